@@ -1,7 +1,7 @@
 #!/bin/bash
 # compile.sh - Compilation script for network diagram generator
 # Usage: ./compile.sh [output_format]
-# Formats: pdf (default), svg, png, all
+# Formats: pdf (default), svg, png, tiles, all
 
 set -e  # Exit on error
 
@@ -92,6 +92,22 @@ compile_png() {
     echo "✅ PNG created: ${MAIN_FILE}.png"
 }
 
+# Export a deep-zoom tile pyramid with an offline viewer
+compile_tiles() {
+    if ! command -v pdftoppm &> /dev/null; then
+        echo "⚠️  WARNING: pdftoppm not found. Install with:"
+        echo "   Ubuntu/Debian: sudo apt-get install poppler-utils"
+        echo "   Fedora/RHEL: sudo dnf install poppler-utils"
+        echo "   Skipping tile export."
+        return
+    fi
+
+    echo ""
+    echo "🗺️  Exporting deep-zoom tiles (300 DPI)..."
+    python3 tile_pyramid.py "${MAIN_FILE}.pdf" > /dev/null
+    echo "✅ Tiles created: ${MAIN_FILE}_files/ (open ${MAIN_FILE}.html)"
+}
+
 # Clean auxiliary files
 clean_aux() {
     echo ""
@@ -117,6 +133,10 @@ main() {
             compile_pdf
             compile_png
             ;;
+        tiles)
+            compile_pdf
+            compile_tiles
+            ;;
         all)
             compile_pdf
             compile_svg
@@ -125,12 +145,13 @@ main() {
         clean)
             clean_aux
             rm -f "${MAIN_FILE}.pdf" "${MAIN_FILE}.svg" "${MAIN_FILE}.png"
+            rm -rf "${MAIN_FILE}.dzi" "${MAIN_FILE}.html" "${MAIN_FILE}_files"
             echo "✅ All output files removed"
             exit 0
             ;;
         *)
             echo "❌ Unknown format: $OUTPUT_FORMAT"
-            echo "Usage: $0 [pdf|svg|png|all|clean]"
+            echo "Usage: $0 [pdf|svg|png|tiles|all|clean]"
             exit 1
             ;;
     esac
@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+"""
+compile_styles.py - Precompile color schemes and the shared preamble
+
+This script compiles each color scheme in color_schemes/ into a single
+snapshot file holding every resolved color plus the TikZ style keys from
+styles_config.tex with all color mixes (e.g. serverBlue!20) already
+computed. \\loadColorScheme picks up a snapshot automatically when its
+file name matches the MD5 of the scheme file and of styles_config.tex,
+so an out-of-date snapshot is never used.
+
+With --format it also dumps the shared preamble (styles_config,
+node_definitions, connection_renderer, threat_indicators) into a TeX
+format file using mylatexformat.
+
+Usage:
+    python3 compile_styles.py
+    python3 compile_styles.py dark colorblind
+    python3 compile_styles.py --format
+    python3 compile_styles.py --clean
+"""
+
+import sys
+import re
+import hashlib
+import shutil
+import subprocess
+from pathlib import Path
+
+# ANSI color codes
+GREEN = '\033[0;32m'
+YELLOW = '\033[1;33m'
+BLUE = '\033[0;34m'
+RED = '\033[0;31m'
+NC = '\033[0m'
+
+ROOT = Path(__file__).resolve().parent
+SCHEME_DIR = ROOT / 'color_schemes'
+COMPILED_DIR = SCHEME_DIR / 'compiled'
+STYLES_FILE = ROOT / 'styles_config.tex'
+
+# Modules dumped into the preamble format, in load order
+PREAMBLE_MODULES = ['styles_config', 'node_definitions',
+                    'connection_renderer', 'threat_indicators']
+FORMAT_NAME = 'network_preamble'
+
+# xcolor base colors (RGB, 0-1) that may appear in mixes
+XCOLOR_BASE = {
+    'white': (1, 1, 1), 'black': (0, 0, 0),
+    'red': (1, 0, 0), 'green': (0, 1, 0), 'blue': (0, 0, 1),
+    'cyan': (0, 1, 1), 'magenta': (1, 0, 1), 'yellow': (1, 1, 0),
+    'gray': (.5, .5, .5), 'darkgray': (.25, .25, .25), 'lightgray': (.75, .75, .75),
+    'brown': (.75, .5, .25), 'lime': (.75, 1, 0), 'olive': (.5, .5, 0),
+    'orange': (1, .5, 0), 'pink': (1, .75, .75), 'purple': (.75, 0, .25),
+    'teal': (0, .5, .5), 'violet': (.5, 0, .5),
+}
+
+DEFINECOLOR_RE = re.compile(
+    r'\\definecolor\{([A-Za-z]+)\}\{RGB\}\{\s*(\d+)\s*,\s*(\d+)\s*,\s*(\d+)\s*\}')
+
+# name!pct or name!pct!other, not followed by a further mix step
+MIX_RE = re.compile(r'(?<![\w\\])([A-Za-z]+)!(\d+(?:\.\d+)?)(?:!([A-Za-z]+))?(?![!\w])')
+
+def file_md5(path):
+    """Uppercase hex MD5 of a file (matches \\pdf@filemdfivesum)"""
+    return hashlib.md5(path.read_bytes()).hexdigest().upper()
+
+def parse_colors(text):
+    """Return {name: (r, g, b)} in 0-1 range from \\definecolor{..}{RGB} lines"""
+    colors = {}
+    for line in text.splitlines():
+        line = line.split('%', 1)[0]
+        for name, r, g, b in DEFINECOLOR_RE.findall(line):
+            colors[name] = (int(r) / 255, int(g) / 255, int(b) / 255)
+    return colors
+
+def extract_tikzset_blocks(text):
+    """Return every top-level \\tikzset{...} block, braces matched"""
+    blocks = []
+    start = text.find('\\tikzset{')
+    while start != -1:
+        depth = 0
+        i = start + len('\\tikzset')
+        while i < len(text):
+            char = text[i]
+            if char == '%':
+                i = text.find('\n', i)
+                if i == -1:
+                    i = len(text)
+                continue
+            if char == '\\':
+                i += 2
+                continue
+            if char == '{':
+                depth += 1
+            elif char == '}':
+                depth -= 1
+                if depth == 0:
+                    break
+            i += 1
+        blocks.append(text[start:i + 1])
+        start = text.find('\\tikzset{', i + 1)
+    return blocks
+
+def rgb_spec(rgb):
+    """xcolor literal color expression for an RGB triple"""
+    r, g, b = (int(round(c * 255)) for c in rgb)
+    return f'{{rgb,255:red,{r};green,{g};blue,{b}}}'
+
+class SchemeCompiler:
+    """Resolve colors and pre-expand style keys for one color scheme"""
+
+    def __init__(self, styles_text):
+        self.styles_text = styles_text
+        self.defaults = parse_colors(styles_text)
+        self.blocks = extract_tikzset_blocks(styles_text)
+
+    def resolve_mix(self, colors, match):
+        name, pct, other = match.group(1), match.group(2), match.group(3)
+        base = colors.get(name) or XCOLOR_BASE.get(name)
+        if base is None:
+            return match.group(0)
+        if other is None:
+            mix_with = XCOLOR_BASE['white']
+        else:
+            mix_with = colors.get(other) or XCOLOR_BASE.get(other)
+            if mix_with is None:
+                return match.group(0)
+        p = min(max(float(pct), 0.0), 100.0) / 100
+        return rgb_spec(tuple(p * a + (1 - p) * b for a, b in zip(base, mix_with)))
+
+    def compile(self, scheme_path):
+        """Return snapshot text for a .colorscheme file"""
+        colors = dict(self.defaults)
+        colors.update(parse_colors(scheme_path.read_text(encoding='utf-8')))
+
+        lines = [
+            f'% Compiled color scheme: {scheme_path.stem}',
+            '% Generated by compile_styles.py - do not edit by hand',
+            f'% Source: color_schemes/{scheme_path.name}',
+            '',
+            '% Resolved colors',
+        ]
+        for name, rgb in colors.items():
+            r, g, b = (int(round(c * 255)) for c in rgb)
+            lines.append(f'\\definecolor{{{name}}}{{RGB}}{{{r},{g},{b}}}')
+
+        lines.append('')
+        lines.append('% Style keys with color mixes pre-computed')
+        mixes = 0
+        for block in self.blocks:
+            expanded, count = MIX_RE.subn(lambda m: self.resolve_mix(colors, m), block)
+            mixes += count
+            lines.append(expanded)
+        lines.append('')
+        lines.append('\\endinput')
+        return '\n'.join(lines) + '\n', len(colors), mixes
+
+def compile_schemes(names):
+    """Compile the named schemes (all when names is empty)"""
+    styles_hash = file_md5(STYLES_FILE)
+    compiler = SchemeCompiler(STYLES_FILE.read_text(encoding='utf-8'))
+    COMPILED_DIR.mkdir(exist_ok=True)
+
+    schemes = sorted(SCHEME_DIR.glob('*.colorscheme'))
+    if names:
+        schemes = [s for s in schemes if s.stem in names]
+        missing = set(names) - {s.stem for s in schemes}
+        for name in sorted(missing):
+            print(f"{RED}✗ Color scheme not found: {name}{NC}")
+
+    for scheme in schemes:
+        target = COMPILED_DIR / f'{scheme.stem}-{file_md5(scheme)}-{styles_hash}.tex'
+        if target.exists():
+            print(f"{GREEN}✓ Up to date: {scheme.stem}{NC}")
+            continue
+
+        # Drop snapshots of older versions of this scheme
+        for stale in COMPILED_DIR.glob(f'{scheme.stem}-*.tex'):
+            stale.unlink()
+
+        text, color_count, mix_count = compiler.compile(scheme)
+        target.write_text(text, encoding='utf-8')
+        print(f"{GREEN}✓ Compiled: {scheme.stem}{NC}")
+        print(f"{BLUE}  Colors: {color_count}  Pre-computed mixes: {mix_count}{NC}")
+
+def build_format(engine, modules=None, name=FORMAT_NAME):
+    """Dump the shared preamble into a format file with mylatexformat"""
+    modules = modules or PREAMBLE_MODULES
+    if shutil.which(engine) is None:
+        print(f"{RED}✗ {engine} not found; cannot build the preamble format{NC}")
+        return False
+
+    main_text = (ROOT / 'network_diagram_generator.tex').read_text(encoding='utf-8')
+    preamble = main_text.split('% Input modular components', 1)[0].rstrip()
+    inputs = '\n'.join(f'\\input{{{module}}}' for module in modules)
+    driver = ROOT / f'{name}.tex'
+    driver.write_text(
+        f'{preamble}\n\n{inputs}\n\n\\csname endofdump\\endcsname\n'
+        '\\begin{document}\n\\end{document}\n', encoding='utf-8')
+
+    print(f"{BLUE}Dumping preamble format with {engine}...{NC}")
+    result = subprocess.run(
+        [engine, '-ini', '-interaction=nonstopmode', f'-jobname={name}',
+         f'&{engine}', 'mylatexformat.ltx', driver.name],
+        cwd=str(ROOT), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    driver.unlink()
+    if result.returncode != 0:
+        print(f"{RED}✗ Format dump failed, see {name}.log{NC}")
+        return False
+
+    print(f"{GREEN}✓ Format written: {name}.fmt{NC}")
+    print(f"{YELLOW}  Usage: {engine} -fmt={name} your_diagram.tex{NC}")
+    return True
+
+def main():
+    """Main style compilation function"""
+    args = sys.argv[1:]
+    if '--help' in args or '-h' in args:
+        print("Usage: python3 compile_styles.py [schemes...] [options]")
+        print("")
+        print("Examples:")
+        print("  python3 compile_styles.py                 # Compile all color schemes")
+        print("  python3 compile_styles.py dark colorblind # Compile selected schemes")
+        print("  python3 compile_styles.py --format        # Also dump the preamble format")
+        print("")
+        print("Options:")
+        print("  --format           Dump the shared preamble to network_preamble.fmt")
+        print("  --engine ENGINE    TeX engine for --format (default: pdflatex)")
+        print("  --clean            Remove compiled snapshots and the format file")
+        sys.exit(0)
+
+    engine = 'pdflatex'
+    if '--engine' in args:
+        index = args.index('--engine')
+        if index + 1 >= len(args):
+            print(f"{RED}Error: --engine requires a value{NC}")
+            sys.exit(1)
+        engine = args[index + 1]
+        del args[index:index + 2]
+
+    print(f"{BLUE}{'='*60}{NC}")
+    print(f"{BLUE}Style and Preamble Compiler{NC}")
+    print(f"{BLUE}{'='*60}{NC}\n")
+
+    if '--clean' in args:
+        if COMPILED_DIR.exists():
+            shutil.rmtree(str(COMPILED_DIR))
+        for path in ROOT.glob(f'{FORMAT_NAME}.*'):
+            path.unlink()
+        print(f"{GREEN}✓ Removed compiled snapshots and format{NC}")
+        return
+
+    compile_schemes([a for a in args if not a.startswith('--')])
+
+    if '--format' in args:
+        print("")
+        if not build_format(engine):
+            sys.exit(1)
+
+    print(f"\n{GREEN}✓ Compilation complete{NC}\n")
+
+if __name__ == '__main__':
+    main()
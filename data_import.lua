@@ -0,0 +1,1128 @@
+-- data_import.lua - Lua side of data_import.tex (LuaTeX only)
+--
+-- Loaded by data_import.tex under LuaTeX. Keeping the Lua code in its own
+-- file avoids the TeX-side pitfalls of \directlua (% starts a TeX comment,
+-- -- comments swallow the rest of the block, \\ is expanded).
+--
+-- CSV reader: RFC 4180 fields (quoted fields may contain commas, quotes as
+-- "" and line breaks), CRLF/LF/CR line endings and a UTF-8 BOM. The file is
+-- read in one pass and all resulting TeX commands are sent back with a
+-- single tex.print call.
+--
+-- JSON and YAML network files: single-pass decoders feeding the same row
+-- commands as the CSV reader. Decoded documents are cached on disk between
+-- compilation passes, keyed by file mtime/size and MD5.
+
+csvimport = csvimport or {}
+
+-- TeX special characters in text fields (labels, descriptions)
+local TEX_ESCAPES = {
+    ["\\"] = "\\textbackslash{}",
+    ["{"] = "\\{",
+    ["}"] = "\\}",
+    ["#"] = "\\#",
+    ["%"] = "\\%",
+    ["&"] = "\\&",
+    ["$"] = "\\$",
+    ["_"] = "\\_",
+    ["~"] = "\\textasciitilde{}",
+    ["^"] = "\\textasciicircum{}",
+}
+
+local function trim(s)
+    return (s:gsub("^%s+", ""):gsub("%s+$", ""))
+end
+
+-- Text that will be typeset (line breaks inside quoted fields become spaces)
+local function text(s)
+    local flat = trim(s or ""):gsub("%s*[\r\n]+%s*", " ")
+    return (flat:gsub("[\\{}#%%&$_~^]", TEX_ESCAPES))
+end
+
+-- Identifiers, IPs, numbers and type names: drop characters that would
+-- break the generated TeX instead of escaping them
+local function ident(s)
+    return (trim(s or ""):gsub("[\\{}#%%&$~^]", ""))
+end
+
+-- Split CSV text into rows of fields.
+-- Returns rows (each a list of strings, blank lines dropped) and a list of
+-- line numbers where the input was malformed (unterminated quote or text
+-- after a closing quote); those rows are still returned, best effort.
+function csvimport.parse(content)
+    local rows, row, problems = {}, {}, {}
+    local pos, len, line = 1, #content, 1
+    if content:sub(1, 3) == "\239\187\191" then
+        pos = 4
+    end
+
+    while pos <= len do
+        local field
+        local startLine = line
+        if content:byte(pos) == 34 then
+            -- Quoted field: runs to the next lone quote, "" is a literal quote
+            local parts = {}
+            local i = pos + 1
+            while true do
+                local q = content:find('"', i, true)
+                if not q then
+                    parts[#parts + 1] = content:sub(i)
+                    if problems[#problems] ~= startLine then
+                        problems[#problems + 1] = startLine
+                    end
+                    pos = len + 1
+                    break
+                end
+                parts[#parts + 1] = content:sub(i, q - 1)
+                if content:byte(q + 1) == 34 then
+                    parts[#parts + 1] = '"'
+                    i = q + 2
+                else
+                    pos = q + 1
+                    break
+                end
+            end
+            field = table.concat(parts)
+            for _ in field:gmatch("\n") do
+                line = line + 1
+            end
+            -- Anything between the closing quote and the delimiter is kept
+            local stop = content:find("[,\r\n]", pos) or len + 1
+            if stop > pos then
+                -- Each line is reported once, however many fields are bad
+                if content:sub(pos, stop - 1):find("%S") and problems[#problems] ~= startLine then
+                    problems[#problems + 1] = startLine
+                end
+                field = field .. content:sub(pos, stop - 1)
+                pos = stop
+            end
+        else
+            local stop = content:find("[,\r\n]", pos) or len + 1
+            field = content:sub(pos, stop - 1)
+            pos = stop
+        end
+        row[#row + 1] = field
+
+        local delimiter = content:byte(pos)
+        if delimiter == 44 then
+            pos = pos + 1
+            if pos > len then
+                row[#row + 1] = ""
+            end
+        else
+            if delimiter == 13 and content:byte(pos + 1) == 10 then
+                pos = pos + 2
+            elseif delimiter then
+                pos = pos + 1
+            end
+            if #row > 1 or row[1] ~= "" then
+                rows[#rows + 1] = row
+            end
+            row = {}
+            line = line + 1
+        end
+    end
+    if #row > 1 or (row[1] and row[1] ~= "") then
+        rows[#rows + 1] = row
+    end
+    return rows, problems
+end
+
+-- Column layout of each import kind: documented order (used when the file
+-- has no recognisable header) and the fields a row must have
+local LAYOUTS = {
+    nodes = {
+        columns = {"id", "type", "ip", "x", "y", "label"},
+        required = {"id", "type"},
+    },
+    ["nodes-auto"] = {
+        columns = {"id", "type", "ip", "label"},
+        required = {"id", "type"},
+    },
+    connections = {
+        columns = {"source", "destination", "label", "type"},
+        required = {"source", "destination"},
+    },
+    threats = {
+        columns = {"target", "type", "severity", "cve", "description"},
+        required = {"target", "type"},
+    },
+}
+
+-- Map column names to field positions from the header row
+local function column_index(header, layout)
+    local index = {}
+    for i, name in ipairs(header) do
+        index[trim(name):lower()] = i
+    end
+    for _, name in ipairs(layout.required) do
+        if not index[name] then
+            -- No usable header: fall back to the documented column order
+            index = {}
+            for i, column in ipairs(layout.columns) do
+                index[column] = i
+            end
+            return index
+        end
+    end
+    return index
+end
+
+-- TeX command(s) for one row; node rows without x,y continue the auto grid
+local function row_command(kind, get)
+    if kind == "nodes" then
+        local x, y = ident(get("x")), ident(get("y"))
+        if x == "" or y == "" then
+            return "\\calcNextGridPosition{\\autopX}{\\autopY}"
+                .. "\\createNodeFromType{" .. ident(get("type")) .. "}{" .. ident(get("id"))
+                .. "}{" .. ident(get("ip")) .. "}{\\autopX}{\\autopY}{" .. text(get("label")) .. "}"
+        end
+        return "\\createNodeFromType{" .. ident(get("type")) .. "}{" .. ident(get("id"))
+            .. "}{" .. ident(get("ip")) .. "}{" .. x .. "}{" .. y .. "}{" .. text(get("label")) .. "}"
+    elseif kind == "nodes-auto" then
+        return "\\calcNextGridPosition{\\autopX}{\\autopY}"
+            .. "\\createNodeFromType{" .. ident(get("type")) .. "}{" .. ident(get("id"))
+            .. "}{" .. ident(get("ip")) .. "}{\\autopX}{\\autopY}{" .. text(get("label")) .. "}"
+    elseif kind == "connections" then
+        return "\\createConnectionFromType{" .. ident(get("type")) .. "}{" .. ident(get("source"))
+            .. "}{" .. ident(get("destination")) .. "}{" .. text(get("label")) .. "}"
+    elseif kind == "threats" then
+        return "\\createThreatFromRow{" .. ident(get("target")) .. "}{" .. ident(get("type"))
+            .. "}{" .. ident(get("severity")) .. "}{" .. ident(get("cve"))
+            .. "}{" .. text(get("description")) .. "}"
+    end
+end
+
+-- Append the command for one record to out.
+-- Returns false (and appends nothing) when a required field is missing.
+local function add_row(out, kind, get)
+    for _, name in ipairs(LAYOUTS[kind].required) do
+        if ident(get(name)) == "" then
+            return false
+        end
+    end
+    out[#out + 1] = row_command(kind, get)
+    if kind == "nodes" or kind == "nodes-auto" then
+        iputils.registerNode(ident(get("id")), ident(get("ip")))
+    end
+    return true
+end
+
+-- Read a CSV file and emit one TeX command per row in a single batch.
+-- Sets the csvlinecount counter to the number of rows imported.
+function csvimport.import(filename, kind)
+    local layout = LAYOUTS[kind]
+    if not layout then
+        tex.print("\\PackageError{data_import}{Unknown CSV import kind: " .. kind .. "}{}")
+        return
+    end
+
+    local path = kpse.find_file(filename) or filename
+    local file = io.open(path, "rb")
+    if not file then
+        tex.print("\\PackageError{data_import}{CSV file not found: " .. filename .. "}{}")
+        return
+    end
+    local content = file:read("*a")
+    file:close()
+
+    local rows, problems = csvimport.parse(content)
+    local header = table.remove(rows, 1) or {}
+    local index = column_index(header, layout)
+
+    local out = {}
+    local skipped = 0
+    for _, row in ipairs(rows) do
+        local function get(name)
+            local i = index[name]
+            return i and row[i] or ""
+        end
+        if not add_row(out, kind, get) then
+            skipped = skipped + 1
+        end
+    end
+
+    tex.setcount("global", "c@csvlinecount", #out)
+    if skipped > 0 then
+        out[#out + 1] = "\\message{Warning: skipped " .. skipped
+            .. " CSV rows without required fields in " .. filename .. "}"
+    end
+    if #problems > 0 then
+        local lines = {}
+        for i = 1, math.min(#problems, 10) do
+            lines[i] = tostring(problems[i])
+        end
+        out[#out + 1] = "\\message{Warning: malformed quoting in " .. filename
+            .. " near line(s) " .. table.concat(lines, ", ") .. "}"
+    end
+    tex.print(out)
+end
+
+-- ---------------------------------------------------------------------------
+-- JSON decoder
+-- ---------------------------------------------------------------------------
+-- Recursive descent over the string with a moving position, so every byte
+-- is looked at once. JSON null becomes nil.
+
+json = json or {}
+
+local JSON_ESCAPES = {
+    ['"'] = '"', ["\\"] = "\\", ["/"] = "/",
+    b = "\b", f = "\f", n = "\n", r = "\r", t = "\t",
+}
+
+local function json_error(str, pos, what)
+    local _, newlines = str:sub(1, pos):gsub("\n", "")
+    error(what .. " at line " .. (newlines + 1), 0)
+end
+
+local function skip_space(str, pos)
+    return str:find("[^ \t\r\n]", pos) or #str + 1
+end
+
+-- pos is at the opening quote; returns the string and the position after it
+local function json_string(str, pos)
+    local parts = {}
+    local i = pos + 1
+    while true do
+        local j = str:find('["\\]', i)
+        if not j then
+            json_error(str, pos, "unterminated string")
+        end
+        parts[#parts + 1] = str:sub(i, j - 1)
+        if str:byte(j) == 34 then
+            return table.concat(parts), j + 1
+        end
+        local c = str:sub(j + 1, j + 1)
+        if c == "u" then
+            local hex = str:match("^%x%x%x%x", j + 2)
+            if not hex then
+                json_error(str, j, "bad \\u escape")
+            end
+            local code = tonumber(hex, 16)
+            i = j + 6
+            local low = code >= 0xD800 and code <= 0xDBFF and str:match("^\\u(%x%x%x%x)", i)
+            if low then
+                code = 0x10000 + (code - 0xD800) * 0x400 + (tonumber(low, 16) - 0xDC00)
+                i = i + 6
+            end
+            parts[#parts + 1] = utf8.char(code)
+        elseif JSON_ESCAPES[c] then
+            parts[#parts + 1] = JSON_ESCAPES[c]
+            i = j + 2
+        else
+            json_error(str, j, "bad escape")
+        end
+    end
+end
+
+local function json_value(str, pos)
+    pos = skip_space(str, pos)
+    local c = str:byte(pos)
+    if c == 123 then
+        -- {
+        local object = {}
+        pos = skip_space(str, pos + 1)
+        if str:byte(pos) == 125 then
+            return object, pos + 1
+        end
+        while true do
+            if str:byte(pos) ~= 34 then
+                json_error(str, pos, "expected a string key")
+            end
+            local key, value
+            key, pos = json_string(str, pos)
+            pos = skip_space(str, pos)
+            if str:byte(pos) ~= 58 then
+                json_error(str, pos, "expected ':'")
+            end
+            value, pos = json_value(str, pos + 1)
+            object[key] = value
+            pos = skip_space(str, pos)
+            c = str:byte(pos)
+            if c == 125 then
+                return object, pos + 1
+            elseif c ~= 44 then
+                json_error(str, pos, "expected ',' or '}'")
+            end
+            pos = skip_space(str, pos + 1)
+        end
+    elseif c == 91 then
+        -- [
+        local array, n = {}, 0
+        pos = skip_space(str, pos + 1)
+        if str:byte(pos) == 93 then
+            return array, pos + 1
+        end
+        while true do
+            local value
+            value, pos = json_value(str, pos)
+            n = n + 1
+            array[n] = value
+            pos = skip_space(str, pos)
+            c = str:byte(pos)
+            if c == 93 then
+                return array, pos + 1
+            elseif c ~= 44 then
+                json_error(str, pos, "expected ',' or ']'")
+            end
+            pos = pos + 1
+        end
+    elseif c == 34 then
+        return json_string(str, pos)
+    end
+
+    local literal = str:match("^[%w%.%+%-]+", pos)
+    if literal == "true" then
+        return true, pos + 4
+    elseif literal == "false" then
+        return false, pos + 5
+    elseif literal == "null" then
+        return nil, pos + 4
+    end
+    local number = literal and tonumber(literal)
+    if not number then
+        json_error(str, pos, "unexpected " .. (literal or (c and string.char(c)) or "end of file"))
+    end
+    return number, pos + #literal
+end
+
+function json.decode(str)
+    if str:sub(1, 3) == "\239\187\191" then
+        str = str:sub(4)
+    end
+    local value, pos = json_value(str, 1)
+    pos = skip_space(str, pos)
+    if pos <= #str then
+        json_error(str, pos, "unexpected text after the document")
+    end
+    return value
+end
+
+-- ---------------------------------------------------------------------------
+-- YAML decoder
+-- ---------------------------------------------------------------------------
+-- The block subset used for network files: nested mappings and sequences
+-- (including "- key: value" items), plain, quoted and block (| and >)
+-- scalars, single-line flow collections ([a, b], {x: 0, y: 5}) and
+-- comments. Anchors, tags and multi-document streams are not supported.
+-- Lines are split once and each is visited once.
+
+yaml = yaml or {}
+
+local YAML_ESCAPES = {
+    ['"'] = '"', ["\\"] = "\\", ["/"] = "/", [" "] = " ",
+    ["0"] = "\0", a = "\a", b = "\b", e = "\27", f = "\f",
+    n = "\n", r = "\r", t = "\t", v = "\v",
+}
+
+local function yaml_error(line, what)
+    error(what .. " at line " .. line, 0)
+end
+
+-- Plain scalar: null, booleans and numbers are converted, the rest is text
+local function yaml_plain(s)
+    if s == "" or s == "~" or s == "null" or s == "Null" or s == "NULL" then
+        return nil
+    elseif s == "true" or s == "True" or s == "TRUE" then
+        return true
+    elseif s == "false" or s == "False" or s == "FALSE" then
+        return false
+    elseif s:find("^[-+]?%.?%d") then
+        local number = tonumber(s)
+        if number then
+            return number
+        end
+    end
+    return s
+end
+
+-- Quoted scalar starting at pos; returns the text and the position after it
+local function yaml_quoted(s, pos, line)
+    local quote = s:sub(pos, pos)
+    local parts = {}
+    local i = pos + 1
+    while true do
+        local j = s:find(quote == "'" and "'" or '["\\]', i)
+        if not j then
+            yaml_error(line, "unterminated string")
+        end
+        parts[#parts + 1] = s:sub(i, j - 1)
+        local c = s:sub(j + 1, j + 1)
+        if quote == "'" then
+            if c ~= "'" then
+                return table.concat(parts), j + 1
+            end
+            parts[#parts + 1] = "'"
+            i = j + 2
+        elseif s:byte(j) == 34 then
+            return table.concat(parts), j + 1
+        elseif c == "x" or c == "u" or c == "U" then
+            local digits = ({x = 2, u = 4, U = 8})[c]
+            local hex = s:match("^" .. ("%x"):rep(digits), j + 2)
+            if not hex then
+                yaml_error(line, "bad \\" .. c .. " escape")
+            end
+            parts[#parts + 1] = utf8.char(tonumber(hex, 16))
+            i = j + 2 + digits
+        else
+            parts[#parts + 1] = YAML_ESCAPES[c] or c
+            i = j + 2
+        end
+    end
+end
+
+-- Flow value (collection, quoted or plain scalar) starting at or after pos
+local function yaml_flow(s, pos, line)
+    pos = s:find("%S", pos) or #s + 1
+    local c = s:sub(pos, pos)
+    if c == "[" or c == "{" then
+        local close = c == "[" and "]" or "}"
+        local result, n = {}, 0
+        pos = s:find("%S", pos + 1) or #s + 1
+        while s:sub(pos, pos) ~= close do
+            local key, value
+            key, pos = yaml_flow(s, pos, line)
+            pos = s:find("%S", pos) or #s + 1
+            if c == "{" then
+                if s:sub(pos, pos) == ":" then
+                    value, pos = yaml_flow(s, pos + 1, line)
+                    pos = s:find("%S", pos) or #s + 1
+                end
+                if key ~= nil then
+                    result[tostring(key)] = value
+                end
+            else
+                n = n + 1
+                result[n] = key
+            end
+            local d = s:sub(pos, pos)
+            if d == "," then
+                pos = s:find("%S", pos + 1) or #s + 1
+            elseif d ~= close then
+                yaml_error(line, "expected ',' or '" .. close .. "'")
+            end
+        end
+        return result, pos + 1
+    elseif c == '"' or c == "'" then
+        return yaml_quoted(s, pos, line)
+    end
+    -- Plain scalar inside a collection: ends at , ] } or a ": " separator
+    local stop = s:find("[,%]}]", pos) or #s + 1
+    local colon = s:find(":[%s,%]}]", pos) or s:find(":$", pos)
+    if colon and colon < stop then
+        stop = colon
+    end
+    return yaml_plain((s:sub(pos, stop - 1):gsub("%s+$", ""))), stop
+end
+
+-- Scalar or flow collection written after "key:" or "- "
+local function yaml_scalar(text, line)
+    local c = text:sub(1, 1)
+    if c == '"' or c == "'" or c == "[" or c == "{" then
+        local value, pos = yaml_flow(text, 1, line)
+        local rest = text:sub(pos)
+        if rest:find("%S") and not rest:find("^%s+#") then
+            yaml_error(line, "unexpected text after value")
+        end
+        return value
+    end
+    return yaml_plain((text:gsub("%s+#.*$", ""):gsub("%s+$", "")))
+end
+
+-- Split "key: rest" (rest may be empty); nil when the text is not a key
+local function yaml_key(text, line)
+    local c = text:sub(1, 1)
+    if c == "[" or c == "{" then
+        return nil
+    elseif c == '"' or c == "'" then
+        local key, pos = yaml_quoted(text, 1, line)
+        local rest = text:match("^%s*:%s+(.*)$", pos) or text:match("^%s*:$", pos) and ""
+        if rest then
+            return key, rest
+        end
+        return nil
+    end
+    local key, rest = text:match("^(.-)%s*:%s+(.*)$")
+    if not key then
+        key, rest = text:match("^(.-)%s*:$"), ""
+    end
+    if not key or key == "" or key:find("^#") then
+        return nil
+    end
+    return key, rest
+end
+
+local function yaml_item(text)
+    return text == "-" or text:sub(1, 2) == "- "
+end
+
+-- Split content into lines: indent, text without indent, blank flag
+local function yaml_lines(content)
+    local lines = {}
+    local number = 0
+    for raw in (content .. "\n"):gmatch("([^\n]*)\n") do
+        number = number + 1
+        raw = raw:gsub("\r$", "")
+        if raw == "..." then
+            break
+        end
+        local spaces = raw:match("^ *")
+        local text = raw:sub(#spaces + 1):gsub("%s+$", "")
+        lines[#lines + 1] = {
+            indent = #spaces,
+            text = text,
+            raw = raw,
+            line = number,
+            blank = text == "" or text:sub(1, 1) == "#" or raw:find("^%-%-%-") ~= nil,
+        }
+    end
+    return lines
+end
+
+function yaml.decode(content)
+    if content:sub(1, 3) == "\239\187\191" then
+        content = content:sub(4)
+    end
+    local lines = yaml_lines(content)
+    local count = #lines
+    local parse_block, parse_mapping, parse_sequence
+
+    local function next_content(i)
+        while i <= count and lines[i].blank do
+            i = i + 1
+        end
+        return i
+    end
+
+    -- Block scalar (| or >) for the header line at i, parent indent given
+    local function block_scalar(i, indent, header)
+        local parts = {}
+        local block_indent
+        local j = i + 1
+        while j <= count do
+            local l = lines[j]
+            if l.text ~= "" then
+                if l.indent <= indent then
+                    break
+                end
+                block_indent = block_indent or l.indent
+                parts[#parts + 1] = l.raw:sub(block_indent + 1)
+            else
+                parts[#parts + 1] = ""
+            end
+            j = j + 1
+        end
+        while parts[#parts] == "" do
+            parts[#parts] = nil
+        end
+        local value = table.concat(parts, header:sub(1, 1) == ">" and " " or "\n")
+        if not header:find("-", 2, true) then
+            value = value .. "\n"
+        end
+        return value, next_content(j)
+    end
+
+    -- Value written after "key:" or "- " on line i
+    local function inline_value(i, indent, rest)
+        if rest:find("^[|>]") then
+            return block_scalar(i, indent, rest)
+        end
+        return yaml_scalar(rest, lines[i].line), next_content(i + 1)
+    end
+
+    function parse_block(i)
+        local line = lines[i]
+        if yaml_item(line.text) then
+            return parse_sequence(i, line.indent)
+        elseif yaml_key(line.text, line.line) then
+            return parse_mapping(i, line.indent)
+        end
+        return yaml_scalar(line.text, line.line), next_content(i + 1)
+    end
+
+    function parse_mapping(i, indent)
+        local map = {}
+        while i <= count do
+            local line = lines[i]
+            if line.indent < indent or yaml_item(line.text) then
+                break
+            elseif line.indent > indent then
+                yaml_error(line.line, "bad indentation")
+            end
+            local key, rest = yaml_key(line.text, line.line)
+            if not key then
+                yaml_error(line.line, "expected 'key: value'")
+            end
+            if rest ~= "" and rest:sub(1, 1) ~= "#" then
+                map[key], i = inline_value(i, indent, rest)
+            else
+                i = next_content(i + 1)
+                local child = lines[i]
+                -- A sequence may sit at the same indent as its key
+                if child and (child.indent > indent
+                        or child.indent == indent and yaml_item(child.text)) then
+                    map[key], i = parse_block(i)
+                end
+            end
+        end
+        return map, i
+    end
+
+    function parse_sequence(i, indent)
+        local sequence, n = {}, 0
+        while i <= count do
+            local line = lines[i]
+            if line.indent < indent or not yaml_item(line.text) then
+                if line.indent > indent then
+                    yaml_error(line.line, "bad indentation")
+                end
+                break
+            elseif line.indent > indent then
+                yaml_error(line.line, "bad indentation")
+            end
+            local spaces = line.text:match("^%-( *)")
+            local rest = line.text:sub(#spaces + 2)
+            n = n + 1
+            if rest == "" or rest:sub(1, 1) == "#" then
+                i = next_content(i + 1)
+                local child = lines[i]
+                if child and child.indent > indent then
+                    sequence[n], i = parse_block(i)
+                end
+            elseif yaml_item(rest) or yaml_key(rest, line.line) then
+                -- Nested block starting on the item line: re-read the rest
+                -- of the line as if it stood alone at its column
+                lines[i] = {
+                    indent = indent + #spaces + 1,
+                    text = rest,
+                    raw = line.raw,
+                    line = line.line,
+                }
+                sequence[n], i = parse_block(i)
+            else
+                sequence[n], i = inline_value(i, indent, rest)
+            end
+        end
+        return sequence, i
+    end
+
+    local i = next_content(1)
+    if i > count then
+        return nil
+    end
+    local value
+    value, i = parse_block(i)
+    if i <= count then
+        yaml_error(lines[i].line, "bad indentation")
+    end
+    return value
+end
+
+-- ---------------------------------------------------------------------------
+-- Network files
+-- ---------------------------------------------------------------------------
+-- netimport.load decodes a JSON or YAML network description and emits the
+-- same \createNodeFromType/\createConnectionFromType/\createThreatFromRow
+-- commands as the CSV importers. Layout (as written by convert_format.py):
+--   nodes:       id, type, ip, label, position {x, y} or x, y
+--   connections: source, destination, label, type
+--   threats:     target, type, severity, cve, description
+-- The three lists may also sit under a top-level "network" key.
+--
+-- Decoded documents are stored in <jobname>-import-cache.lua. A file whose
+-- mtime and size match its entry is not read again; one whose content MD5
+-- matches is not parsed again. A three-pass build therefore parses once.
+
+netimport = netimport or {}
+
+local DECODERS = {json = json.decode, yaml = yaml.decode}
+
+local cache_entries
+
+local function cache_name()
+    return tex.jobname .. "-import-cache.lua"
+end
+
+local function hexdigest(content)
+    return (md5.sum(content):gsub(".", function(c)
+        return string.format("%02x", c:byte())
+    end))
+end
+
+local function serialize(value, out)
+    local kind = type(value)
+    if kind == "table" then
+        out[#out + 1] = "{"
+        for k, v in pairs(value) do
+            out[#out + 1] = "["
+            serialize(k, out)
+            out[#out + 1] = "]="
+            serialize(v, out)
+            out[#out + 1] = ",\n"
+        end
+        out[#out + 1] = "}"
+    elseif kind == "string" then
+        out[#out + 1] = string.format("%q", value)
+    elseif kind == "number" and math.type(value) == "float" then
+        out[#out + 1] = string.format("%.17g", value)
+    else
+        out[#out + 1] = tostring(value)
+    end
+end
+
+local function load_cache()
+    if not cache_entries then
+        local chunk = loadfile(cache_name(), "t", {})
+        local ok, entries = false, nil
+        if chunk then
+            ok, entries = pcall(chunk)
+        end
+        cache_entries = ok and type(entries) == "table" and entries or {}
+    end
+    return cache_entries
+end
+
+local function save_cache()
+    local out = {"-- Generated by data_import.lua - parsed network files, safe to delete\nreturn "}
+    serialize(cache_entries, out)
+    local file = io.open(cache_name(), "w")
+    if file then
+        file:write(table.concat(out), "\n")
+        file:close()
+    end
+end
+
+-- Decoded document for a file.
+-- Returns data and "parsed" or "cached", or nil and an error message.
+function netimport.read(filename, format)
+    local path = kpse.find_file(filename) or filename
+    local attributes = lfs.attributes(path)
+    if not attributes or attributes.mode ~= "file" then
+        return nil, "file not found"
+    end
+
+    local cache = load_cache()
+    local entry = cache[path]
+    if entry and entry.format ~= format then
+        entry = nil
+    end
+    if entry and entry.mtime == attributes.modification and entry.size == attributes.size then
+        return entry.data, "cached"
+    end
+
+    local file = io.open(path, "rb")
+    if not file then
+        return nil, "file not readable"
+    end
+    local content = file:read("*a")
+    file:close()
+
+    local hash = hexdigest(content)
+    if entry and entry.md5 == hash then
+        entry.mtime, entry.size = attributes.modification, attributes.size
+        save_cache()
+        return entry.data, "cached"
+    end
+
+    local ok, data = pcall(DECODERS[format], content)
+    if not ok then
+        return nil, data
+    elseif type(data) ~= "table" then
+        return nil, "expected a mapping at the top level"
+    end
+    cache[path] = {
+        format = format,
+        mtime = attributes.modification,
+        size = attributes.size,
+        md5 = hash,
+        data = data,
+    }
+    save_cache()
+    return data, "parsed"
+end
+
+-- List of records in a section, looked up at the top level or under "network"
+local function records(data, name)
+    local list = data[name]
+    if list == nil and type(data.network) == "table" then
+        list = data.network[name]
+    end
+    return type(list) == "table" and list or {}
+end
+
+-- Field accessor for one record; x and y may sit under "position"
+local function record_getter(record)
+    return function(name)
+        local value = record[name]
+        if value == nil and (name == "x" or name == "y") and type(record.position) == "table" then
+            value = record.position[name]
+        end
+        if value == nil or type(value) == "table" then
+            return ""
+        end
+        return tostring(value)
+    end
+end
+
+-- Import a JSON or YAML network file: one batch of TeX commands
+function netimport.load(filename, format)
+    local data, status = netimport.read(filename, format)
+    if not data then
+        tex.print("\\PackageError{data_import}{Cannot import " .. format:upper() .. " file "
+            .. text(filename) .. ": " .. text(status) .. "}{}")
+        return
+    end
+
+    local out = {}
+    local counts = {}
+    local skipped = 0
+    for _, section in ipairs({"nodes", "connections", "threats"}) do
+        counts[section] = 0
+        for _, record in ipairs(records(data, section)) do
+            if type(record) == "table" and add_row(out, section, record_getter(record)) then
+                counts[section] = counts[section] + 1
+            else
+                skipped = skipped + 1
+            end
+        end
+    end
+
+    out[#out + 1] = "\\message{Imported " .. counts.nodes .. " nodes, "
+        .. counts.connections .. " connections, " .. counts.threats .. " threats from "
+        .. filename .. " (" .. status .. ")}"
+    if skipped > 0 then
+        out[#out + 1] = "\\message{Warning: skipped " .. skipped
+            .. " records without required fields in " .. filename .. "}"
+    end
+    tex.print(out)
+end
+
+-- ---------------------------------------------------------------------------
+-- IP addresses and subnets
+-- ---------------------------------------------------------------------------
+-- IPv4 and IPv6 addresses (with :: compression, embedded IPv4, [brackets]
+-- and zone ids) are parsed into eight 16-bit groups. IPv4 addresses keep
+-- their IPv4-mapped form (::ffff:a.b.c.d), as in ip_utils.py, so both
+-- families share one representation. Subnets are /24 for IPv4 and /64 for
+-- IPv6 unless a prefix length is given.
+
+iputils = iputils or {}
+iputils.prefix4 = 24
+iputils.prefix6 = 64
+iputils.labelWidth = 24
+iputils.subnets = {}
+iputils.subnetOrder = {}
+
+local function ipv4_octets(s)
+    local a, b, c, d = s:match("^(%d+)%.(%d+)%.(%d+)%.(%d+)$")
+    if not a then
+        return nil
+    end
+    local octets = {tonumber(a), tonumber(b), tonumber(c), tonumber(d)}
+    for _, octet in ipairs(octets) do
+        if octet > 255 or #tostring(octet) > 3 then
+            return nil
+        end
+    end
+    return octets
+end
+
+-- Hex groups of one side of "::"; nil when a group is malformed
+local function hex_groups(part)
+    local groups = {}
+    if part == "" then
+        return groups
+    end
+    for group in (part .. ":"):gmatch("([^:]*):") do
+        if not group:match("^%x%x?%x?%x?$") then
+            return nil
+        end
+        groups[#groups + 1] = tonumber(group, 16)
+    end
+    return groups
+end
+
+local function ipv6_groups(s)
+    s = s:gsub("^%[", ""):gsub("%]$", ""):gsub("%%.*$", "")
+    -- Embedded IPv4 (::ffff:10.0.0.1) becomes the last two groups
+    local v4 = s:match(":(%d+%.%d+%.%d+%.%d+)$")
+    if v4 then
+        local octets = ipv4_octets(v4)
+        if not octets then
+            return nil
+        end
+        s = s:sub(1, #s - #v4) .. string.format("%x:%x", octets[1] * 256 + octets[2],
+            octets[3] * 256 + octets[4])
+    end
+    local head, tail = s, nil
+    local gap = s:find("::", 1, true)
+    if gap then
+        if s:find("::", gap + 1, true) then
+            return nil
+        end
+        head, tail = s:sub(1, gap - 1), s:sub(gap + 2)
+    end
+    local groups, rest = hex_groups(head), hex_groups(tail or "")
+    if not groups or not rest then
+        return nil
+    end
+    if tail then
+        if #groups + #rest > 7 then
+            return nil
+        end
+        while #groups + #rest < 8 do
+            groups[#groups + 1] = 0
+        end
+    elseif #groups ~= 8 then
+        return nil
+    end
+    for _, group in ipairs(rest) do
+        groups[#groups + 1] = group
+    end
+    return groups
+end
+
+local function is_mapped(g)
+    return g[1] == 0 and g[2] == 0 and g[3] == 0 and g[4] == 0 and g[5] == 0 and g[6] == 0xffff
+end
+
+-- Compressed IPv6 text: the longest run of two or more zero groups is "::"
+local function ipv6_text(g)
+    local best, bestLength, start, length = 0, 1, 0, 0
+    for i = 1, 8 do
+        if g[i] == 0 then
+            if length == 0 then
+                start = i
+            end
+            length = length + 1
+            if length > bestLength then
+                best, bestLength = start, length
+            end
+        else
+            length = 0
+        end
+    end
+    local parts = {}
+    for i = 1, 8 do
+        parts[i] = string.format("%x", g[i])
+    end
+    if best == 0 then
+        return table.concat(parts, ":")
+    end
+    return table.concat(parts, ":", 1, best - 1) .. "::" .. table.concat(parts, ":", best + bestLength, 8)
+end
+
+-- Eight 16-bit groups of an IPv4 or IPv6 address, nil when it is neither
+function iputils.parse(ip)
+    ip = trim(ip or "")
+    local octets = ipv4_octets(ip)
+    if octets then
+        return {0, 0, 0, 0, 0, 0xffff, octets[1] * 256 + octets[2], octets[3] * 256 + octets[4]}
+    end
+    if ip:find(":", 1, true) then
+        return ipv6_groups(ip)
+    end
+    return nil
+end
+
+function iputils.format(g)
+    if is_mapped(g) then
+        return string.format("%d.%d.%d.%d", math.floor(g[7] / 256), g[7] % 256,
+            math.floor(g[8] / 256), g[8] % 256)
+    end
+    return ipv6_text(g)
+end
+
+function iputils.validateIPv4(ip)
+    return ipv4_octets(trim(ip or "")) ~= nil
+end
+
+function iputils.validateIP(ip)
+    return iputils.parse(ip) ~= nil
+end
+
+function iputils.isIPv6(ip)
+    local g = iputils.parse(ip)
+    return g ~= nil and not is_mapped(g)
+end
+
+-- Network of an address as CIDR text ("10.0.3.0/24", "2001:db8:1:2::/64"),
+-- at prefix4 for IPv4 and prefix6 for IPv6 addresses
+function iputils.getSubnet(ip, prefix4, prefix6)
+    local g = iputils.parse(ip)
+    if not g then
+        return nil
+    end
+    local v4 = is_mapped(g)
+    local length = v4 and (tonumber(prefix4) or iputils.prefix4) or (tonumber(prefix6) or iputils.prefix6)
+    length = math.max(0, math.min(v4 and 32 or 128, length))
+    local bits = v4 and 96 + length or length
+    local network = {}
+    for i = 1, 8 do
+        local keep = math.max(0, math.min(16, bits - (i - 1) * 16))
+        local span = math.floor(2 ^ (16 - keep))
+        network[i] = math.floor(g[i] / span) * span
+    end
+    return iputils.format(network) .. "/" .. length
+end
+
+-- Private, loopback, link-local and shared IPv4 ranges; IPv6 unique local
+-- (fc00::/7), link-local (fe80::/10) and loopback
+function iputils.isPrivate(ip)
+    local g = iputils.parse(ip)
+    if not g then
+        return false
+    end
+    if is_mapped(g) then
+        local a, b = math.floor(g[7] / 256), g[7] % 256
+        return a == 10 or a == 127 or (a == 172 and b >= 16 and b <= 31) or (a == 192 and b == 168)
+            or (a == 169 and b == 254) or (a == 100 and b >= 64 and b <= 127)
+    end
+    if g[1] >= 0xfc00 and g[1] <= 0xfebf and (g[1] <= 0xfdff or g[1] >= 0xfe80) then
+        return true
+    end
+    return ipv6_text(g) == "::1"
+end
+
+-- Address text for a node label: IPv6 compressed, and when still longer
+-- than width, cut to its first two and last groups (2001:db8:...:7334)
+function iputils.abbreviate(ip, width)
+    local g = iputils.parse(ip)
+    if not g or is_mapped(g) then
+        return ip
+    end
+    local s = ipv6_text(g)
+    if #s <= (tonumber(width) or iputils.labelWidth) then
+        return s
+    end
+    local first, second = s:match("^([^:]*):([^:]*)")
+    return first .. ":" .. second .. ":\\ldots:" .. s:match("([^:]*)$")
+end
+
+-- Remember a node for \autoGenerateSubnetZones (called for every imported node)
+function iputils.registerNode(nodeId, ip)
+    local subnet = iputils.getSubnet(ip)
+    if not subnet or nodeId == "" then
+        return
+    end
+    local nodes = iputils.subnets[subnet]
+    if not nodes then
+        nodes = {private = iputils.isPrivate(ip)}
+        iputils.subnets[subnet] = nodes
+        iputils.subnetOrder[#iputils.subnetOrder + 1] = subnet
+    end
+    nodes[#nodes + 1] = nodeId
+end
+
+-- One \drawSubnet per registered subnet, in the order they were first seen
+function iputils.generateSubnetZones()
+    local out = {}
+    for index, subnet in ipairs(iputils.subnetOrder) do
+        local nodes = iputils.subnets[subnet]
+        out[#out + 1] = "\\drawSubnet{zone" .. index .. "}{"
+            .. (nodes.private and "clientGreen" or "routerOrange") .. "}{("
+            .. table.concat(nodes, ") (") .. ")}{" .. subnet .. "}"
+    end
+    tex.print(out)
+end
@@ -0,0 +1,398 @@
+#!/usr/bin/env python3
+"""
+attack_paths.py - Enumerate attack paths from the internet to crown jewels
+
+This script loads nodes, connections and threat findings and computes the
+k best attack paths from attacker/internet nodes to each crown-jewel
+target, instead of the node lists analysts type into \\drawAttackPath and
+\\highlightLateralMovement by hand.
+
+Two path metrics are supported:
+
+  risk    highest-likelihood paths: each hop into a node succeeds with
+          max(floor, severity/10), as in threat_scoring.py propagation
+  hops    fewest hops
+
+Paths are found with Yen's k-shortest simple paths algorithm. Every spur
+search is an A* search guided by distances to the target from one bounded
+reverse Dijkstra per target, so it walks almost straight to the target
+instead of flooding the graph, and a hop bound prunes long detours. Connection types
+can be excluded (blocked by default) or whitelisted.
+
+The paths are written as a TeX file for \\loadAttackPaths, \\drawAttackPath
+and \\highlightAttackPath (threat_indicators.tex).
+
+Usage:
+    python3 attack_paths.py nodes.csv connections.csv threats.csv
+    python3 attack_paths.py nodes.csv connections.csv threats.csv --targets db1,db2 -k 5
+    python3 attack_paths.py nodes.csv connections.csv threats.csv --metric hops --exclude blocked,encrypted
+"""
+
+import sys
+import math
+import heapq
+import time
+import csv
+from pathlib import Path
+
+from threat_scoring import ThreatScorer, DEFAULT_FLOOR, INTERNET_TYPES, normalize_type
+
+# ANSI color codes
+GREEN = '\033[0;32m'
+YELLOW = '\033[1;33m'
+BLUE = '\033[0;34m'
+CYAN = '\033[0;36m'
+RED = '\033[0;31m'
+NC = '\033[0m'
+
+# Node types treated as crown jewels when --targets is not given
+CROWN_JEWEL_TYPES = {'database', 'database_primary', 'database_replica', 'database_cluster',
+                     'storage', 'nas', 'san'}
+
+# Connection types attackers cannot traverse unless --exclude says otherwise
+DEFAULT_EXCLUDE = 'blocked'
+
+DEFAULT_K = 3
+DEFAULT_MAX_HOPS = 12
+
+# Reverse searches settle nodes up to this multiple of the best entry cost
+RADIUS_FACTOR = 2.0
+
+INFINITY = math.inf
+
+class AttackGraph(ThreatScorer):
+    """Connections graph with per-node hop costs taken from the findings"""
+
+    def __init__(self, floor=DEFAULT_FLOOR, exclude=(), only=()):
+        super().__init__(floor=floor)
+        self.exclude = set(exclude)
+        self.only = set(only)
+        self.edges = 0
+        self.filtered = 0
+
+    def load_connections_csv(self, filepath):
+        """Load connections (source,destination,label,type), dropping filtered types"""
+        with open(filepath, 'r', encoding='utf-8', newline='') as f:
+            for row in csv.DictReader(f):
+                source = self.index.get((row.get('source') or '').strip())
+                dest = self.index.get((row.get('destination') or '').strip())
+                if source is None or dest is None or source == dest:
+                    continue
+                conn_type = normalize_type(row.get('type') or 'normal')
+                if conn_type in self.exclude or (self.only and conn_type not in self.only):
+                    self.filtered += 1
+                    continue
+                self.neighbors[source].append(dest)
+                self.neighbors[dest].append(source)
+                self.edges += 1
+
+    def prepare(self, sources, metric='risk'):
+        """Freeze the graph: add a virtual source joined to every entry node
+
+        cost[v] is the cost of a hop into v: -log of its exploit likelihood
+        for the risk metric, 1 for hops. Hops out of the virtual source are
+        free, so all entry nodes start level.
+        """
+        self.metric = metric
+        if metric == 'hops':
+            self.cost = [1.0] * len(self.ids)
+        else:
+            self.cost = [-math.log(max(self.floor, min(s, 10.0) / 10.0))
+                         for s in self.max_severity]
+        self.source = len(self.ids)
+        self.adjacency = [tuple(n) for n in self.neighbors] + [tuple(sources)]
+        self.entries = set(sources)
+        self.cost.append(0.0)
+
+    def edge_cost(self, u, v):
+        return 0.0 if u == self.source else self.cost[v]
+
+    def distances_to(self, target, metric='risk'):
+        """Lower bounds on the remaining cost and hops from nodes to target
+
+        Returns (remaining, radius, hops, hop_radius). The reverse Dijkstra
+        and BFS stop once they have settled every node within RADIUS_FACTOR
+        times the distance of the nearest entry node. Nodes further out are
+        missing from the dicts and bounded by the radius instead, which is
+        still a lower bound, so A* stays exact while only a small ball
+        around the target is ever searched. A radius of INFINITY means the
+        search ran out, so a missing node cannot reach the target at all.
+        """
+        adjacency = self.adjacency
+        entries = self.entries
+
+        hops = {target: 0}
+        hop_radius = INFINITY
+        level = [target]
+        depth = 0
+        limit = INFINITY
+        while level:
+            if depth > limit:
+                hop_radius = depth
+                break
+            if limit == INFINITY and not entries.isdisjoint(level):
+                limit = RADIUS_FACTOR * depth
+            depth += 1
+            following = []
+            for x in level:
+                for u in adjacency[x]:
+                    if u not in hops:
+                        hops[u] = depth
+                        following.append(u)
+            level = following
+
+        if metric == 'hops':
+            # Both bounds come from the same BFS
+            remaining = {node: float(h) for node, h in hops.items() if h < hop_radius}
+            radius = float(hop_radius)
+        else:
+            remaining = {}
+            tentative = {target: 0.0}
+            cost = self.cost
+            radius = INFINITY
+            limit = INFINITY
+            heap = [(0.0, target)]
+            while heap:
+                d, x = heapq.heappop(heap)
+                if x in remaining:
+                    continue
+                if d > limit:
+                    radius = d
+                    break
+                remaining[x] = d
+                if limit == INFINITY and x in entries:
+                    limit = RADIUS_FACTOR * d
+                # A hop u -> x costs cost[x]
+                step = d + cost[x]
+                for u in adjacency[x]:
+                    if step < tentative.get(u, INFINITY):
+                        tentative[u] = step
+                        heapq.heappush(heap, (step, u))
+
+        # The virtual source reaches entry nodes for free, in one extra hop
+        remaining[self.source] = min((remaining.get(s, radius) for s in entries), default=INFINITY)
+        hops[self.source] = min((hops.get(s, hop_radius) for s in entries), default=INFINITY) + 1
+        return remaining, radius, hops, hop_radius
+
+    def search(self, start, target, bounds, banned_nodes, banned_edges, max_hops):
+        """A* from start to target guided by the distances_to lower bounds
+
+        Returns the node list, or None when the bans or the hop bound leave
+        no path. Among equal estimates the deeper entry is expanded first,
+        so where the bounds are exact the search follows the best path.
+        """
+        remaining, radius, hops_left, hop_radius = bounds
+        adjacency = self.adjacency
+        cost = self.cost
+        source = self.source
+        entries = self.entries
+        best = {start: 0.0}
+        depth = {start: 0}
+        previous = {start: -1}
+        heap = [(remaining.get(start, radius), 0.0, start)]
+        while heap:
+            _, negative, u = heapq.heappop(heap)
+            g = -negative
+            if g > best[u]:
+                continue
+            if u == target:
+                path = []
+                while u >= 0:
+                    path.append(u)
+                    u = previous[u]
+                return path[::-1]
+            next_depth = depth[u] + 1
+            for v in adjacency[u]:
+                if v in banned_nodes or (u, v) in banned_edges:
+                    continue
+                # Paths start at one entry node and never pass another
+                if v in entries and u != source and v != target:
+                    continue
+                h = remaining.get(v, radius)
+                # Unreachable, or the hop bound cannot be met from v
+                if h == INFINITY or next_depth + hops_left.get(v, hop_radius) > max_hops:
+                    continue
+                candidate = g + (0.0 if u == source else cost[v])
+                if candidate < best.get(v, INFINITY):
+                    best[v] = candidate
+                    depth[v] = next_depth
+                    previous[v] = u
+                    heapq.heappush(heap, (candidate + h, -candidate, v))
+        return None
+
+    def path_cost(self, path):
+        return sum(self.edge_cost(u, v) for u, v in zip(path, path[1:]))
+
+    def k_paths(self, target, k, max_hops=DEFAULT_MAX_HOPS):
+        """Yen's k best simple paths from the virtual source to target"""
+        bounds = self.distances_to(target, self.metric)
+        # The virtual source adds one hop that is not a connection
+        max_hops += 1
+        first = self.search(self.source, target, bounds, set(), set(), max_hops)
+        if first is None:
+            return []
+        found = [first]
+        candidates = []
+        seen = {tuple(first)}
+        while len(found) < k:
+            last = found[-1]
+            for i in range(len(last) - 1):
+                spur = last[i]
+                root = last[:i + 1]
+                banned_edges = {(p[i], p[i + 1]) for p in found
+                                if len(p) > i + 1 and p[:i + 1] == root}
+                banned_nodes = set(root[:-1])
+                spur_path = self.search(spur, target, bounds, banned_nodes, banned_edges,
+                                        max_hops - i)
+                if spur_path is None:
+                    continue
+                path = root[:-1] + spur_path
+                key = tuple(path)
+                if key not in seen:
+                    seen.add(key)
+                    heapq.heappush(candidates, (self.path_cost(path), len(path), key))
+            if not candidates:
+                break
+            found.append(list(heapq.heappop(candidates)[2]))
+        # Drop the virtual source
+        return [path[1:] for path in found]
+
+    def path_risk(self, path):
+        """10 x the product of exploit likelihoods of every hop after the entry node"""
+        likelihood = 1.0
+        for v in path[1:]:
+            likelihood *= max(self.floor, min(self.max_severity[v], 10.0) / 10.0)
+        return 10.0 * likelihood
+
+def write_tex(filepath, graph, paths, metric, k):
+    """Write \\setAttackPath lines and the list of path ids"""
+    lines = [
+        '% Generated by attack_paths.py - do not edit by hand',
+        f'% Metric: {metric}; up to {k} paths per target; excluded connection types: '
+        f'{",".join(sorted(graph.exclude)) or "none"}',
+        '% \\setAttackPath{id}{target}{risk}{hops}{node,node,...}',
+    ]
+    for number, (target, path) in enumerate(paths, 1):
+        lines.append(f'\\setAttackPath{{{number}}}{{{graph.ids[target]}}}'
+                     f'{{{graph.path_risk(path):.1f}}}{{{len(path) - 1}}}'
+                     f'{{{",".join(graph.ids[v] for v in path)}}}')
+    lines.append(f'\\def\\attackPathIds{{{",".join(str(n) for n in range(1, len(paths) + 1))}}}')
+    lines.append('\\endinput')
+    Path(filepath).write_text('\n'.join(lines) + '\n', encoding='utf-8')
+
+def parse_list(value):
+    return [item.strip() for item in value.split(',') if item.strip()]
+
+def main():
+    """Main attack path function"""
+    args = sys.argv[1:]
+    if len(args) < 3 or '--help' in args or '-h' in args:
+        print("Usage: python3 attack_paths.py nodes.csv connections.csv threats.csv [more threats...] [options]")
+        print("")
+        print("Options:")
+        print("  -k N               Paths per target (default: 3)")
+        print("  --metric MODE      risk (default) or hops")
+        print("  --sources IDS      Entry nodes (default: attacker/internet/cloud nodes)")
+        print("  --targets IDS      Crown jewels (default: database and storage nodes)")
+        print("  --exclude TYPES    Connection types attackers cannot use (default: blocked)")
+        print("  --only TYPES       Use only these connection types")
+        print("  --max-hops N       Longest path considered (default: 12)")
+        print("  --floor P          Exploit likelihood of hops without findings (default: 0.5)")
+        print("  --output FILE      TeX output file (default: attack_paths.tex)")
+        sys.exit(1)
+
+    options = {'-k': str(DEFAULT_K), '--metric': 'risk', '--sources': '', '--targets': '',
+               '--exclude': DEFAULT_EXCLUDE, '--only': '', '--max-hops': str(DEFAULT_MAX_HOPS),
+               '--floor': str(DEFAULT_FLOOR), '--output': 'attack_paths.tex'}
+    for flag in options:
+        if flag in args:
+            index = args.index(flag)
+            if index + 1 >= len(args):
+                print(f"{RED}Error: {flag} requires a value{NC}")
+                sys.exit(1)
+            options[flag] = args[index + 1]
+            del args[index:index + 2]
+    if options['--metric'] not in ('risk', 'hops'):
+        print(f"{RED}Error: --metric must be risk or hops{NC}")
+        sys.exit(1)
+
+    for filepath in args:
+        if not Path(filepath).exists():
+            print(f"{RED}✗ File not found: {filepath}{NC}")
+            sys.exit(1)
+
+    print(f"{BLUE}{'='*60}{NC}")
+    print(f"{BLUE}Attack Path Analysis{NC}")
+    print(f"{BLUE}{'='*60}{NC}\n")
+
+    graph = AttackGraph(floor=float(options['--floor']),
+                        exclude=[normalize_type(t) for t in parse_list(options['--exclude'])],
+                        only=[normalize_type(t) for t in parse_list(options['--only'])])
+    start = time.perf_counter()
+    graph.load_nodes_csv(args[0])
+    graph.load_connections_csv(args[1])
+    for filepath in args[2:]:
+        try:
+            graph.load_threats_csv(filepath)
+        except ValueError as e:
+            print(f"{RED}✗ {e}{NC}")
+            sys.exit(1)
+    loaded = time.perf_counter()
+
+    def resolve(flag, default_types):
+        if not options[flag]:
+            return [i for i, t in enumerate(graph.types) if t in default_types]
+        nodes = []
+        for name in parse_list(options[flag]):
+            if name in graph.index:
+                nodes.append(graph.index[name])
+            else:
+                print(f"{YELLOW}  ⚠ {flag}: unknown node {name}{NC}")
+        return nodes
+
+    sources = resolve('--sources', INTERNET_TYPES)
+    targets = resolve('--targets', CROWN_JEWEL_TYPES)
+    if not sources:
+        print(f"{RED}✗ No entry nodes: add attacker/internet nodes or use --sources{NC}")
+        sys.exit(1)
+    if not targets:
+        print(f"{RED}✗ No crown jewels: add database/storage nodes or use --targets{NC}")
+        sys.exit(1)
+
+    graph.prepare(sources, options['--metric'])
+    k = int(options['-k'])
+    max_hops = int(options['--max-hops'])
+    paths = []
+    unreachable = []
+    for target in targets:
+        found = graph.k_paths(target, k, max_hops)
+        if not found:
+            unreachable.append(graph.ids[target])
+        paths.extend((target, path) for path in found)
+    done = time.perf_counter()
+
+    print(f"{GREEN}✓ Loaded {len(graph.ids)} nodes, {graph.edges} connections and "
+          f"{graph.findings} findings in {loaded - start:.2f}s{NC}")
+    if graph.filtered:
+        print(f"{YELLOW}  ⚠ {graph.filtered} connections skipped by type filter{NC}")
+    print(f"{GREEN}✓ {len(paths)} paths from {len(sources)} entry nodes to "
+          f"{len(targets)} targets in {done - loaded:.2f}s{NC}")
+    if unreachable:
+        print(f"{YELLOW}  ⚠ No path within {max_hops} hops to: {', '.join(unreachable[:10])}"
+              f"{' ...' if len(unreachable) > 10 else ''}{NC}")
+
+    print(f"\n{BLUE}{'='*60}{NC}")
+    print(f"{BLUE}ATTACK PATHS{NC}")
+    print(f"{BLUE}{'='*60}{NC}\n")
+    for number, (target, path) in enumerate(paths, 1):
+        print(f"  {number:3}. {graph.ids[target]:20} risk {graph.path_risk(path):4.1f}  "
+              f"hops {len(path) - 1:2}")
+        print(f"  {CYAN}     {' -> '.join(graph.ids[v] for v in path)}{NC}")
+
+    write_tex(options['--output'], graph, paths, options['--metric'], k)
+    print(f"\n{GREEN}✓ Attack paths written to: {options['--output']}{NC}")
+    print(f"{YELLOW}  Usage: \\loadAttackPaths{{{options['--output']}}} then "
+          f"\\drawAttackPath[1]{{x}}{{y}} or \\highlightAttackPath{{1}}{NC}\n")
+
+if __name__ == '__main__':
+    main()
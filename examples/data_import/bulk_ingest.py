@@ -0,0 +1,388 @@
+#!/usr/bin/env python3
+"""
+bulk_ingest.py - Ingest directories of scan files into one dataset
+
+This script takes directories or glob patterns of Nmap XML, Nessus and CSV
+files, parses them in parallel on a process pool and merges the results
+into a single nodes.csv / threats.csv pair:
+- Each worker parses a chunk of files and merges them into a partial
+  dataset; the partials are merged as they come back
+- Hosts are deduplicated during the merge: by IP address, then by MAC
+  address or hostname for records that have no address
+- Findings are deduplicated per host, plugin/CVE and port, keeping the
+  highest severity
+- When scans disagree on a host's name, OS or type, the newest scan wins
+- Every file gets a line in the report (ingest_report.csv), with the
+  error message for files that could not be parsed
+
+CSV files are recognized by their header: host inventories have an ip
+column, threat lists a target and a severity column (target being an IP
+address, hostname or MAC address).
+
+Usage:
+    python3 bulk_ingest.py scans/
+    python3 bulk_ingest.py 'scans/**/*.xml' 'scans/**/*.nessus' --output-dir merged
+    python3 bulk_ingest.py scans/ --workers 8
+"""
+
+import os
+import sys
+import csv
+import glob
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+from convert_format import parse_nmap_xml, parse_nessus
+from threat_scoring import parse_severity, normalize_type
+
+# ANSI color codes
+GREEN = '\033[0;32m'
+YELLOW = '\033[1;33m'
+BLUE = '\033[0;34m'
+CYAN = '\033[0;36m'
+RED = '\033[0;31m'
+NC = '\033[0m'
+
+SCAN_SUFFIXES = ('.xml', '.nessus', '.csv')
+
+# Nmap osclass device types -> node types
+DEVICE_TYPES = {
+    'router': 'router',
+    'firewall': 'firewall',
+    'switch': 'switch',
+    'general_purpose': 'server',
+    'load_balancer': 'loadbalancer',
+    'phone': 'mobile_phone',
+    'wap': 'iot_device',
+    'printer': 'iot_device',
+    'webcam': 'iot_device',
+    'storage_misc': 'server',
+}
+
+HOST_FIELDS = ('ip', 'ipv6', 'mac', 'hostname', 'os', 'type')
+
+class Dataset:
+    """Hosts and findings merged from any number of scan files
+
+    Merging is commutative, so partial datasets can be combined in
+    whatever order the workers finish.
+    """
+
+    def __init__(self):
+        self.hosts = {}
+        self.findings = {}
+
+    @staticmethod
+    def host_key(ip, mac, hostname):
+        if ip:
+            return ip
+        if mac:
+            return f'mac:{mac}'
+        return f'name:{hostname.lower()}' if hostname else ''
+
+    def add_host(self, source, ip='', mac='', hostname='', os='', device='', ports=(), seen=0,
+                 node_type='', ipv6=''):
+        key = self.host_key(ip, mac, hostname)
+        if not key:
+            return None
+        node_type = node_type or DEVICE_TYPES.get(normalize_type(device), '')
+        self.merge_host(key, {'ip': ip, 'ipv6': ipv6, 'mac': mac, 'hostname': hostname, 'os': os,
+                              'type': node_type, 'ports': set(ports), 'seen': seen,
+                              'source': source, 'scans': 1})
+        return key
+
+    def merge_host(self, key, host):
+        current = self.hosts.get(key)
+        if current is None:
+            self.hosts[key] = host
+            return
+        newer, older = ((host, current) if (host['seen'], host['source']) > (current['seen'], current['source'])
+                        else (current, host))
+        merged = {field: newer[field] or older[field] for field in HOST_FIELDS}
+        merged.update(ports=current['ports'] | host['ports'], seen=newer['seen'],
+                      source=newer['source'], scans=current['scans'] + host['scans'])
+        self.hosts[key] = merged
+
+    def add_finding(self, host, finding):
+        key = (host, finding['plugin'] or finding['cve'] or finding['name'], finding['port'])
+        self.merge_finding(key, finding)
+
+    def merge_finding(self, key, finding):
+        current = self.findings.get(key)
+        if current is None or ((parse_severity(finding['severity']), finding['source'])
+                               > (parse_severity(current['severity']), current['source'])):
+            self.findings[key] = finding
+
+    def merge(self, other):
+        for key, host in other.hosts.items():
+            self.merge_host(key, host)
+        for key, finding in other.findings.items():
+            self.merge_finding(key, finding)
+
+    def resolve(self):
+        """Fold hosts known only by MAC or hostname into hosts with an IP,
+        and move findings keyed by hostname or MAC onto the matching host"""
+        by_mac = {}
+        by_name = {}
+        for key, host in self.hosts.items():
+            if not key.startswith(('mac:', 'name:')):
+                if host['mac']:
+                    by_mac.setdefault(host['mac'], key)
+                if host['hostname']:
+                    by_name.setdefault(host['hostname'].lower(), key)
+        moved = {}
+        for key in [k for k in self.hosts if k.startswith(('mac:', 'name:'))]:
+            host = self.hosts[key]
+            target = by_mac.get(host['mac']) or by_name.get(host['hostname'].lower())
+            if target is None and key.startswith('name:') and host['mac']:
+                target = f"mac:{host['mac']}" if f"mac:{host['mac']}" in self.hosts else None
+            if target:
+                moved[key] = target
+                self.merge_host(target, self.hosts.pop(key))
+
+        # Findings that name a host by hostname or MAC (threat CSVs) go to
+        # the host that has it, preferring hosts with an IP
+        by_mac, by_name = {}, {}
+        for key in sorted(self.hosts, key=lambda k: k.startswith(('mac:', 'name:'))):
+            host = self.hosts[key]
+            if host['mac']:
+                by_mac.setdefault(host['mac'], key)
+            if host['hostname']:
+                by_name.setdefault(host['hostname'].lower(), key)
+        remap = dict(moved)
+        for host, _, _ in self.findings:
+            if host in self.hosts or host in remap:
+                continue
+            if host.startswith('name:'):
+                target = by_name.get(host[len('name:'):])
+            else:
+                # Threat CSVs give a MAC target as is
+                target = by_mac.get(host[len('mac:'):] if host.startswith('mac:') else host.upper())
+            if target:
+                remap[host] = target
+        if remap:
+            findings, self.findings = self.findings, {}
+            for (host, finding_id, port), finding in findings.items():
+                self.merge_finding((remap.get(host, host), finding_id, port), finding)
+        return len(moved)
+
+def scan_format(path):
+    """'nmap', 'nessus', 'hosts' or 'threats'; None for other files"""
+    suffix = path.suffix.lower()
+    if suffix == '.nessus':
+        return 'nessus'
+    if suffix == '.xml':
+        with open(path, 'r', encoding='utf-8', errors='replace') as f:
+            head = f.read(2048)
+        if '<nmaprun' in head:
+            return 'nmap'
+        if '<NessusClientData' in head:
+            return 'nessus'
+        return None
+    if suffix == '.csv':
+        with open(path, 'r', encoding='utf-8', newline='') as f:
+            header = [name.strip().lower() for name in next(csv.reader(f), [])]
+        if 'target' in header and 'severity' in header:
+            return 'threats'
+        if 'ip' in header:
+            return 'hosts'
+    return None
+
+def ingest_file(dataset, path):
+    """Merge one file into a dataset; (format, hosts, findings) read"""
+    fmt = scan_format(path)
+    source = str(path)
+    if fmt == 'nmap':
+        hosts = parse_nmap_xml(path)
+        for host in hosts:
+            dataset.add_host(source, **host)
+        return fmt, len(hosts), 0
+    if fmt == 'nessus':
+        hosts, findings = parse_nessus(path)
+        keys = {}
+        for host in hosts:
+            keys[host['ip']] = dataset.add_host(source, **host)
+        for finding in findings:
+            finding.update(type='vulnerability', source=source)
+            dataset.add_finding(keys[finding.pop('ip')], finding)
+        return fmt, len(hosts), len(findings)
+    if fmt is None:
+        return None, 0, 0
+
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        rows = [{(k or '').strip().lower(): (v or '').strip() for k, v in row.items()}
+                for row in csv.DictReader(f)]
+    seen = int(path.stat().st_mtime)
+    if fmt == 'hosts':
+        for row in rows:
+            dataset.add_host(source, ip=row.get('ip', ''), mac=row.get('mac', '').upper(),
+                             hostname=row.get('hostname') or row.get('label', ''), os=row.get('os', ''),
+                             ports=[p.strip() for p in row.get('ports', '').split(',') if p.strip()],
+                             seen=seen, node_type=normalize_type(row.get('type', '')),
+                             ipv6=row.get('ipv6', ''))
+        return fmt, len(rows), 0
+    for row in rows:
+        target = row.get('target', '')
+        host = target if target[:1].isdigit() or ':' in target else f'name:{target.lower()}'
+        dataset.add_finding(host, {'port': row.get('port', ''), 'plugin': row.get('plugin', ''),
+                                   'name': row.get('type', ''), 'cve': row.get('cve', ''),
+                                   'severity': row.get('severity', ''),
+                                   'description': row.get('description', ''),
+                                   'type': normalize_type(row.get('type', '')) or 'vulnerability',
+                                   'source': source})
+    return fmt, 0, len(rows)
+
+def ingest_chunk(paths):
+    """Worker task: parse a chunk of files into one partial dataset"""
+    dataset = Dataset()
+    report = []
+    for path in paths:
+        start = time.perf_counter()
+        try:
+            fmt, hosts, findings = ingest_file(dataset, Path(path))
+            status, error = ('ok', '') if fmt else ('skipped', 'not a recognized scan file')
+        except Exception as e:
+            # A file that fails half way may have merged some hosts already;
+            # keep them, the report says the file is incomplete
+            fmt, hosts, findings, status, error = scan_format_safe(Path(path)), 0, 0, 'error', str(e)
+        report.append([path, fmt or '', status, hosts, findings,
+                       f'{time.perf_counter() - start:.3f}', error])
+    return dataset, report
+
+def scan_format_safe(path):
+    try:
+        return scan_format(path)
+    except Exception:
+        return None
+
+def expand_inputs(patterns):
+    """Scan files named by directories, glob patterns or paths, sorted"""
+    files = set()
+    for pattern in patterns:
+        path = Path(pattern)
+        if path.is_dir():
+            files.update(str(p) for p in path.rglob('*') if p.is_file() and p.suffix.lower() in SCAN_SUFFIXES)
+        elif path.is_file():
+            files.add(str(path))
+        else:
+            files.update(p for p in glob.glob(pattern, recursive=True) if os.path.isfile(p))
+    return sorted(files)
+
+def node_id(key):
+    for prefix in ('mac:', 'name:'):
+        if key.startswith(prefix):
+            key = key[len(prefix):]
+    return 'host_' + ''.join(c if c.isalnum() else '_' for c in key)
+
+def write_dataset(dataset, output_dir):
+    output_dir.mkdir(parents=True, exist_ok=True)
+    ids = {}
+    with open(output_dir / 'nodes.csv', 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(['id', 'type', 'ip', 'label', 'ports', 'mac', 'os', 'scans', 'ipv6'])
+        for key in sorted(dataset.hosts):
+            host = dataset.hosts[key]
+            ids[key] = node_id(key)
+            ports = sorted(host['ports'], key=lambda p: (len(p), p))
+            writer.writerow([ids[key], host['type'] or 'server', host['ip'],
+                             host['hostname'] or host['ip'] or host['mac'], ','.join(ports),
+                             host['mac'], host['os'], host['scans'], host['ipv6']])
+
+    orphans = 0
+    with open(output_dir / 'threats.csv', 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(['target', 'type', 'severity', 'cve', 'description', 'port'])
+        for key in sorted(dataset.findings):
+            finding = dataset.findings[key]
+            if key[0] not in ids:
+                orphans += 1
+            writer.writerow([ids.get(key[0], node_id(key[0])), finding['type'], finding['severity'],
+                             finding['cve'].split(',')[0], finding['description'], finding['port']])
+    return orphans
+
+def main():
+    """Main ingestion function"""
+    args = sys.argv[1:]
+    if not args or '--help' in args or '-h' in args:
+        print("Usage: python3 bulk_ingest.py <directory|glob|file>... [options]")
+        print("")
+        print("Options:")
+        print("  --output-dir DIR   Where nodes.csv, threats.csv and ingest_report.csv go (default: ingested)")
+        print("  --workers N        Parser processes (default: one per CPU)")
+        print("  --chunk N          Files per worker task (default: automatic)")
+        sys.exit(1)
+
+    options = {'--output-dir': 'ingested', '--workers': str(os.cpu_count() or 1), '--chunk': ''}
+    for flag in options:
+        if flag in args:
+            index = args.index(flag)
+            if index + 1 >= len(args):
+                print(f"{RED}Error: {flag} requires a value{NC}")
+                sys.exit(1)
+            options[flag] = args[index + 1]
+            del args[index:index + 2]
+
+    print(f"{BLUE}{'='*60}{NC}")
+    print(f"{BLUE}Bulk Scan Ingestion{NC}")
+    print(f"{BLUE}{'='*60}{NC}\n")
+
+    files = expand_inputs(args)
+    if not files:
+        print(f"{RED}✗ No scan files found in: {' '.join(args)}{NC}")
+        sys.exit(1)
+
+    workers = max(1, int(options['--workers']))
+    # Several chunks per worker keeps them busy when file sizes vary
+    chunk = int(options['--chunk']) if options['--chunk'] else max(1, min(64, len(files) // (workers * 8)))
+    chunks = [files[i:i + chunk] for i in range(0, len(files), chunk)]
+    print(f"{CYAN}Ingesting {len(files)} files with {workers} workers ({len(chunks)} tasks)...{NC}")
+
+    start = time.perf_counter()
+    dataset = Dataset()
+    report = []
+    done = 0
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for future in as_completed([pool.submit(ingest_chunk, c) for c in chunks]):
+            partial, lines = future.result()
+            dataset.merge(partial)
+            report.extend(lines)
+            done += len(lines)
+            elapsed = time.perf_counter() - start
+            print(f"\r  {done}/{len(files)} files, {len(dataset.hosts)} hosts "
+                  f"({done / elapsed:.0f} files/s)", end='', flush=True)
+    print()
+    folded = dataset.resolve()
+
+    output_dir = Path(options['--output-dir'])
+    orphans = write_dataset(dataset, output_dir)
+    report.sort()
+    with open(output_dir / 'ingest_report.csv', 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(['file', 'format', 'status', 'hosts', 'findings', 'seconds', 'error'])
+        writer.writerows(report)
+
+    errors = [line for line in report if line[2] == 'error']
+    skipped = sum(1 for line in report if line[2] == 'skipped')
+    records = sum(line[3] for line in report)
+    print(f"\n{GREEN}✓ {len(files) - len(errors) - skipped} files ingested in "
+          f"{time.perf_counter() - start:.2f}s{NC}")
+    print(f"{BLUE}  Hosts: {len(dataset.hosts)} unique of {records} host records "
+          f"({folded} matched by MAC or hostname){NC}")
+    print(f"{BLUE}  Findings: {len(dataset.findings)} unique{NC}")
+    print(f"{GREEN}✓ Wrote {output_dir / 'nodes.csv'}, {output_dir / 'threats.csv'}, "
+          f"{output_dir / 'ingest_report.csv'}{NC}")
+    if orphans:
+        print(f"{YELLOW}⚠ {orphans} findings name a host no scan reported{NC}")
+    if skipped:
+        print(f"{YELLOW}⚠ {skipped} files skipped (not a recognized scan file){NC}")
+    if errors:
+        print(f"{RED}✗ {len(errors)} files failed:{NC}")
+        for line in errors[:10]:
+            print(f"{RED}  {line[0]}: {line[6]}{NC}")
+        if len(errors) > 10:
+            print(f"{RED}  ... see {output_dir / 'ingest_report.csv'}{NC}")
+        sys.exit(2)
+
+if __name__ == '__main__':
+    main()
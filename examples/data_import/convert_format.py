@@ -6,12 +6,14 @@ This script converts network data between different formats:
 - CSV to JSON
 - JSON to CSV
 - Nmap XML to CSV
+- Nessus to CSV
 - CSV to GraphML (for Gephi/Cytoscape)
 
 Usage:
     python3 convert_format.py nodes.csv --to json
     python3 convert_format.py network.json --to csv
     python3 convert_format.py nmap-scan.xml --to csv
+    python3 convert_format.py nessus-scan.nessus --to csv
     python3 convert_format.py nodes.csv connections.csv --to graphml
 """
 
@@ -29,6 +31,9 @@ BLUE = '\033[0;34m'
 RED = '\033[0;31m'
 NC = '\033[0m'
 
+# Nessus 1-4 ratings as CVSS scores, at the bottom of each band
+NESSUS_SEVERITY = {1: '0.1', 2: '4.0', 3: '7.0', 4: '9.0'}
+
 class FormatConverter:
     """Convert between network data formats"""
 
@@ -39,78 +44,21 @@ class FormatConverter:
 
     def csv_to_json(self, nodes_file, connections_file=None, threats_file=None, output_file='network.json'):
         """Convert CSV files to JSON"""
-        data = {
-            "network": {
-                "name": "Imported Network",
-                "version": "1.0"
-            },
-            "nodes": [],
-            "connections": [],
-            "threats": []
-        }
+        data = json_document()
 
         # Load nodes
         with open(nodes_file, 'r', encoding='utf-8') as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                node = {
-                    "id": row.get('id', '').strip(),
-                    "type": row.get('type', '').strip(),
-                    "ip": row.get('ip', '').strip(),
-                    "label": row.get('label', '').strip()
-                }
-
-                # Add position if available
-                if 'x' in row and 'y' in row:
-                    try:
-                        node["position"] = {
-                            "x": float(row['x']),
-                            "y": float(row['y'])
-                        }
-                    except ValueError:
-                        pass
-
-                data["nodes"].append(node)
+            data["nodes"] = [node_json(row) for row in csv.DictReader(f)]
 
         # Load connections if provided
         if connections_file and Path(connections_file).exists():
             with open(connections_file, 'r', encoding='utf-8') as f:
-                reader = csv.DictReader(f)
-                for row in reader:
-                    conn = {
-                        "source": row.get('source', '').strip(),
-                        "destination": row.get('destination', '').strip()
-                    }
-
-                    if row.get('type'):
-                        conn["type"] = row.get('type', '').strip()
-                    if row.get('label'):
-                        conn["label"] = row.get('label', '').strip()
-
-                    data["connections"].append(conn)
+                data["connections"] = [connection_json(row) for row in csv.DictReader(f)]
 
         # Load threats if provided
         if threats_file and Path(threats_file).exists():
             with open(threats_file, 'r', encoding='utf-8') as f:
-                reader = csv.DictReader(f)
-                for row in reader:
-                    threat = {
-                        "target": row.get('target', '').strip(),
-                        "type": row.get('type', '').strip()
-                    }
-
-                    if row.get('severity'):
-                        try:
-                            threat["severity"] = float(row.get('severity'))
-                        except ValueError:
-                            threat["severity"] = row.get('severity', '').strip()
-
-                    if row.get('cve'):
-                        threat["cve"] = row.get('cve', '').strip()
-                    if row.get('description'):
-                        threat["description"] = row.get('description', '').strip()
-
-                    data["threats"].append(threat)
+                data["threats"] = [threat_json(row) for row in csv.DictReader(f)]
 
         # Write JSON
         with open(output_file, 'w', encoding='utf-8') as f:
@@ -202,56 +150,60 @@ class FormatConverter:
 
             print(f"{GREEN}✓ Created: threats_from_json.csv ({len(threats)} threats){NC}")
 
-    def nmap_to_csv(self, nmap_file):
+    def nmap_to_csv(self, nmap_file, output_file='nodes_from_nmap.csv'):
         """Convert Nmap XML to CSV"""
-        tree = ET.parse(nmap_file)
-        root = tree.getroot()
-
         nodes = []
         node_id = 1
 
-        for host in root.findall('.//host'):
-            # Get IP address
-            addr_elem = host.find('.//address[@addrtype="ipv4"]')
-            if addr_elem is None:
+        for host in parse_nmap_xml(nmap_file):
+            if not host['ip']:
                 continue
 
-            ip = addr_elem.get('addr')
-
-            # Get hostname
-            hostname_elem = host.find('.//hostname')
-            if hostname_elem is not None:
-                label = hostname_elem.get('name')
-            else:
-                label = f"Host-{node_id}"
-
-            # Get open ports
-            ports = []
-            for port in host.findall('.//port'):
-                state = port.find('state')
-                if state is not None and state.get('state') == 'open':
-                    ports.append(port.get('portid'))
-
             nodes.append({
                 'id': f"nmap_{node_id}",
                 'type': 'server',
-                'ip': ip,
-                'label': label,
-                'ports': ','.join(ports) if ports else ''
+                'ip': host['ip'],
+                'label': host['hostname'] or f"Host-{node_id}",
+                'ports': ','.join(host['ports']),
+                'ipv6': host['ipv6']
             })
 
             node_id += 1
 
         # Write CSV
-        with open('nodes_from_nmap.csv', 'w', newline='', encoding='utf-8') as f:
-            fieldnames = ['id', 'type', 'ip', 'label', 'ports']
+        with open(output_file, 'w', newline='', encoding='utf-8') as f:
+            fieldnames = ['id', 'type', 'ip', 'label', 'ports', 'ipv6']
             writer = csv.DictWriter(f, fieldnames=fieldnames)
             writer.writeheader()
             writer.writerows(nodes)
 
-        print(f"{GREEN}✓ Converted Nmap XML to CSV: nodes_from_nmap.csv{NC}")
+        print(f"{GREEN}✓ Converted Nmap XML to CSV: {output_file}{NC}")
         print(f"{BLUE}  Discovered {len(nodes)} hosts{NC}")
 
+    def nessus_to_csv(self, nessus_file, nodes_file='nodes_from_nessus.csv',
+                      threats_file='threats_from_nessus.csv'):
+        """Convert a .nessus report to node and threat CSVs"""
+        hosts, findings = parse_nessus(nessus_file)
+        ids = {}
+
+        with open(nodes_file, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(['id', 'type', 'ip', 'label', 'ports'])
+            for i, host in enumerate(hosts, 1):
+                ids[host['ip']] = f"nessus_{i}"
+                writer.writerow([ids[host['ip']], 'server', host['ip'],
+                                 host['hostname'] or f"Host-{i}", ','.join(host['ports'])])
+
+        with open(threats_file, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(['target', 'type', 'severity', 'cve', 'description'])
+            for finding in findings:
+                writer.writerow([ids[finding['ip']], 'vulnerability', finding['severity'],
+                                 finding['cve'].split(',')[0], finding['description']])
+
+        print(f"{GREEN}✓ Converted Nessus report to CSV: {nodes_file}, {threats_file}{NC}")
+        print(f"{BLUE}  {len(hosts)} hosts, {len(findings)} findings{NC}")
+
     def csv_to_graphml(self, nodes_file, connections_file, output_file='network.graphml'):
         """Convert CSV to GraphML format"""
         # Read nodes
@@ -269,41 +221,203 @@ class FormatConverter:
 
         # Generate GraphML
         with open(output_file, 'w', encoding='utf-8') as f:
-            f.write('<?xml version="1.0" encoding="UTF-8"?>\n')
-            f.write('<graphml xmlns="http://graphml.graphdrawing.org/xmlns">\n')
-            f.write('  <key id="label" for="node" attr.name="label" attr.type="string"/>\n')
-            f.write('  <key id="type" for="node" attr.name="type" attr.type="string"/>\n')
-            f.write('  <key id="ip" for="node" attr.name="ip" attr.type="string"/>\n')
-            f.write('  <graph id="network" edgedefault="directed">\n')
+            f.write(GRAPHML_HEADER)
 
             # Write nodes
             for node in nodes:
-                node_id = html.escape(node.get('id', '').strip())
-                node_label = html.escape(node.get('label', ''))
-                node_type = html.escape(node.get('type', ''))
-                node_ip = html.escape(node.get('ip', ''))
-                f.write(f'    <node id="{node_id}">\n')
-                f.write(f'      <data key="label">{node_label}</data>\n')
-                f.write(f'      <data key="type">{node_type}</data>\n')
-                f.write(f'      <data key="ip">{node_ip}</data>\n')
-                f.write(f'    </node>\n')
+                f.write(graphml_node(node))
 
             # Write edges
-            edge_id = 0
-            for conn in connections:
-                source = html.escape(conn.get('source', '').strip())
-                dest = html.escape(conn.get('destination', '').strip())
-                f.write(f'    <edge id="e{edge_id}" source="{source}" target="{dest}"/>\n')
-                edge_id += 1
+            for edge_id, conn in enumerate(connections):
+                f.write(graphml_edge(conn, edge_id))
 
-            f.write('  </graph>\n')
-            f.write('</graphml>\n')
+            f.write(GRAPHML_FOOTER)
 
         print(f"{GREEN}✓ Converted to GraphML: {output_file}{NC}")
         print(f"{BLUE}  Nodes: {len(nodes)}{NC}")
         print(f"{BLUE}  Edges: {len(connections)}{NC}")
         print(f"{BLUE}  Can be imported into Gephi or Cytoscape{NC}")
 
+def json_document():
+    """Skeleton of the network.json written by csv_to_json"""
+    return {
+        "network": {
+            "name": "Imported Network",
+            "version": "1.0"
+        },
+        "nodes": [],
+        "connections": [],
+        "threats": []
+    }
+
+def node_json(row):
+    """network.json entry for a nodes.csv row"""
+    node = {
+        "id": row.get('id', '').strip(),
+        "type": row.get('type', '').strip(),
+        "ip": row.get('ip', '').strip(),
+        "label": row.get('label', '').strip()
+    }
+
+    # Add position if available
+    if 'x' in row and 'y' in row:
+        try:
+            node["position"] = {
+                "x": float(row['x']),
+                "y": float(row['y'])
+            }
+        except ValueError:
+            pass
+    return node
+
+def connection_json(row):
+    """network.json entry for a connections.csv row"""
+    conn = {
+        "source": row.get('source', '').strip(),
+        "destination": row.get('destination', '').strip()
+    }
+
+    if row.get('type'):
+        conn["type"] = row.get('type', '').strip()
+    if row.get('label'):
+        conn["label"] = row.get('label', '').strip()
+    return conn
+
+def threat_json(row):
+    """network.json entry for a threats.csv row"""
+    threat = {
+        "target": row.get('target', '').strip(),
+        "type": row.get('type', '').strip()
+    }
+
+    if row.get('severity'):
+        try:
+            threat["severity"] = float(row.get('severity'))
+        except ValueError:
+            threat["severity"] = row.get('severity', '').strip()
+
+    if row.get('cve'):
+        threat["cve"] = row.get('cve', '').strip()
+    if row.get('description'):
+        threat["description"] = row.get('description', '').strip()
+    return threat
+
+GRAPHML_HEADER = (
+    '<?xml version="1.0" encoding="UTF-8"?>\n'
+    '<graphml xmlns="http://graphml.graphdrawing.org/xmlns">\n'
+    '  <key id="label" for="node" attr.name="label" attr.type="string"/>\n'
+    '  <key id="type" for="node" attr.name="type" attr.type="string"/>\n'
+    '  <key id="ip" for="node" attr.name="ip" attr.type="string"/>\n'
+    '  <graph id="network" edgedefault="directed">\n'
+)
+GRAPHML_FOOTER = '  </graph>\n</graphml>\n'
+
+def graphml_node(node):
+    """GraphML <node> element for a nodes.csv row"""
+    return (f'    <node id="{html.escape(node.get("id", "").strip())}">\n'
+            f'      <data key="label">{html.escape(node.get("label", ""))}</data>\n'
+            f'      <data key="type">{html.escape(node.get("type", ""))}</data>\n'
+            f'      <data key="ip">{html.escape(node.get("ip", ""))}</data>\n'
+            f'    </node>\n')
+
+def graphml_edge(conn, edge_id):
+    """GraphML <edge> element for a connections.csv row"""
+    source = html.escape(conn.get('source', '').strip())
+    dest = html.escape(conn.get('destination', '').strip())
+    return f'    <edge id="e{edge_id}" source="{source}" target="{dest}"/>\n'
+
+def parse_nmap_xml(nmap_file):
+    """Hosts reported up in an Nmap XML file
+
+    Returns a list of dicts with ip (the IPv4 address of dual-stack hosts),
+    ipv6 (the first IPv6 address, if any), mac, hostname, os, device (the
+    osclass type Nmap guessed, if any), ports (open port ids, in file
+    order) and seen (scan start, epoch seconds; 0 if unknown).
+    """
+    hosts = []
+    seen = 0
+    for event, elem in ET.iterparse(nmap_file, events=('start', 'end')):
+        if event == 'start':
+            if elem.tag == 'nmaprun':
+                seen = int(elem.get('start', 0) or 0)
+            continue
+        if elem.tag != 'host':
+            continue
+        status = elem.find('status')
+        if status is None or status.get('state', 'up') == 'up':
+            host = {'ip': '', 'ipv6': '', 'mac': '', 'hostname': '', 'os': '', 'device': '',
+                    'ports': [], 'seen': int(elem.get('starttime', 0) or 0) or seen}
+            for address in elem.findall('address'):
+                kind = address.get('addrtype', 'ipv4')
+                if kind == 'mac':
+                    host['mac'] = address.get('addr', '').upper()
+                    continue
+                if kind == 'ipv6' and not host['ipv6']:
+                    host['ipv6'] = address.get('addr', '')
+                if not host['ip'] or kind == 'ipv4':
+                    host['ip'] = address.get('addr', '')
+            hostname = elem.find('hostnames/hostname')
+            if hostname is not None:
+                host['hostname'] = hostname.get('name', '')
+            for port in elem.findall('ports/port'):
+                state = port.find('state')
+                if state is not None and state.get('state') == 'open':
+                    host['ports'].append(port.get('portid'))
+            osmatch = elem.find('os/osmatch')
+            if osmatch is not None:
+                host['os'] = osmatch.get('name', '')
+                osclass = osmatch.find('osclass')
+                if osclass is not None:
+                    host['device'] = osclass.get('type', '')
+            hosts.append(host)
+        # Scans of large ranges do not fit in memory as a tree
+        elem.clear()
+    return hosts
+
+def parse_nessus(nessus_file):
+    """Hosts and findings in a .nessus (NessusClientData_v2) file
+
+    Returns (hosts, findings). Hosts have the keys of parse_nmap_xml();
+    their ports are the non-zero ports any report item was raised on.
+    Findings are dicts with ip, port, plugin, name, cve (comma-separated),
+    severity (CVSS score, or the Nessus 0-4 rating mapped onto CVSS bands
+    when no score is given) and description. Informational items
+    (severity 0) only contribute ports.
+    """
+    hosts = []
+    findings = []
+    for _, elem in ET.iterparse(nessus_file):
+        if elem.tag != 'ReportHost':
+            continue
+        tags = {tag.get('name'): (tag.text or '').strip() for tag in elem.findall('HostProperties/tag')}
+        ip = tags.get('host-ip') or elem.get('name', '')
+        end = tags.get('HOST_END_TIMESTAMP') or tags.get('HOST_START_TIMESTAMP') or '0'
+        host = {'ip': ip, 'ipv6': ip if ':' in ip else '', 'mac': tags.get('mac-address', '').split('\n')[0].upper(),
+                'hostname': tags.get('host-fqdn') or tags.get('netbios-name', ''),
+                'os': tags.get('operating-system', '').split('\n')[0], 'device': '',
+                'ports': [], 'seen': int(end) if end.isdigit() else 0}
+        for item in elem.findall('ReportItem'):
+            port = item.get('port', '0')
+            if port != '0' and port not in host['ports']:
+                host['ports'].append(port)
+            rating = int(item.get('severity', '0') or 0)
+            if rating == 0:
+                continue
+            score = item.findtext('cvss3_base_score') or item.findtext('cvss_base_score')
+            findings.append({
+                'ip': ip,
+                'port': port,
+                'plugin': item.get('pluginID', ''),
+                'name': item.get('pluginName', ''),
+                'cve': ','.join(cve.text.strip() for cve in item.findall('cve') if cve.text),
+                'severity': score.strip() if score else NESSUS_SEVERITY.get(rating, '0.0'),
+                'description': ' '.join((item.findtext('synopsis') or item.findtext('description')
+                                         or item.get('pluginName', '')).split()),
+            })
+        hosts.append(host)
+        elem.clear()
+    return hosts, findings
+
 def main():
     """Main conversion function"""
     if len(sys.argv) < 3:
@@ -314,12 +428,16 @@ def main():
         print("  python3 convert_format.py nodes.csv connections.csv --to json")
         print("  python3 convert_format.py network.json --to csv")
         print("  python3 convert_format.py nmap-scan.xml --to csv")
+        print("  python3 convert_format.py nessus-scan.nessus --to csv")
         print("  python3 convert_format.py nodes.csv connections.csv --to graphml")
         print("")
+        print("For directories of scan files, use bulk_ingest.py")
+        print("")
         print("Supported conversions:")
         print("  CSV → JSON")
         print("  JSON → CSV")
         print("  Nmap XML → CSV")
+        print("  Nessus → CSV")
         print("  CSV → GraphML")
         sys.exit(1)
 
@@ -355,6 +473,8 @@ def main():
                 converter.json_to_csv(input_file)
             elif input_file.endswith('.xml'):
                 converter.nmap_to_csv(input_file)
+            elif input_file.endswith('.nessus'):
+                converter.nessus_to_csv(input_file)
             else:
                 print(f"{RED}Unknown input format for CSV conversion{NC}")
                 sys.exit(1)
@@ -0,0 +1,449 @@
+#!/usr/bin/env python3
+"""
+diagram_service.py - Local HTTP service for network queries and diagrams
+
+This script loads nodes, connections and threats once and serves them over
+a small asyncio HTTP API on the local machine, so portals, bots and
+runbooks no longer pay a parse, validate and compile per request:
+
+  GET /health                   data version, sizes and cache counters
+  GET /stats                    dashboard figures (network_stats.py --latex)
+  GET /subgraph?nodes=EXPR&connections=EXPR&threats=EXPR[&prune=1][&format=json|tex]
+  GET /threats?q=EXPR[&limit=N] threat findings matching an expression
+  GET /node?id=ID               one node with its connections and threats
+  GET /render?nodes=EXPR&...[&format=pdf|svg]   the subgraph as a diagram
+
+Expressions use the net_query.py language (type in (server, database),
+subnet 10.0.0.0/8, severity >= 7 ...). Queries are answered from the model
+held in memory; the files are checked every --poll seconds and reloaded in
+the background when they change, which bumps the data version.
+
+Responses are kept in an LRU cache keyed by endpoint, normalized query and
+data version, bounded by --cache-mb. Concurrent identical requests share a
+single computation. Diagrams are rendered by at most --workers TeX
+processes at a time; SVG output needs pdf2svg, as for compile.sh. Nothing
+leaves the machine: the service binds to 127.0.0.1 unless --host says
+otherwise.
+
+Usage:
+    python3 diagram_service.py nodes.csv connections.csv threats.csv
+    python3 diagram_service.py nodes.csv connections.csv threats.csv --port 8765 --workers 4
+    curl 'http://127.0.0.1:8765/render?nodes=subnet%20192.168.100.0/24&format=svg' -o lan.svg
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import asyncio
+import tempfile
+from array import array
+from collections import OrderedDict
+from pathlib import Path
+from urllib.parse import urlsplit, parse_qsl
+
+from net_query import Network, QueryError, KINDS
+from network_stats import NetworkStats
+from threat_scoring import parse_severity
+
+# ANSI color codes
+GREEN = '\033[0;32m'
+YELLOW = '\033[1;33m'
+BLUE = '\033[0;34m'
+CYAN = '\033[0;36m'
+RED = '\033[0;31m'
+NC = '\033[0m'
+
+ROOT = Path(__file__).resolve().parent.parent.parent
+
+DEFAULT_PORT = 8765
+DEFAULT_WORKERS = 2
+DEFAULT_CACHE_MB = 64
+DEFAULT_POLL = 1.0
+RENDER_TIMEOUT = 120
+
+# Modules loaded by rendered documents, in load order
+RENDER_MODULES = ('styles_config', 'node_definitions', 'network_layout',
+                  'connection_renderer', 'threat_indicators', 'data_import')
+
+DOCUMENT_TEMPLATE = r"""\documentclass[tikz,border=10pt]{standalone}
+\usepackage{tikz}
+\usetikzlibrary{shapes.geometric, arrows.meta, positioning, backgrounds, fit, calc, decorations.pathmorphing, shadows}
+\usepackage{ifthen}
+%(modules)s
+\providecommand{\diagramScale}{1.0}
+\begin{document}
+\begin{tikzpicture}[scale=\diagramScale, every node/.style={transform shape}]
+\importNetworkView{view.tex}
+\end{tikzpicture}
+\end{document}
+"""
+
+CONTENT_TYPES = {
+    'json': 'application/json',
+    'tex': 'application/x-tex; charset=utf-8',
+    'pdf': 'application/pdf',
+    'svg': 'image/svg+xml',
+}
+
+REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+           500: 'Internal Server Error', 501: 'Not Implemented', 503: 'Service Unavailable'}
+
+class HTTPError(Exception):
+    """Error answered with a status code and a JSON message"""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+class ResponseCache:
+    """LRU of (content type, body) bounded by total body size"""
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return entry
+
+    def put(self, key, entry):
+        if len(entry[1]) > self.max_bytes:
+            return
+        old = self.entries.pop(key, None)
+        if old:
+            self.size -= len(old[1])
+        self.entries[key] = entry
+        self.size += len(entry[1])
+        while self.size > self.max_bytes:
+            _, evicted = self.entries.popitem(last=False)
+            self.size -= len(evicted[1])
+
+    def drop_version(self, version):
+        """Forget every entry computed from an older data version"""
+        for key in [k for k in self.entries if k[0] < version]:
+            self.size -= len(self.entries.pop(key)[1])
+
+class NetworkModel:
+    """One loaded version of the data files"""
+
+    def __init__(self, nodes_file, connections_file, threat_files, version):
+        self.version = version
+        self.network = Network()
+        self.network.load_nodes_csv(nodes_file)
+        self.network.load_connections_csv(connections_file)
+        for filepath in threat_files:
+            self.network.load_threats_csv(filepath)
+        self.network.finish()
+
+    def records(self, kind, indices):
+        """Rows as dicts keyed by the file's header"""
+        header = self.network.headers.get(kind, [])
+        rows = self.network.rows[kind]
+        return [dict(zip(header, rows[i])) for i in indices]
+
+    def stats(self):
+        """Dashboard figures, as written by network_stats.py --latex"""
+        stats = NetworkStats()
+        stats.nodes = self.records('nodes', range(len(self.network.rows['nodes'])))
+        stats.connections = self.records('connections', range(len(self.network.rows['connections'])))
+        stats.threats = self.records('threats', range(len(self.network.rows['threats'])))
+        stats.severities = array('d', (parse_severity(t.get('severity')) for t in stats.threats))
+        return stats.compute_dashboard()
+
+    def view_tex(self, queries, selection):
+        return self.network.tex_view('diagram_service', queries, selection, 'diagram_service.py')
+
+class DiagramService:
+    """Request routing, caching, coalescing and the TeX worker pool"""
+
+    def __init__(self, files, workers=DEFAULT_WORKERS, cache_mb=DEFAULT_CACHE_MB,
+                 engine='pdflatex', poll=DEFAULT_POLL):
+        self.files = files
+        self.engine = engine
+        self.poll = poll
+        self.cache = ResponseCache(int(cache_mb * 1024 * 1024))
+        self.inflight = {}
+        self.coalesced = 0
+        self.renders = asyncio.Semaphore(workers)
+        self.model = None
+        self.stamps = None
+
+    def file_stamps(self):
+        stamps = []
+        for path in [self.files[0], self.files[1]] + self.files[2:]:
+            info = os.stat(path)
+            stamps.append((info.st_mtime_ns, info.st_size))
+        return stamps
+
+    async def load(self):
+        """(Re)load the model in a worker thread and publish it"""
+        stamps = self.file_stamps()
+        version = self.model.version + 1 if self.model else 1
+        start = time.perf_counter()
+        model = await asyncio.to_thread(NetworkModel, self.files[0], self.files[1], self.files[2:], version)
+        self.model, self.stamps = model, stamps
+        self.cache.drop_version(version)
+        network = model.network
+        print(f"{GREEN}✓ Data version {version}: {len(network.rows['nodes'])} nodes, "
+              f"{len(network.rows['connections'])} connections, {len(network.rows['threats'])} threats "
+              f"({time.perf_counter() - start:.2f}s){NC}")
+
+    async def watch_files(self):
+        """Reload whenever a data file changes"""
+        while True:
+            await asyncio.sleep(self.poll)
+            try:
+                if self.file_stamps() != self.stamps:
+                    await self.load()
+            except (OSError, ValueError) as e:
+                print(f"{YELLOW}⚠ Reload skipped, keeping version {self.model.version}: {e}{NC}")
+
+    async def cached(self, key, compute):
+        """Cached response for a key, computing it once for concurrent callers"""
+        entry = self.cache.get(key)
+        if entry is not None:
+            return entry, 'hit'
+        pending = self.inflight.get(key)
+        if pending is not None:
+            self.coalesced += 1
+            return await asyncio.shield(pending), 'coalesced'
+        future = asyncio.get_running_loop().create_future()
+        self.inflight[key] = future
+        try:
+            entry = await compute()
+        except BaseException as e:
+            future.set_exception(e)
+            # Retrieved here so an unawaited failure is not reported
+            future.exception()
+            raise
+        finally:
+            del self.inflight[key]
+        future.set_result(entry)
+        self.cache.put(key, entry)
+        return entry, 'miss'
+
+    def queries(self, params):
+        return {kind: params.get(kind, '').strip() for kind in KINDS}
+
+    def selection(self, model, queries, prune):
+        try:
+            return model.network.view(queries, prune)
+        except QueryError as e:
+            raise HTTPError(400, str(e))
+
+    async def handle(self, path, params):
+        """(status, content type, body, cache state) for one GET request"""
+        model = self.model
+        if path == '/health':
+            body = {'status': 'ok', 'version': model.version,
+                    'nodes': len(model.network.rows['nodes']),
+                    'connections': len(model.network.rows['connections']),
+                    'threats': len(model.network.rows['threats']),
+                    'cache': {'entries': len(self.cache.entries), 'bytes': self.cache.size,
+                              'hits': self.cache.hits, 'misses': self.cache.misses,
+                              'coalesced': self.coalesced}}
+            return 200, CONTENT_TYPES['json'], json_bytes(body), 'none'
+
+        if path not in ('/stats', '/subgraph', '/threats', '/node', '/render'):
+            raise HTTPError(404, f'Unknown endpoint {path}')
+        key = (model.version, path, tuple(sorted(params.items())))
+
+        async def compute():
+            if path == '/stats':
+                return CONTENT_TYPES['json'], json_bytes(await asyncio.to_thread(model.stats))
+            if path == '/threats':
+                query = {'threats': params.get('q', '')}
+                threats = self.selection(model, query, False)['threats']
+                limit = int(params['limit']) if params.get('limit', '').isdigit() else len(threats)
+                return CONTENT_TYPES['json'], json_bytes(
+                    {'version': model.version, 'count': len(threats),
+                     'threats': model.records('threats', threats[:limit])})
+            if path == '/node':
+                index = model.network.index.get(params.get('id', ''))
+                if index is None:
+                    raise HTTPError(404, f"Unknown node {params.get('id', '')!r}")
+                cols = model.network.columns
+                connections = [i for i, (s, d) in enumerate(zip(cols['connections'].get('src', []),
+                                                                 cols['connections'].get('dst', [])))
+                               if index in (s, d)]
+                threats = [i for i, n in enumerate(cols['threats'].get('node', [])) if n == index]
+                return CONTENT_TYPES['json'], json_bytes(
+                    {'version': model.version, 'node': model.records('nodes', [index])[0],
+                     'connections': model.records('connections', connections),
+                     'threats': model.records('threats', threats)})
+
+            queries = self.queries(params)
+            prune = params.get('prune', '') in ('1', 'true', 'yes')
+            fmt = params.get('format', 'json' if path == '/subgraph' else 'pdf')
+            if fmt not in (('json', 'tex') if path == '/subgraph' else ('pdf', 'svg')):
+                raise HTTPError(400, f"unsupported format {fmt!r} for {path}")
+            # Large selections take a while to serialize: keep the loop serving cached hits
+            selection = await asyncio.to_thread(self.selection, model, queries, prune)
+            if fmt == 'json':
+                return CONTENT_TYPES['json'], await asyncio.to_thread(lambda: json_bytes(
+                    {'version': model.version,
+                     **{kind: model.records(kind, selection[kind]) for kind in KINDS}}))
+            view = await asyncio.to_thread(model.view_tex, queries, selection)
+            if fmt == 'tex':
+                return CONTENT_TYPES['tex'], view.encode('utf-8')
+            return CONTENT_TYPES[fmt], await self.render(view, fmt)
+
+        entry, state = await self.cached(key, compute)
+        return 200, entry[0], entry[1], state
+
+    async def render(self, view, fmt):
+        """Compile a view with one of the pooled TeX processes"""
+        if shutil.which(self.engine) is None:
+            raise HTTPError(501, f'{self.engine} not found; cannot render')
+        if fmt == 'svg' and shutil.which('pdf2svg') is None:
+            raise HTTPError(501, 'pdf2svg not found; cannot render SVG')
+        async with self.renders:
+            with tempfile.TemporaryDirectory(prefix='diagram_service_') as workdir:
+                workdir = Path(workdir)
+                modules = '\n'.join(f'\\input{{{(ROOT / m).as_posix()}.tex}}' for m in RENDER_MODULES)
+                (workdir / 'view.tex').write_text(view, encoding='utf-8')
+                (workdir / 'diagram.tex').write_text(DOCUMENT_TEMPLATE % {'modules': modules},
+                                                     encoding='utf-8')
+                await run_process([self.engine, '-interaction=batchmode', '-halt-on-error', 'diagram.tex'],
+                                  workdir, 'diagram.log')
+                if fmt == 'svg':
+                    await run_process(['pdf2svg', 'diagram.pdf', 'diagram.svg'], workdir, None)
+                return (workdir / f'diagram.{fmt}').read_bytes()
+
+    async def serve_client(self, reader, writer):
+        """Answer requests on one connection until it closes"""
+        try:
+            while True:
+                request = await reader.readline()
+                if not request:
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+                parts = request.decode('latin-1').split()
+                keep_alive = (len(parts) == 3 and parts[2] == 'HTTP/1.1'
+                              and headers.get('connection', '').lower() != 'close')
+                start = time.perf_counter()
+                state = 'none'
+                try:
+                    if len(parts) != 3:
+                        raise HTTPError(400, 'Malformed request line')
+                    if parts[0] not in ('GET', 'HEAD'):
+                        raise HTTPError(405, 'Only GET and HEAD are supported')
+                    url = urlsplit(parts[1])
+                    status, content_type, body, state = await self.handle(url.path, dict(parse_qsl(url.query)))
+                except HTTPError as e:
+                    status, content_type, body = e.status, CONTENT_TYPES['json'], json_bytes({'error': str(e)})
+                except Exception as e:
+                    status, content_type, body = 500, CONTENT_TYPES['json'], json_bytes({'error': str(e)})
+                head = (f'HTTP/1.1 {status} {REASONS.get(status, "")}\r\n'
+                        f'Content-Type: {content_type}\r\n'
+                        f'Content-Length: {len(body)}\r\n'
+                        f'X-Data-Version: {self.model.version}\r\n'
+                        f'X-Cache: {state}\r\n'
+                        f'Connection: {"keep-alive" if keep_alive else "close"}\r\n\r\n')
+                writer.write(head.encode('latin-1'))
+                if parts and parts[0] != 'HEAD':
+                    writer.write(body)
+                await writer.drain()
+                if status >= 400 or state == 'miss':
+                    color = RED if status >= 500 else (YELLOW if status >= 400 else CYAN)
+                    print(f"{color}  {status} {parts[1] if len(parts) > 1 else '?'} "
+                          f"({state}, {(time.perf_counter() - start) * 1000:.1f} ms){NC}")
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+async def run_process(command, workdir, log_name):
+    """Run a render step; HTTPError with the log tail when it fails"""
+    process = await asyncio.create_subprocess_exec(
+        *command, cwd=str(workdir), stdout=asyncio.subprocess.DEVNULL, stderr=asyncio.subprocess.DEVNULL)
+    try:
+        await asyncio.wait_for(process.wait(), RENDER_TIMEOUT)
+    except asyncio.TimeoutError:
+        process.kill()
+        await process.wait()
+        raise HTTPError(500, f'{command[0]} timed out after {RENDER_TIMEOUT}s')
+    if process.returncode != 0:
+        log = workdir / log_name if log_name else None
+        tail = ''
+        if log and log.exists():
+            tail = '\n'.join(log.read_text(encoding='utf-8', errors='replace').splitlines()[-20:])
+        raise HTTPError(500, f'{command[0]} failed\n{tail}'.rstrip())
+
+def json_bytes(value):
+    return json.dumps(value, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+async def serve(service, host, port):
+    await service.load()
+    server = await asyncio.start_server(service.serve_client, host, port)
+    asyncio.create_task(service.watch_files())
+    print(f"{GREEN}✓ Listening on http://{host}:{port}/ (Ctrl-C to stop){NC}")
+    print(f"{YELLOW}  Try: curl 'http://{host}:{port}/subgraph?nodes=type%20%3D%3D%20server'{NC}\n")
+    async with server:
+        await server.serve_forever()
+
+def main():
+    """Main service function"""
+    args = sys.argv[1:]
+    if len(args) < 2 or '--help' in args or '-h' in args:
+        print("Usage: python3 diagram_service.py nodes.csv connections.csv [threats.csv...] [options]")
+        print("")
+        print("Options:")
+        print("  --host HOST       Address to bind (default: 127.0.0.1)")
+        print(f"  --port N          Port (default: {DEFAULT_PORT})")
+        print(f"  --workers N       TeX processes rendering at once (default: {DEFAULT_WORKERS})")
+        print(f"  --cache-mb N      Response cache size (default: {DEFAULT_CACHE_MB})")
+        print("  --engine ENGINE   TeX engine for /render (default: pdflatex)")
+        print(f"  --poll S          Seconds between data file checks (default: {DEFAULT_POLL})")
+        sys.exit(1)
+
+    options = {'--host': '127.0.0.1', '--port': str(DEFAULT_PORT), '--workers': str(DEFAULT_WORKERS),
+               '--cache-mb': str(DEFAULT_CACHE_MB), '--engine': 'pdflatex', '--poll': str(DEFAULT_POLL)}
+    for flag in options:
+        if flag in args:
+            index = args.index(flag)
+            if index + 1 >= len(args):
+                print(f"{RED}Error: {flag} requires a value{NC}")
+                sys.exit(1)
+            options[flag] = args[index + 1]
+            del args[index:index + 2]
+
+    for filepath in args:
+        if not Path(filepath).exists():
+            print(f"{RED}✗ File not found: {filepath}{NC}")
+            sys.exit(1)
+
+    print(f"{BLUE}{'='*60}{NC}")
+    print(f"{BLUE}Diagram Service{NC}")
+    print(f"{BLUE}{'='*60}{NC}\n")
+
+    try:
+        service = DiagramService(args, int(options['--workers']), float(options['--cache-mb']),
+                                 options['--engine'], float(options['--poll']))
+        asyncio.run(serve(service, options['--host'], int(options['--port'])))
+    except ValueError as e:
+        print(f"{RED}✗ {e}{NC}")
+        sys.exit(1)
+    except KeyboardInterrupt:
+        print(f"\n{GREEN}✓ Stopped{NC}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,491 @@
+#!/usr/bin/env python3
+"""
+entity_resolve.py - Merge records of the same host across data sources
+
+The same machine often appears under several names: nmap_17 from
+convert_format.py, a Nessus ReportHost, and a hand-named node in nodes.csv.
+This script reads any number of such sources and works out which records
+are the same host:
+- Exact matches through hash indexes on IP address, MAC address and FQDN
+- Hostname matches through blocking keys: records are only compared with
+  others sharing a key (web-01, WEB01 and web1.corp.example all share
+  "web1"; a transposed name shares its sorted letters), so candidate
+  pairs grow with the number of records rather than its square
+- A match is refused when it would join hosts that a stronger key tells
+  apart: an IP match between different MAC addresses or FQDNs (a reused
+  DHCP lease), an FQDN match between different MAC addresses, and a
+  hostname match between hosts with any different address or FQDN.
+  Refused matches are listed in conflicts.csv
+
+It writes one merged node per host, with the records it came from, and
+an ID mapping that it applies to connection and threat files so they
+point at the merged nodes.
+
+Sources are listed in priority order: a merged node keeps the id, label
+and type of its first record from the earliest source, so list hand-kept
+node files before scan results.
+
+Usage:
+    python3 entity_resolve.py nodes.csv nmap-scan.xml nessus-scan.nessus
+    python3 entity_resolve.py nodes.csv scans/*.xml --connections connections.csv --threats threats.csv
+    python3 entity_resolve.py nodes.csv ingested/nodes.csv --output-dir resolved --no-fuzzy
+"""
+
+import re
+import sys
+import csv
+import time
+from difflib import SequenceMatcher
+from pathlib import Path
+
+from convert_format import parse_nmap_xml, parse_nessus
+from bulk_ingest import scan_format, DEVICE_TYPES
+from threat_scoring import normalize_type
+
+# ANSI color codes
+GREEN = '\033[0;32m'
+YELLOW = '\033[1;33m'
+BLUE = '\033[0;34m'
+CYAN = '\033[0;36m'
+RED = '\033[0;31m'
+NC = '\033[0m'
+
+# Blocks larger than this are too common a key to say anything ("host",
+# "server"); they are skipped rather than compared pairwise
+MAX_BLOCK = 64
+DEFAULT_SIMILARITY = 0.85
+
+HOSTNAME_RE = re.compile(r'^[A-Za-z0-9][A-Za-z0-9_.-]*$')
+IPV4_RE = re.compile(r'^\d{1,3}(\.\d{1,3}){3}$')
+SEPARATOR_RE = re.compile(r'[^a-z0-9]+')
+LEADING_ZERO_RE = re.compile(r'(?<![0-9])0+(?=[0-9])')
+LETTERS_RE = re.compile(r'[a-z]+')
+
+RULES = ('source', 'mac', 'ip', 'fqdn', 'hostname', 'fuzzy')
+
+# Keys two components must not disagree on for a match by each rule
+KEY_NAMES = ('ip', 'mac', 'fqdn')
+CHECKS = {
+    'mac': (),
+    'ip': (1, 2),
+    'fqdn': (1,),
+    'hostname': (0, 1, 2),
+    'fuzzy': (0, 1, 2),
+}
+
+def split_hostname(name):
+    """(short hostname, FQDN) in lower case; addresses are no hostname"""
+    name = name.strip().lower().rstrip('.')
+    if '.' not in name:
+        return name, ''
+    if IPV4_RE.match(name):
+        return '', ''
+    return name.split('.', 1)[0], name
+
+class Records:
+    """Host records from every source, stored column-wise"""
+
+    def __init__(self):
+        self.source = []
+        self.oid = []
+        self.ip = []
+        self.mac = []
+        self.host = []
+        self.fqdn = []
+        self.type = []
+        self.label = []
+        self.ports = []
+        self.sources = []
+
+    def __len__(self):
+        return len(self.oid)
+
+    def extend(self, source, oids, ips, macs, hostnames, types, labels, ports):
+        """Append records given column by column"""
+        names = [split_hostname(name) for name in hostnames]
+        self.source.extend([source] * len(oids))
+        self.oid.extend(oids)
+        self.ip.extend(ips)
+        self.mac.extend(mac.upper().replace('-', ':') for mac in macs)
+        self.host.extend(host for host, _ in names)
+        self.fqdn.extend(fqdn for _, fqdn in names)
+        self.type.extend(types)
+        self.label.extend(labels)
+        self.ports.extend(ports)
+
+    def load(self, filepath):
+        """Read one source file; returns (format, records read)"""
+        path = Path(filepath)
+        source = len(self.sources)
+        self.sources.append(path.name)
+        start = len(self)
+        fmt = scan_format(path)
+        if fmt is None and path.suffix.lower() == '.csv':
+            # Inventories keyed by MAC or hostname only have no ip column
+            fmt = 'hosts'
+        if fmt in ('nmap', 'nessus'):
+            if fmt == 'nmap':
+                # Same numbering as convert_format.py --to csv
+                hosts = [h for h in parse_nmap_xml(path) if h['ip']]
+            else:
+                hosts, _ = parse_nessus(path)
+            self.extend(source, [f'{fmt}_{i}' for i in range(1, len(hosts) + 1)],
+                        [h['ip'] for h in hosts], [h['mac'] for h in hosts],
+                        [h['hostname'] for h in hosts],
+                        [DEVICE_TYPES.get(normalize_type(h['device']), '') for h in hosts],
+                        [h['hostname'] for h in hosts], [','.join(h['ports']) for h in hosts])
+        elif fmt == 'hosts':
+            with open(path, 'r', encoding='utf-8', newline='') as f:
+                reader = csv.reader(f)
+                names = [name.strip().lower() for name in next(reader, [])]
+                rows = [row for row in reader if row]
+
+            def column(name):
+                if name not in names:
+                    return [''] * len(rows)
+                i = names.index(name)
+                return [row[i].strip() if i < len(row) else '' for row in rows]
+            labels = column('label')
+            hostnames = [fqdn or hostname or (label if HOSTNAME_RE.match(label) else '')
+                         for fqdn, hostname, label in zip(column('fqdn'), column('hostname'), labels)]
+            oids = [oid or f'row_{n}' for n, oid in enumerate(column('id'), 1)]
+            self.extend(source, oids, column('ip'), column('mac'), hostnames,
+                        [normalize_type(t) for t in column('type')], labels, column('ports'))
+        else:
+            raise ValueError(f"{filepath}: not a node list, Nmap XML or Nessus file")
+        return fmt, len(self) - start
+
+class Resolver:
+    """Union-find over records, joined by shared keys"""
+
+    def __init__(self, records, similarity=DEFAULT_SIMILARITY):
+        self.records = records
+        self.similarity = similarity
+        count = len(records)
+        self.parent = list(range(count))
+        self.rule = [''] * count
+        # Identifying values per component root, for the compatibility test
+        self.keys = {}
+        self.skipped_blocks = 0
+        self.conflicts = []
+
+    def find(self, i):
+        parent = self.parent
+        root = i
+        while parent[root] != root:
+            root = parent[root]
+        while parent[i] != root:
+            parent[i], i = root, parent[i]
+        return root
+
+    def component_keys(self, root):
+        """(ip, mac, fqdn) of a component: each a string, or a frozenset
+        once the component holds several values"""
+        keys = self.keys.get(root)
+        if keys is None:
+            r = self.records
+            return r.ip[root], r.mac[root], r.fqdn[root]
+        return keys
+
+    def conflict(self, a, b, checks):
+        """Name of the first key two components disagree on, or None"""
+        keys_a, keys_b = self.component_keys(a), self.component_keys(b)
+        for k in checks:
+            x, y = keys_a[k], keys_b[k]
+            if x and y and x != y and not (as_set(x) & as_set(y)):
+                return KEY_NAMES[k]
+        return None
+
+    def union(self, a, b, rule):
+        ra, rb = self.find(a), self.find(b)
+        if ra == rb:
+            return True
+        key = self.conflict(ra, rb, CHECKS[rule])
+        if key:
+            self.conflicts.append((rule, a, b, key))
+            return False
+        # The root is the record with the higher priority (lower index)
+        if rb < ra:
+            ra, rb = rb, ra
+        keys_a, keys_b = self.component_keys(ra), self.component_keys(rb)
+        self.keys[ra] = tuple(x if not y or x == y else y if not x else as_set(x) | as_set(y)
+                              for x, y in zip(keys_a, keys_b))
+        self.keys.pop(rb, None)
+        self.parent[rb] = ra
+        if not self.rule[rb]:
+            self.rule[rb] = rule
+        return True
+
+    def match_exact(self, values, rule):
+        first = {}
+        for i, value in enumerate(values):
+            if value:
+                j = first.setdefault(value, i)
+                if j != i:
+                    self.union(j, i, rule)
+
+    def match_blocks(self, blocks, rule, verify=None):
+        for members in blocks.values():
+            if len(members) < 2:
+                continue
+            if len(members) > MAX_BLOCK:
+                self.skipped_blocks += 1
+                continue
+            anchors = []
+            for i in members:
+                root = self.find(i)
+                for j in anchors:
+                    if self.find(j) == root or ((verify is None or verify(j, i))
+                                                and self.union(j, i, rule)):
+                        break
+                else:
+                    anchors.append(i)
+
+    def resolve(self, fuzzy=True):
+        r = self.records
+        self.match_exact(r.mac, 'mac')
+        self.match_exact(r.ip, 'ip')
+        self.match_exact(r.fqdn, 'fqdn')
+
+        # Blocking: one representative record per distinct hostname
+        # (records with the same name are the same candidate), then
+        # candidates are only ever compared inside a block
+        by_name = {}
+        for i, name in enumerate(r.host):
+            if name:
+                by_name.setdefault(name, []).append(i)
+        for name, members in by_name.items():
+            for i in members[1:]:
+                self.union(members[0], i, 'hostname')
+        if not fuzzy:
+            return
+
+        canonical = {}
+        letters = {}
+        for name, members in by_name.items():
+            # Letters and numbers without separators or leading zeros;
+            # runs of letters and digits still split unambiguously
+            alnum = SEPARATOR_RE.sub('', name)
+            key = LEADING_ZERO_RE.sub('', alnum)
+            canonical.setdefault(key, []).append(members[0])
+            if len(alnum) >= 5:
+                # Transposed letters, but the numbers must agree
+                letters.setdefault((''.join(sorted(alnum)), LETTERS_RE.sub(' ', key)),
+                                   []).append(members[0])
+        self.match_blocks(canonical, 'fuzzy')
+
+        def similar(a, b):
+            return SequenceMatcher(None, r.host[a], r.host[b]).ratio() >= self.similarity
+        self.match_blocks(letters, 'fuzzy', similar)
+
+    def components(self):
+        """Member record indices per component, root first"""
+        groups = {}
+        for i in range(len(self.records)):
+            groups.setdefault(self.find(i), []).append(i)
+        return groups
+
+def merged_nodes(records, resolver):
+    """(nodes rows, {record index: merged id})"""
+    rows = []
+    merged_id = {}
+    used = set()
+    names = records.sources
+    for root, members in sorted(resolver.components().items()):
+        node_id = records.oid[root]
+        if node_id in used:
+            node_id = f'{records.sources[records.source[root]].rsplit(".", 1)[0]}_{node_id}'
+        used.add(node_id)
+        if len(members) == 1:
+            ip, fqdn = records.ip[root], records.fqdn[root]
+            rows.append([node_id, records.type[root] or 'server', ip,
+                         records.label[root] or fqdn or records.host[root] or ip,
+                         records.ports[root], records.mac[root], fqdn, '',
+                         f'{records.sources[records.source[root]]}:{records.oid[root]}'])
+            merged_id[root] = node_id
+            continue
+        ip, fqdn = first(records.ip, members), first(records.fqdn, members)
+        addresses = sorted({records.ip[i] for i in members} - {ip, ''})
+        ports = sorted({p.strip() for i in members for p in records.ports[i].split(',') if p.strip()},
+                       key=lambda p: (len(p), p))
+        rows.append([node_id, first(records.type, members) or 'server', ip,
+                     first(records.label, members) or fqdn or first(records.host, members) or ip,
+                     ','.join(ports), first(records.mac, members), fqdn, ';'.join(addresses),
+                     ';'.join([f'{names[records.source[i]]}:{records.oid[i]}' for i in members])])
+        for i in members:
+            merged_id[i] = node_id
+    return rows, merged_id
+
+def first(column, members):
+    """First non-empty value of a column among a component's records"""
+    for i in members:
+        if column[i]:
+            return column[i]
+    return ''
+
+def as_set(value):
+    return value if isinstance(value, frozenset) else frozenset((value,))
+
+class IdMapper:
+    """Looks up the merged id for an id, address or hostname reference"""
+
+    def __init__(self, records, merged_id):
+        self.lookup = {}
+        self.ambiguous = set()
+        for i, node_id in merged_id.items():
+            for value in (records.oid[i], records.ip[i], records.fqdn[i], records.host[i]):
+                if not value:
+                    continue
+                known = self.lookup.setdefault(value, node_id)
+                if known != node_id and value == records.oid[i]:
+                    self.ambiguous.add(value)
+        self.unresolved = set()
+
+    def __call__(self, value):
+        key = value.strip()
+        node_id = self.lookup.get(key) or self.lookup.get(key.lower())
+        if node_id is None:
+            self.unresolved.add(key)
+            return key
+        return node_id
+
+def remap_csv(filepath, output, columns, mapper, dedupe=False):
+    """Rewrite reference columns of a CSV; (rows written, rows dropped)"""
+    with open(filepath, 'r', encoding='utf-8', newline='') as f:
+        reader = csv.reader(f)
+        header = next(reader, [])
+        names = [name.strip().lower() for name in header]
+        rows = [row for row in reader if row]
+    indices = [names.index(c) for c in columns if c in names]
+    seen = set()
+    written = dropped = 0
+    with open(output, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(header)
+        for row in rows:
+            for i in indices:
+                if i < len(row):
+                    row[i] = mapper(row[i])
+            if dedupe:
+                # Connections between records of one host, or repeated once
+                # both ends are merged, are dropped
+                if len(indices) == 2 and row[indices[0]] == row[indices[1]]:
+                    dropped += 1
+                    continue
+                key = tuple(row)
+                if key in seen:
+                    dropped += 1
+                    continue
+                seen.add(key)
+            writer.writerow(row)
+            written += 1
+    return written, dropped
+
+def main():
+    """Main resolution function"""
+    args = sys.argv[1:]
+    if not args or '--help' in args or '-h' in args:
+        print("Usage: python3 entity_resolve.py <source>... [options]")
+        print("")
+        print("Sources are node CSV files, Nmap XML and Nessus files, highest priority first.")
+        print("")
+        print("Options:")
+        print("  --connections FILE  Connection CSV to remap onto the merged ids (repeatable)")
+        print("  --threats FILE      Threat CSV to remap onto the merged ids (repeatable)")
+        print("  --output-dir DIR    Output directory (default: resolved)")
+        print(f"  --similarity R      Minimum name similarity for transposed names (default: {DEFAULT_SIMILARITY})")
+        print("  --no-fuzzy          Match hostnames exactly only")
+        sys.exit(1)
+
+    remaps = {'--connections': [], '--threats': []}
+    for flag in remaps:
+        while flag in args:
+            index = args.index(flag)
+            if index + 1 >= len(args):
+                print(f"{RED}Error: {flag} requires a value{NC}")
+                sys.exit(1)
+            remaps[flag].append(args[index + 1])
+            del args[index:index + 2]
+    fuzzy = '--no-fuzzy' not in args
+    args = [a for a in args if a != '--no-fuzzy']
+    options = {'--output-dir': 'resolved', '--similarity': str(DEFAULT_SIMILARITY)}
+    for flag in options:
+        if flag in args:
+            index = args.index(flag)
+            if index + 1 >= len(args):
+                print(f"{RED}Error: {flag} requires a value{NC}")
+                sys.exit(1)
+            options[flag] = args[index + 1]
+            del args[index:index + 2]
+
+    for filepath in args + remaps['--connections'] + remaps['--threats']:
+        if not Path(filepath).exists():
+            print(f"{RED}✗ File not found: {filepath}{NC}")
+            sys.exit(1)
+
+    print(f"{BLUE}{'='*60}{NC}")
+    print(f"{BLUE}Entity Resolution{NC}")
+    print(f"{BLUE}{'='*60}{NC}\n")
+
+    start = time.perf_counter()
+    records = Records()
+    for filepath in args:
+        try:
+            fmt, count = records.load(filepath)
+        except (ValueError, OSError) as e:
+            print(f"{RED}✗ {e}{NC}")
+            sys.exit(1)
+        print(f"{GREEN}✓ {filepath}: {count} records ({fmt}){NC}")
+
+    resolver = Resolver(records, float(options['--similarity']))
+    resolver.resolve(fuzzy)
+    rows, merged_id = merged_nodes(records, resolver)
+
+    output_dir = Path(options['--output-dir'])
+    output_dir.mkdir(parents=True, exist_ok=True)
+    with open(output_dir / 'nodes.csv', 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['id', 'type', 'ip', 'label', 'ports', 'mac', 'fqdn', 'addresses', 'sources'])
+        writer.writerows(rows)
+    with open(output_dir / 'id_map.csv', 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['source', 'original_id', 'merged_id', 'matched_by'])
+        for i in range(len(records)):
+            writer.writerow([records.sources[records.source[i]], records.oid[i], merged_id[i],
+                             resolver.rule[i] or 'source'])
+
+    print(f"\n{CYAN}Resolved {len(records)} records into {len(rows)} hosts "
+          f"({time.perf_counter() - start:.2f}s){NC}")
+    matched = {rule: resolver.rule.count(rule) for rule in RULES[1:]}
+    print(f"{BLUE}  Matched by " + ', '.join(f'{rule}: {n}' for rule, n in matched.items()) + NC)
+    if resolver.conflicts:
+        with open(output_dir / 'conflicts.csv', 'w', encoding='utf-8', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['rule', 'record', 'other_record', 'differing_key'])
+            for rule, a, b, key in resolver.conflicts:
+                writer.writerow([rule, f'{records.sources[records.source[a]]}:{records.oid[a]}',
+                                 f'{records.sources[records.source[b]]}:{records.oid[b]}', key])
+        print(f"{YELLOW}⚠ {len(resolver.conflicts)} matches refused because a stronger key differs; "
+              f"see {output_dir / 'conflicts.csv'}{NC}")
+    if resolver.skipped_blocks:
+        print(f"{YELLOW}⚠ {resolver.skipped_blocks} hostname blocks over {MAX_BLOCK} records skipped{NC}")
+
+    mapper = IdMapper(records, merged_id)
+    for flag, columns, dedupe in (('--connections', ('source', 'destination'), True),
+                                  ('--threats', ('target',), False)):
+        for filepath in remaps[flag]:
+            output = output_dir / Path(filepath).name
+            written, dropped = remap_csv(filepath, output, columns, mapper, dedupe)
+            note = f", {dropped} duplicates dropped" if dropped else ''
+            print(f"{GREEN}✓ Remapped {filepath} → {output} ({written} rows{note}){NC}")
+    if mapper.ambiguous:
+        print(f"{YELLOW}⚠ {len(mapper.ambiguous)} ids name different hosts in different sources; "
+              f"references resolved to the first source: {', '.join(sorted(mapper.ambiguous)[:5])}{NC}")
+    if mapper.unresolved:
+        print(f"{YELLOW}⚠ {len(mapper.unresolved)} references match no record and were kept as is: "
+              f"{', '.join(sorted(mapper.unresolved)[:5])}{NC}")
+
+    print(f"{GREEN}✓ Wrote {output_dir / 'nodes.csv'} and {output_dir / 'id_map.csv'}{NC}\n")
+
+if __name__ == '__main__':
+    main()
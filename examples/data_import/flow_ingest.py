@@ -0,0 +1,736 @@
+#!/usr/bin/env python3
+"""
+flow_ingest.py - Aggregate flow logs into a connections file
+
+This script streams Zeek conn.log files and NetFlow/IPFIX CSV exports and
+turns them into connections with real traffic figures:
+- flows are aggregated per (source, destination, protocol, port) into
+  flow, byte and packet counts, first/last seen and the peak rate over
+  --interval seconds
+- aggregation uses a hash table of at most --max-edges entries (edges and
+  their per-interval byte counts); when it fills up, it is spilled to hash
+  partitions on disk and each partition is merged separately at the end,
+  so memory stays bounded however many distinct edges the logs hold
+- records may come in any order: the peak is taken over per-interval
+  byte counts once everything is merged
+- the peak rate against --capacity gives the utilization, and both give
+  the connection type: bw_low, bw_medium, bw_high, bw_very_high, or
+  bw_congested above --congested percent
+
+Formats are recognized per file: Zeek TSV (#fields header), Zeek JSON
+(one object per line) and CSV with a header (nfdump -o csv, nfcapd/IPFIX
+exports, AWS VPC flow logs with space separators). Files may be gzipped.
+Endpoints are mapped to node ids through --nodes; addresses not in the
+node file get bulk_ingest.py ids (host_10_0_0_1).
+
+Usage:
+    python3 flow_ingest.py conn.log
+    python3 flow_ingest.py logs/ --nodes nodes.csv --capacity 10000
+    python3 flow_ingest.py flows.csv.gz --format tex --output flows.tex
+"""
+
+import os
+import sys
+import csv
+import gc
+import glob
+import gzip
+import json
+import heapq
+import itertools
+import marshal
+import shutil
+import tempfile
+import time
+import zlib
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime, timezone
+from pathlib import Path
+
+from bulk_ingest import node_id
+from infer_connections import SERVICE_PORTS
+from net_query import tex_ident, tex_text
+
+# ANSI color codes
+GREEN = '\033[0;32m'
+YELLOW = '\033[1;33m'
+BLUE = '\033[0;34m'
+CYAN = '\033[0;36m'
+RED = '\033[0;31m'
+NC = '\033[0m'
+
+FLOW_SUFFIXES = ('.log', '.csv', '.json', '.txt', '.gz')
+
+# CSV header names (lower case, without separators) -> field
+CSV_COLUMNS = {
+    'src': ('sa', 'srcaddr', 'srcip', 'src', 'source', 'ipv4srcaddr', 'ipv6srcaddr',
+            'sourceipv4address', 'sourceipv6address', 'idorigh'),
+    'dst': ('da', 'dstaddr', 'dstip', 'dst', 'destination', 'ipv4dstaddr', 'ipv6dstaddr',
+            'destinationipv4address', 'destinationipv6address', 'idresph'),
+    'sport': ('sp', 'srcport', 'sport', 'l4srcport', 'sourcetransportport', 'idorigp'),
+    'dport': ('dp', 'dstport', 'dport', 'l4dstport', 'destinationtransportport', 'idrespp'),
+    'proto': ('pr', 'proto', 'protocol', 'protocolidentifier'),
+    'bytes': ('ibyt', 'bytes', 'inbytes', 'octets', 'doctets', 'octetdeltacount', 'origipbytes'),
+    'obytes': ('obyt', 'outbytes', 'respipbytes'),
+    'packets': ('ipkt', 'packets', 'inpkts', 'pkts', 'dpkts', 'packetdeltacount', 'origpkts'),
+    'opackets': ('opkt', 'outpkts', 'resppkts'),
+    'start': ('ts', 'start', 'first', 'stime', 'firstswitched', 'flowstartseconds', 'flowstartmilliseconds'),
+    'end': ('te', 'end', 'last', 'etime', 'lastswitched', 'flowendseconds', 'flowendmilliseconds'),
+    'duration': ('td', 'duration', 'dur'),
+}
+
+PROTOCOLS = {'6': 'tcp', '17': 'udp', '1': 'icmp', '58': 'icmp6', '47': 'gre', '50': 'esp', '132': 'sctp'}
+
+# Peak Mbps -> connection type (the ranges of the bw styles in styles_config.tex)
+BANDWIDTH_TYPES = [(1000, 'bw_very_high'), (100, 'bw_high'), (10, 'bw_medium'), (0, 'bw_low')]
+
+DEFAULT_INTERVAL = 60
+DEFAULT_CAPACITY = 1000
+DEFAULT_CONGESTED = 80
+DEFAULT_MAX_EDGES = 1_000_000
+PARTITIONS = 16
+READ_BLOCK = 1 << 22
+
+# Aggregate state: [flows, bytes, packets, first, last, bucket, bucket bytes, service,
+# buckets]. Zeek writes a connection when it closes and NetFlow exporters on
+# their timeouts, so records are not in time order: every --interval bucket
+# of an edge keeps its own byte count ({bucket: bytes}) until all parts of
+# the edge are merged, and the peak is taken at the end. The current bucket
+# is cached in the state, as consecutive records of an edge mostly share
+# it; buckets stays None for edges seen in one bucket only.
+FLOWS, BYTES, PACKETS, FIRST, LAST, BUCKET, BUCKET_BYTES, SERVICE, BUCKETS = range(9)
+
+class FlowAggregator:
+    """Hash aggregation of flows per edge, spilling to disk partitions when full"""
+
+    def __init__(self, interval=DEFAULT_INTERVAL, max_edges=DEFAULT_MAX_EDGES, spill_dir=None):
+        self.interval = interval
+        self.max_edges = max_edges
+        self.spill_dir = spill_dir
+        self.table = {}
+        self.partitions = None
+        # Per-bucket byte counts held besides the edges; they count against max_edges
+        self.entries = 0
+        self.spills = 0
+        self.records = 0
+        self.skipped = 0
+
+    def add(self, key, nbytes, packets, ts, duration, service):
+        """Count one flow; ts and duration in seconds"""
+        interval = self.interval
+        share = nbytes if duration <= interval else nbytes * interval / duration
+        bucket = ts // interval
+        state = self.table.get(key)
+        if state is None:
+            self.table[key] = [1, nbytes, packets, ts, ts + duration, bucket, share, service, None]
+            if len(self.table) + self.entries >= self.max_edges:
+                self.spill()
+            return
+        state[FLOWS] += 1
+        state[BYTES] += nbytes
+        state[PACKETS] += packets
+        if ts < state[FIRST]:
+            state[FIRST] = ts
+        if ts + duration > state[LAST]:
+            state[LAST] = ts + duration
+        if service and not state[SERVICE]:
+            state[SERVICE] = service
+        if bucket == state[BUCKET]:
+            state[BUCKET_BYTES] += share
+        else:
+            buckets = state[BUCKETS]
+            if buckets is None:
+                buckets = state[BUCKETS] = {}
+            previous = buckets.get(state[BUCKET])
+            if previous is None:
+                buckets[state[BUCKET]] = state[BUCKET_BYTES]
+                self.entries += 1
+            else:
+                buckets[state[BUCKET]] = previous + state[BUCKET_BYTES]
+            state[BUCKET] = bucket
+            state[BUCKET_BYTES] = share
+            if len(self.table) + self.entries >= self.max_edges:
+                self.spill()
+
+    @staticmethod
+    def close(state):
+        """Move the current bucket into the buckets, at the end of a range or spill"""
+        buckets = state[BUCKETS] or {}
+        buckets[state[BUCKET]] = buckets.get(state[BUCKET], 0) + state[BUCKET_BYTES]
+        state[BUCKETS], state[BUCKET], state[BUCKET_BYTES] = buckets, None, 0
+        return state
+
+    @staticmethod
+    def merge(state, other):
+        """Combine two closed partial aggregates of the same edge"""
+        state[FLOWS] += other[FLOWS]
+        state[BYTES] += other[BYTES]
+        state[PACKETS] += other[PACKETS]
+        state[FIRST] = min(state[FIRST], other[FIRST])
+        state[LAST] = max(state[LAST], other[LAST])
+        state[SERVICE] = state[SERVICE] or other[SERVICE]
+        buckets = state[BUCKETS]
+        for bucket, nbytes in other[BUCKETS].items():
+            buckets[bucket] = buckets.get(bucket, 0) + nbytes
+
+    def spill(self):
+        """Move the table to the disk partitions, split by key hash"""
+        if self.partitions is None:
+            self.spill_path = tempfile.mkdtemp(prefix='flow_ingest_', dir=self.spill_dir)
+            self.partitions = [open(os.path.join(self.spill_path, f'part{i}'), 'wb') for i in range(PARTITIONS)]
+        chunks = [[] for _ in range(PARTITIONS)]
+        close = self.close
+        for key, state in self.table.items():
+            chunks[partition(key)].append((key, close(state)))
+        for chunk, part in zip(chunks, self.partitions):
+            if chunk:
+                # Length-prefixed: marshal.load() on a file reads in tiny pieces
+                data = marshal.dumps(chunk)
+                part.write(len(data).to_bytes(8, 'little'))
+                part.write(data)
+        self.table = {}
+        self.entries = 0
+        self.spills += 1
+
+    def close_partitions(self):
+        for part in self.partitions or ():
+            part.close()
+
+    def edges(self):
+        """Every (key, state); from the partitions once anything was spilled"""
+        if self.partitions is None:
+            return ((key, self.close(state)) for key, state in self.table.items())
+        self.spill()
+        self.close_partitions()
+        return merge_partitions([self.spill_path])
+
+def partition(key):
+    """Spill partition of an edge; stable across processes, unlike hash()"""
+    return zlib.crc32('\t'.join(key).encode('utf-8', 'replace')) % PARTITIONS
+
+def merge_partitions(spill_paths):
+    """Merge partition i of every spill directory, one partition in memory at a time"""
+    try:
+        for i in range(PARTITIONS):
+            merged = {}
+            for spill_path in spill_paths:
+                with open(os.path.join(spill_path, f'part{i}'), 'rb') as f:
+                    while True:
+                        size = int.from_bytes(f.read(8), 'little')
+                        if not size:
+                            break
+                        for key, state in marshal.loads(f.read(size)):
+                            current = merged.get(key)
+                            if current is None:
+                                merged[key] = state
+                            else:
+                                FlowAggregator.merge(current, state)
+            yield from merged.items()
+    finally:
+        for spill_path in spill_paths:
+            shutil.rmtree(spill_path, ignore_errors=True)
+
+def parse_time(text, cache={}):
+    """Epoch seconds from epoch text (seconds or milliseconds) or an ISO date"""
+    try:
+        value = float(text)
+        return value / 1000 if value > 1e11 else value
+    except ValueError:
+        pass
+    second = text[:19]
+    value = cache.get(second)
+    if value is None:
+        try:
+            value = datetime.fromisoformat(second).replace(tzinfo=timezone.utc).timestamp()
+        except ValueError:
+            value = 0.0
+        if len(cache) > 100_000:
+            cache.clear()
+        cache[second] = value
+    fraction = text[19:]
+    return value + float(fraction) if fraction[:1] == '.' and fraction[1:].isdigit() else value
+
+def number(text):
+    """Counter value; Zeek writes '-' for unset fields"""
+    try:
+        return int(text)
+    except ValueError:
+        try:
+            return int(float(text))
+        except ValueError:
+            return 0
+
+def open_binary(path):
+    return gzip.open(path, 'rb') if path.endswith('.gz') else open(path, 'rb')
+
+def sniff(path):
+    """(format, header, offset of the first record) from the start of a file"""
+    with open_binary(path) as f:
+        offset = 0
+        comments = []
+        for raw in f:
+            line = raw.decode('utf-8', 'replace').rstrip('\r\n')
+            if not line.strip() or line.startswith('#'):
+                comments.append(line)
+                offset += len(raw)
+                continue
+            fields = [c.split('\t')[1:] for c in comments if c.startswith('#fields')]
+            if fields:
+                return 'zeek', {name: i for i, name in enumerate(fields[-1])}, offset
+            if line.lstrip().startswith('{'):
+                return 'zeek-json', None, offset
+            delimiter = ',' if ',' in line else ' '
+            return 'csv', (next(csv.reader([line], delimiter=delimiter)), delimiter), offset + len(raw)
+    return 'empty', None, offset
+
+def split_ranges(path, start, parts):
+    """Byte ranges of a plain file from start, cut at line ends"""
+    size = os.path.getsize(path)
+    if parts <= 1 or path.endswith('.gz') or size - start < READ_BLOCK:
+        return [(start, None)]
+    cuts = [start]
+    with open(path, 'rb') as f:
+        for i in range(1, parts):
+            f.seek(start + (size - start) * i // parts)
+            f.readline()
+            if f.tell() > cuts[-1] and f.tell() < size:
+                cuts.append(f.tell())
+    cuts.append(None)
+    return list(zip(cuts, cuts[1:]))
+
+def line_blocks(path, start, end):
+    """Lists of lines (without line ends) from start to end (None: end of file)"""
+    with open_binary(path) as f:
+        if start:
+            f.seek(start)
+        remaining = float('inf') if end is None else end - start
+        while remaining > 0:
+            block = f.read(int(min(READ_BLOCK, remaining)))
+            if not block:
+                break
+            remaining -= len(block)
+            if block[-1:] != b'\n' and remaining > 0:
+                tail = f.readline()
+                remaining -= len(tail)
+                block += tail
+            lines = block.decode('utf-8', 'replace').split('\n')
+            if lines[-1] == '':
+                lines.pop()
+            yield lines
+
+def aggregate_zeek(blocks, fields, aggregator):
+    """Zeek conn.log in its native tab-separated format"""
+    try:
+        ts_i, src_i, dst_i, port_i = fields['ts'], fields['id.orig_h'], fields['id.resp_h'], fields['id.resp_p']
+        proto_i, dur_i = fields['proto'], fields['duration']
+        ob_i = fields.get('orig_ip_bytes', fields.get('orig_bytes'))
+        rb_i = fields.get('resp_ip_bytes', fields.get('resp_bytes'))
+    except KeyError as e:
+        raise ValueError(f'no {e.args[0]} field in the #fields header')
+    if ob_i is None or rb_i is None:
+        raise ValueError('no orig_bytes/resp_bytes fields')
+    service_i = fields.get('service')
+    op_i, rp_i = fields.get('orig_pkts'), fields.get('resp_pkts')
+    if op_i is None or rp_i is None:
+        op_i = rp_i = None
+    width = max(fields.values()) + 1
+    # add() inlined: this loop runs once per flow record
+    interval, table, max_edges = aggregator.interval, aggregator.table, aggregator.max_edges
+    count = skipped = 0
+    entries = aggregator.entries
+    for lines in blocks:
+        for line in lines:
+            row = line.split('\t')
+            if len(row) < width:
+                if line[:1] != '#' and line.strip():
+                    skipped += 1
+                continue
+            try:
+                nbytes = int(row[ob_i]) + int(row[rb_i])
+                packets = int(row[op_i]) + int(row[rp_i]) if op_i is not None else 0
+                ts, duration = float(row[ts_i]), float(row[dur_i])
+            except ValueError:
+                # Unset fields ('-'), e.g. the duration of unanswered connections
+                try:
+                    ts = float(row[ts_i])
+                    duration = float(row[dur_i]) if row[dur_i] != '-' else 0.0
+                except ValueError:
+                    skipped += 1
+                    continue
+                nbytes = number(row[ob_i]) + number(row[rb_i])
+                packets = number(row[op_i]) + number(row[rp_i]) if op_i is not None else 0
+            count += 1
+            share = nbytes if duration <= interval else nbytes * interval / duration
+            bucket = ts // interval
+            key = (row[src_i], row[dst_i], row[proto_i], row[port_i])
+            state = table.get(key)
+            if state is None:
+                service = row[service_i] if service_i is not None else '-'
+                table[key] = [1, nbytes, packets, ts, ts + duration, bucket, share,
+                              service if service != '-' else '', None]
+                if len(table) + entries >= max_edges:
+                    aggregator.spill()
+                    table, entries = aggregator.table, 0
+                continue
+            state[FLOWS] += 1
+            state[BYTES] += nbytes
+            state[PACKETS] += packets
+            if ts < state[FIRST]:
+                state[FIRST] = ts
+            if ts + duration > state[LAST]:
+                state[LAST] = ts + duration
+            if bucket == state[BUCKET]:
+                state[BUCKET_BYTES] += share
+            else:
+                buckets = state[BUCKETS]
+                if buckets is None:
+                    buckets = state[BUCKETS] = {}
+                previous = buckets.get(state[BUCKET])
+                if previous is None:
+                    buckets[state[BUCKET]] = state[BUCKET_BYTES]
+                    entries += 1
+                else:
+                    buckets[state[BUCKET]] = previous + state[BUCKET_BYTES]
+                state[BUCKET] = bucket
+                state[BUCKET_BYTES] = share
+                if len(table) + entries >= max_edges:
+                    aggregator.spill()
+                    table, entries = aggregator.table, 0
+    aggregator.entries = entries
+    aggregator.records += count
+    aggregator.skipped += skipped
+
+def aggregate_zeek_json(blocks, _, aggregator):
+    """Zeek conn.log written with LogAscii::use_json"""
+    add = aggregator.add
+    count = 0
+    for lines in blocks:
+        for line in lines:
+            try:
+                row = json.loads(line)
+                nbytes = (row.get('orig_ip_bytes', row.get('orig_bytes')) or 0) + \
+                    (row.get('resp_ip_bytes', row.get('resp_bytes')) or 0)
+                ts = row['ts']
+                add((row['id.orig_h'], row['id.resp_h'], row.get('proto', ''), str(row['id.resp_p'])),
+                    int(nbytes), int((row.get('orig_pkts') or 0) + (row.get('resp_pkts') or 0)),
+                    ts if isinstance(ts, (int, float)) else parse_time(ts),
+                    float(row.get('duration') or 0), row.get('service') or '')
+                count += 1
+            except (ValueError, KeyError, TypeError):
+                if line.strip():
+                    aggregator.skipped += 1
+    aggregator.records += count
+
+def column_index(header):
+    """CSV header -> {field: position} using the CSV_COLUMNS aliases"""
+    names = {''.join(c for c in name.lower() if c.isalnum()): i for i, name in enumerate(header)}
+    index = {}
+    for field, aliases in CSV_COLUMNS.items():
+        for alias in aliases:
+            if alias in names:
+                index[field] = names[alias]
+                break
+    missing = [field for field in ('src', 'dst', 'bytes') if field not in index]
+    if missing:
+        raise ValueError(f"no {', '.join(missing)} column in header")
+    return index
+
+def aggregate_csv(blocks, header, aggregator):
+    """NetFlow/IPFIX CSV exports (nfdump -o csv and similar) and AWS VPC flow logs"""
+    header, delimiter = header
+    index = column_index(header)
+    add = aggregator.add
+    src_i, dst_i, bytes_i = index['src'], index['dst'], index['bytes']
+    get = {field: index.get(field) for field in CSV_COLUMNS}
+    sport_i, dport_i, proto_i = get['sport'], get['dport'], get['proto']
+    obytes_i, packets_i, opackets_i = get['obytes'], get['packets'], get['opackets']
+    start_i, end_i, dur_i = get['start'], get['end'], get['duration']
+    width = max(index.values()) + 1
+    protocols = PROTOCOLS
+    count = 0
+    for row in csv.reader(itertools.chain.from_iterable(blocks), delimiter=delimiter):
+        if len(row) < width:
+            if row and row[0] == 'Summary':
+                break  # nfdump appends totals after the records
+            if row and not row[0].startswith('#'):
+                aggregator.skipped += 1
+            continue
+        try:
+            src, dst = row[src_i].strip(), row[dst_i].strip()
+            sport = row[sport_i].strip() if sport_i is not None else ''
+            dport = row[dport_i].strip() if dport_i is not None else ''
+            proto = row[proto_i].strip().lower() if proto_i is not None else ''
+            proto = protocols.get(proto, proto)
+            nbytes = number(row[bytes_i]) + (number(row[obytes_i]) if obytes_i is not None else 0)
+            packets = (number(row[packets_i]) if packets_i is not None else 0) + \
+                (number(row[opackets_i]) if opackets_i is not None else 0)
+            start = parse_time(row[start_i].strip()) if start_i is not None else 0.0
+            if dur_i is not None:
+                duration = float(row[dur_i] or 0)
+            elif end_i is not None:
+                duration = max(0.0, parse_time(row[end_i].strip()) - start)
+            else:
+                duration = 0.0
+        except ValueError:
+            aggregator.skipped += 1
+            continue
+        # Unidirectional records of a reply: turn them round so the
+        # edge points at the service port
+        if sport.isdigit() and dport.isdigit() and int(sport) < 1024 <= int(dport):
+            src, dst, dport = dst, src, sport
+        add((src, dst, proto, dport), nbytes, packets, start, duration, '')
+        count += 1
+    aggregator.records += count
+
+READERS = {'zeek': aggregate_zeek, 'zeek-json': aggregate_zeek_json, 'csv': aggregate_csv}
+
+def aggregate_range(path, kind, header, start, end, interval, max_edges, spill_dir):
+    """Worker: aggregate one byte range into its own spill partitions"""
+    aggregator = FlowAggregator(interval, max_edges, spill_dir)
+    # Aggregate states are never cyclic; the cycle collector only costs time here
+    gc.disable()
+    READERS[kind](line_blocks(path, start, end), header, aggregator)
+    aggregator.spill()
+    aggregator.close_partitions()
+    return aggregator.records, aggregator.skipped, aggregator.spills - 1, aggregator.spill_path
+
+def expand_inputs(patterns):
+    """Flow files named by directories, glob patterns or paths, sorted"""
+    files = set()
+    for pattern in patterns:
+        path = Path(pattern)
+        if path.is_dir():
+            files.update(str(p) for p in path.rglob('*') if p.is_file() and p.suffix.lower() in FLOW_SUFFIXES)
+        elif path.is_file():
+            files.add(str(path))
+        else:
+            files.update(p for p in glob.glob(pattern, recursive=True) if os.path.isfile(p))
+    return sorted(files)
+
+def load_node_ids(filepath):
+    """ip -> node id from a nodes CSV"""
+    ids = {}
+    with open(filepath, 'r', encoding='utf-8') as f:
+        for row in csv.DictReader(f):
+            ip, node = (row.get('ip') or '').strip(), (row.get('id') or '').strip()
+            if ip and node:
+                ids.setdefault(ip, node)
+    return ids
+
+def connection_type(mbps, utilization, congested):
+    if utilization >= congested:
+        return 'bw_congested'
+    for limit, conn_type in BANDWIDTH_TYPES:
+        if mbps >= limit:
+            return conn_type
+    return 'bw_low'
+
+class ConnectionWriter:
+    """Edges -> connection rows, resolving endpoints to node ids"""
+
+    def __init__(self, interval, capacity, congested, node_ids=None, known_only=False):
+        self.interval = interval
+        self.capacity = capacity
+        self.congested = congested
+        self.node_ids = node_ids
+        self.known_only = known_only
+        self.unknown = set()
+        self.dropped = 0
+        self.types = {}
+
+    def endpoint(self, ip):
+        if self.node_ids is not None:
+            node = self.node_ids.get(ip)
+            if node is not None:
+                return node
+            self.unknown.add(ip)
+            if self.known_only:
+                return None
+        return node_id(ip)
+
+    def rows(self, edges):
+        for (src, dst, proto, port), state in edges:
+            source, destination = self.endpoint(src), self.endpoint(dst)
+            if source is None or destination is None:
+                self.dropped += 1
+                continue
+            peak = max(state[BUCKETS].values())
+            mbps = peak * 8 / self.interval / 1e6
+            utilization = round(100 * mbps / self.capacity)
+            conn_type = connection_type(mbps, utilization, self.congested)
+            self.types[conn_type] = self.types.get(conn_type, 0) + 1
+            service = state[SERVICE] or (SERVICE_PORTS[port][1] if port in SERVICE_PORTS else '')
+            label = service or (f'{proto}/{port}' if port else proto)
+            yield (source, destination, label, conn_type, port, proto, f'{mbps:.2f}', utilization,
+                   state[FLOWS], state[BYTES], state[PACKETS], int(state[FIRST]), int(state[LAST]))
+
+COLUMNS = ['source', 'destination', 'label', 'type', 'port', 'protocol', 'bandwidth', 'utilization',
+           'flows', 'bytes', 'packets', 'first_seen', 'last_seen']
+
+def write_csv(filepath, rows):
+    count = 0
+    with open(filepath, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(COLUMNS)
+        for row in rows:
+            writer.writerow(row)
+            count += 1
+    return count
+
+def write_tex(filepath, rows):
+    lines = ['% Generated by flow_ingest.py - do not edit by hand',
+             '% \\drawConnectionWithUtilization{source}{destination}{peak Mbps}{utilization %}{label}']
+    for source, destination, label, _, _, _, mbps, utilization, *_ in rows:
+        lines.append(f'\\drawConnectionWithUtilization{{{tex_ident(source)}}}{{{tex_ident(destination)}}}'
+                     f'{{{mbps}}}{{{utilization}}}{{{tex_text(label)}}}')
+    lines.append('\\endinput')
+    Path(filepath).write_text('\n'.join(lines) + '\n', encoding='utf-8')
+    return len(lines) - 3
+
+def main():
+    """Main flow ingestion function"""
+    args = sys.argv[1:]
+    if not args or '--help' in args or '-h' in args:
+        print("Usage: python3 flow_ingest.py <file|directory|glob>... [options]")
+        print("")
+        print("Options:")
+        print("  --output FILE       Output file (default: flow_connections.csv, or .tex)")
+        print("  --format FMT        csv (default, for \\importConnectionsFromCSV) or tex")
+        print("                      (\\drawConnectionWithUtilization lines)")
+        print("  --nodes FILE        Map addresses to the ids of a nodes CSV")
+        print("  --known-only        Drop edges with an endpoint missing from --nodes")
+        print(f"  --interval SEC      Window of the peak rate (default: {DEFAULT_INTERVAL})")
+        print(f"  --capacity MBPS     Link capacity for utilization (default: {DEFAULT_CAPACITY})")
+        print(f"  --congested PCT     Utilization typed bw_congested (default: {DEFAULT_CONGESTED})")
+        print("  --min-bytes N       Drop edges with fewer bytes")
+        print("  --top N             Keep the N edges with the most bytes")
+        print(f"  --max-edges N       Edges and interval counts held in memory before spilling (default: {DEFAULT_MAX_EDGES})")
+        print("  --spill-dir DIR     Directory for spill files (default: system temp)")
+        print("  --workers N         Processes; large files are split by byte range (default: 1)")
+        sys.exit(1)
+
+    known_only = '--known-only' in args
+    if known_only:
+        args.remove('--known-only')
+    options = {'--output': None, '--format': 'csv', '--nodes': None,
+               '--interval': str(DEFAULT_INTERVAL), '--capacity': str(DEFAULT_CAPACITY),
+               '--congested': str(DEFAULT_CONGESTED), '--min-bytes': '0', '--top': '0',
+               '--max-edges': str(DEFAULT_MAX_EDGES), '--spill-dir': None, '--workers': '1'}
+    for flag in options:
+        if flag in args:
+            index = args.index(flag)
+            if index + 1 >= len(args):
+                print(f"{RED}Error: {flag} requires a value{NC}")
+                sys.exit(1)
+            options[flag] = args[index + 1]
+            del args[index:index + 2]
+    if options['--format'] not in ('csv', 'tex'):
+        print(f"{RED}Error: --format must be csv or tex{NC}")
+        sys.exit(1)
+    try:
+        interval, capacity = float(options['--interval']), float(options['--capacity'])
+        congested, min_bytes = float(options['--congested']), int(options['--min-bytes'])
+        top, max_edges = int(options['--top']), int(options['--max-edges'])
+        workers = max(1, int(options['--workers']))
+    except ValueError:
+        print(f"{RED}Error: --interval, --capacity, --congested, --min-bytes, --top, --max-edges "
+              f"and --workers take numbers{NC}")
+        sys.exit(1)
+    if interval <= 0 or capacity <= 0 or max_edges <= 0:
+        print(f"{RED}Error: --interval, --capacity and --max-edges must be positive{NC}")
+        sys.exit(1)
+    files = expand_inputs(args)
+    if not files:
+        print(f"{RED}✗ No flow files found{NC}")
+        sys.exit(1)
+    if options['--nodes'] and not Path(options['--nodes']).exists():
+        print(f"{RED}✗ File not found: {options['--nodes']}{NC}")
+        sys.exit(1)
+    output = options['--output'] or f"flow_connections.{options['--format']}"
+
+    print(f"{BLUE}{'='*60}{NC}")
+    print(f"{BLUE}Flow Log Ingestion{NC}")
+    print(f"{BLUE}{'='*60}{NC}\n")
+
+    start = time.perf_counter()
+    aggregator = FlowAggregator(interval, max_edges, options['--spill-dir'])
+    tasks = []
+    gc.disable()
+    for path in files:
+        try:
+            kind, header, offset = sniff(path)
+            if kind == 'csv':
+                column_index(header[0])
+        except (OSError, ValueError) as e:
+            print(f"{RED}✗ {path}: {e}{NC}")
+            continue
+        if kind == 'empty':
+            print(f"{YELLOW}⚠ {path}: no flow records{NC}")
+            continue
+        if workers == 1:
+            before = aggregator.records
+            try:
+                READERS[kind](line_blocks(path, offset, None), header, aggregator)
+            except (OSError, ValueError) as e:
+                print(f"{RED}✗ {path}: {e}{NC}")
+                continue
+            print(f"{GREEN}✓ {path} ({kind}): {aggregator.records - before} flows{NC}")
+        else:
+            tasks.extend((path, kind, header, first, last) for first, last in split_ranges(path, offset, workers))
+
+    records, skipped, spills = aggregator.records, aggregator.skipped, aggregator.spills
+    if tasks:
+        spill_paths = []
+        per_file = {}
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {pool.submit(aggregate_range, path, kind, header, first, last, interval,
+                                   max(1, max_edges // workers), options['--spill-dir']): (path, kind)
+                       for path, kind, header, first, last in tasks}
+            for future in as_completed(futures):
+                path, kind = futures[future]
+                try:
+                    task_records, task_skipped, task_spills, spill_path = future.result()
+                except (OSError, ValueError) as e:
+                    print(f"{RED}✗ {path}: {e}{NC}")
+                    continue
+                records, skipped, spills = records + task_records, skipped + task_skipped, spills + task_spills
+                spill_paths.append(spill_path)
+                per_file[path, kind] = per_file.get((path, kind), 0) + task_records
+        for (path, kind), count in sorted(per_file.items()):
+            print(f"{GREEN}✓ {path} ({kind}): {count} flows{NC}")
+        edges = merge_partitions(spill_paths)
+    else:
+        edges = aggregator.edges()
+    read_time = time.perf_counter() - start
+    rate = records / read_time if read_time else 0
+    print(f"{CYAN}  {records} flows in {read_time:.2f}s ({rate / 1e6:.2f}M flows/s, "
+          f"{workers} worker{'s' if workers > 1 else ''}){NC}")
+    if skipped:
+        print(f"{YELLOW}⚠ Skipped {skipped} malformed records{NC}")
+    if spills:
+        print(f"{CYAN}  Spilled to disk {spills} times (--max-edges {max_edges}){NC}")
+
+    writer = ConnectionWriter(interval, capacity, congested,
+                              load_node_ids(options['--nodes']) if options['--nodes'] else None, known_only)
+    if min_bytes:
+        edges = ((key, state) for key, state in edges if state[BYTES] >= min_bytes)
+    if top:
+        edges = heapq.nlargest(top, edges, key=lambda edge: edge[1][BYTES])
+    rows = writer.rows(edges)
+    if options['--format'] == 'tex':
+        count = write_tex(output, rows)
+    else:
+        count = write_csv(output, rows)
+    gc.enable()
+    elapsed = time.perf_counter() - start
+
+    print(f"{GREEN}✓ {count} connections in {elapsed:.2f}s{NC}")
+    for conn_type, type_count in sorted(writer.types.items(), key=lambda item: -item[1]):
+        print(f"{BLUE}  {conn_type:14} {type_count}{NC}")
+    if writer.unknown:
+        action = 'dropped' if known_only else 'given host_ ids'
+        print(f"{YELLOW}⚠ {len(writer.unknown)} addresses not in {options['--nodes']} ({action}){NC}")
+    print(f"{BLUE}  Connections written to: {output}{NC}\n")
+
+if __name__ == '__main__':
+    main()
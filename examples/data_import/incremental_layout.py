@@ -0,0 +1,357 @@
+#!/usr/bin/env python3
+"""
+incremental_layout.py - Stable, incremental node positioning
+
+This script assigns x,y coordinates to nodes and remembers them in a
+state file. On the next run only new or changed nodes (and their
+immediate neighbourhood) are re-placed; every other node keeps its
+previous position, so successive diagrams stay comparable.
+
+A node counts as changed when its type, IP, label or set of neighbours
+differs from the previous run. Nodes that already carry x,y in the input
+CSV are treated as pinned and never moved.
+
+Usage:
+    python3 incremental_layout.py nodes.csv connections.csv
+    python3 incremental_layout.py nodes.csv connections.csv --state layout_state.json
+    python3 incremental_layout.py nodes.csv connections.csv --full
+"""
+
+import sys
+import csv
+import json
+import math
+import time
+import zlib
+from pathlib import Path
+
+# ANSI color codes
+GREEN = '\033[0;32m'
+YELLOW = '\033[1;33m'
+BLUE = '\033[0;34m'
+RED = '\033[0;31m'
+NC = '\033[0m'
+
+# Ideal distance between connected nodes (matches \calcNextGridPosition spacing)
+SPACING = 3.0
+
+# Columns written first by write_nodes_csv; any other input column follows them
+LAYOUT_COLUMNS = ('id', 'type', 'ip', 'x', 'y', 'label')
+
+class IncrementalLayout:
+    """Force-directed layout that only moves what changed"""
+
+    def __init__(self, spacing=SPACING):
+        self.spacing = spacing
+        self.nodes = {}
+        self.order = []
+        self.neighbors = {}
+        self.pinned = set()
+        self.positions = {}
+        self.previous = {}
+        self.extra_columns = []
+
+    def load_nodes_csv(self, filepath):
+        """Load nodes from CSV (x,y columns optional)"""
+        with open(filepath, 'r', encoding='utf-8') as f:
+            reader = csv.DictReader(f)
+            for name in reader.fieldnames or []:
+                if name not in LAYOUT_COLUMNS and name not in self.extra_columns:
+                    self.extra_columns.append(name)
+            for row in reader:
+                node_id = row.get('id', '').strip()
+                if not node_id or node_id in self.nodes:
+                    continue
+                self.nodes[node_id] = row
+                self.order.append(node_id)
+                self.neighbors[node_id] = set()
+                try:
+                    x = float(row.get('x') or '')
+                    y = float(row.get('y') or '')
+                except ValueError:
+                    continue
+                self.pinned.add(node_id)
+                self.positions[node_id] = (x, y)
+
+    def load_connections_csv(self, filepath):
+        """Load connections from CSV"""
+        with open(filepath, 'r', encoding='utf-8') as f:
+            reader = csv.DictReader(f)
+            for row in reader:
+                source = row.get('source', '').strip()
+                dest = row.get('destination', '').strip()
+                if source in self.nodes and dest in self.nodes and source != dest:
+                    self.neighbors[source].add(dest)
+                    self.neighbors[dest].add(source)
+
+    def load_state(self, filepath):
+        """Load positions and signatures from a previous run"""
+        with open(filepath, 'r', encoding='utf-8') as f:
+            state = json.load(f)
+        self.previous = state.get('nodes', {})
+
+    def save_state(self, filepath):
+        """Save positions and signatures for the next run"""
+        state = {
+            'version': 1,
+            'spacing': self.spacing,
+            'nodes': {
+                node_id: {
+                    'x': round(self.positions[node_id][0], 2),
+                    'y': round(self.positions[node_id][1], 2),
+                    'signature': self.signature(node_id),
+                }
+                for node_id in self.order
+            },
+        }
+        with open(filepath, 'w', encoding='utf-8') as f:
+            json.dump(state, f, indent=1)
+
+    def signature(self, node_id):
+        """Fingerprint of everything that should trigger re-placement"""
+        row = self.nodes[node_id]
+        text = '|'.join([
+            row.get('type', '').strip(),
+            row.get('ip', '').strip(),
+            row.get('label', '').strip(),
+            ','.join(sorted(self.neighbors[node_id])),
+        ])
+        return format(zlib.crc32(text.encode('utf-8')), '08x')
+
+    def diff(self):
+        """Return (added, changed, removed) node ids against the previous run"""
+        added = []
+        changed = []
+        for node_id in self.order:
+            old = self.previous.get(node_id)
+            if old is None:
+                added.append(node_id)
+            elif old.get('signature') != self.signature(node_id):
+                changed.append(node_id)
+        removed = [node_id for node_id in self.previous if node_id not in self.nodes]
+        return added, changed, removed
+
+    def active_set(self, seeds, radius=1):
+        """Seeds plus every node within radius hops of them"""
+        active = set(seeds)
+        frontier = set(seeds)
+        for _ in range(radius):
+            next_frontier = set()
+            for node_id in frontier:
+                next_frontier.update(self.neighbors[node_id])
+            next_frontier -= active
+            active |= next_frontier
+            frontier = next_frontier
+        return active - self.pinned
+
+    def seed_positions(self, full=False):
+        """Reuse previous positions and give new nodes a starting point"""
+        for node_id in self.order:
+            if node_id in self.pinned:
+                continue
+            old = self.previous.get(node_id)
+            if old is not None and not full:
+                self.positions[node_id] = (old['x'], old['y'])
+
+        unplaced = [n for n in self.order if n not in self.positions]
+        if not unplaced:
+            return
+
+        # New nodes start at the centroid of their placed neighbours,
+        # spread by a small deterministic offset so they do not coincide
+        orphans = []
+        for node_id in unplaced:
+            placed = [self.positions[n] for n in self.neighbors[node_id]
+                      if n in self.positions]
+            if not placed:
+                orphans.append(node_id)
+                continue
+            cx = sum(p[0] for p in placed) / len(placed)
+            cy = sum(p[1] for p in placed) / len(placed)
+            angle = (zlib.crc32(node_id.encode('utf-8')) % 360) * math.pi / 180
+            self.positions[node_id] = (cx + math.cos(angle) * self.spacing,
+                                       cy + math.sin(angle) * self.spacing)
+
+        # Unconnected new nodes go on a grid below the existing drawing
+        if orphans:
+            if self.positions:
+                min_x = min(p[0] for p in self.positions.values())
+                min_y = min(p[1] for p in self.positions.values())
+                top = min_y - self.spacing
+            else:
+                min_x = 0.0
+                top = 0.0
+            columns = max(4, int(math.ceil(math.sqrt(len(orphans)))))
+            for i, node_id in enumerate(orphans):
+                self.positions[node_id] = (min_x + (i % columns) * self.spacing,
+                                           top - (i // columns) * self.spacing)
+
+    def relax(self, active, max_iterations=300, tolerance=0.01):
+        """Fruchterman-Reingold iterations moving only the active nodes
+
+        Repulsion is limited to nodes within two spacings, found through
+        a uniform grid, so each iteration costs O(active) rather than O(n^2).
+        Returns (iterations, converged).
+        """
+        if not active:
+            return 0, True
+
+        k = self.spacing
+        cutoff = 2 * k
+        cutoff_sq = cutoff * cutoff
+        positions = self.positions
+
+        grid = {}
+        for node_id, (x, y) in positions.items():
+            grid.setdefault((int(x // cutoff), int(y // cutoff)), []).append(node_id)
+
+        temperature = k
+        active = sorted(active)
+        for iteration in range(1, max_iterations + 1):
+            max_move = 0.0
+            for node_id in active:
+                x, y = positions[node_id]
+                fx = fy = 0.0
+                cx, cy = int(x // cutoff), int(y // cutoff)
+                for gx in (cx - 1, cx, cx + 1):
+                    for gy in (cy - 1, cy, cy + 1):
+                        for other in grid.get((gx, gy), ()):
+                            if other == node_id:
+                                continue
+                            ox, oy = positions[other]
+                            dx, dy = x - ox, y - oy
+                            dist_sq = dx * dx + dy * dy
+                            if dist_sq >= cutoff_sq:
+                                continue
+                            if dist_sq < 1e-9:
+                                dx, dy, dist_sq = 0.01, 0.0, 1e-4
+                            force = k * k / dist_sq
+                            fx += dx * force
+                            fy += dy * force
+                for other in self.neighbors[node_id]:
+                    ox, oy = positions[other]
+                    dx, dy = x - ox, y - oy
+                    dist = math.sqrt(dx * dx + dy * dy)
+                    force = dist / k
+                    fx -= dx * force
+                    fy -= dy * force
+
+                length = math.sqrt(fx * fx + fy * fy)
+                if length == 0.0:
+                    continue
+                step = min(length, temperature)
+                nx = x + fx / length * step
+                ny = y + fy / length * step
+
+                old_cell = (cx, cy)
+                new_cell = (int(nx // cutoff), int(ny // cutoff))
+                if new_cell != old_cell:
+                    grid[old_cell].remove(node_id)
+                    grid.setdefault(new_cell, []).append(node_id)
+                positions[node_id] = (nx, ny)
+                max_move = max(max_move, step)
+
+            temperature *= 0.95
+            if max_move < tolerance * k:
+                return iteration, True
+        return max_iterations, False
+
+    def write_nodes_csv(self, filepath):
+        """Write nodes with coordinates for \\importNodesFromCSV
+
+        Input columns other than LAYOUT_COLUMNS (ports, zone, ...) are
+        carried through unchanged after the layout columns.
+        """
+        with open(filepath, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(list(LAYOUT_COLUMNS) + self.extra_columns)
+            for node_id in self.order:
+                row = self.nodes[node_id]
+                x, y = self.positions[node_id]
+                writer.writerow([node_id, row.get('type', '').strip(),
+                                 row.get('ip', '').strip(),
+                                 f'{round(x, 2):.2f}', f'{round(y, 2):.2f}',
+                                 row.get('label', '').strip()]
+                                + [row.get(name) or '' for name in self.extra_columns])
+
+def main():
+    """Main incremental layout function"""
+    if len(sys.argv) < 2:
+        print("Usage: python3 incremental_layout.py <nodes.csv> [connections.csv] [options]")
+        print("")
+        print("Examples:")
+        print("  python3 incremental_layout.py nodes-simple.csv connections.csv")
+        print("  python3 incremental_layout.py nodes.csv connections.csv --full")
+        print("")
+        print("Options:")
+        print("  --state FILE     Layout state file (default: layout_state.json)")
+        print("  --output FILE    Positioned nodes CSV (default: nodes_layout.csv)")
+        print("  --radius N       Neighbourhood hops re-placed around changes (default: 1)")
+        print("  --full           Ignore the saved state and lay out everything")
+        sys.exit(1)
+
+    args = sys.argv[1:]
+    options = {'--state': 'layout_state.json', '--output': 'nodes_layout.csv', '--radius': '1'}
+    for flag in options:
+        if flag in args:
+            index = args.index(flag)
+            if index + 1 >= len(args):
+                print(f"{RED}Error: {flag} requires a value{NC}")
+                sys.exit(1)
+            options[flag] = args[index + 1]
+            del args[index:index + 2]
+    full = '--full' in args
+    input_files = [a for a in args if not a.startswith('--')]
+
+    for filepath in input_files:
+        if not Path(filepath).exists():
+            print(f"{RED}✗ File not found: {filepath}{NC}")
+            sys.exit(1)
+
+    print(f"{BLUE}{'='*60}{NC}")
+    print(f"{BLUE}Incremental Layout{NC}")
+    print(f"{BLUE}{'='*60}{NC}\n")
+
+    layout = IncrementalLayout()
+    layout.load_nodes_csv(input_files[0])
+    if len(input_files) > 1:
+        layout.load_connections_csv(input_files[1])
+
+    state_file = options['--state']
+    if not full and Path(state_file).exists():
+        try:
+            layout.load_state(state_file)
+            print(f"{GREEN}✓ Loaded previous layout: {state_file}{NC}")
+        except (ValueError, OSError) as e:
+            print(f"{YELLOW}⚠ Ignoring unreadable state file ({e}), doing a full layout{NC}")
+            full = True
+    else:
+        full = True
+
+    start = time.perf_counter()
+    added, changed, removed = layout.diff()
+    if full:
+        seeds = [n for n in layout.order if n not in layout.pinned]
+    else:
+        seeds = added + changed
+    layout.seed_positions(full)
+    active = layout.active_set(seeds, radius=int(options['--radius']))
+    iterations, converged = layout.relax(active)
+    elapsed = time.perf_counter() - start
+
+    layout.write_nodes_csv(options['--output'])
+    layout.save_state(state_file)
+
+    print(f"{BLUE}  Nodes: {len(layout.order)} "
+          f"({len(layout.pinned)} pinned){NC}")
+    print(f"{BLUE}  Added: {len(added)}  Changed: {len(changed)}  Removed: {len(removed)}{NC}")
+    print(f"{BLUE}  Re-placed: {len(active)} nodes in {iterations} iterations "
+          f"({elapsed:.3f}s){NC}")
+    if not converged:
+        print(f"{YELLOW}  ⚠ Layout did not fully converge; run again to refine{NC}")
+    print(f"{GREEN}✓ Positions written to: {options['--output']}{NC}")
+    print(f"{GREEN}✓ State saved to: {state_file}{NC}")
+    print(f"{YELLOW}  Usage: \\importNodesFromCSV{{{options['--output']}}}{NC}\n")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,343 @@
+#!/usr/bin/env python3
+"""
+infer_connections.py - Infer probable connections from open ports
+
+Scan-derived node lists (nmap, Nessus, bulk_ingest.py) have hosts and
+ports but no edges. This script adds the connections the services imply:
+- every host is put in role buckets from a port -> service table (web,
+  app, db, cache, mq, mail, dns, directory, file, proxy, logging) and
+  from its node type (clients, load balancers, databases)
+- tier rules such as app -> db and client -> dns connect the buckets,
+  subnet by subnet: same subnet first, then the same site (/16), and
+  shared services (dns, directory, mail, proxy, logging) across sites
+- each source gets at most --fanout targets per rule and each target at
+  most --max-in sources of a role, so work stays linear in the number of hosts
+- each edge has a confidence: the rule's base confidence, lowered for
+  other subnets; the pool size does not lower it, since --fanout and
+  --max-in already bound how many edges a large pool yields
+
+The connections file has a type column for \\createConnectionFromType
+(encrypted for TLS/SSH ports, normal otherwise); --format tex writes the
+\\createConnectionFromType lines directly.
+
+Usage:
+    python3 infer_connections.py nodes.csv
+    python3 infer_connections.py nodes.csv --known connections.csv --min-confidence 0.3
+    python3 infer_connections.py nodes.csv --format tex --output inferred_connections.tex
+"""
+
+import sys
+import csv
+import time
+import zlib
+from collections import Counter
+from pathlib import Path
+
+from threat_scoring import normalize_type
+from ip_utils import ip_value, subnet_value
+from net_query import tex_ident, tex_text
+
+# ANSI color codes
+GREEN = '\033[0;32m'
+YELLOW = '\033[1;33m'
+BLUE = '\033[0;34m'
+CYAN = '\033[0;36m'
+RED = '\033[0;31m'
+NC = '\033[0m'
+
+# Port -> (role, service name)
+SERVICE_PORTS = {
+    '80': ('web', 'HTTP'), '443': ('web', 'HTTPS'), '8080': ('web', 'HTTP-alt'),
+    '8443': ('web', 'HTTPS-alt'), '8000': ('web', 'HTTP-alt'),
+    '3000': ('app', 'App'), '5000': ('app', 'App'), '8009': ('app', 'AJP'),
+    '8081': ('app', 'App'), '9000': ('app', 'App'), '50051': ('app', 'gRPC'),
+    '3306': ('db', 'MySQL'), '5432': ('db', 'PostgreSQL'), '1433': ('db', 'MSSQL'),
+    '1521': ('db', 'Oracle'), '27017': ('db', 'MongoDB'), '9042': ('db', 'Cassandra'),
+    '6379': ('cache', 'Redis'), '11211': ('cache', 'Memcached'),
+    '5672': ('mq', 'AMQP'), '5671': ('mq', 'AMQPS'), '9092': ('mq', 'Kafka'),
+    '61616': ('mq', 'ActiveMQ'), '1883': ('mq', 'MQTT'),
+    '25': ('mail', 'SMTP'), '465': ('mail', 'SMTPS'), '587': ('mail', 'Submission'),
+    '143': ('mail', 'IMAP'), '993': ('mail', 'IMAPS'), '110': ('mail', 'POP3'),
+    '995': ('mail', 'POP3S'),
+    '53': ('dns', 'DNS'),
+    '389': ('directory', 'LDAP'), '636': ('directory', 'LDAPS'), '88': ('directory', 'Kerberos'),
+    '3268': ('directory', 'Global Catalog'),
+    '445': ('file', 'SMB'), '2049': ('file', 'NFS'), '139': ('file', 'NetBIOS'),
+    '3128': ('proxy', 'Proxy'), '8888': ('proxy', 'Proxy'),
+    '514': ('logging', 'Syslog'), '6514': ('logging', 'Syslog-TLS'), '9200': ('logging', 'Elasticsearch'),
+}
+
+# Target ports whose traffic is encrypted
+ENCRYPTED_PORTS = {'443', '8443', '465', '993', '995', '636', '5671', '6514', '22'}
+
+# Node type -> roles a host has whatever ports were seen
+TYPE_ROLES = {
+    'client': ('client',), 'laptop': ('client',), 'mobile': ('client',),
+    'mobile_phone': ('client',), 'tablet': ('client',),
+    'loadbalancer': ('lb',), 'loadbalancer_active': ('lb',), 'loadbalancer_passive': ('lb',),
+    'proxy': ('proxy',), 'waf': ('lb',),
+    'database': ('db',), 'database_primary': ('db',), 'database_replica': ('db',),
+    'database_cluster': ('db',),
+}
+
+# Roles that make a host a server (source of the infrastructure rules)
+SERVER_ROLES = {'web', 'app', 'db', 'cache', 'mq', 'mail', 'file', 'lb'}
+
+# (source role, target role, base confidence, scope); scope 'site' stays
+# within the /16, 'global' reaches shared services anywhere
+TIER_RULES = [
+    ('client', 'web', 0.5, 'site'),
+    ('client', 'proxy', 0.7, 'global'),
+    ('client', 'mail', 0.7, 'global'),
+    ('client', 'file', 0.5, 'site'),
+    ('client', 'directory', 0.8, 'global'),
+    ('client', 'dns', 0.8, 'global'),
+    ('lb', 'web', 0.8, 'site'),
+    ('lb', 'app', 0.7, 'site'),
+    ('web', 'app', 0.6, 'site'),
+    ('web', 'db', 0.5, 'site'),
+    ('web', 'cache', 0.5, 'site'),
+    ('app', 'db', 0.7, 'site'),
+    ('app', 'cache', 0.6, 'site'),
+    ('app', 'mq', 0.6, 'site'),
+    ('server', 'dns', 0.6, 'global'),
+    ('server', 'directory', 0.5, 'global'),
+    ('server', 'logging', 0.5, 'global'),
+]
+
+# Confidence factor by how far the target is
+REACH = {'subnet': 1.0, 'site': 0.7, 'global': 0.5}
+
+DEFAULT_FANOUT = 2
+DEFAULT_MAX_IN = 500
+DEFAULT_MIN_CONFIDENCE = 0.1
+
+class ConnectionInferrer:
+    """Role buckets per subnet, connected tier by tier"""
+
+    def __init__(self, prefix=24, fanout=DEFAULT_FANOUT, max_in=DEFAULT_MAX_IN):
+        self.prefix = prefix
+        self.fanout = fanout
+        self.max_in = max_in
+        self.ids = []
+        self.subnets = []
+        self.sites = []
+        self.services = []
+        # role -> subnet -> [host], role -> site -> [host], role -> [host]
+        self.by_subnet = {}
+        self.by_site = {}
+        self.by_role = {}
+        self.known_pairs = set()
+        self.reachable = set()
+        self.global_pools = {}
+
+    def load_nodes(self, filepath):
+        with open(filepath, 'r', encoding='utf-8') as f:
+            reader = csv.DictReader(f)
+            if 'ports' not in (reader.fieldnames or []):
+                print(f"{YELLOW}⚠ {filepath} has no ports column; roles come from node types only{NC}")
+            for row in reader:
+                node_id = (row.get('id') or '').strip()
+                if not node_id:
+                    continue
+                address = ip_value((row.get('ip') or '').strip())
+                services = {}
+                for port in (row.get('ports') or '').split(','):
+                    port = port.strip().split('/')[0]
+                    if port in SERVICE_PORTS:
+                        services.setdefault(SERVICE_PORTS[port][0], port)
+                roles = set(services) | set(TYPE_ROLES.get(normalize_type(row.get('type') or ''), ()))
+                if roles & SERVER_ROLES:
+                    roles.add('server')
+                self.add_host(node_id, address, roles, services)
+
+    def add_host(self, node_id, address, roles, services):
+        host = len(self.ids)
+        subnet, site = subnet_value(address, self.prefix), subnet_value(address, 16, 48)
+        self.ids.append(node_id)
+        self.subnets.append(subnet)
+        self.sites.append(site)
+        self.services.append(services)
+        for role in roles:
+            self.by_subnet.setdefault(role, {}).setdefault(subnet, []).append(host)
+            self.by_site.setdefault(role, {}).setdefault(site, []).append(host)
+            self.by_role.setdefault(role, []).append(host)
+
+    def load_known(self, filepath, index):
+        """Existing connections: not inferred again, and their subnets are reachable"""
+        with open(filepath, 'r', encoding='utf-8') as f:
+            for row in csv.DictReader(f):
+                s = index.get((row.get('source') or '').strip())
+                d = index.get((row.get('destination') or '').strip())
+                if s is None or d is None:
+                    continue
+                self.known_pairs.add((s, d))
+                self.known_pairs.add((d, s))
+                self.reachable.add((self.subnets[s], self.subnets[d]))
+
+    def pools(self, target_role, subnet, site, scope):
+        """Candidate target lists for a source bucket, nearest first"""
+        pools = []
+        same_subnet = self.by_subnet.get(target_role, {}).get(subnet) if subnet is not None else None
+        if same_subnet:
+            pools.append(('subnet', same_subnet))
+        # Subnets seen talking to each other in --known count as the same subnet
+        if self.reachable and subnet is not None:
+            linked = [h for other, hosts in self.by_subnet.get(target_role, {}).items()
+                      if other != subnet and (subnet, other) in self.reachable for h in hosts]
+            if linked:
+                pools.append(('subnet', linked))
+        # Site and global pools are shared by every subnet of the site; hosts
+        # already offered by a nearer pool are skipped as existing edges
+        if site is not None:
+            in_site = self.by_site.get(target_role, {}).get(site)
+            if in_site and len(in_site) > len(same_subnet or ()):
+                pools.append(('site', in_site))
+        if scope == 'global':
+            key = (target_role, site)
+            if key not in self.global_pools:
+                self.global_pools[key] = [h for h in self.by_role.get(target_role, ())
+                                          if self.sites[h] != site]
+            if self.global_pools[key]:
+                pools.append(('global', self.global_pools[key]))
+        return pools
+
+    def infer(self, min_confidence=DEFAULT_MIN_CONFIDENCE):
+        """Edges as {(source, target): (confidence, port)}"""
+        edges = {}
+        fan_in = Counter()
+        self.rule_counts = Counter()
+        for source_role, target_role, base, scope in TIER_RULES:
+            if target_role not in self.by_role:
+                continue
+            for subnet, sources in self.by_subnet.get(source_role, {}).items():
+                site = self.sites[sources[0]]
+                pools = self.pools(target_role, subnet, site, scope)
+                if not pools:
+                    continue
+                for source in sources:
+                    picked = 0
+                    for reach, pool in pools:
+                        confidence = round(base * REACH[reach], 2)
+                        if confidence < min_confidence:
+                            break
+                        # Start where the source id hashes to, so sources spread over the pool
+                        start = zlib.crc32(self.ids[source].encode('utf-8')) % len(pool)
+                        for step in range(min(len(pool), self.fanout * 4)):
+                            target = pool[(start + step) % len(pool)]
+                            if (target == source or fan_in[source_role, target] >= self.max_in
+                                    or (source, target) in self.known_pairs):
+                                continue
+                            previous = edges.get((source, target))
+                            if previous is not None and reach != 'subnet':
+                                continue
+                            if previous is None:
+                                fan_in[source_role, target] += 1
+                                self.rule_counts[(source_role, target_role)] += 1
+                            if previous is None or previous[0] < confidence:
+                                edges[(source, target)] = (confidence, self.services[target].get(target_role, ''))
+                            picked += 1
+                            if picked >= self.fanout:
+                                break
+                        if picked >= self.fanout:
+                            break
+        return edges
+
+def connection_row(ids, source, target, confidence, port):
+    service = SERVICE_PORTS[port][1] if port in SERVICE_PORTS else ''
+    conn_type = 'encrypted' if port in ENCRYPTED_PORTS else 'normal'
+    return ids[source], ids[target], service, conn_type, port, f'{confidence:.2f}'
+
+def write_csv(filepath, inferrer, edges):
+    with open(filepath, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['source', 'destination', 'label', 'type', 'port', 'confidence'])
+        for (source, target), (confidence, port) in edges.items():
+            writer.writerow(connection_row(inferrer.ids, source, target, confidence, port))
+
+def write_tex(filepath, inferrer, edges):
+    lines = ['% Generated by infer_connections.py - do not edit by hand',
+             f'% {len(edges)} inferred connections; confidence after each line']
+    for (source, target), (confidence, port) in edges.items():
+        src, dst, label, conn_type, _, conf = connection_row(inferrer.ids, source, target, confidence, port)
+        lines.append(f'\\createConnectionFromType{{{conn_type}}}{{{tex_ident(src)}}}'
+                     f'{{{tex_ident(dst)}}}{{{tex_text(label)}}}% {conf}')
+    lines.append('\\endinput')
+    Path(filepath).write_text('\n'.join(lines) + '\n', encoding='utf-8')
+
+def main():
+    """Main connection inference function"""
+    args = sys.argv[1:]
+    if not args or '--help' in args or '-h' in args:
+        print("Usage: python3 infer_connections.py nodes.csv [options]")
+        print("")
+        print("Options:")
+        print("  --output FILE          Output file (default: inferred_connections.csv, or .tex)")
+        print("  --format FMT           csv (default) or tex (\\createConnectionFromType lines)")
+        print("  --known FILE           Existing connections: skipped, and their subnets are reachable")
+        print(f"  --fanout N             Targets per source and rule (default: {DEFAULT_FANOUT})")
+        print(f"  --max-in N             Sources of one role per target (default: {DEFAULT_MAX_IN})")
+        print(f"  --min-confidence P     Drop weaker edges (default: {DEFAULT_MIN_CONFIDENCE})")
+        print("  --prefix N             IPv4 prefix length of a subnet (default: 24)")
+        sys.exit(1)
+
+    options = {'--output': None, '--format': 'csv', '--known': None,
+               '--fanout': str(DEFAULT_FANOUT), '--max-in': str(DEFAULT_MAX_IN),
+               '--min-confidence': str(DEFAULT_MIN_CONFIDENCE), '--prefix': '24'}
+    for flag in options:
+        if flag in args:
+            index = args.index(flag)
+            if index + 1 >= len(args):
+                print(f"{RED}Error: {flag} requires a value{NC}")
+                sys.exit(1)
+            options[flag] = args[index + 1]
+            del args[index:index + 2]
+    files = [a for a in args if not a.startswith('--')]
+    for filepath in files + ([options['--known']] if options['--known'] else []):
+        if not Path(filepath).exists():
+            print(f"{RED}✗ File not found: {filepath}{NC}")
+            sys.exit(1)
+    if options['--format'] not in ('csv', 'tex'):
+        print(f"{RED}Error: --format must be csv or tex{NC}")
+        sys.exit(1)
+    try:
+        fanout, max_in = int(options['--fanout']), int(options['--max-in'])
+        min_confidence, prefix = float(options['--min-confidence']), int(options['--prefix'])
+    except ValueError:
+        print(f"{RED}Error: --fanout, --max-in, --min-confidence and --prefix take numbers{NC}")
+        sys.exit(1)
+    output = options['--output'] or f"inferred_connections.{options['--format']}"
+
+    print(f"{BLUE}{'='*60}{NC}")
+    print(f"{BLUE}Connection Inference{NC}")
+    print(f"{BLUE}{'='*60}{NC}\n")
+
+    start = time.perf_counter()
+    inferrer = ConnectionInferrer(prefix, fanout, max_in)
+    for filepath in files:
+        inferrer.load_nodes(filepath)
+    if options['--known']:
+        index = {node_id: i for i, node_id in enumerate(inferrer.ids)}
+        inferrer.load_known(options['--known'], index)
+    roles = {role: len(hosts) for role, hosts in inferrer.by_role.items()}
+    print(f"{GREEN}✓ {len(inferrer.ids)} hosts in {len(roles)} roles{NC}")
+    print(f"{CYAN}  {', '.join(f'{role}: {count}' for role, count in sorted(roles.items()))}{NC}")
+
+    edges = inferrer.infer(min_confidence)
+    if options['--format'] == 'tex':
+        write_tex(output, inferrer, edges)
+    else:
+        write_csv(output, inferrer, edges)
+    elapsed = time.perf_counter() - start
+
+    print(f"{GREEN}✓ Inferred {len(edges)} connections in {elapsed:.2f}s{NC}")
+    for (source_role, target_role), count in sorted(inferrer.rule_counts.items(), key=lambda item: -item[1]):
+        print(f"{BLUE}  {source_role:>8} -> {target_role:10} {count}{NC}")
+    if edges:
+        confidences = [confidence for confidence, _ in edges.values()]
+        print(f"{CYAN}  Confidence: mean {sum(confidences) / len(confidences):.2f}, "
+              f"{sum(1 for c in confidences if c >= 0.5)} edges at 0.5 or more{NC}")
+    print(f"{BLUE}  Connections written to: {output}{NC}\n")
+
+if __name__ == '__main__':
+    main()
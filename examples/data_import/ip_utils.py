@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""
+ip_utils.py - IPv4/IPv6 address columns for the data import tools
+
+Addresses are held as 128-bit values split into two unsigned 64-bit
+words, stored column-wise in array('Q') pairs:
+- IPv4 addresses are stored IPv4-mapped (::ffff:a.b.c.d), so dual-stack
+  data sorts and groups in one column
+- the unspecified address (::) marks a missing or invalid address
+- prefix grouping works at any length: an IPv4 prefix applies to mapped
+  addresses, an IPv6 prefix to the rest
+
+Tools that keep one address per record (net_query.py, zone_detect.py,
+infer_connections.py) use the same value as a single 128-bit int, -1
+when missing (see ip_value). Used by validate_data.py and
+network_stats.py too; the same rules are in the Lua iputils of
+data_import.lua.
+
+Usage:
+    python3 ip_utils.py nodes.csv
+    python3 ip_utils.py nodes.csv --prefix 16 --prefix6 48
+"""
+
+import sys
+import csv
+import ipaddress
+from array import array
+from collections import defaultdict
+
+# ANSI color codes
+GREEN = '\033[0;32m'
+YELLOW = '\033[1;33m'
+BLUE = '\033[0;34m'
+CYAN = '\033[0;36m'
+RED = '\033[0;31m'
+NC = '\033[0m'
+
+WORD = (1 << 64) - 1
+# Low word of ::ffff:0.0.0.0, the IPv4-mapped range
+V4_MAPPED = 0xFFFF << 32
+
+def parse_ip(text):
+    """(high, low) 64-bit words of an address, None when it is not one
+
+    Accepts dotted IPv4, any IPv6 notation, bracketed addresses and zone
+    ids (fe80::1%eth0).
+    """
+    text = text.strip()
+    parts = text.split('.')
+    if len(parts) == 4 and ':' not in text:
+        if not all(p.isdigit() and len(p) <= 3 for p in parts):
+            return None
+        a, b, c, d = (int(p) for p in parts)
+        if a <= 255 and b <= 255 and c <= 255 and d <= 255:
+            return 0, V4_MAPPED | (a << 24) | (b << 16) | (c << 8) | d
+        return None
+    if ':' not in text:
+        return None
+    text = text.strip('[]').split('%')[0]
+    try:
+        value = int(ipaddress.IPv6Address(text))
+    except ValueError:
+        return None
+    return value >> 64, value & WORD
+
+def is_ipv4(high, low):
+    return high == 0 and low >> 32 == 0xFFFF
+
+def parse_network(text):
+    """(network high, network low, length in 128 bits) of a subnet such as
+    10.0.0.0/8 or 2001:db8::/32, as AddressColumn.groups keys it; None when
+    it is not one. A bare address is a /32 or /128 and host bits are cleared.
+    """
+    address, slash, prefix = text.strip().partition('/')
+    words = parse_ip(address)
+    if words is None:
+        return None
+    bits = 128 if ':' in address else 32
+    if not slash:
+        length = bits
+    elif prefix.isdigit() and int(prefix) <= bits:
+        length = int(prefix)
+    else:
+        return None
+    length += 128 - bits
+    value = ip_network_value((words[0] << 64) | words[1], length)
+    return value >> 64, value & WORD, length
+
+def ip_value(text):
+    """parse_ip as one 128-bit int, -1 when missing or invalid"""
+    words = parse_ip(text) if text else None
+    if not words or words == (0, 0):
+        return -1
+    return (words[0] << 64) | words[1]
+
+def is_ipv4_value(value):
+    return value >> 32 == 0xFFFF
+
+def ip_network_value(value, length):
+    """ip_value with all but its first length bits cleared"""
+    shift = 128 - length
+    return value >> shift << shift
+
+def subnet_value(value, v4_prefix=24, v6_prefix=64):
+    """Network of an ip_value, None when missing; IPv4 values by v4_prefix,
+    IPv6 values by v6_prefix, as AddressColumn.groups does"""
+    if value < 0:
+        return None
+    return ip_network_value(value, 96 + v4_prefix if is_ipv4_value(value) else v6_prefix)
+
+def format_ip(high, low):
+    """Canonical text: dotted for IPv4, compressed for IPv6"""
+    if is_ipv4(high, low):
+        return str(ipaddress.IPv4Address(low & 0xFFFFFFFF))
+    return str(ipaddress.IPv6Address((high << 64) | low))
+
+def network_text(key):
+    """CIDR text of an AddressColumn.groups key"""
+    high, low, length = key
+    if is_ipv4(high, low) and length >= 96:
+        return f'{ipaddress.IPv4Address(low & 0xFFFFFFFF)}/{length - 96}'
+    return str(ipaddress.IPv6Network(((high << 64) | low, length)))
+
+class AddressColumn:
+    """Addresses of many rows as two packed 64-bit word columns"""
+
+    def __init__(self):
+        self.high = array('Q')
+        self.low = array('Q')
+        self.invalid = 0
+
+    @classmethod
+    def from_texts(cls, texts):
+        """Column from address strings; each distinct string is parsed once"""
+        column = cls()
+        cache = {}
+        high, low = [], []
+        for text in texts:
+            words = cache.get(text)
+            if words is None:
+                words = cache[text] = parse_ip(text) or (0, 0)
+            high.append(words[0])
+            low.append(words[1])
+        column.high.extend(high)
+        column.low.extend(low)
+        column.invalid = sum(1 for text in texts if text and cache[text] == (0, 0))
+        return column
+
+    def __len__(self):
+        return len(self.high)
+
+    def versions(self):
+        """{4: count, 6: count} over the rows that hold an address"""
+        v4 = sum(1 for h, l in zip(self.high, self.low) if h == 0 and l >> 32 == 0xFFFF)
+        total = sum(1 for h, l in zip(self.high, self.low) if h or l)
+        return {4: v4, 6: total - v4}
+
+    def groups(self, v4_prefix=24, v6_prefix=64):
+        """{(network high, network low, length in 128 bits): [row]} for the
+        rows that hold an address; IPv4 rows group by v4_prefix, IPv6 rows
+        by v6_prefix"""
+        groups = defaultdict(list)
+        v4_length, v6_length = 96 + v4_prefix, v6_prefix
+        v4_mask = WORD << (128 - v4_length) & WORD
+        v6_high = WORD << (64 - v6_length) & WORD if v6_length <= 64 else WORD
+        v6_low = 0 if v6_length <= 64 else WORD << (128 - v6_length) & WORD
+        for i, (h, l) in enumerate(zip(self.high, self.low)):
+            if h == 0 and l >> 32 == 0xFFFF:
+                groups[0, l & v4_mask, v4_length].append(i)
+            elif h or l:
+                groups[h & v6_high, l & v6_low, v6_length].append(i)
+        return groups
+
+def main():
+    """Print the subnets of a node CSV, IPv4 and IPv6"""
+    args = sys.argv[1:]
+    if not args or '--help' in args or '-h' in args:
+        print("Usage: python3 ip_utils.py nodes.csv [--prefix N] [--prefix6 N]")
+        sys.exit(1)
+    options = {'--prefix': '24', '--prefix6': '64'}
+    for flag in options:
+        if flag in args:
+            index = args.index(flag)
+            if index + 1 >= len(args):
+                print(f"{RED}Error: {flag} requires a value{NC}")
+                sys.exit(1)
+            options[flag] = args[index + 1]
+            del args[index:index + 2]
+    try:
+        v4_prefix, v6_prefix = int(options['--prefix']), int(options['--prefix6'])
+    except ValueError:
+        print(f"{RED}Error: --prefix and --prefix6 take numbers{NC}")
+        sys.exit(1)
+    if not 0 <= v4_prefix <= 32 or not 0 <= v6_prefix <= 128:
+        print(f"{RED}Error: --prefix must be 0-32 and --prefix6 0-128{NC}")
+        sys.exit(1)
+
+    with open(args[0], 'r', encoding='utf-8') as f:
+        texts = [(row.get('ip') or '').strip() for row in csv.DictReader(f)]
+    column = AddressColumn.from_texts(texts)
+    versions = column.versions()
+    print(f"{GREEN}✓ {len(column)} rows: {versions[4]} IPv4, {versions[6]} IPv6{NC}")
+    if column.invalid:
+        print(f"{YELLOW}⚠ {column.invalid} invalid addresses{NC}")
+    groups = column.groups(v4_prefix, v6_prefix)
+    for key, rows in sorted(groups.items(), key=lambda item: (-len(item[1]), item[0])):
+        print(f"{CYAN}  {network_text(key):45} {len(rows)} nodes{NC}")
+
+if __name__ == '__main__':
+    main()
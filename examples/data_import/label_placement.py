@@ -0,0 +1,321 @@
+#!/usr/bin/env python3
+"""
+label_placement.py - Automatic collision-free label placement
+
+This script estimates the extents of node captions and connection labels,
+indexes them in a uniform grid and picks, for every label, the candidate
+anchor that overlaps the fewest already-placed labels and node bodies.
+The chosen anchors are written as a TeX fragment that \\smartLabel and
+\\smartConnectionLabel (network_layout.tex) read directly.
+
+Usage:
+    python3 label_placement.py nodes.csv
+    python3 label_placement.py nodes.csv connections.csv
+    python3 label_placement.py nodes.csv connections.csv --output label_anchors.tex
+"""
+
+import sys
+import csv
+import time
+from pathlib import Path
+
+# ANSI color codes
+GREEN = '\033[0;32m'
+YELLOW = '\033[1;33m'
+BLUE = '\033[0;34m'
+RED = '\033[0;31m'
+NC = '\033[0m'
+
+# Approximate glyph metrics in cm (sans-serif, see font= keys in the .tex modules)
+CHAR_WIDTH = {'small': 0.16, 'tiny': 0.09}
+LINE_HEIGHT = {'small': 0.35, 'tiny': 0.20}
+
+# Node body size in cm (matches \setNodeDimensions defaults in network_layout.tex)
+NODE_WIDTH = 2.0
+NODE_HEIGHT = 1.5
+PORTS_NODE_HEIGHT = 2.0
+
+# Gap between a node border and its caption (matches "2pt of" in \smartLabel)
+LABEL_GAP = 0.07
+
+# Candidate anchors for node captions, in order of preference
+NODE_ANCHORS = [
+    'below', 'above', 'right', 'left',
+    'below right', 'below left', 'above right', 'above left',
+]
+
+# Candidate (pos, side) pairs for connection labels, in order of preference
+CONNECTION_ANCHORS = [
+    ('0.5', 'above'), ('0.5', 'below'),
+    ('0.35', 'above'), ('0.65', 'above'),
+    ('0.35', 'below'), ('0.65', 'below'),
+]
+
+class SpatialGrid:
+    """Uniform grid of axis-aligned rectangles for fast overlap queries"""
+
+    def __init__(self, cell_size):
+        self.cell_size = cell_size
+        self.cells = {}
+        self.rects = []
+
+    def _cell_range(self, x0, y0, x1, y1):
+        size = self.cell_size
+        return (int(x0 // size), int(y0 // size), int(x1 // size), int(y1 // size))
+
+    def insert(self, rect):
+        """Add a rectangle (x0, y0, x1, y1) to the index"""
+        index = len(self.rects)
+        self.rects.append(rect)
+        cx0, cy0, cx1, cy1 = self._cell_range(*rect)
+        cells = self.cells
+        for cx in range(cx0, cx1 + 1):
+            for cy in range(cy0, cy1 + 1):
+                bucket = cells.get((cx, cy))
+                if bucket is None:
+                    cells[(cx, cy)] = [index]
+                else:
+                    bucket.append(index)
+
+    def overlap_area(self, rect, limit=float('inf')):
+        """Total area of indexed rectangles overlapping rect
+
+        Stops early once the area reaches limit, so candidates that are
+        already worse than the best one found cost almost nothing.
+        """
+        x0, y0, x1, y1 = rect
+        size = self.cell_size
+        cx0, cy0, cx1, cy1 = self._cell_range(x0, y0, x1, y1)
+        cells = self.cells
+        rects = self.rects
+        area = 0.0
+        for cx in range(cx0, cx1 + 1):
+            for cy in range(cy0, cy1 + 1):
+                bucket = cells.get((cx, cy))
+                if not bucket:
+                    continue
+                for index in bucket:
+                    ox0, oy0, ox1, oy1 = rects[index]
+                    ix0 = x0 if x0 > ox0 else ox0
+                    ix1 = x1 if x1 < ox1 else ox1
+                    if ix1 <= ix0:
+                        continue
+                    iy0 = y0 if y0 > oy0 else oy0
+                    iy1 = y1 if y1 < oy1 else oy1
+                    if iy1 <= iy0:
+                        continue
+                    # Count each pair once: only in the cell holding the
+                    # lower-left corner of the intersection
+                    if int(ix0 // size) != cx or int(iy0 // size) != cy:
+                        continue
+                    area += (ix1 - ix0) * (iy1 - iy0)
+                    if area >= limit:
+                        return area
+        return area
+
+def estimate_extent(text, font='small'):
+    """Estimate (width, height) in cm of a label set in the given font"""
+    lines = text.split('\\\\') if text else ['']
+    width = max(len(line.strip()) for line in lines) * CHAR_WIDTH[font]
+    return width, len(lines) * LINE_HEIGHT[font]
+
+def node_caption_rect(x, y, half_w, half_h, width, height, anchor):
+    """Rectangle of a caption placed at anchor relative to a node body"""
+    gap = LABEL_GAP
+    if 'left' in anchor:
+        x0 = x - half_w - gap - width
+    elif 'right' in anchor:
+        x0 = x + half_w + gap
+    else:
+        x0 = x - width / 2
+    if 'above' in anchor:
+        y0 = y + half_h + gap
+    elif 'below' in anchor:
+        y0 = y - half_h - gap - height
+    else:
+        y0 = y - height / 2
+    return (x0, y0, x0 + width, y0 + height)
+
+def connection_label_rect(x0, y0, x1, y1, pos, side, width, height):
+    """Rectangle of a connection label at fraction pos along the segment"""
+    t = float(pos)
+    mx = x0 + (x1 - x0) * t
+    my = y0 + (y1 - y0) * t
+    left = mx - width / 2
+    if side == 'above':
+        return (left, my + LABEL_GAP, left + width, my + LABEL_GAP + height)
+    return (left, my - LABEL_GAP - height, left + width, my - LABEL_GAP)
+
+class LabelPlacer:
+    """Greedy label placement over a uniform grid index"""
+
+    def __init__(self):
+        self.nodes = []
+        self.connections = []
+        self.node_anchors = {}
+        self.connection_anchors = []
+        self.collisions = 0
+
+    def load_nodes_csv(self, filepath):
+        """Load positioned nodes from CSV"""
+        with open(filepath, 'r', encoding='utf-8') as f:
+            reader = csv.DictReader(f)
+            for row in reader:
+                try:
+                    x = float(row.get('x') or '')
+                    y = float(row.get('y') or '')
+                except ValueError:
+                    continue
+                label = (row.get('label') or '').strip()
+                ip = (row.get('ip') or '').strip()
+                ports = (row.get('ports') or '').strip()
+                caption = label
+                if ip:
+                    caption += '\\\\' + ip
+                if ports:
+                    caption += '\\\\' + ports
+                self.nodes.append({
+                    'id': (row.get('id') or '').strip(),
+                    'x': x,
+                    'y': y,
+                    'caption': caption,
+                    'tall': bool(ports),
+                })
+
+    def load_connections_csv(self, filepath):
+        """Load labelled connections from CSV"""
+        with open(filepath, 'r', encoding='utf-8') as f:
+            reader = csv.DictReader(f)
+            for row in reader:
+                label = (row.get('label') or '').strip()
+                if not label:
+                    continue
+                self.connections.append({
+                    'source': (row.get('source') or '').strip(),
+                    'destination': (row.get('destination') or '').strip(),
+                    'label': label,
+                })
+
+    def place(self):
+        """Choose an anchor for every node caption and connection label"""
+        grid = SpatialGrid(cell_size=NODE_WIDTH)
+        positions = {}
+
+        # Node bodies are fixed obstacles
+        for node in self.nodes:
+            half_w = NODE_WIDTH / 2
+            half_h = (PORTS_NODE_HEIGHT if node['tall'] else NODE_HEIGHT) / 2
+            positions[node['id']] = (node['x'], node['y'], half_w, half_h)
+            grid.insert((node['x'] - half_w, node['y'] - half_h,
+                         node['x'] + half_w, node['y'] + half_h))
+
+        # Node captions first: they are larger and anchor the reader's eye
+        for node in self.nodes:
+            x, y, half_w, half_h = positions[node['id']]
+            width, height = estimate_extent(node['caption'], 'small')
+            best = None
+            for anchor in NODE_ANCHORS:
+                rect = node_caption_rect(x, y, half_w, half_h, width, height, anchor)
+                cost = grid.overlap_area(rect, best[0] if best else float('inf'))
+                if best is None or cost < best[0]:
+                    best = (cost, anchor, rect)
+                    if cost == 0.0:
+                        break
+            if best[0] > 0.0:
+                self.collisions += 1
+            self.node_anchors[node['id']] = best[1]
+            grid.insert(best[2])
+
+        # Connection labels fill the remaining free space
+        for conn in self.connections:
+            src = positions.get(conn['source'])
+            dst = positions.get(conn['destination'])
+            if src is None or dst is None:
+                continue
+            width, height = estimate_extent(conn['label'], 'tiny')
+            best = None
+            for pos, side in CONNECTION_ANCHORS:
+                rect = connection_label_rect(src[0], src[1], dst[0], dst[1],
+                                             pos, side, width, height)
+                cost = grid.overlap_area(rect, best[0] if best else float('inf'))
+                if best is None or cost < best[0]:
+                    best = (cost, pos, side, rect)
+                    if cost == 0.0:
+                        break
+            if best[0] > 0.0:
+                self.collisions += 1
+            self.connection_anchors.append(
+                (conn['source'], conn['destination'], best[1], best[2]))
+            grid.insert(best[3])
+
+    def write_tex(self, output_file):
+        """Write chosen anchors as a TeX fragment"""
+        with open(output_file, 'w', encoding='utf-8') as f:
+            f.write('% Generated by label_placement.py - do not edit by hand\n')
+            f.write('% Load after network_layout.tex, then use \\smartLabel and\n')
+            f.write('% \\smartConnectionLabel to draw the labels\n')
+            for node_id, anchor in self.node_anchors.items():
+                f.write(f'\\setLabelAnchor{{{node_id}}}{{{anchor}}}\n')
+            for source, dest, pos, side in self.connection_anchors:
+                f.write(f'\\setConnectionLabelPos{{{source}}}{{{dest}}}{{{pos}}}{{{side}}}\n')
+
+def main():
+    """Main label placement function"""
+    if len(sys.argv) < 2:
+        print("Usage: python3 label_placement.py <nodes.csv> [connections.csv] [options]")
+        print("")
+        print("Examples:")
+        print("  python3 label_placement.py nodes.csv")
+        print("  python3 label_placement.py nodes.csv connections.csv")
+        print("  python3 label_placement.py nodes.csv connections.csv --output anchors.tex")
+        print("")
+        print("Options:")
+        print("  --output FILE    Output TeX fragment (default: label_anchors.tex)")
+        sys.exit(1)
+
+    output_file = 'label_anchors.tex'
+    args = sys.argv[1:]
+    if '--output' in args:
+        index = args.index('--output')
+        if index + 1 >= len(args):
+            print(f"{RED}Error: --output requires a file name{NC}")
+            sys.exit(1)
+        output_file = args[index + 1]
+        del args[index:index + 2]
+
+    input_files = [a for a in args if not a.startswith('--')]
+    for filepath in input_files:
+        if not Path(filepath).exists():
+            print(f"{RED}✗ File not found: {filepath}{NC}")
+            sys.exit(1)
+
+    print(f"{BLUE}{'='*60}{NC}")
+    print(f"{BLUE}Label Placement{NC}")
+    print(f"{BLUE}{'='*60}{NC}\n")
+
+    placer = LabelPlacer()
+    placer.load_nodes_csv(input_files[0])
+    if len(input_files) > 1:
+        placer.load_connections_csv(input_files[1])
+
+    if not placer.nodes:
+        print(f"{YELLOW}⚠ No positioned nodes found (x,y columns required){NC}")
+        sys.exit(1)
+
+    start = time.perf_counter()
+    placer.place()
+    elapsed = time.perf_counter() - start
+
+    placer.write_tex(output_file)
+
+    total = len(placer.node_anchors) + len(placer.connection_anchors)
+    print(f"{GREEN}✓ Placed {total} labels in {elapsed:.3f}s{NC}")
+    print(f"{BLUE}  Node captions: {len(placer.node_anchors)}{NC}")
+    print(f"{BLUE}  Connection labels: {len(placer.connection_anchors)}{NC}")
+    if placer.collisions:
+        print(f"{YELLOW}  ⚠ {placer.collisions} labels could not avoid every overlap{NC}")
+    print(f"{GREEN}✓ Anchors written to: {output_file}{NC}")
+    print(f"{YELLOW}  Usage: \\input{{{output_file}}} after network_layout.tex{NC}\n")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,673 @@
+#!/usr/bin/env python3
+"""
+net_query.py - Filtered views of a network, selected before TeX sees them
+
+This script loads nodes, connections and threats once and writes filtered
+views of them, so a diagram that shows only some connection types, ports,
+subnets or severities no longer expands \\showOnlyConnectionTypes,
+\\drawConnectionIfPort or \\drawConnectionIfBandwidth for every hidden edge.
+Each view is either a set of CSV files or a TeX fragment of ready-made
+\\createNodeFromType/\\createConnectionFromType/\\createThreatFromRow calls.
+
+Queries use a small predicate language, one expression per record kind:
+
+    type in (encrypted, vpn) and not port == 22
+    bandwidth >= 100 or label like "VPN*"
+    ip in 192.168.100.0/24            (subnet 192.168.100.0/24 means the same)
+    severity >= 7 and port in 8000..8100
+
+Fields:
+    nodes        id, type, ip, label, port (any open port), severity (worst finding)
+    connections  source, destination, type, label, port, bandwidth,
+                 ip (either end), severity (worse end)
+    threats      target, type, severity, cve, description, ip (target's)
+
+Each expression is compiled once into a Python comprehension over column
+lists, so every view is a few C-speed passes over the loaded data. Records
+whose node was filtered out are pruned: connections need both ends,
+threats their target.
+
+Usage:
+    python3 net_query.py nodes.csv connections.csv threats.csv --connections "type == encrypted"
+    python3 net_query.py nodes.csv connections.csv --nodes "subnet 192.168.100.0/24" --format tex --output dmz.tex
+    python3 net_query.py nodes.csv connections.csv threats.csv --views views.ini --output views/
+"""
+
+import sys
+import re
+import csv
+import math
+import time
+import fnmatch
+import configparser
+from itertools import compress
+from pathlib import Path
+
+from threat_scoring import parse_severity, normalize_type, tex_escape
+from ip_utils import V4_MAPPED, ip_value, parse_network
+
+# ANSI color codes
+GREEN = '\033[0;32m'
+YELLOW = '\033[1;33m'
+BLUE = '\033[0;34m'
+CYAN = '\033[0;36m'
+RED = '\033[0;31m'
+NC = '\033[0m'
+
+KINDS = ('nodes', 'connections', 'threats')
+
+# Field -> (column name, kind) per record kind. Column kinds:
+#   str   text, compared as is; type fields are normalized first
+#   num   float, NaN when missing
+#   ports set of open ports
+#   ip    one address as an int, -1 when missing
+#   ips   addresses of both ends
+FIELDS = {
+    'nodes': {
+        'id': ('id', 'str'), 'type': ('type', 'str'), 'ip': ('ip', 'ip'),
+        'subnet': ('ip', 'ip'), 'label': ('label', 'str'), 'port': ('ports', 'ports'),
+        'severity': ('severity', 'num'),
+    },
+    'connections': {
+        'source': ('source', 'str'), 'destination': ('destination', 'str'),
+        'type': ('type', 'str'), 'label': ('label', 'str'), 'port': ('port', 'num'),
+        'bandwidth': ('bandwidth', 'num'), 'ip': ('ips', 'ips'), 'subnet': ('ips', 'ips'),
+        'severity': ('severity', 'num'),
+    },
+    'threats': {
+        'target': ('target', 'str'), 'type': ('type', 'str'), 'severity': ('severity', 'num'),
+        'cve': ('cve', 'str'), 'description': ('description', 'str'),
+        'ip': ('ip', 'ip'), 'subnet': ('ip', 'ip'),
+    },
+}
+
+TOKEN_RE = re.compile(r'\s*(?:(\.\.)|([(),])|(<=|>=|==|!=|=|<|>)|"([^"]*)"|\'([^\']*)\'|([^\s(),<>=!"\']+))')
+
+class QueryError(ValueError):
+    """Malformed query expression"""
+
+class LineRenderer:
+    """File stand-in that hands back what is written to it"""
+
+    def write(self, text):
+        return text
+
+def tokenize(text):
+    """Split an expression into (kind, value) tokens"""
+    tokens = []
+    pos = 0
+    text = text.strip()
+    while pos < len(text):
+        match = TOKEN_RE.match(text, pos)
+        if not match or match.end() == pos:
+            raise QueryError(f"unexpected character at: {text[pos:]!r}")
+        pos = match.end()
+        dots, punct, op, dquoted, squoted, word = match.groups()
+        if dots:
+            tokens.append(('range', '..'))
+        elif punct:
+            tokens.append((punct, punct))
+        elif op:
+            tokens.append(('op', '==' if op == '=' else op))
+        elif dquoted is not None or squoted is not None:
+            tokens.append(('string', dquoted if dquoted is not None else squoted))
+        else:
+            # A word may carry a trailing range: 8000..8100
+            first, dots, rest = word.partition('..')
+            tokens.append(('word', first))
+            if dots:
+                tokens.append(('range', '..'))
+                if rest:
+                    tokens.append(('word', rest))
+    return tokens
+
+class QueryCompiler:
+    """Compile one expression for one record kind into Python source
+
+    Grammar:
+        expr    := term ('or' term)*
+        term    := factor ('and' factor)*
+        factor  := 'not' factor | '(' expr ')' | test
+        test    := field op value | field 'in' set | field 'like' pattern
+                 | 'subnet' cidr
+        set     := '(' value (',' value)* ')' | value '..' value | cidr
+    """
+
+    def __init__(self, kind, text):
+        self.kind = kind
+        self.fields = FIELDS[kind]
+        self.tokens = tokenize(text)
+        self.pos = 0
+        self.constants = {}
+        self.used = []
+
+    def peek(self):
+        return self.tokens[self.pos] if self.pos < len(self.tokens) else (None, None)
+
+    def take(self, kind=None, value=None):
+        token = self.peek()
+        if token[0] is None or (kind and token[0] != kind) or (value and token[1].lower() != value):
+            want = value or kind or 'more input'
+            raise QueryError(f"expected {want}, found {token[1] or 'end of query'}")
+        self.pos += 1
+        return token
+
+    def keyword(self, word):
+        token = self.peek()
+        return token[0] == 'word' and token[1].lower() == word
+
+    def constant(self, value):
+        name = f'_c{len(self.constants)}'
+        self.constants[name] = value
+        return name
+
+    def compile(self):
+        source = self.parse_or()
+        if self.pos != len(self.tokens):
+            raise QueryError(f"unexpected {self.tokens[self.pos][1]!r}")
+        return source
+
+    def parse_or(self):
+        parts = [self.parse_and()]
+        while self.keyword('or'):
+            self.pos += 1
+            parts.append(self.parse_and())
+        return parts[0] if len(parts) == 1 else '(' + ' or '.join(parts) + ')'
+
+    def parse_and(self):
+        parts = [self.parse_not()]
+        while self.keyword('and'):
+            self.pos += 1
+            parts.append(self.parse_not())
+        return parts[0] if len(parts) == 1 else '(' + ' and '.join(parts) + ')'
+
+    def parse_not(self):
+        if self.keyword('not'):
+            self.pos += 1
+            return f'(not {self.parse_not()})'
+        if self.peek()[0] == '(':
+            self.pos += 1
+            inner = self.parse_or()
+            self.take(')')
+            return inner
+        return self.parse_test()
+
+    def field(self):
+        name = self.take('word')[1].lower()
+        if name not in self.fields:
+            raise QueryError(f"unknown {self.kind} field {name!r} "
+                             f"(known: {', '.join(sorted(self.fields))})")
+        column, kind = self.fields[name]
+        # Both ends of a connection are separate columns
+        columns = ('src_ip', 'dst_ip') if kind == 'ips' else (column,)
+        for column in columns:
+            if column not in self.used:
+                self.used.append(column)
+        var = tuple(f'v_{c}' for c in columns)
+        return name, var if kind == 'ips' else var[0], kind
+
+    def value(self):
+        token = self.peek()
+        if token[0] not in ('word', 'string'):
+            raise QueryError(f"expected a value, found {token[1] or 'end of query'}")
+        self.pos += 1
+        return token[1]
+
+    def number(self, text):
+        try:
+            number = float(text)
+        except ValueError:
+            number = math.nan
+        # nan and inf have no literal in the compiled source
+        if not math.isfinite(number):
+            raise QueryError(f"expected a number, found {text!r}")
+        return number
+
+    def network(self, text):
+        network = parse_network(text)
+        if network is None:
+            raise QueryError(f"expected an address or subnet, found {text!r}")
+        return network
+
+    def parse_test(self):
+        name, var, kind = self.field()
+        if name == 'subnet' and not (self.keyword('in') or self.peek()[0] == 'op'):
+            return self.ip_test(var, kind, [self.network(self.value())])
+
+        if self.keyword('like'):
+            self.pos += 1
+            if kind not in ('str',):
+                raise QueryError(f"'like' needs a text field, not {name}")
+            pattern = re.compile(fnmatch.translate(self.value()), re.IGNORECASE)
+            return f'{self.constant(pattern.match)}({var}) is not None'
+
+        if self.keyword('in'):
+            self.pos += 1
+            if kind in ('ip', 'ips'):
+                return self.ip_test(var, kind, self.value_list(self.network))
+            if kind == 'str':
+                return f'{var} in {self.constant(frozenset(self.value_list(self.text(name))))}'
+            low, high, values = self.number_set()
+            if values is None:
+                if kind == 'ports':
+                    return f'any({low!r} <= p <= {high!r} for p in {var})'
+                return f'{low!r} <= {var} <= {high!r}'
+            values = self.constant(frozenset(values))
+            if kind == 'ports':
+                return f'not {var}.isdisjoint({values})'
+            return f'{var} in {values}'
+
+        op = self.take('op')[1]
+        raw = self.value()
+        if kind == 'str':
+            if op not in ('==', '!='):
+                raise QueryError(f"{name} only supports ==, != , in and like")
+            return f'{var} {op} {self.text(name)(raw)!r}'
+        if kind in ('ip', 'ips'):
+            if op not in ('==', '!='):
+                raise QueryError(f"{name} only supports ==, != and in")
+            test = self.ip_test(var, kind, [self.network(raw)])
+            return test if op == '==' else f'(not {test})'
+        number = self.number(raw)
+        if kind == 'ports':
+            return f'any(p {op} {number!r} for p in {var})'
+        return f'{var} {op} {number!r}'
+
+    def text(self, name):
+        """Normalizer applied to literal values of a text field"""
+        return normalize_type if name == 'type' else (lambda value: value)
+
+    def value_list(self, convert):
+        if self.peek()[0] != '(':
+            return [convert(self.value())]
+        self.pos += 1
+        values = [convert(self.value())]
+        while self.peek()[0] == ',':
+            self.pos += 1
+            values.append(convert(self.value()))
+        self.take(')')
+        return values
+
+    def number_set(self):
+        """(low, high, None) for a range, (None, None, values) for a list"""
+        if self.peek()[0] != '(':
+            low = self.number(self.value())
+            if self.peek()[0] == 'range':
+                self.pos += 1
+                return low, self.number(self.value()), None
+            return None, None, [low]
+        return None, None, self.value_list(self.number)
+
+    def ip_test(self, var, kind, networks):
+        """Address-in-subnet test as integer masking (addresses are ip_value
+        ints, -1 when missing)"""
+        tests = []
+        for v in (var if kind == 'ips' else (var,)):
+            for high, low, length in networks:
+                # IPv4 subnets are masked over the whole mapped address, so
+                # they never match IPv6; IPv6 subnets that span the mapped
+                # range (::/0) leave IPv4 addresses out explicitly
+                mask = ((1 << length) - 1) << (128 - length)
+                net = (high << 64) | low
+                test = f'({v} & {mask}) == {net}'
+                if length < 96 and V4_MAPPED & mask == net:
+                    test += f' and {v} >> 32 != {0xFFFF}'
+                tests.append(test)
+            tests[-len(networks):] = [f'({v} >= 0 and ({" or ".join(tests[-len(networks):])}))']
+        return tests[0] if len(tests) == 1 else '(' + ' or '.join(tests) + ')'
+
+class Network:
+    """Nodes, connections and threats held as column lists"""
+
+    def __init__(self):
+        self.headers = {}
+        self.rows = {kind: [] for kind in KINDS}
+        self.columns = {kind: {} for kind in KINDS}
+        self.index = {}
+        self.csv_lines = {kind: None for kind in KINDS}
+        self.tex_lines = {kind: None for kind in KINDS}
+        self.selectors = {}
+
+    @staticmethod
+    def read_csv(filepath):
+        with open(filepath, 'r', encoding='utf-8', newline='') as f:
+            reader = csv.reader(f)
+            header = next(reader, [])
+            names = [name.strip().lower() for name in header]
+            rows = [row for row in reader if row]
+        return header, names, rows
+
+    @staticmethod
+    def column(names, rows, name):
+        if name not in names:
+            return [''] * len(rows)
+        i = names.index(name)
+        return [row[i].strip() if i < len(row) else '' for row in rows]
+
+
+    def load_nodes_csv(self, filepath):
+        header, names, rows = self.read_csv(filepath)
+        col = lambda name: self.column(names, rows, name)
+        ids = col('id')
+        columns = self.columns['nodes']
+        columns['id'] = ids
+        columns['type'] = memoized(normalize_type, col('type'))
+        columns['ip_text'] = col('ip')
+        columns['ip'] = [ip_value(ip) for ip in columns['ip_text']]
+        columns['label'] = col('label')
+        columns['ports'] = memoized(lambda ports: frozenset(float(p) for p in re.findall(r'\d+', ports)),
+                                    col('ports'))
+        columns['x'], columns['y'] = col('x'), col('y')
+        columns['severity'] = [math.nan] * len(rows)
+        self.headers['nodes'], self.rows['nodes'] = header, rows
+        self.index = {node_id: i for i, node_id in enumerate(ids) if node_id}
+
+    def load_connections_csv(self, filepath):
+        header, names, rows = self.read_csv(filepath)
+        col = lambda name: self.column(names, rows, name)
+        columns = self.columns['connections']
+        columns['source'], columns['destination'] = col('source'), col('destination')
+        columns['type'] = memoized(lambda t: normalize_type(t or 'normal'), col('type'))
+        columns['label'] = col('label')
+        columns['port'] = memoized(parse_severity, col('port'))
+        columns['bandwidth'] = memoized(parse_severity, col('bandwidth'))
+        # Index -1 stands for a node missing from the nodes file
+        index = self.index
+        columns['src'] = [index.get(s, -1) for s in columns['source']]
+        columns['dst'] = [index.get(d, -1) for d in columns['destination']]
+        self.headers['connections'], self.rows['connections'] = header, rows
+
+    def load_threats_csv(self, filepath):
+        header, names, rows = self.read_csv(filepath)
+        col = lambda name: self.column(names, rows, name)
+        columns = self.columns['threats']
+        if self.rows['threats'] and names != [n.strip().lower() for n in self.headers['threats']]:
+            raise ValueError(f"{filepath}: columns differ from the first threats file")
+        for name in ('target', 'type', 'cve', 'description'):
+            values = col(name)
+            columns.setdefault(name, []).extend(
+                memoized(normalize_type, values) if name == 'type' else values)
+        severity = col('severity')
+        columns.setdefault('severity_text', []).extend(severity)
+        columns.setdefault('severity', []).extend(parse_severity(s) for s in severity)
+        self.headers.setdefault('threats', header)
+        self.rows['threats'].extend(rows)
+
+    def finish(self):
+        """Derive the cross-record columns once everything is loaded"""
+        nodes = self.columns['nodes']
+        ips = nodes.get('ip', [])
+        severity = nodes.get('severity', [])
+        threats = self.columns['threats']
+        index = self.index
+        targets = [index.get(t, -1) for t in threats.get('target', [])]
+        threats['node'] = targets
+        threats['ip'] = [ips[i] if i >= 0 else -1 for i in targets]
+        for i, s in zip(targets, threats.get('severity', [])):
+            if i >= 0 and worse(s, severity[i]) is s:
+                severity[i] = s
+
+        connections = self.columns['connections']
+        if 'src' in connections:
+            # One extra slot so index -1 reads as "no address / no findings"
+            ips = ips + [-1]
+            severity = severity + [math.nan]
+            connections['src_ip'] = [ips[s] for s in connections['src']]
+            connections['dst_ip'] = [ips[d] for d in connections['dst']]
+            connections['severity'] = [worse(severity[s], severity[d]) for s, d in
+                                       zip(connections['src'], connections['dst'])]
+
+    def selector(self, kind, text):
+        """Compile an expression into a function returning matching row indices"""
+        key = (kind, text)
+        if key not in self.selectors:
+            compiler = QueryCompiler(kind, text)
+            test = compiler.compile()
+            columns = compiler.used
+            names = ', '.join(f'v_{c}' for c in columns)
+            source = (f'lambda cols: [i for i, ({names},) in '
+                      f'enumerate(zip({", ".join(f"cols[{c!r}]" for c in columns)})) if {test}]')
+            namespace = dict(compiler.constants)
+            self.selectors[key] = (eval(compile(source, f'<{kind} query>', 'eval'), namespace),
+                                   columns)
+        return self.selectors[key]
+
+    def select(self, kind, text):
+        function, _ = self.selector(kind, text)
+        return function(self.columns[kind])
+
+    def view(self, queries, prune_isolated=False):
+        """Row indices kept per kind for {kind: expression} queries"""
+        node_count = len(self.rows['nodes'])
+        src = self.columns['connections'].get('src', [])
+        dst = self.columns['connections'].get('dst', [])
+        targets = self.columns['threats'].get('node', [])
+        filter_nodes = bool(queries.get('nodes')) or prune_isolated
+
+        # The extra last slot answers for index -1, nodes missing from the
+        # nodes file: kept only while no node query is given
+        node_keep = bytearray(node_count + 1)
+        if queries.get('nodes'):
+            for i in self.select('nodes', queries['nodes']):
+                node_keep[i] = 1
+        else:
+            node_keep[:] = b'\x01' * (node_count + 1)
+
+        if queries.get('connections'):
+            connections = self.select('connections', queries['connections'])
+        else:
+            connections = range(len(src))
+        if queries.get('nodes'):
+            connections = [i for i in connections if node_keep[src[i]] and node_keep[dst[i]]]
+
+        if prune_isolated:
+            linked = bytearray(node_count + 1)
+            for i in connections:
+                linked[src[i]] = linked[dst[i]] = 1
+            node_keep = bytearray(a & b for a, b in zip(node_keep, linked))
+
+        if queries.get('threats'):
+            threats = self.select('threats', queries['threats'])
+        else:
+            threats = range(len(targets))
+        if filter_nodes:
+            nodes = list(compress(range(node_count), node_keep))
+            threats = [i for i in threats if node_keep[targets[i]]]
+        else:
+            nodes = range(node_count)
+        return {'nodes': nodes, 'connections': connections, 'threats': threats}
+
+    def csv_for(self, kind):
+        """CSV line per row, built once and shared by every view"""
+        if self.csv_lines[kind] is None:
+            # writerow returns what the file's write returns: the line itself
+            writer = csv.writer(LineRenderer())
+            self.csv_lines[kind] = [writer.writerow(row) for row in self.rows[kind]]
+        return self.csv_lines[kind]
+
+    def write_csv_view(self, directory, selection):
+        directory.mkdir(parents=True, exist_ok=True)
+        for kind in KINDS:
+            if kind not in self.headers:
+                continue
+            lines = self.csv_for(kind)
+            with open(directory / f'{kind}.csv', 'w', encoding='utf-8', newline='') as f:
+                csv.writer(f).writerow(self.headers[kind])
+                f.writelines(map(lines.__getitem__, selection[kind]))
+
+    def tex_for(self, kind):
+        """TeX command per row, built once and shared by every view"""
+        if self.tex_lines[kind] is None:
+            cols = self.columns[kind]
+            if kind == 'nodes':
+                lines = []
+                for node_id, node_type, ip, x, y, label in zip(
+                        cols['id'], cols['type'], cols['ip_text'], cols['x'], cols['y'], cols['label']):
+                    fields = f'{{{tex_ident(node_type)}}}{{{tex_ident(node_id)}}}{{{tex_ident(ip)}}}'
+                    if x and y:
+                        lines.append(f'\\createNodeFromType{fields}{{{tex_ident(x)}}}'
+                                     f'{{{tex_ident(y)}}}{{{tex_text(label)}}}')
+                    else:
+                        lines.append(f'\\calcNextGridPosition{{\\autopX}}{{\\autopY}}'
+                                     f'\\createNodeFromType{fields}{{\\autopX}}{{\\autopY}}'
+                                     f'{{{tex_text(label)}}}')
+            elif kind == 'connections':
+                lines = [f'\\createConnectionFromType{{{tex_ident(t)}}}{{{tex_ident(s)}}}'
+                         f'{{{tex_ident(d)}}}{{{tex_text(label)}}}'
+                         for t, s, d, label in zip(cols['type'], cols['source'],
+                                                   cols['destination'], cols['label'])]
+            else:
+                lines = [f'\\createThreatFromRow{{{tex_ident(target)}}}{{{tex_ident(t)}}}'
+                         f'{{{tex_ident(s)}}}{{{tex_ident(cve)}}}{{{tex_text(description)}}}'
+                         for target, t, s, cve, description in zip(
+                             cols['target'], cols['type'], cols['severity_text'], cols['cve'],
+                             cols['description'])]
+            self.tex_lines[kind] = lines
+        return self.tex_lines[kind]
+
+    def tex_view(self, name, queries, selection, generator='net_query.py'):
+        """\\importNetworkView fragment for a selection"""
+        lines = [f'% Generated by {generator} - do not edit by hand',
+                 f'% View: {name}']
+        for kind in KINDS:
+            if queries.get(kind):
+                lines.append(f'%   {kind}: {queries[kind]}')
+        for kind in KINDS:
+            if kind not in self.headers:
+                continue
+            tex = self.tex_for(kind)
+            lines.append(f'% {kind}: {len(selection[kind])}')
+            lines.extend(map(tex.__getitem__, selection[kind]))
+        lines.append('\\endinput')
+        return '\n'.join(lines) + '\n'
+
+    def write_tex_view(self, filepath, name, queries, selection):
+        filepath.parent.mkdir(parents=True, exist_ok=True)
+        filepath.write_text(self.tex_view(name, queries, selection), encoding='utf-8')
+
+def memoized(function, values):
+    """function applied to every value, computed once per distinct value"""
+    cache = {}
+    return [cache[v] if v in cache else cache.setdefault(v, function(v)) for v in values]
+
+def worse(a, b):
+    """The higher of two severities, where NaN means no finding"""
+    return a if b != b or a > b else b
+
+def tex_ident(value):
+    """Identifiers, IPs, numbers and type names: drop TeX specials"""
+    return re.sub(r'[\\{}#%&$~^]', '', value.strip())
+
+def tex_text(value):
+    """Free text: escape TeX specials, one line"""
+    return tex_escape(' '.join(value.split()))
+
+def load_views(filepath):
+    """Views from an INI file: one section per view, keys nodes/connections/threats"""
+    parser = configparser.ConfigParser(interpolation=None)
+    parser.read(filepath, encoding='utf-8')
+    views = []
+    for name in parser.sections():
+        section = parser[name]
+        unknown = set(section) - set(KINDS) - {'prune_isolated'}
+        if unknown:
+            raise QueryError(f"view {name}: unknown keys {', '.join(sorted(unknown))}")
+        queries = {kind: section.get(kind, '').strip() for kind in KINDS}
+        views.append((name, queries, section.getboolean('prune_isolated', fallback=False)))
+    return views
+
+def main():
+    """Main query function"""
+    args = sys.argv[1:]
+    if len(args) < 2 or '--help' in args or '-h' in args:
+        print("Usage: python3 net_query.py nodes.csv connections.csv [threats.csv ...] [options]")
+        print("")
+        print("Options:")
+        print("  --nodes EXPR        Keep nodes matching EXPR")
+        print("  --connections EXPR  Keep connections matching EXPR")
+        print("  --threats EXPR      Keep threats matching EXPR")
+        print("  --prune-isolated    Also drop nodes left without connections")
+        print("  --views FILE        Write every view of an INI file (one section per view)")
+        print("  --format FMT        csv (default) or tex")
+        print("  --output PATH       Output directory (csv, --views) or .tex file (default: filtered)")
+        print("")
+        print("Example: --connections \"type in (encrypted, vpn) and port == 443\"")
+        sys.exit(1)
+
+    options = {'--nodes': '', '--connections': '', '--threats': '', '--views': None,
+               '--format': 'csv', '--output': None}
+    for flag in options:
+        if flag in args:
+            index = args.index(flag)
+            if index + 1 >= len(args):
+                print(f"{RED}Error: {flag} requires a value{NC}")
+                sys.exit(1)
+            options[flag] = args[index + 1]
+            del args[index:index + 2]
+    prune_isolated = '--prune-isolated' in args
+    if prune_isolated:
+        args.remove('--prune-isolated')
+    if options['--format'] not in ('csv', 'tex'):
+        print(f"{RED}Error: --format must be csv or tex{NC}")
+        sys.exit(1)
+
+    for filepath in args + ([options['--views']] if options['--views'] else []):
+        if not Path(filepath).exists():
+            print(f"{RED}✗ File not found: {filepath}{NC}")
+            sys.exit(1)
+
+    print(f"{BLUE}{'='*60}{NC}")
+    print(f"{BLUE}Network Query{NC}")
+    print(f"{BLUE}{'='*60}{NC}\n")
+
+    try:
+        if options['--views']:
+            views = load_views(options['--views'])
+        else:
+            views = [('filtered', {kind: options[f'--{kind}'] for kind in KINDS}, prune_isolated)]
+        for name, queries, _ in views:
+            for kind in KINDS:
+                if queries[kind]:
+                    QueryCompiler(kind, queries[kind]).compile()
+    except (QueryError, configparser.Error) as e:
+        print(f"{RED}✗ {e}{NC}")
+        sys.exit(1)
+
+    start = time.perf_counter()
+    network = Network()
+    try:
+        network.load_nodes_csv(args[0])
+        network.load_connections_csv(args[1])
+        for filepath in args[2:]:
+            network.load_threats_csv(filepath)
+    except ValueError as e:
+        print(f"{RED}✗ {e}{NC}")
+        sys.exit(1)
+    network.finish()
+    loaded = time.perf_counter()
+    print(f"{GREEN}✓ Loaded {len(network.rows['nodes'])} nodes, "
+          f"{len(network.rows['connections'])} connections and "
+          f"{len(network.rows['threats'])} threats in {loaded - start:.2f}s{NC}\n")
+
+    output = Path(options['--output'] or 'filtered')
+    single = len(views) == 1 and not options['--views']
+    for name, queries, prune in views:
+        view_start = time.perf_counter()
+        selection = network.view(queries, prune)
+        if options['--format'] == 'tex':
+            target = output if single and output.suffix == '.tex' else (
+                output.with_suffix('.tex') if single else output / f'{name}.tex')
+            network.write_tex_view(target, name, queries, selection)
+        else:
+            target = output if single else output / name
+            network.write_csv_view(target, selection)
+        print(f"  {GREEN}✓{NC} {name:20} {len(selection['nodes']):8} nodes "
+              f"{len(selection['connections']):9} connections {len(selection['threats']):8} threats "
+              f"{CYAN}{time.perf_counter() - view_start:6.2f}s -> {target}{NC}")
+
+    print(f"\n{GREEN}✓ {len(views)} view(s) written in {time.perf_counter() - loaded:.2f}s{NC}")
+    if options['--format'] == 'tex':
+        print(f"{YELLOW}  Usage: \\importNetworkView{{file}} inside a tikzpicture{NC}\n")
+
+if __name__ == '__main__':
+    main()
@@ -8,15 +8,22 @@ statistics and reports about the network topology.
 Usage:
     python3 network_stats.py nodes.csv connections.csv
     python3 network_stats.py --all
-    python3 network_stats.py --latex nodes.csv connections.csv
+    python3 network_stats.py --latex nodes.csv connections.csv threats.csv
+    python3 network_stats.py --all --latex --output dashboard_stats.tex
 """
 
 import sys
 import csv
 import json
+import time
+from array import array
 from collections import Counter, defaultdict
 from pathlib import Path
 
+from ip_utils import AddressColumn, network_text
+from threat_scoring import parse_severity, normalize_type
+from validate_data import read_csv_kind
+
 # ANSI color codes
 GREEN = '\033[0;32m'
 YELLOW = '\033[1;33m'
@@ -25,6 +32,21 @@ CYAN = '\033[0;36m'
 RED = '\033[0;31m'
 NC = '\033[0m'
 
+# Connection types with their own dashboard counter; others add to conn/other
+DASHBOARD_CONN_TYPES = ('normal', 'encrypted', 'suspicious', 'attack', 'vpn', 'wireless')
+
+# Severity bands: lowest severity of each band, checked in order
+SEVERITY_BANDS = {'critical': 9.0, 'high': 7.0, 'medium': 4.0, 'low': 0.1, 'info': 0.0}
+
+# IOC dashboard rows and the threat types counted in each
+IOC_TYPES = {
+    'maliciousIP': ('malicious_ip',),
+    'maliciousDomain': ('malicious_domain',),
+    'fileHash': ('file_hash',),
+    'suspiciousURL': ('suspicious_url',),
+    'c2Server': ('c2_server', 'c2'),
+}
+
 class NetworkStats:
     """Analyze network topology data"""
 
@@ -32,6 +54,7 @@ class NetworkStats:
         self.nodes = []
         self.connections = []
         self.threats = []
+        self.severities = array('d')
 
     def load_nodes_csv(self, filepath):
         """Load nodes from CSV"""
@@ -47,9 +70,17 @@ class NetworkStats:
 
     def load_threats_csv(self, filepath):
         """Load threats from CSV"""
+        self.threats = []
+        self.severities = array('d')
         with open(filepath, 'r', encoding='utf-8') as f:
-            reader = csv.DictReader(f)
-            self.threats = list(reader)
+            self.add_threats(csv.DictReader(f))
+
+    def add_threats(self, rows):
+        """Append threat rows as read by csv.DictReader"""
+        start = len(self.threats)
+        self.threats.extend(rows)
+        # Parsed once here; NaN marks a missing or non-numeric severity
+        self.severities.extend(parse_severity(t.get('severity')) for t in self.threats[start:])
 
     def analyze_nodes(self):
         """Analyze node statistics"""
@@ -67,20 +98,17 @@ class NetworkStats:
             percentage = (count / total_nodes * 100) if total_nodes > 0 else 0
             print(f"  {node_type:15} {count:4} ({percentage:5.1f}%)")
 
-        # IP address analysis
+        # IP address analysis: IPv4 by /24, IPv6 by /64
         print(f"\n{GREEN}IP Address Distribution:{NC}")
-        subnets = defaultdict(int)
-        for node in self.nodes:
-            ip = node.get('ip', '').strip()
-            if ip:
-                # Extract /24 subnet
-                parts = ip.split('.')
-                if len(parts) >= 3:
-                    subnet = '.'.join(parts[:3]) + '.0/24'
-                    subnets[subnet] += 1
-
-        for subnet, count in sorted(subnets.items(), key=lambda x: x[1], reverse=True):
-            print(f"  {subnet:20} {count:4} nodes")
+        addresses = AddressColumn.from_texts([node.get('ip', '').strip() for node in self.nodes])
+        versions = addresses.versions()
+        if versions[6]:
+            print(f"  IPv4 {versions[4]:4} nodes, IPv6 {versions[6]:4} nodes")
+        subnets = addresses.groups(24, 64)
+        for key, rows in sorted(subnets.items(), key=lambda x: len(x[1]), reverse=True):
+            print(f"  {network_text(key):20} {len(rows):4} nodes")
+        if addresses.invalid:
+            print(f"\n{YELLOW}  ⚠ {addresses.invalid} nodes with an invalid IP address{NC}")
 
         # Check for missing IPs
         nodes_without_ip = sum(1 for node in self.nodes if not node.get('ip', '').strip())
@@ -162,21 +190,17 @@ class NetworkStats:
             'Info (0.0)': 0
         }
 
-        for threat in self.threats:
-            try:
-                severity = float(threat.get('severity', '0').strip())
-                if severity >= 9.0:
-                    severity_ranges['Critical (9.0-10.0)'] += 1
-                elif severity >= 7.0:
-                    severity_ranges['High (7.0-8.9)'] += 1
-                elif severity >= 4.0:
-                    severity_ranges['Medium (4.0-6.9)'] += 1
-                elif severity > 0:
-                    severity_ranges['Low (0.1-3.9)'] += 1
-                else:
-                    severity_ranges['Info (0.0)'] += 1
-            except ValueError:
-                pass
+        for severity in self.severities:
+            if severity >= 9.0:
+                severity_ranges['Critical (9.0-10.0)'] += 1
+            elif severity >= 7.0:
+                severity_ranges['High (7.0-8.9)'] += 1
+            elif severity >= 4.0:
+                severity_ranges['Medium (4.0-6.9)'] += 1
+            elif severity > 0:
+                severity_ranges['Low (0.1-3.9)'] += 1
+            elif severity == 0:
+                severity_ranges['Info (0.0)'] += 1
 
         for severity_range, count in severity_ranges.items():
             if count > 0:
@@ -190,37 +214,98 @@ class NetworkStats:
         for node_id, threat_count in top_vulnerable:
             print(f"  {node_id:20} {threat_count:4} threats")
 
-    def generate_latex_summary(self):
-        """Generate LaTeX code for summary statistics"""
-        print(f"\n{BLUE}{'='*60}{NC}")
-        print(f"{BLUE}LATEX SUMMARY CODE{NC}")
-        print(f"{BLUE}{'='*60}{NC}\n")
+    def compute_dashboard(self):
+        """Every figure the TeX dashboards show, in one pass per table
 
-        print("% Network Statistics Summary")
-        print("% Copy this into your LaTeX document")
-        print("")
-        print("\\node[draw=black!20, fill=white, rounded corners=3pt, anchor=north west] at (-10,9) {")
-        print("    \\tiny\\bfseries Network Statistics \\\\[2pt]")
-        print("    \\begin{tabular}{lr}")
-        print(f"        Total Nodes: & {len(self.nodes)} \\\\")
-        print(f"        Total Connections: & {len(self.connections)} \\\\")
-
-        if self.threats:
-            print(f"        Total Threats: & {len(self.threats)} \\\\")
-
-            # Count critical threats
-            critical = 0
-            for t in self.threats:
-                try:
-                    if float(t.get('severity', '0')) >= 9.0:
-                        critical += 1
-                except ValueError:
-                    pass  # Skip non-numeric severity values
-            if critical > 0:
-                print(f"        Critical Threats: & {critical} \\\\")
+        Returns an ordered dict of stat name -> value, named as read by
+        \\netStat (connection_renderer.tex).
+        """
+        stats = {
+            'nodes': len(self.nodes),
+            'connections': len(self.connections),
+            'threats': len(self.threats),
+        }
 
-        print("    \\end{tabular}")
-        print("};")
+        node_types = Counter()
+        for node in self.nodes:
+            node_types[normalize_type(node.get('type') or '') or 'unknown'] += 1
+        for node_type, count in sorted(node_types.items()):
+            stats[f'nodeType/{node_type}'] = count
+
+        # Connections: counts per type, bandwidth and degrees
+        conn_types = Counter()
+        degree = Counter()
+        bandwidth = 0.0
+        for conn in self.connections:
+            conn_types[normalize_type(conn.get('type') or '') or 'normal'] += 1
+            degree[(conn.get('source') or '').strip()] += 1
+            degree[(conn.get('destination') or '').strip()] += 1
+            value = parse_severity(conn.get('bandwidth'))
+            if value == value:
+                bandwidth += value
+        degree.pop('', None)
+        for conn_type in DASHBOARD_CONN_TYPES:
+            stats[f'conn/{conn_type}'] = conn_types.get(conn_type, 0)
+        stats['conn/other'] = sum(count for conn_type, count in conn_types.items()
+                                  if conn_type not in DASHBOARD_CONN_TYPES)
+        stats['bandwidthGbps'] = f'{bandwidth / 1000:.1f}'
+        node_ids = {(node.get('id') or '').strip() for node in self.nodes} - {''}
+        stats['isolatedNodes'] = len(node_ids - set(degree))
+        stats['maxDegree'] = max(degree.values(), default=0)
+
+        # Threats: severity bands, types, IOCs, CVEs and ATT&CK techniques
+        bands = dict.fromkeys(SEVERITY_BANDS, 0)
+        threat_types = Counter()
+        worst = {}
+        critical_vulns = 0
+        cves = set()
+        techniques = set()
+        for threat, severity in zip(self.threats, self.severities):
+            threat_type = normalize_type(threat.get('type') or '') or 'unknown'
+            threat_types[threat_type] += 1
+            if threat_type == 'vulnerability' and severity >= SEVERITY_BANDS['critical']:
+                critical_vulns += 1
+            for band, low in SEVERITY_BANDS.items():
+                if severity >= low:
+                    bands[band] += 1
+                    break
+            target = (threat.get('target') or '').strip()
+            if severity == severity and severity > worst.get(target, -1.0):
+                worst[target] = severity
+            cve = (threat.get('cve') or '').strip().upper()
+            if cve.startswith('CVE-'):
+                cves.add(cve)
+            techniques.update(t for t in (threat.get('attack_techniques') or '').split(';') if t)
+        for band, count in bands.items():
+            stats[f'severity/{band}'] = count
+        stats['vulnerabilities'] = threat_types.get('vulnerability', 0)
+        stats['vulnerabilities/critical'] = critical_vulns
+        stats['malware'] = threat_types.get('malware', 0)
+        for ioc, names in IOC_TYPES.items():
+            stats[f'ioc/{ioc}'] = sum(threat_types.get(name, 0) for name in names)
+        stats['ioc/total'] = sum(stats[f'ioc/{ioc}'] for ioc in IOC_TYPES)
+        stats['cves'] = len(cves)
+        stats['attackTechniques'] = len(techniques)
+        stats['affectedNodes'] = len(worst)
+
+        # Risk score: mean worst severity per node, as a percentage of 10
+        total_nodes = max(len(node_ids), len(worst), 1)
+        stats['riskScore'] = round(10 * sum(min(s, 10.0) for s in worst.values()) / total_nodes)
+        stats['securityScore'] = 100 - stats['riskScore']
+        stats['generated'] = time.strftime('%Y-%m-%d %H:%M UTC', time.gmtime())
+        return stats
+
+    def write_dashboard_tex(self, filepath):
+        """Write the dashboard figures as \\setNetStat lines for \\loadNetworkStats"""
+        stats = self.compute_dashboard()
+        lines = [
+            '% Generated by network_stats.py - do not edit by hand',
+            '% \\setNetStat{name}{value}; read with \\netStat{name}',
+        ]
+        lines.extend(f'\\setNetStat{{{name}}}{{{value}}}' for name, value in stats.items())
+        lines.append('\\endinput')
+        Path(filepath).write_text('\n'.join(lines) + '\n', encoding='utf-8')
+        return stats
 
     def print_summary(self):
         """Print complete analysis"""
@@ -240,11 +325,20 @@ def main():
         print("  python3 network_stats.py --all --latex")
         print("")
         print("Options:")
-        print("  --latex    Generate LaTeX code for statistics summary")
+        print("  --latex        Write dashboard figures for \\loadNetworkStats")
+        print("  --output FILE  File written by --latex (default: network_stats.tex)")
         sys.exit(1)
 
     stats = NetworkStats()
     generate_latex = '--latex' in sys.argv
+    output = 'network_stats.tex'
+    if '--output' in sys.argv:
+        index = sys.argv.index('--output')
+        if index + 1 >= len(sys.argv):
+            print(f"{RED}Error: --output requires a value{NC}")
+            sys.exit(1)
+        output = sys.argv[index + 1]
+        del sys.argv[index:index + 2]
 
     # Handle --all flag
     if '--all' in sys.argv:
@@ -274,13 +368,14 @@ def main():
                 continue
 
             try:
-                if 'node' in filepath.lower():
+                kind = read_csv_kind(filepath)
+                if kind == 'nodes':
                     stats.load_nodes_csv(filepath)
                     print(f"{GREEN}✓ Loaded nodes: {filepath}{NC}")
-                elif 'connection' in filepath.lower():
+                elif kind == 'connections':
                     stats.load_connections_csv(filepath)
                     print(f"{GREEN}✓ Loaded connections: {filepath}{NC}")
-                elif 'threat' in filepath.lower():
+                elif kind == 'threats':
                     stats.load_threats_csv(filepath)
                     print(f"{GREEN}✓ Loaded threats: {filepath}{NC}")
                 else:
@@ -293,7 +388,15 @@ def main():
     stats.print_summary()
 
     if generate_latex:
-        stats.generate_latex_summary()
+        figures = stats.write_dashboard_tex(output)
+        print(f"\n{BLUE}{'='*60}{NC}")
+        print(f"{BLUE}LATEX DASHBOARD STATISTICS{NC}")
+        print(f"{BLUE}{'='*60}{NC}\n")
+        print(f"{GREEN}✓ {len(figures)} figures written to: {output}{NC}")
+        print(f"  Risk score: {figures['riskScore']}/100, "
+              f"critical findings: {figures['severity/critical']}, IOCs: {figures['ioc/total']}")
+        print(f"{YELLOW}  Usage: \\loadNetworkStats{{{output}}} before \\drawConnectionSummary, "
+              f"\\drawSecurityDashboard, \\drawIOCDashboard, ...{NC}")
 
     print(f"\n{BLUE}{'='*60}{NC}")
     print(f"{GREEN}✓ Analysis complete{NC}")
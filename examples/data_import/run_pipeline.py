@@ -0,0 +1,289 @@
+#!/usr/bin/env python3
+"""
+run_pipeline.py - Validate, convert and analyze network data in one pass
+
+Running validate_data.py, convert_format.py and network_stats.py one after
+the other reads and parses every input file three times. This script
+reads each file once and streams the parsed rows, in batches, to every
+stage at the same time:
+- validate: the validate_data.py checks and summary
+- json:     network.json, as convert_format.py --to json
+- graphml:  network.graphml, as convert_format.py --to graphml
+- stats:    network_stats.tex, as network_stats.py --latex (and the
+            printed report with --report)
+
+Each stage is a generator that receives the batches; the outputs are the
+same files the separate tools write. A throughput table shows where the
+time went.
+
+Usage:
+    python3 run_pipeline.py nodes.csv connections.csv threats.csv
+    python3 run_pipeline.py --all --output-dir build
+    python3 run_pipeline.py nodes.csv connections.csv --stages validate,stats --report
+"""
+
+import sys
+import csv
+import json
+import time
+from itertools import islice
+from pathlib import Path
+
+from validate_data import NetworkDataValidator, csv_kind
+from convert_format import (json_document, node_json, connection_json, threat_json,
+                            GRAPHML_HEADER, GRAPHML_FOOTER, graphml_node, graphml_edge)
+from network_stats import NetworkStats
+
+# ANSI color codes
+GREEN = '\033[0;32m'
+YELLOW = '\033[1;33m'
+BLUE = '\033[0;34m'
+CYAN = '\033[0;36m'
+RED = '\033[0;31m'
+NC = '\033[0m'
+
+KINDS = ('nodes', 'connections', 'threats')
+STAGES = ('validate', 'json', 'graphml', 'stats')
+
+# Rows handed to the stages at a time
+BATCH_ROWS = 2048
+
+# Events sent to every stage:
+#   ('begin', kind, fieldnames, filepath)
+#   ('rows', kind, first_line, rows)      rows as read by csv.DictReader
+#   ('end', kind, row_count, filepath)
+# then None, after which a stage returns its list of report lines.
+
+def validate_stage(validator):
+    """validate_data.py checks, row by row"""
+    checks = {
+        'nodes': validator.check_node,
+        'connections': validator.check_connection,
+        'threats': validator.check_threat,
+    }
+    skip = False
+    has_coordinates = False
+    report = []
+    while True:
+        event = yield
+        if event is None:
+            return report
+        if event[0] == 'begin':
+            _, kind, fieldnames, _ = event
+            skip = not validator.check_headers(kind, fieldnames)
+            has_coordinates = 'x' in fieldnames and 'y' in fieldnames
+        elif event[0] == 'rows' and not skip:
+            _, kind, line_num, rows = event
+            check = checks[kind]
+            if kind == 'nodes':
+                for row in rows:
+                    check(row, line_num, has_coordinates)
+                    line_num += 1
+            else:
+                for row in rows:
+                    check(row, line_num)
+                    line_num += 1
+        elif event[0] == 'end':
+            _, kind, count, filepath = event
+            if skip:
+                report.append(f"{RED}✗ {filepath}: header check failed{NC}")
+            else:
+                report.append(f"{GREEN}✓ Validated {count} {kind} from {filepath}{NC}")
+
+def json_stage(output_file):
+    """network.json, as convert_format.py --to json"""
+    data = json_document()
+    builders = {'nodes': node_json, 'connections': connection_json, 'threats': threat_json}
+    while True:
+        event = yield
+        if event is None:
+            break
+        if event[0] == 'rows':
+            data[event[1]].extend(map(builders[event[1]], event[3]))
+    with open(output_file, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2)
+    return [f"{GREEN}✓ Converted to JSON: {output_file}{NC}",
+            f"{BLUE}  Nodes: {len(data['nodes'])}, connections: {len(data['connections'])}, "
+            f"threats: {len(data['threats'])}{NC}"]
+
+def graphml_stage(output_file):
+    """network.graphml, as convert_format.py --to graphml"""
+    nodes = edges = 0
+    with open(output_file, 'w', encoding='utf-8') as f:
+        f.write(GRAPHML_HEADER)
+        while True:
+            event = yield
+            if event is None:
+                break
+            if event[0] != 'rows':
+                continue
+            if event[1] == 'nodes':
+                f.write(''.join(map(graphml_node, event[3])))
+                nodes += len(event[3])
+            elif event[1] == 'connections':
+                f.write(''.join(graphml_edge(conn, edges + i) for i, conn in enumerate(event[3])))
+                edges += len(event[3])
+        f.write(GRAPHML_FOOTER)
+    return [f"{GREEN}✓ Converted to GraphML: {output_file}{NC}",
+            f"{BLUE}  Nodes: {nodes}, edges: {edges}{NC}"]
+
+def stats_stage(output_file, report_summary=False):
+    """network_stats.tex, as network_stats.py --latex"""
+    stats = NetworkStats()
+    while True:
+        event = yield
+        if event is None:
+            break
+        if event[0] == 'rows':
+            if event[1] == 'nodes':
+                stats.nodes.extend(event[3])
+            elif event[1] == 'connections':
+                stats.connections.extend(event[3])
+            else:
+                stats.add_threats(event[3])
+    if report_summary:
+        stats.print_summary()
+    figures = stats.write_dashboard_tex(output_file)
+    return [f"{GREEN}✓ {len(figures)} dashboard figures written to: {output_file}{NC}",
+            f"{BLUE}  Risk score: {figures['riskScore']}/100, "
+            f"critical findings: {figures['severity/critical']}, IOCs: {figures['ioc/total']}{NC}"]
+
+class Pipeline:
+    """Reads each input once and fans the rows out to the stages"""
+
+    def __init__(self, stages):
+        self.stages = {}
+        self.seconds = {'read': 0.0}
+        for name, stage in stages.items():
+            next(stage)
+            self.stages[name] = stage
+            self.seconds[name] = 0.0
+        self.rows = 0
+
+    def send(self, event):
+        for name, stage in self.stages.items():
+            start = time.perf_counter()
+            stage.send(event)
+            self.seconds[name] += time.perf_counter() - start
+
+    def feed(self, filepath, kind, reader):
+        self.send(('begin', kind, reader.fieldnames or [], filepath))
+        line_num = 2
+        while True:
+            start = time.perf_counter()
+            rows = list(islice(reader, BATCH_ROWS))
+            self.seconds['read'] += time.perf_counter() - start
+            if not rows:
+                break
+            self.send(('rows', kind, line_num, rows))
+            line_num += len(rows)
+        self.rows += line_num - 2
+        self.send(('end', kind, line_num - 2, filepath))
+
+    def finish(self):
+        """Report lines per stage"""
+        reports = {}
+        for name, stage in self.stages.items():
+            start = time.perf_counter()
+            try:
+                stage.send(None)
+            except StopIteration as done:
+                reports[name] = done.value or []
+            self.seconds[name] += time.perf_counter() - start
+        return reports
+
+def main():
+    """Main pipeline function"""
+    args = sys.argv[1:]
+    if not args or '--help' in args or '-h' in args:
+        print("Usage: python3 run_pipeline.py <files...> [options]")
+        print("       python3 run_pipeline.py --all [options]")
+        print("")
+        print("Options:")
+        print(f"  --stages LIST      Comma-separated stages to run (default: {','.join(STAGES)})")
+        print("  --output-dir DIR   Where network.json, network.graphml and network_stats.tex go (default: .)")
+        print("  --report           Also print the network_stats.py report")
+        sys.exit(1)
+
+    options = {'--stages': ','.join(STAGES), '--output-dir': '.'}
+    for flag in options:
+        if flag in args:
+            index = args.index(flag)
+            if index + 1 >= len(args):
+                print(f"{RED}Error: {flag} requires a value{NC}")
+                sys.exit(1)
+            options[flag] = args[index + 1]
+            del args[index:index + 2]
+    report_summary = '--report' in args
+    if '--all' in args:
+        files = [f for f in ('nodes.csv', 'connections.csv', 'threats.csv') if Path(f).exists()]
+    else:
+        files = [a for a in args if not a.startswith('--')]
+
+    selected = [s.strip() for s in options['--stages'].split(',') if s.strip()]
+    unknown = [s for s in selected if s not in STAGES]
+    if unknown:
+        print(f"{RED}Error: unknown stage(s) {', '.join(unknown)} (known: {', '.join(STAGES)}){NC}")
+        sys.exit(1)
+
+    print(f"{BLUE}{'='*60}{NC}")
+    print(f"{BLUE}Network Data Pipeline{NC}")
+    print(f"{BLUE}{'='*60}{NC}\n")
+
+    # Nodes first, so connection and threat references can be checked
+    inputs = []
+    for filepath in files:
+        if not Path(filepath).exists():
+            print(f"{RED}✗ File not found: {filepath}{NC}")
+            sys.exit(1)
+        with open(filepath, 'r', encoding='utf-8', newline='') as f:
+            kind = csv_kind(next(csv.reader(f), []), filepath)
+        if kind is None:
+            print(f"{YELLOW}⚠ Skipping {filepath}: not a nodes, connections or threats CSV{NC}")
+            continue
+        inputs.append((KINDS.index(kind), filepath, kind))
+    inputs.sort(key=lambda item: item[0])
+    if not inputs:
+        print(f"{RED}✗ No input files{NC}")
+        sys.exit(1)
+
+    output_dir = Path(options['--output-dir'])
+    output_dir.mkdir(parents=True, exist_ok=True)
+    validator = NetworkDataValidator()
+    factories = {
+        'validate': lambda: validate_stage(validator),
+        'json': lambda: json_stage(output_dir / 'network.json'),
+        'graphml': lambda: graphml_stage(output_dir / 'network.graphml'),
+        'stats': lambda: stats_stage(output_dir / 'network_stats.tex', report_summary),
+    }
+    pipeline = Pipeline({name: factories[name]() for name in STAGES if name in selected})
+
+    start = time.perf_counter()
+    for _, filepath, kind in inputs:
+        with open(filepath, 'r', encoding='utf-8') as f:
+            pipeline.feed(filepath, kind, csv.DictReader(f))
+        print(f"{CYAN}Read {filepath} ({kind}){NC}")
+    reports = pipeline.finish()
+    elapsed = time.perf_counter() - start
+
+    print()
+    for name in pipeline.stages:
+        for line in reports[name]:
+            print(line)
+    if 'validate' in pipeline.stages:
+        validator.print_summary()
+
+    print(f"\n{BLUE}{'='*60}{NC}")
+    print(f"{BLUE}STAGE THROUGHPUT{NC}")
+    print(f"{BLUE}{'='*60}{NC}\n")
+    print(f"  {'stage':10} {'seconds':>8} {'rows/s':>12}")
+    for name, seconds in pipeline.seconds.items():
+        rate = f"{pipeline.rows / seconds:,.0f}" if seconds > 0 else '-'
+        print(f"  {name:10} {seconds:8.2f} {rate:>12}")
+    print(f"\n{GREEN}✓ {pipeline.rows} rows through {len(pipeline.stages)} stages in {elapsed:.2f}s{NC}\n")
+
+    if validator.errors:
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
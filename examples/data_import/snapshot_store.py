@@ -0,0 +1,556 @@
+#!/usr/bin/env python3
+"""
+snapshot_store.py - Keep a history of network and threat snapshots
+
+This script records each import of nodes, connections and threats CSV files
+into a local SQLite store and answers questions about the history: the
+state at a given time, what changed between two times, and how many
+threats each node carried over time. It also writes timeline and campaign
+data for \\drawAttackTimeline and \\drawCampaignTracker.
+
+Each snapshot stores only the rows that differ from the previous one. Every
+--checkpoint-every snapshots (and whenever the CSV columns change) the full
+state is also stored, zlib-compressed, so rebuilding any snapshot replays
+at most one checkpoint interval. Row changes are keyed by (kind, key,
+snapshot), so the value of a row at a time, and the rows touched in a time
+range, are B-tree lookups rather than replays. Per-node threat counts are
+kept in their own table, again only when they change.
+
+Rows are keyed by node id, by source/destination for connections and by
+target/type/cve for threats; repeated keys are numbered in file order.
+Threats with a campaign (or actor) column are also tracked per campaign.
+
+Times are ISO dates or date-times in UTC (2025-01-15, 2025-01-15T10:00);
+'latest' names the newest snapshot.
+
+Usage:
+    python3 snapshot_store.py record --nodes nodes.csv --connections connections.csv --threats threats.csv
+    python3 snapshot_store.py record --threats threats.csv --at 2025-01-15T10:00 --label "hourly scan"
+    python3 snapshot_store.py state --at 2025-01-15T10:00 --output state/
+    python3 snapshot_store.py diff 2025-01-15 2025-01-16
+    python3 snapshot_store.py counts web1 db1 --since 2025-01-01
+    python3 snapshot_store.py timeline --since 2025-01-15 --output network_history.tex
+    python3 snapshot_store.py info
+"""
+
+import sys
+import re
+import csv
+import json
+import time
+import zlib
+import sqlite3
+from collections import Counter
+from datetime import datetime, timezone
+from pathlib import Path
+
+from threat_scoring import parse_severity, tex_escape
+
+# ANSI color codes
+GREEN = '\033[0;32m'
+YELLOW = '\033[1;33m'
+BLUE = '\033[0;34m'
+CYAN = '\033[0;36m'
+RED = '\033[0;31m'
+NC = '\033[0m'
+
+DEFAULT_DB = 'network_history.sqlite'
+DEFAULT_TEX = 'network_history.tex'
+
+# One full state per week of hourly snapshots
+DEFAULT_CHECKPOINT_EVERY = 168
+
+# Row kinds, stored by index
+KINDS = ('node', 'connection', 'threat')
+
+# Columns forming the row key of each kind
+KEY_COLUMNS = {
+    'node': ('id',),
+    'connection': ('source', 'destination'),
+    'threat': ('target', 'type', 'cve'),
+}
+
+# Threat columns naming a campaign, first match wins
+CAMPAIGN_COLUMNS = ('campaign', 'actor', 'threat_actor')
+
+# Events shown by \drawAttackTimeline
+DEFAULT_EVENTS = 6
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS snapshot (
+    id INTEGER PRIMARY KEY,
+    taken INTEGER NOT NULL,
+    label TEXT,
+    nodes INTEGER,
+    connections INTEGER,
+    threats INTEGER,
+    changes INTEGER
+);
+CREATE INDEX IF NOT EXISTS snapshot_taken ON snapshot (taken);
+CREATE TABLE IF NOT EXISTS checkpoint (
+    snapshot INTEGER PRIMARY KEY,
+    columns TEXT NOT NULL,
+    data BLOB NOT NULL
+);
+CREATE TABLE IF NOT EXISTS change (
+    kind INTEGER,
+    key TEXT,
+    snapshot INTEGER,
+    value TEXT,
+    PRIMARY KEY (kind, key, snapshot)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS change_snapshot ON change (snapshot, kind);
+CREATE TABLE IF NOT EXISTS threat_count (
+    node TEXT,
+    snapshot INTEGER,
+    count INTEGER,
+    worst REAL,
+    PRIMARY KEY (node, snapshot)
+) WITHOUT ROWID;
+"""
+
+def parse_time(text):
+    """UTC epoch seconds for an ISO date or date-time"""
+    try:
+        moment = datetime.fromisoformat(text.strip().replace(' ', 'T'))
+    except ValueError:
+        raise ValueError(f"Invalid time '{text}' (use 2025-01-15 or 2025-01-15T10:00)")
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return int(moment.timestamp())
+
+def format_time(epoch):
+    """ISO-style UTC text for epoch seconds"""
+    return time.strftime('%Y-%m-%d %H:%M', time.gmtime(epoch))
+
+def format_offset(seconds):
+    """Timeline offset label: T+5h, or T+3d past two days"""
+    hours = seconds // 3600
+    return f'T+{hours}h' if hours < 48 else f'T+{hours // 24}d'
+
+def read_rows(filepath, kind):
+    """(columns, {key: values}) for one CSV file"""
+    with open(filepath, 'r', encoding='utf-8', newline='') as f:
+        reader = csv.reader(f)
+        columns = [c.strip() for c in next(reader, [])]
+        key_index = [columns.index(c) for c in KEY_COLUMNS[kind] if c in columns]
+        if not key_index:
+            raise ValueError(f"{filepath}: no {'/'.join(KEY_COLUMNS[kind])} column")
+        rows = {}
+        seen = Counter()
+        width = len(columns)
+        for row in reader:
+            if not any(row):
+                continue
+            row = (row + [''] * width)[:width]
+            key = '\t'.join(row[i].strip() for i in key_index)
+            seen[key] += 1
+            if seen[key] > 1:
+                key = f'{key}\t{seen[key]}'
+            rows[key] = json.dumps(row, ensure_ascii=False, separators=(',', ':'))
+    return columns, rows
+
+class SnapshotStore:
+    """SQLite history of network snapshots as row deltas plus checkpoints"""
+
+    def __init__(self, db_path, checkpoint_every=DEFAULT_CHECKPOINT_EVERY):
+        self.db = sqlite3.connect(str(db_path))
+        self.db.executescript(SCHEMA)
+        self.checkpoint_every = checkpoint_every
+        self.columns_cache = {}
+
+    def snapshots(self):
+        """Number of recorded snapshots"""
+        return self.db.execute('SELECT COUNT(*) FROM snapshot').fetchone()[0]
+
+    def resolve(self, when):
+        """Id and time of the newest snapshot at or before a time text, or None"""
+        if when in (None, 'latest'):
+            return self.db.execute('SELECT id, taken FROM snapshot ORDER BY id DESC LIMIT 1').fetchone()
+        return self.db.execute('SELECT id, taken FROM snapshot WHERE taken <= ? '
+                               'ORDER BY taken DESC, id DESC LIMIT 1', (parse_time(when),)).fetchone()
+
+    def first_after(self, when):
+        """Id and time of the oldest snapshot at or after a time text, or None"""
+        return self.db.execute('SELECT id, taken FROM snapshot WHERE taken >= ? '
+                               'ORDER BY taken, id LIMIT 1', (parse_time(when),)).fetchone()
+
+    def governing_checkpoint(self, snapshot):
+        """Newest checkpoint at or before a snapshot"""
+        return self.db.execute('SELECT snapshot FROM checkpoint WHERE snapshot <= ? '
+                               'ORDER BY snapshot DESC LIMIT 1', (snapshot,)).fetchone()[0]
+
+    def columns_at(self, snapshot):
+        """{kind: columns} in effect at a snapshot"""
+        checkpoint = self.governing_checkpoint(snapshot)
+        if checkpoint not in self.columns_cache:
+            row = self.db.execute('SELECT columns FROM checkpoint WHERE snapshot = ?',
+                                  (checkpoint,)).fetchone()
+            self.columns_cache[checkpoint] = json.loads(row[0])
+        return self.columns_cache[checkpoint]
+
+    def state_at(self, snapshot):
+        """{kind: {key: json values}} at a snapshot: one checkpoint plus its deltas"""
+        checkpoint = self.governing_checkpoint(snapshot)
+        data = self.db.execute('SELECT data FROM checkpoint WHERE snapshot = ?', (checkpoint,)).fetchone()[0]
+        state = {kind: dict(rows) for kind, rows in json.loads(zlib.decompress(data)).items()}
+        for kind, key, value in self.db.execute(
+                'SELECT kind, key, value FROM change WHERE snapshot > ? AND snapshot <= ? '
+                'ORDER BY snapshot', (checkpoint, snapshot)):
+            rows = state[KINDS[kind]]
+            if value is None:
+                rows.pop(key, None)
+            else:
+                rows[key] = value
+        return state
+
+    def value_at(self, kind, key, snapshot):
+        """Stored values of one row at a snapshot, or None if absent"""
+        row = self.db.execute('SELECT value FROM change WHERE kind = ? AND key = ? AND snapshot <= ? '
+                              'ORDER BY snapshot DESC LIMIT 1',
+                              (KINDS.index(kind), key, snapshot)).fetchone()
+        return row[0] if row else None
+
+    def record(self, files, taken, label=''):
+        """Store one snapshot of the given {kind: csv path}; returns (id, changes)
+
+        Kinds without a file keep their previous rows.
+        """
+        latest = self.resolve('latest')
+        if latest and taken < latest[1]:
+            raise ValueError(f"Snapshot time {format_time(taken)} is before the latest "
+                             f"snapshot ({format_time(latest[1])})")
+        previous = self.state_at(latest[0]) if latest else {kind: {} for kind in KINDS}
+        columns = dict(self.columns_at(latest[0])) if latest else {kind: [] for kind in KINDS}
+        current = dict(previous)
+        for kind, filepath in files.items():
+            columns[kind], current[kind] = read_rows(filepath, kind)
+
+        with self.db:
+            snapshot = self.db.execute(
+                'INSERT INTO snapshot (taken, label, nodes, connections, threats) VALUES (?, ?, ?, ?, ?)',
+                (taken, label, len(current['node']), len(current['connection']),
+                 len(current['threat']))).lastrowid
+            changes = []
+            for code, kind in enumerate(KINDS):
+                old, new = previous[kind], current[kind]
+                if old is new:
+                    continue
+                changes.extend((code, key, snapshot, value) for key, value in new.items()
+                               if old.get(key) != value)
+                changes.extend((code, key, snapshot, None) for key in old.keys() - new.keys())
+            self.db.executemany('INSERT INTO change VALUES (?, ?, ?, ?)', changes)
+            self.db.execute('UPDATE snapshot SET changes = ? WHERE id = ?', (len(changes), snapshot))
+
+            if (not latest or columns != self.columns_at(latest[0])
+                    or snapshot - self.governing_checkpoint(latest[0]) >= self.checkpoint_every):
+                data = zlib.compress(json.dumps({kind: list(current[kind].items()) for kind in KINDS},
+                                                separators=(',', ':')).encode('utf-8'), 6)
+                self.db.execute('INSERT INTO checkpoint VALUES (?, ?, ?)',
+                                (snapshot, json.dumps(columns), data))
+
+            if 'threat' in files:
+                old = self.threat_counts(previous['threat'], self.columns_at(latest[0])['threat']) if latest else {}
+                new = self.threat_counts(current['threat'], columns['threat'])
+                counts = [(node, snapshot, count, worst) for node, (count, worst) in new.items()
+                          if old.get(node) != (count, worst)]
+                counts.extend((node, snapshot, 0, -1.0) for node in old.keys() - new.keys())
+                self.db.executemany('INSERT INTO threat_count VALUES (?, ?, ?, ?)', counts)
+        return snapshot, len(changes)
+
+    def threat_counts(self, rows, columns):
+        """{node: (count, worst severity)} for threat rows"""
+        target = columns.index('target') if 'target' in columns else None
+        severity = columns.index('severity') if 'severity' in columns else None
+        counts = {}
+        for value in rows.values():
+            row = json.loads(value)
+            node = row[target].strip() if target is not None else ''
+            level = parse_severity(row[severity]) if severity is not None else float('nan')
+            count, worst = counts.get(node, (0, -1.0))
+            counts[node] = (count + 1, level if level > worst else worst)
+        return counts
+
+    def diff(self, first, second):
+        """{kind: (added, removed, changed)} key lists between two snapshots"""
+        result = {kind: ([], [], []) for kind in KINDS}
+        for kind, key, value, _ in self.db.execute(
+                'SELECT kind, key, value, MAX(snapshot) FROM change WHERE snapshot > ? AND snapshot <= ? '
+                'GROUP BY kind, key', (first, second)).fetchall():
+            before = self.value_at(KINDS[kind], key, first)
+            added, removed, changed = result[KINDS[kind]]
+            if before is None and value is not None:
+                added.append(key)
+            elif before is not None and value is None:
+                removed.append(key)
+            elif before != value:
+                changed.append(key)
+        return result
+
+    def count_series(self, node, since, until):
+        """[(time, count, worst)] for one node: the value at since, then each change"""
+        series = []
+        start = self.db.execute('SELECT count, worst FROM threat_count WHERE node = ? AND snapshot <= ? '
+                                'ORDER BY snapshot DESC LIMIT 1', (node, since[0])).fetchone()
+        series.append((since[1],) + (start or (0, -1.0)))
+        series.extend(self.db.execute(
+            'SELECT s.taken, t.count, t.worst FROM threat_count t JOIN snapshot s ON s.id = t.snapshot '
+            'WHERE t.node = ? AND t.snapshot > ? AND t.snapshot <= ? ORDER BY t.snapshot',
+            (node, since[0], until[0])))
+        return series
+
+    def new_threats(self, first, last):
+        """[(snapshot, time, key, values)] for threats appearing in (first, last]"""
+        return self.db.execute(
+            'SELECT c.snapshot, s.taken, c.key, c.value FROM change c '
+            'JOIN snapshot s ON s.id = c.snapshot '
+            'WHERE c.kind = ? AND c.snapshot > ? AND c.snapshot <= ? AND c.value IS NOT NULL '
+            'AND COALESCE((SELECT p.value IS NULL FROM change p WHERE p.kind = c.kind AND p.key = c.key '
+            'AND p.snapshot < c.snapshot ORDER BY p.snapshot DESC LIMIT 1), 1) '
+            'ORDER BY c.snapshot', (KINDS.index('threat'), first, last)).fetchall()
+
+    def timeline(self, since, until, limit):
+        """Timeline events and campaigns between two snapshots
+
+        Each snapshot that introduced threats is a candidate event, ranked by
+        the worst new finding; the top `limit` are returned in time order.
+        Returns (events, campaigns): events are (time, text, severity),
+        campaigns map name -> [first seen, targets set, active].
+        """
+        first = since[0] - 1 if since else 0
+        events = {}
+        campaigns = {}
+        for snapshot, taken, key, value in self.new_threats(first, until[0]):
+            columns = self.columns_at(snapshot)['threat']
+            row = dict(zip(columns, json.loads(value)))
+            severity = parse_severity(row.get('severity'))
+            severity = severity if severity == severity else 0.0
+            target = (row.get('target') or '').strip()
+            cve = (row.get('cve') or '').strip()
+            text = cve if cve.upper().startswith('CVE-') else (row.get('type') or 'threat').strip()
+            event = events.setdefault(snapshot, [taken, 0, -1.0, ''])
+            event[1] += 1
+            if severity > event[2]:
+                event[2], event[3] = severity, f'{text} on {target}' if target else text
+            campaign = next((row[c].strip() for c in CAMPAIGN_COLUMNS if (row.get(c) or '').strip()), '')
+            if campaign:
+                entry = campaigns.setdefault(campaign, [taken, set(), False])
+                entry[1].add(target)
+
+        if campaigns:
+            columns = self.columns_at(until[0])['threat']
+            for value in self.state_at(until[0])['threat'].values():
+                row = dict(zip(columns, json.loads(value)))
+                campaign = next((row[c].strip() for c in CAMPAIGN_COLUMNS if (row.get(c) or '').strip()), '')
+                if campaign in campaigns:
+                    campaigns[campaign][2] = True
+
+        ranked = sorted(events.values(), key=lambda e: (-e[2], e[0]))[:limit]
+        ranked.sort()
+        timeline = []
+        for taken, count, severity, text in ranked:
+            if count > 1:
+                text = f'{text} +{count - 1}'
+            timeline.append((taken, text, severity))
+        return timeline, campaigns
+
+    def info(self):
+        """Row counts per table and the store size in bytes"""
+        counts = {table: self.db.execute(f'SELECT COUNT(*) FROM {table}').fetchone()[0]
+                  for table in ('snapshot', 'checkpoint', 'change', 'threat_count')}
+        page_size = self.db.execute('PRAGMA page_size').fetchone()[0]
+        pages = self.db.execute('PRAGMA page_count').fetchone()[0]
+        return counts, page_size * pages
+
+def campaign_slugs(campaigns):
+    """{name: slug} in name order; the slug (lowercase letters, digits and
+    dashes) names the campaign in \\drawCampaignHistory"""
+    slugs = {}
+    for name in sorted(campaigns):
+        base = re.sub(r'[^a-z0-9]+', '-', name.lower()).strip('-') or 'campaign'
+        slug, n = base, 1
+        while slug in slugs.values():
+            n += 1
+            slug = f'{base}-{n}'
+        slugs[name] = slug
+    return slugs
+
+def write_timeline_tex(filepath, events, campaigns, start, end):
+    """Write timeline events and campaigns for \\loadNetworkHistory"""
+    span = max(end - start, 1)
+    first = events[0][0] if events else start
+    lines = [
+        '% Generated by snapshot_store.py - do not edit by hand',
+        f'% Timeline {format_time(start)} to {format_time(end)} UTC',
+    ]
+    for index, (taken, text, severity) in enumerate(events, 1):
+        lines.append(f'\\setTimelineEvent{{{index}}}{{{(taken - start) / span:.3f}}}'
+                     f'{{{format_offset(taken - first)}}}{{{tex_escape(text)}}}{{{severity:.1f}}}')
+    lines.append(f'\\gdef\\timelineEventIds{{{",".join(str(i) for i in range(1, len(events) + 1))}}}')
+    lines.append(f'\\setTimelineSpan{{{format_time(start)}}}{{{format_time(end)}}}')
+    for name, slug in campaign_slugs(campaigns).items():
+        first_seen, targets, active = campaigns[name]
+        lines.append(f'\\setCampaignHistory{{{slug}}}{{{tex_escape(name)}}}'
+                     f'{{{format_time(first_seen)[:10]}}}{{{len(targets - {""})}}}{{{1 if active else 0}}}')
+    lines.append('\\endinput')
+    Path(filepath).write_text('\n'.join(lines) + '\n', encoding='utf-8')
+
+def main():
+    """Main snapshot store function"""
+    commands = ('record', 'state', 'diff', 'counts', 'timeline', 'info')
+    args = sys.argv[1:]
+    if not args or args[0] not in commands:
+        print(f"Usage: python3 snapshot_store.py <{'|'.join(commands)}> [arguments] [options]")
+        print("")
+        print("Commands:")
+        print("  record             Store a snapshot of --nodes/--connections/--threats")
+        print("  state              Write the CSV files as they were at --at")
+        print("  diff T1 T2         Rows added, removed and changed between two times")
+        print("  counts NODE...     Threat count per node over time")
+        print("  timeline           Write timeline and campaign data for the TeX widgets")
+        print("  info               Show store contents and size")
+        print("")
+        print("Options:")
+        print(f"  --db FILE              Store file (default: {DEFAULT_DB})")
+        print("  --nodes/--connections/--threats FILE   record: CSV files to store")
+        print("  --at TIME              record: snapshot time (default: now); state: time to rebuild")
+        print("  --label TEXT           record: note stored with the snapshot")
+        print(f"  --checkpoint-every N   record: full state every N snapshots (default: {DEFAULT_CHECKPOINT_EVERY})")
+        print("  --since/--until TIME   counts, timeline: time range (default: whole history)")
+        print(f"  --events N             timeline: events to keep (default: {DEFAULT_EVENTS})")
+        print(f"  --output PATH          state: directory (default: state); timeline: file (default: {DEFAULT_TEX})")
+        sys.exit(1)
+
+    command = args.pop(0)
+    options = {'--db': DEFAULT_DB, '--nodes': None, '--connections': None, '--threats': None,
+               '--at': None, '--label': '', '--checkpoint-every': str(DEFAULT_CHECKPOINT_EVERY),
+               '--since': None, '--until': None, '--events': str(DEFAULT_EVENTS), '--output': None}
+    for flag in options:
+        while flag in args:
+            index = args.index(flag)
+            if index + 1 >= len(args):
+                print(f"{RED}Error: {flag} requires a value{NC}")
+                sys.exit(1)
+            options[flag] = args[index + 1]
+            del args[index:index + 2]
+    try:
+        checkpoint_every = max(1, int(options['--checkpoint-every']))
+        limit = max(1, int(options['--events']))
+    except ValueError:
+        print(f"{RED}Error: --checkpoint-every and --events take whole numbers{NC}")
+        sys.exit(1)
+
+    print(f"{BLUE}{'='*60}{NC}")
+    print(f"{BLUE}Network Snapshot Store{NC}")
+    print(f"{BLUE}{'='*60}{NC}\n")
+
+    if command != 'record' and not Path(options['--db']).exists():
+        print(f"{RED}✗ Store not found: {options['--db']} (record a snapshot first){NC}")
+        sys.exit(1)
+    store = SnapshotStore(options['--db'], checkpoint_every)
+    if command != 'record' and not store.snapshots():
+        print(f"{RED}✗ No snapshots in {options['--db']}{NC}")
+        sys.exit(1)
+
+    try:
+        if command == 'record':
+            files = {kind: options[f'--{kind}s'] for kind in KINDS if options[f'--{kind}s']}
+            if not files:
+                print(f"{RED}Error: record needs --nodes, --connections and/or --threats{NC}")
+                sys.exit(1)
+            for filepath in files.values():
+                if not Path(filepath).exists():
+                    print(f"{RED}✗ File not found: {filepath}{NC}")
+                    sys.exit(1)
+            taken = parse_time(options['--at']) if options['--at'] else int(time.time())
+            start = time.perf_counter()
+            snapshot, changes = store.record(files, taken, options['--label'])
+            print(f"{GREEN}✓ Snapshot {snapshot} at {format_time(taken)} UTC: {changes} row changes "
+                  f"({time.perf_counter() - start:.2f}s){NC}")
+            print(f"{CYAN}  → {options['--db']}{NC}\n")
+
+        elif command == 'state':
+            found = store.resolve(options['--at'])
+            if not found:
+                print(f"{RED}✗ No snapshot at or before {options['--at']}{NC}")
+                sys.exit(1)
+            output = Path(options['--output'] or 'state')
+            output.mkdir(parents=True, exist_ok=True)
+            state = store.state_at(found[0])
+            columns = store.columns_at(found[0])
+            for kind in KINDS:
+                if not columns[kind]:
+                    continue
+                filepath = output / f'{kind}s.csv'
+                with open(filepath, 'w', encoding='utf-8', newline='') as f:
+                    writer = csv.writer(f)
+                    writer.writerow(columns[kind])
+                    writer.writerows(json.loads(value) for value in state[kind].values())
+                print(f"{GREEN}✓ {len(state[kind])} {kind}s → {filepath}{NC}")
+            print(f"{CYAN}  Snapshot {found[0]} at {format_time(found[1])} UTC{NC}\n")
+
+        elif command == 'diff':
+            if len(args) != 2:
+                print(f"{RED}Error: diff needs two times{NC}")
+                sys.exit(1)
+            first, second = store.resolve(args[0]), store.resolve(args[1])
+            if not second:
+                print(f"{RED}✗ No snapshot at or before {args[1]}{NC}")
+                sys.exit(1)
+            first = first or (0, 0)
+            print(f"{CYAN}Snapshot {first[0]} → {second[0]}{NC}\n")
+            for kind, (added, removed, changed) in store.diff(first[0], second[0]).items():
+                print(f"{GREEN}{kind.capitalize()}s:{NC} +{len(added)} -{len(removed)} ~{len(changed)}")
+                for sign, keys in (('+', added), ('-', removed), ('~', changed)):
+                    for key in sorted(keys)[:10]:
+                        print(f"  {sign} {key.replace(chr(9), ' / ')}")
+                    if len(keys) > 10:
+                        print(f"    ... and {len(keys) - 10} more")
+            print("")
+
+        elif command == 'counts':
+            if not args:
+                print(f"{RED}Error: counts needs at least one node id{NC}")
+                sys.exit(1)
+            since = store.resolve(options['--since']) if options['--since'] else None
+            since = since or store.db.execute('SELECT id, taken FROM snapshot ORDER BY id LIMIT 1').fetchone()
+            until = store.resolve(options['--until'])
+            if not until:
+                print(f"{RED}✗ No snapshot at or before {options['--until']}{NC}")
+                sys.exit(1)
+            for node in args:
+                print(f"{GREEN}{node}:{NC}")
+                for taken, count, worst in store.count_series(node, since, until):
+                    worst_text = f'  worst {worst:.1f}' if worst >= 0 else ''
+                    print(f"  {format_time(taken)}  {count:5}{worst_text}")
+            print("")
+
+        elif command == 'timeline':
+            since = store.first_after(options['--since']) if options['--since'] else None
+            until = store.resolve(options['--until'])
+            if (options['--since'] and not since) or not until or (since and since[0] > until[0]):
+                print(f"{RED}✗ No snapshots in the requested range{NC}")
+                sys.exit(1)
+            start = since[1] if since else store.db.execute('SELECT MIN(taken) FROM snapshot').fetchone()[0]
+            events, campaigns = store.timeline(since, until, limit)
+            output = options['--output'] or DEFAULT_TEX
+            write_timeline_tex(output, events, campaigns, start, until[1])
+            print(f"{GREEN}✓ {len(events)} timeline events, {len(campaigns)} campaigns written to: {output}{NC}")
+            for taken, text, severity in events:
+                print(f"  {format_time(taken)}  {severity:4.1f}  {text}")
+            for name, slug in campaign_slugs(campaigns).items():
+                print(f"  campaign {slug:20} {name}")
+            print(f"{YELLOW}  Usage: \\loadNetworkHistory{{{output}}} then \\drawAttackTimeline{{x}}{{y}} "
+                  f"or \\drawCampaignHistory{{x}}{{y}}{{campaign id}}{NC}\n")
+
+        else:
+            counts, size = store.info()
+            for table, count in counts.items():
+                print(f"  {table:15} {count:10}")
+            print(f"  {'size':15} {size / 1024:9.0f}K\n")
+    except ValueError as e:
+        print(f"{RED}✗ {e}{NC}")
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
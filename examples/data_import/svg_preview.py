@@ -0,0 +1,526 @@
+#!/usr/bin/env python3
+"""
+svg_preview.py - Draw a network straight to SVG for quick review
+
+A full pdflatex run plus pdf2svg takes far too long when all you want is to
+look at the data. This script draws nodes, connections and threat badges
+directly from the CSV files:
+- colours come from styles_config.tex, or from color_schemes/NAME.colorscheme
+  with --scheme, so a preview matches the palette of the compiled diagram
+- every node type gets a simple shape in its type colour
+- connection types keep their colour, width and dash pattern
+- nodes with findings get a badge in the colour of their worst severity
+
+This is a preview, not a second renderer: the shapes are simplified, labels
+are plain text and the layout is not pixel-identical to the TikZ output.
+Build the PDF with compile.sh for anything you publish.
+
+The SVG is written as it is drawn, so memory use grows with the node count
+only. Nodes without x/y columns are placed on a grid.
+
+Usage:
+    python3 svg_preview.py nodes.csv connections.csv threats.csv
+    python3 svg_preview.py nodes.csv connections.csv --scheme dark --output preview.svg
+    python3 svg_preview.py nodes.csv --labels off --output - > preview.svg
+"""
+
+import sys
+import csv
+import math
+import re
+import time
+from pathlib import Path
+from xml.sax.saxutils import escape, quoteattr
+
+from threat_scoring import parse_severity, normalize_type
+from network_stats import SEVERITY_BANDS
+
+# ANSI color codes
+GREEN = '\033[0;32m'
+YELLOW = '\033[1;33m'
+BLUE = '\033[0;34m'
+CYAN = '\033[0;36m'
+RED = '\033[0;31m'
+NC = '\033[0m'
+
+ROOT = Path(__file__).resolve().parent.parent.parent
+
+DEFINECOLOR_PATTERN = re.compile(
+    r'\\definecolor\{(\w+)\}\{RGB\}\{\s*(\d+)\s*,\s*(\d+)\s*,\s*(\d+)\s*\}')
+
+# xcolor base colours used in the connection styles (blue!60 etc.)
+XCOLOR_BASE = {
+    'red': (255, 0, 0), 'blue': (0, 0, 255), 'yellow': (255, 255, 0),
+    'purple': (191, 0, 64),
+}
+
+# Pixels per TikZ unit (1cm); TikZ y grows upwards, SVG y downwards
+DEFAULT_SCALE = 40
+NODE_RADIUS = 12
+GRID_SPACING = 3
+
+# Above this many nodes, --labels auto leaves the labels out
+AUTO_LABEL_LIMIT = 2000
+
+# Elements joined per write
+WRITE_BATCH = 4096
+
+# Node type -> (colour, shape); names as registered in data_import.tex
+NODE_STYLES = {
+    'server': ('serverBlue', 'rect'),
+    'client': ('clientGreen', 'screen'),
+    'laptop': ('clientGreen', 'screen'),
+    'router': ('routerOrange', 'circle'),
+    'firewall': ('firewallRed', 'wall'),
+    'switch': ('switchPurple', 'flat'),
+    'cloud': ('cloudGray', 'cloud'),
+    'attacker': ('threatCritical', 'diamond'),
+    'database': ('databaseTeal', 'cylinder'),
+    'database_primary': ('databaseTeal', 'cylinder'),
+    'database_replica': ('databaseTeal', 'cylinder'),
+    'database_cluster': ('databaseTeal', 'cylinder'),
+    'loadbalancer': ('loadBalancerCyan', 'hexagon'),
+    'loadbalancer_active': ('loadBalancerCyan', 'hexagon'),
+    'loadbalancer_passive': ('loadBalancerCyan', 'hexagon'),
+    'vm': ('vmIndigo', 'rect'),
+    'hypervisor': ('vmIndigo', 'flat'),
+    'container': ('containerBlue', 'rect'),
+    'pod': ('containerBlue', 'hexagon'),
+    'mobile': ('mobileOrange', 'phone'),
+    'mobile_phone': ('mobileOrange', 'phone'),
+    'tablet': ('mobileOrange', 'phone'),
+    'iot': ('iotGreen', 'circle'),
+    'iot_device': ('iotGreen', 'circle'),
+    'sensor': ('iotGreen', 'circle'),
+    'smart_device': ('iotGreen', 'circle'),
+    'aws': ('cloudAWS', 'cloud'),
+    'aws_node': ('cloudAWS', 'cloud'),
+    'azure': ('cloudAzure', 'cloud'),
+    'azure_node': ('cloudAzure', 'cloud'),
+    'gcp': ('cloudGCP', 'cloud'),
+    'gcp_node': ('cloudGCP', 'cloud'),
+    'ips': ('appliancePurple', 'wall'),
+    'ids': ('appliancePurple', 'wall'),
+    'proxy': ('appliancePurple', 'hexagon'),
+    'waf': ('appliancePurple', 'wall'),
+    'storage': ('storageYellow', 'cylinder'),
+    'nas': ('storageYellow', 'cylinder'),
+    'san': ('storageYellow', 'cylinder'),
+    'wireless': ('wirelessTeal', 'triangle'),
+    'wireless_ap': ('wirelessTeal', 'triangle'),
+    'access_point': ('wirelessTeal', 'triangle'),
+    'default': ('serverBlue', 'rect'),
+}
+
+# Outline of each shape, centred on 0,0 and about 2*NODE_RADIUS across
+SHAPES = {
+    'rect': '<rect x="-10" y="-12" width="20" height="24" rx="2"/>',
+    'screen': '<rect x="-12" y="-9" width="24" height="16" rx="2"/>'
+              '<rect x="-5" y="7" width="10" height="3"/>',
+    'circle': '<circle r="11"/>',
+    'wall': '<rect x="-12" y="-10" width="24" height="20"/>'
+            '<path d="M-12-3h24M-12 4h24M-4-10v7M4-3v7M-4 4v6" fill="none" stroke="#fff"/>',
+    'flat': '<rect x="-13" y="-6" width="26" height="12" rx="2"/>',
+    'cloud': '<path d="M-9 8a6 6 0 0 1-1-12a8 8 0 0 1 15-3a6 6 0 0 1 5 15z"/>',
+    'diamond': '<path d="M0-13L13 0L0 13L-13 0z"/>',
+    'cylinder': '<path d="M-10-8v16a10 4 0 0 0 20 0v-16"/><ellipse cy="-8" rx="10" ry="4"/>',
+    'hexagon': '<path d="M-12 0L-6-11H6L12 0L6 11H-6z"/>',
+    'phone': '<rect x="-7" y="-12" width="14" height="24" rx="3"/>',
+    'triangle': '<path d="M0-12L12 10H-12z"/>',
+}
+
+# Connection type -> (colour, width pt, dash, arrow, curve); after
+# styles_config.tex and connection_renderer.tex
+CONNECTION_STYLES = {
+    'normal': ('connNormal', 1, None, 'end', 0),
+    'encrypted': ('connEncrypted', 1.5, '1 3', 'end', 0),
+    'attack': ('connMalicious', 2, None, 'end', 0),
+    'suspicious': ('connSuspicious', 1.5, '4 2', 'end', 0),
+    'bidirectional': ('connNormal', 1, None, 'both', 0),
+    'vpn': ('connEncrypted', 2, '6 3', 'end', 0),
+    'vpn_tunnel': ('connEncrypted', 2, '6 3', 'end', 0),
+    'wireless': ('blue!60', 1, '1 2', 'end', 0),
+    'fiber': ('yellow!80', 2, None, 'end', 0),
+    'fiber_optic': ('yellow!80', 2, None, 'end', 0),
+    'satellite': ('purple!60', 1, '2 2', 'end', 0),
+    'satellite_link': ('purple!60', 1, '2 2', 'end', 0),
+    'blocked': ('red', 2, None, 'bar', 0),
+    'bw_low': ('connNormal', 0.5, None, 'end', 0),
+    'bw_medium': ('connNormal', 1, None, 'end', 0),
+    'bw_high': ('connNormal', 2, None, 'end', 0),
+    'bw_very_high': ('connNormal', 3, None, 'end', 0),
+    'bw_congested': ('red!70', 2.5, '3 2', 'end', 0),
+    'load_balanced': ('connNormal', 1.5, None, 'end', 0),
+    'curve': ('connNormal', 1, None, 'end', 15),
+    'curve_sharp': ('connNormal', 1, None, 'end', 45),
+    'curve_reverse': ('connNormal', 1, None, 'end', -15),
+    'default': ('connNormal', 1, None, 'end', 0),
+}
+
+# Badge colour per severity band, worst first
+BADGE_COLORS = (
+    (SEVERITY_BANDS['critical'], 'threatCritical'),
+    (SEVERITY_BANDS['high'], 'threatHigh'),
+    (SEVERITY_BANDS['medium'], 'threatMedium'),
+    (SEVERITY_BANDS['low'], 'threatLow'),
+    (-math.inf, 'threatInfo'),
+)
+
+def load_colors(scheme=None):
+    """Colour name -> (r, g, b): styles_config.tex, overlaid by a scheme"""
+    colors = {}
+    sources = [ROOT / 'styles_config.tex']
+    if scheme:
+        path = Path(scheme)
+        if not path.exists():
+            path = ROOT / 'color_schemes' / f'{scheme}.colorscheme'
+        if not path.exists():
+            raise FileNotFoundError(f"colour scheme not found: {scheme}")
+        sources.append(path)
+    for source in sources:
+        text = source.read_text(encoding='utf-8')
+        for name, r, g, b in DEFINECOLOR_PATTERN.findall(text):
+            colors[name] = (int(r), int(g), int(b))
+    return colors
+
+def resolve_color(spec, colors):
+    """xcolor expression ('connNormal', 'blue!60') as an SVG hex colour"""
+    name, _, percent = spec.partition('!')
+    rgb = colors.get(name) or XCOLOR_BASE.get(name, (0, 0, 0))
+    if percent:
+        # name!p mixes p% of the colour with white
+        p = int(percent) / 100
+        rgb = tuple(round(c * p + 255 * (1 - p)) for c in rgb)
+    return '#%02x%02x%02x' % rgb
+
+def style_sheet(colors, dark):
+    """<defs> with one symbol per node shape/colour, markers and CSS classes"""
+    parts = ['<defs><style>']
+    text = resolve_color('bgLight' if dark else 'bgDark', colors)
+    parts.append(f'text{{font:9px sans-serif;fill:{text};text-anchor:middle}}'
+                 '.b text{font:bold 7px sans-serif;fill:#fff}'
+                 'path.c{fill:none}')
+    for conn_type, (color, width, dash, _, _) in CONNECTION_STYLES.items():
+        rule = f'stroke:{resolve_color(color, colors)};stroke-width:{width}'
+        if dash:
+            rule += f';stroke-dasharray:{dash}'
+        parts.append(f'.c-{conn_type}{{{rule}}}')
+    for _, color in BADGE_COLORS:
+        parts.append(f'.s-{color}{{fill:{resolve_color(color, colors)}}}')
+    parts.append('</style>')
+    for conn_type, (color, _, _, arrow, _) in CONNECTION_STYLES.items():
+        fill = resolve_color(color, colors)
+        if arrow == 'bar':
+            shape = f'<path d="M5 0V10" stroke="{fill}" stroke-width="2"/>'
+        else:
+            shape = f'<path d="M0 0L10 5L0 10L3 5z" fill="{fill}"/>'
+        parts.append(f'<marker id="m-{conn_type}" viewBox="0 0 10 10" refX="10" refY="5" '
+                     f'markerWidth="4" markerHeight="4" orient="auto-start-reverse">{shape}</marker>')
+    for node_type, (color, shape) in NODE_STYLES.items():
+        parts.append(f'<symbol id="n-{node_type}" overflow="visible">'
+                     f'<g fill="{resolve_color(color, colors)}" stroke="#fff" stroke-width="1">'
+                     f'{SHAPES[shape]}</g></symbol>')
+    parts.append('</defs>')
+    return ''.join(parts)
+
+class Layout:
+    """Node positions in SVG pixels, keyed by node id"""
+
+    def __init__(self, scale=DEFAULT_SCALE):
+        self.scale = scale
+        self.ids = []
+        self.types = []
+        self.labels = []
+        self.xs = []
+        self.ys = []
+        self.index = {}
+
+    def load(self, filepath):
+        """Read a nodes CSV; nodes without coordinates go on a grid"""
+        with open(filepath, 'r', encoding='utf-8', newline='') as f:
+            reader = csv.reader(f)
+            header = next(reader, [])
+            col = {name: i for i, name in enumerate(header)}
+            if 'id' not in col:
+                raise ValueError(f"{filepath}: no id column")
+            i_id, i_type, i_label = col['id'], col.get('type'), col.get('label')
+            i_x, i_y = col.get('x'), col.get('y')
+            types = {}
+            missing = []
+            for row in reader:
+                if len(row) <= i_id or not row[i_id]:
+                    continue
+                spelling = row[i_type] if i_type is not None and i_type < len(row) else ''
+                node_type = types.get(spelling)
+                if node_type is None:
+                    node_type = normalize_type(spelling)
+                    if node_type not in NODE_STYLES:
+                        node_type = 'default'
+                    types[spelling] = node_type
+                try:
+                    x, y = float(row[i_x]), float(row[i_y])
+                except (TypeError, ValueError, IndexError):
+                    x = y = math.nan
+                    missing.append(len(self.ids))
+                self.index[row[i_id]] = len(self.ids)
+                self.ids.append(row[i_id])
+                self.types.append(node_type)
+                self.labels.append(row[i_label] if i_label is not None and i_label < len(row) else '')
+                self.xs.append(x * self.scale)
+                self.ys.append(-y * self.scale)
+        self.place_grid(missing)
+        return len(self.ids)
+
+    def place_grid(self, missing):
+        """Put nodes without coordinates on a square grid below the others"""
+        if not missing:
+            return
+        placed = [y for y in self.ys if not math.isnan(y)]
+        top = (max(placed) + GRID_SPACING * self.scale) if placed else 0.0
+        left = min((x for x in self.xs if not math.isnan(x)), default=0.0)
+        columns = math.ceil(math.sqrt(len(missing)))
+        step = GRID_SPACING * self.scale
+        for n, i in enumerate(missing):
+            self.xs[i] = left + (n % columns) * step
+            self.ys[i] = top + (n // columns) * step
+
+    def bounds(self, margin):
+        if not self.ids:
+            return 0, 0, 2 * margin, 2 * margin
+        left, top = min(self.xs) - margin, min(self.ys) - margin
+        return left, top, max(self.xs) + margin - left, max(self.ys) + margin - top
+
+def worst_findings(filepath, index):
+    """Node index -> (worst severity, finding count) from a threats CSV"""
+    findings = {}
+    with open(filepath, 'r', encoding='utf-8', newline='') as f:
+        reader = csv.reader(f)
+        header = next(reader, [])
+        col = {name: i for i, name in enumerate(header)}
+        i_target = col.get('target', col.get('node'))
+        i_severity = col.get('severity')
+        if i_target is None:
+            raise ValueError(f"{filepath}: no target column")
+        for row in reader:
+            node = index.get(row[i_target]) if i_target < len(row) else None
+            if node is None:
+                continue
+            severity = parse_severity(row[i_severity]) if i_severity is not None and i_severity < len(row) else math.nan
+            if math.isnan(severity):
+                severity = 0.0
+            worst, count = findings.get(node, (severity, 0))
+            findings[node] = (max(worst, severity), count + 1)
+    return findings
+
+def badge_color(severity):
+    for floor, color in BADGE_COLORS:
+        if severity >= floor:
+            return color
+    return BADGE_COLORS[-1][1]
+
+class SVGPreview:
+    """Streams a layout, its connections and threat badges to an SVG file"""
+
+    def __init__(self, layout, colors, labels=True, dark=False):
+        self.layout = layout
+        self.colors = colors
+        self.labels = labels
+        self.dark = dark
+        self.counts = {'nodes': 0, 'connections': 0, 'badges': 0, 'skipped': 0}
+
+    def write(self, out, connection_files=(), findings=None):
+        left, top, width, height = self.layout.bounds(3 * NODE_RADIUS)
+        background = resolve_color('bgDark' if self.dark else 'bgLight', self.colors)
+        out.write('<?xml version="1.0" encoding="UTF-8"?>\n'
+                  f'<svg xmlns="http://www.w3.org/2000/svg" '
+                  f'viewBox="{left:.0f} {top:.0f} {width:.0f} {height:.0f}" '
+                  f'width="{width:.0f}" height="{height:.0f}">\n'
+                  '<!-- Preview drawn by svg_preview.py; not identical to the TikZ output -->\n')
+        out.write(style_sheet(self.colors, self.dark))
+        out.write(f'\n<rect x="{left:.0f}" y="{top:.0f}" width="{width:.0f}" '
+                  f'height="{height:.0f}" fill="{background}"/>\n')
+        # Connections first so the nodes are drawn on top of them
+        out.write('<g id="connections">\n')
+        for filepath in connection_files:
+            self.write_connections(out, filepath)
+        out.write('</g>\n<g id="nodes">\n')
+        self.write_nodes(out, findings or {})
+        out.write('</g>\n</svg>\n')
+
+    def write_connections(self, out, filepath):
+        layout = self.layout
+        index, xs, ys = layout.index, layout.xs, layout.ys
+        types = {}
+        batch = []
+        with open(filepath, 'r', encoding='utf-8', newline='') as f:
+            reader = csv.reader(f)
+            header = next(reader, [])
+            col = {name: i for i, name in enumerate(header)}
+            i_src, i_dst, i_type = col.get('source'), col.get('destination'), col.get('type')
+            if i_src is None or i_dst is None:
+                raise ValueError(f"{filepath}: needs source and destination columns")
+            width = max(i_src, i_dst) + 1
+            for row in reader:
+                if len(row) < width:
+                    continue
+                s, d = index.get(row[i_src]), index.get(row[i_dst])
+                if s is None or d is None or s == d:
+                    self.counts['skipped'] += 1
+                    continue
+                spelling = row[i_type] if i_type is not None and i_type < len(row) else ''
+                conn_type = types.get(spelling)
+                if conn_type is None:
+                    conn_type = normalize_type(spelling) or 'normal'
+                    if conn_type not in CONNECTION_STYLES:
+                        conn_type = 'default'
+                    types[spelling] = conn_type
+                batch.append(self.connection(conn_type, xs[s], ys[s], xs[d], ys[d]))
+                if len(batch) >= WRITE_BATCH:
+                    out.write(''.join(batch))
+                    self.counts['connections'] += len(batch)
+                    batch.clear()
+        out.write(''.join(batch))
+        self.counts['connections'] += len(batch)
+
+    @staticmethod
+    def connection(conn_type, x1, y1, x2, y2):
+        """Path from edge to edge of the two node shapes"""
+        _, _, _, arrow, bend = CONNECTION_STYLES[conn_type]
+        dx, dy = x2 - x1, y2 - y1
+        length = math.hypot(dx, dy)
+        ux, uy = dx / length, dy / length
+        x1, y1 = x1 + ux * NODE_RADIUS, y1 + uy * NODE_RADIUS
+        x2, y2 = x2 - ux * NODE_RADIUS, y2 - uy * NODE_RADIUS
+        if bend:
+            # Control point off the midpoint, like TikZ "bend left"
+            offset = math.tan(math.radians(bend)) * length / 2
+            path = (f'M{x1:.1f} {y1:.1f}Q{(x1 + x2) / 2 + uy * offset:.1f} '
+                    f'{(y1 + y2) / 2 - ux * offset:.1f} {x2:.1f} {y2:.1f}')
+        else:
+            path = f'M{x1:.1f} {y1:.1f}L{x2:.1f} {y2:.1f}'
+        marker = f'url(#m-{conn_type})'
+        if arrow == 'end':
+            ends = f' marker-end="{marker}"'
+        else:
+            ends = f' marker-start="{marker}" marker-end="{marker}"'
+        return f'<path class="c c-{conn_type}" d="{path}"{ends}/>\n'
+
+    def write_nodes(self, out, findings):
+        layout = self.layout
+        batch = []
+        for i, node_id in enumerate(layout.ids):
+            x, y = layout.xs[i], layout.ys[i]
+            parts = [f'<g id={quoteattr(node_id)}><use href="#n-{layout.types[i]}" '
+                     f'x="{x:.1f}" y="{y:.1f}"/>']
+            if self.labels and layout.labels[i]:
+                parts.append(f'<text x="{x:.1f}" y="{y + NODE_RADIUS + 10:.1f}">'
+                             f'{escape(layout.labels[i])}</text>')
+            finding = findings.get(i)
+            if finding:
+                severity, count = finding
+                bx, by = x + NODE_RADIUS, y - NODE_RADIUS
+                parts.append(f'<g class="b"><circle class="s-{badge_color(severity)}" '
+                             f'cx="{bx:.1f}" cy="{by:.1f}" r="6"/>'
+                             f'<text x="{bx:.1f}" y="{by + 2.5:.1f}">'
+                             f'{count if count < 100 else "99+"}</text></g>')
+                self.counts['badges'] += 1
+            parts.append('</g>\n')
+            batch.append(''.join(parts))
+            if len(batch) >= WRITE_BATCH:
+                out.write(''.join(batch))
+                batch.clear()
+        out.write(''.join(batch))
+        self.counts['nodes'] = len(layout.ids)
+
+def main():
+    """Main preview function"""
+    args = sys.argv[1:]
+    if not args or '--help' in args or '-h' in args:
+        print("Usage: python3 svg_preview.py nodes.csv [connections.csv] [threats.csv] [options]")
+        print("")
+        print("Options:")
+        print("  --output FILE      SVG file to write, - for stdout (default: preview.svg)")
+        print("  --scheme NAME      Colour scheme from color_schemes/ (default, dark, colorblind, ...)")
+        print(f"  --scale PX         Pixels per TikZ unit (default: {DEFAULT_SCALE})")
+        print(f"  --labels MODE      on, off or auto (labels up to {AUTO_LABEL_LIMIT} nodes; default: auto)")
+        sys.exit(1)
+
+    options = {'--output': 'preview.svg', '--scheme': None, '--scale': str(DEFAULT_SCALE),
+               '--labels': 'auto'}
+    for flag in options:
+        if flag in args:
+            index = args.index(flag)
+            if index + 1 >= len(args):
+                print(f"{RED}Error: {flag} requires a value{NC}")
+                sys.exit(1)
+            options[flag] = args[index + 1]
+            del args[index:index + 2]
+    files = [a for a in args if not a.startswith('--')]
+    to_stdout = options['--output'] == '-'
+    # Progress goes to stderr when the SVG goes to stdout
+    log = sys.stderr if to_stdout else sys.stdout
+
+    for filepath in files:
+        if not Path(filepath).exists():
+            print(f"{RED}✗ File not found: {filepath}{NC}", file=log)
+            sys.exit(1)
+    if options['--labels'] not in ('on', 'off', 'auto'):
+        print(f"{RED}Error: --labels must be on, off or auto{NC}", file=log)
+        sys.exit(1)
+    try:
+        scale = float(options['--scale'])
+        colors = load_colors(options['--scheme'])
+    except (ValueError, FileNotFoundError) as e:
+        print(f"{RED}Error: {e}{NC}", file=log)
+        sys.exit(1)
+
+    print(f"{BLUE}{'='*60}{NC}", file=log)
+    print(f"{BLUE}SVG Preview{NC}", file=log)
+    print(f"{BLUE}{'='*60}{NC}\n", file=log)
+
+    start = time.perf_counter()
+    layout = Layout(scale)
+    connection_files = []
+    findings = {}
+    try:
+        layout.load(files[0])
+        for filepath in files[1:]:
+            with open(filepath, 'r', encoding='utf-8', newline='') as f:
+                header = next(csv.reader(f), [])
+            if 'source' in header and 'destination' in header:
+                connection_files.append(filepath)
+            elif 'target' in header:
+                for node, (severity, count) in worst_findings(filepath, layout.index).items():
+                    worst, total = findings.get(node, (severity, 0))
+                    findings[node] = (max(worst, severity), total + count)
+            else:
+                print(f"{YELLOW}⚠ Skipping {filepath}: not a connections or threats CSV{NC}", file=log)
+
+        labels = options['--labels'] == 'on' or (
+            options['--labels'] == 'auto' and len(layout.ids) <= AUTO_LABEL_LIMIT)
+        dark = options['--scheme'] == 'dark'
+        preview = SVGPreview(layout, colors, labels=labels, dark=dark)
+        if to_stdout:
+            preview.write(sys.stdout, connection_files, findings)
+        else:
+            with open(options['--output'], 'w', encoding='utf-8') as out:
+                preview.write(out, connection_files, findings)
+    except ValueError as e:
+        print(f"{RED}✗ {e}{NC}", file=log)
+        sys.exit(1)
+    elapsed = time.perf_counter() - start
+
+    counts = preview.counts
+    print(f"{GREEN}✓ Drew {counts['nodes']} nodes, {counts['connections']} connections and "
+          f"{counts['badges']} threat badges in {elapsed:.2f}s{NC}", file=log)
+    if counts['skipped']:
+        print(f"{YELLOW}⚠ {counts['skipped']} connections skipped (unknown or identical endpoints){NC}",
+              file=log)
+    if not labels and options['--labels'] == 'auto':
+        print(f"{CYAN}  Labels left out above {AUTO_LABEL_LIMIT} nodes; use --labels on{NC}", file=log)
+    if not to_stdout:
+        print(f"{BLUE}  Preview written to: {options['--output']}{NC}", file=log)
+    print(f"{CYAN}  Approximate preview; build the PDF for the final diagram{NC}\n", file=log)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,102 @@
+"""Tests for bulk_ingest.py"""
+
+import csv
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from bulk_ingest import Dataset, ingest_chunk, write_dataset
+
+EXAMPLES = Path(__file__).resolve().parent.parent
+
+DUAL_STACK_NMAP = """<?xml version="1.0"?>
+<nmaprun start="1700000000">
+<host><status state="up"/>
+<address addr="2001:db8::10" addrtype="ipv6"/>
+<address addr="192.168.1.10" addrtype="ipv4"/>
+<address addr="00:50:56:C0:00:10" addrtype="mac"/>
+<hostnames><hostname name="webserver.example.com"/></hostnames>
+<ports><port protocol="tcp" portid="443"><state state="open"/></port></ports>
+</host>
+<host><status state="up"/><address addr="2001:db8::20" addrtype="ipv6"/></host>
+</nmaprun>
+"""
+
+HOSTS = """ip,hostname,mac,type
+192.168.1.10,webserver.example.com,00:11:22:33:44:55,server
+192.168.1.20,db.example.com,,database
+"""
+
+THREATS = """target,type,severity,cve,description
+webserver.example.com,vulnerability,9.8,CVE-2024-0001,By hostname
+00:11:22:33:44:55,vulnerability,5.0,CVE-2024-0002,By MAC
+192.168.1.20,vulnerability,7.0,CVE-2024-0003,By address
+unknown.example.com,vulnerability,4.0,CVE-2024-0004,No such host
+"""
+
+class BulkIngestTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.root = Path(self.directory.name)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def ingest(self, files):
+        paths = []
+        for name, text in files.items():
+            path = self.root / name
+            path.write_text(text, encoding='utf-8')
+            paths.append(str(path))
+        dataset, report = ingest_chunk(paths)
+        dataset.resolve()
+        return dataset, report
+
+    def threats(self, dataset):
+        orphans = write_dataset(dataset, self.root / 'out')
+        with open(self.root / 'out' / 'threats.csv', encoding='utf-8', newline='') as f:
+            return {row['cve']: row['target'] for row in csv.DictReader(f)}, orphans
+
+    def test_findings_by_hostname_or_mac_join_the_host(self):
+        dataset, report = self.ingest({'hosts.csv': HOSTS, 'threats.csv': THREATS})
+        self.assertEqual([line[2] for line in report], ['ok', 'ok'])
+        targets, orphans = self.threats(dataset)
+        self.assertEqual(targets['CVE-2024-0001'], 'host_192_168_1_10')
+        self.assertEqual(targets['CVE-2024-0002'], 'host_192_168_1_10')
+        self.assertEqual(targets['CVE-2024-0003'], 'host_192_168_1_20')
+        self.assertEqual(targets['CVE-2024-0004'], 'host_unknown_example_com')
+        self.assertEqual(orphans, 1)
+
+    def test_nmap_and_nessus_files(self):
+        dataset, report = ingest_chunk([str(EXAMPLES / 'nmap-scan.xml'),
+                                        str(EXAMPLES / 'nessus-scan.nessus')])
+        self.assertEqual([line[2] for line in report], ['ok', 'ok'], report)
+        self.assertEqual(report[0][3], 4)
+        self.assertTrue(dataset.findings)
+
+    def test_dual_stack_nmap_hosts(self):
+        dataset, report = self.ingest({'dual.xml': DUAL_STACK_NMAP})
+        self.assertEqual(report[0][1:4], ['nmap', 'ok', 2])
+        self.assertEqual(dataset.hosts['192.168.1.10']['ipv6'], '2001:db8::10')
+        self.assertEqual(dataset.hosts['2001:db8::20']['ipv6'], '2001:db8::20')
+        write_dataset(dataset, self.root / 'out')
+        with open(self.root / 'out' / 'nodes.csv', encoding='utf-8', newline='') as f:
+            rows = {row['ip']: row for row in csv.DictReader(f)}
+        self.assertEqual(rows['192.168.1.10']['ipv6'], '2001:db8::10')
+
+    def test_resolve_is_independent_of_merge_order(self):
+        one, _ = self.ingest({'threats.csv': THREATS})
+        two, _ = self.ingest({'hosts.csv': HOSTS})
+        merged = Dataset()
+        merged.merge(one)
+        merged.merge(two)
+        merged.resolve()
+        targets, _ = self.threats(merged)
+        self.assertEqual(targets['CVE-2024-0001'], 'host_192_168_1_10')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,34 @@
+"""Tests for diagram_service.py"""
+
+import re
+import sys
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from diagram_service import DOCUMENT_TEMPLATE, RENDER_MODULES, ROOT
+
+# Commands LaTeX, standalone and TikZ provide themselves
+BUILTINS = {'documentclass', 'usepackage', 'usetikzlibrary', 'input', 'providecommand', 'begin', 'end'}
+
+# \renewcommand does not count: it fails on an undefined macro
+DEFINITION_RE = r'\\(?:newcommand|providecommand|DeclareRobustCommand|def|gdef|edef|xdef)\*?\s*\{?\\%s(?![A-Za-z])'
+
+class DocumentTemplateTest(unittest.TestCase):
+
+    def test_template_only_uses_defined_macros(self):
+        modules = '\n'.join(f'\\input{{{(ROOT / m).as_posix()}.tex}}' for m in RENDER_MODULES)
+        document = DOCUMENT_TEMPLATE % {'modules': modules}
+        sources = [document] + [(ROOT / f'{m}.tex').read_text(encoding='utf-8') for m in RENDER_MODULES]
+        used = set(re.findall(r'\\([A-Za-z]+)', document)) - BUILTINS
+        undefined = sorted(name for name in used
+                           if not any(re.search(DEFINITION_RE % name, text) for text in sources))
+        self.assertEqual(undefined, [])
+
+    def test_modules_exist(self):
+        for module in RENDER_MODULES:
+            self.assertTrue((ROOT / f'{module}.tex').exists(), module)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,89 @@
+"""Tests for flow_ingest.py"""
+
+import csv
+import random
+import subprocess
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+TOOL = Path(__file__).resolve().parent.parent / 'flow_ingest.py'
+
+ZEEK_FIELDS = ['ts', 'uid', 'id.orig_h', 'id.orig_p', 'id.resp_h', 'id.resp_p', 'proto', 'service',
+               'duration', 'orig_bytes', 'resp_bytes', 'orig_pkts', 'orig_ip_bytes', 'resp_pkts',
+               'resp_ip_bytes']
+
+def flows(count=5000, seed=7):
+    """Flow records over ten edges and two hours, in time order"""
+    rng = random.Random(seed)
+    records = []
+    for i in range(count):
+        ts = 1_700_000_000 + i * 7200 / count
+        edge = rng.randrange(10)
+        # One burst minute per edge decides its peak
+        size = rng.randrange(1000, 5000) * (10000 if int(ts // 60) % 30 == edge else 1)
+        records.append((ts, f'10.0.0.{edge + 1}', '10.0.1.1', '443', 'tcp', rng.random() * 30,
+                        size, size // 4))
+    return records
+
+def zeek_log(records):
+    lines = ['#separator \\x09', '#fields\t' + '\t'.join(ZEEK_FIELDS),
+             '#types\t' + '\t'.join(['string'] * len(ZEEK_FIELDS))]
+    for ts, src, dst, port, proto, duration, orig, resp in records:
+        lines.append('\t'.join([f'{ts:.6f}', 'C1', src, '50000', dst, port, proto, 'ssl',
+                                f'{duration:.3f}', str(orig), str(resp), '10', str(orig), '8', str(resp)]))
+    return '\n'.join(lines) + '\n'
+
+def nfdump_csv(records):
+    lines = ['ts,te,td,sa,da,sp,dp,pr,ipkt,ibyt']
+    for ts, src, dst, port, proto, duration, orig, resp in records:
+        lines.append(f'{ts:.3f},{ts + duration:.3f},{duration:.3f},{src},{dst},50000,{port},'
+                     f'{proto.upper()},18,{orig + resp}')
+    return '\n'.join(lines) + '\n'
+
+class FlowIngestTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.root = Path(self.directory.name)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def ingest(self, name, text, *options):
+        path = self.root / name
+        path.write_text(text, encoding='utf-8')
+        output = self.root / f'{name}.out.csv'
+        subprocess.run([sys.executable, str(TOOL), str(path), '--output', str(output), *options],
+                       check=True, capture_output=True)
+        with open(output, encoding='utf-8', newline='') as f:
+            return sorted((row['source'], row['bandwidth'], row['type'], row['flows'], row['bytes'])
+                          for row in csv.DictReader(f))
+
+    def test_peak_does_not_depend_on_record_order(self):
+        records = flows()
+        shuffled = list(records)
+        random.Random(1).shuffle(shuffled)
+        expected = self.ingest('sorted.log', zeek_log(records))
+        self.assertEqual(len(expected), 10)
+        self.assertTrue(any(row[2] != 'bw_low' for row in expected))
+        self.assertEqual(self.ingest('shuffled.log', zeek_log(shuffled)), expected)
+        self.assertEqual(self.ingest('spilled.log', zeek_log(shuffled), '--max-edges', '40'), expected)
+        self.assertEqual(self.ingest('workers.log', zeek_log(shuffled), '--workers', '2'), expected)
+        self.assertEqual(self.ingest('shuffled.csv', nfdump_csv(shuffled), '--max-edges', '40'),
+                         self.ingest('sorted.csv', nfdump_csv(records)))
+
+    def test_peak_of_interleaved_buckets(self):
+        # Minute 0 gets 3 MB in three records split by records of minute 1
+        records = [(0.0, '10.0.0.1', '10.0.1.1', '443', 'tcp', 0.0, 1_000_000, 0),
+                   (60.0, '10.0.0.1', '10.0.1.1', '443', 'tcp', 0.0, 500_000, 0),
+                   (1.0, '10.0.0.1', '10.0.1.1', '443', 'tcp', 0.0, 1_000_000, 0),
+                   (61.0, '10.0.0.1', '10.0.1.1', '443', 'tcp', 0.0, 500_000, 0),
+                   (2.0, '10.0.0.1', '10.0.1.1', '443', 'tcp', 0.0, 1_000_000, 0)]
+        records = [(1_700_000_040 + r[0],) + r[1:] for r in records]
+        [row] = self.ingest('interleaved.log', zeek_log(records))
+        self.assertEqual(row[1], f'{3_000_000 * 8 / 60 / 1e6:.2f}')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,46 @@
+"""Tests for infer_connections.py"""
+
+import sys
+import tempfile
+import unittest
+from collections import Counter
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from infer_connections import ConnectionInferrer
+
+def nodes_csv():
+    """Clients in 10.1.1.0/24, 20 web servers elsewhere in 10.1.0.0/16
+    and 12 DNS servers in another site"""
+    lines = ['id,type,ip,ports']
+    lines += [f'client{i},client,10.1.1.{i + 1},' for i in range(10)]
+    lines += [f'web{i},server,10.1.{2 + i // 10}.{i % 10 + 1},443' for i in range(20)]
+    lines += [f'dns{i},server,10.2.0.{i + 1},53' for i in range(12)]
+    return '\n'.join(lines) + '\n'
+
+class InferConnectionsTest(unittest.TestCase):
+
+    def infer(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory) / 'nodes.csv'
+            path.write_text(nodes_csv(), encoding='utf-8')
+            inferrer = ConnectionInferrer()
+            inferrer.load_nodes(path)
+        edges = inferrer.infer()
+        return {(inferrer.ids[s], inferrer.ids[t]): c for (s, t), (c, _) in edges.items()}
+
+    def test_large_pools_keep_their_edges(self):
+        edges = self.infer()
+        per_client = Counter(s for s, t in edges if s.startswith('client') and t.startswith('web'))
+        self.assertEqual(per_client, {f'client{i}': 2 for i in range(10)})
+        per_client = Counter(s for s, t in edges if s.startswith('client') and t.startswith('dns'))
+        self.assertEqual(per_client, {f'client{i}': 2 for i in range(10)})
+        # base x reach: 0.5 x 0.7 in the site, 0.8 x 0.5 across sites
+        self.assertEqual({c for (s, t), c in edges.items() if s.startswith('client') and t.startswith('web')},
+                         {0.35})
+        self.assertEqual({c for (s, t), c in edges.items() if s.startswith('client') and t.startswith('dns')},
+                         {0.4})
+
+if __name__ == '__main__':
+    unittest.main()
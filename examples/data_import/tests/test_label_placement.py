@@ -0,0 +1,37 @@
+"""Tests for label_placement.py"""
+
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from label_placement import LabelPlacer
+
+NODES = """id,type,ip,label,x,y
+a,server,10.0.0.1,Web,0,0
+b,server
+c,client,10.0.0.3,PC,abc,2
+"""
+
+CONNECTIONS = """label,source,destination
+HTTPS
+"""
+
+class LoadTest(unittest.TestCase):
+
+    def test_short_rows_are_skipped(self):
+        placer = LabelPlacer()
+        with tempfile.TemporaryDirectory() as directory:
+            nodes = Path(directory) / 'nodes.csv'
+            nodes.write_text(NODES, encoding='utf-8')
+            connections = Path(directory) / 'connections.csv'
+            connections.write_text(CONNECTIONS, encoding='utf-8')
+            placer.load_nodes_csv(nodes)
+            placer.load_connections_csv(connections)
+        self.assertEqual([node['id'] for node in placer.nodes], ['a'])
+        self.assertEqual(placer.connections, [{'source': '', 'destination': '', 'label': 'HTTPS'}])
+
+if __name__ == '__main__':
+    unittest.main()
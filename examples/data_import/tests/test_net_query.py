@@ -0,0 +1,74 @@
+"""Tests for net_query.py"""
+
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from net_query import Network, QueryCompiler, QueryError
+
+NODES = """id,type,ip,label,ports
+v4a,server,10.0.0.5,A,22
+v4b,server,192.168.1.5,B,80
+v6a,server,2001:db8::a00:5,C,443
+v6b,server,2001:db8:1::5,D,
+none,client,,E,
+"""
+
+CONNECTIONS = """source,destination,type,port
+v4a,v6a,normal,443
+v4b,v4a,encrypted,22
+v6b,v6a,normal,80
+"""
+
+class NetQueryTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        root = Path(self.directory.name)
+        (root / 'nodes.csv').write_text(NODES, encoding='utf-8')
+        (root / 'connections.csv').write_text(CONNECTIONS, encoding='utf-8')
+        self.network = Network()
+        self.network.load_nodes_csv(root / 'nodes.csv')
+        self.network.load_connections_csv(root / 'connections.csv')
+        self.network.finish()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def ids(self, text):
+        return [self.network.columns['nodes']['id'][i] for i in self.network.select('nodes', text)]
+
+    def test_non_finite_numbers_are_parse_errors(self):
+        for text in ('port == nan', 'port < inf', 'severity >= -inf', 'port in (1, nan)',
+                     'port in 1..inf'):
+            with self.assertRaises(QueryError, msg=text):
+                QueryCompiler('connections', text).compile()
+
+    def test_ipv4_subnet_does_not_match_ipv6(self):
+        self.assertEqual(self.ids('ip in 10.0.0.0/8'), ['v4a'])
+        self.assertEqual(self.ids('subnet 0.0.0.0/0'), ['v4a', 'v4b'])
+
+    def test_ipv6_subnet_does_not_match_ipv4(self):
+        self.assertEqual(self.ids('ip in ::/0'), ['v6a', 'v6b'])
+        self.assertEqual(self.ids('ip in 2001:db8::/48'), ['v6a'])
+
+    def test_ipv4_mapped_subnet_matches_ipv4(self):
+        self.assertEqual(self.ids('ip in ::ffff:10.0.0.0/104'), ['v4a'])
+        for text in ('ip in 10.0.0.0/33', 'ip in 2001:db8::/129', 'ip == 10.0.0', 'ip in ::/x'):
+            with self.assertRaises(QueryError, msg=text):
+                QueryCompiler('nodes', text).compile()
+
+    def test_mixed_subnet_lists(self):
+        self.assertEqual(self.ids('ip in (10.0.0.0/8, 2001:db8:1::/48)'), ['v4a', 'v6b'])
+        self.assertEqual(self.ids('not ip in (10.0.0.0/8, 2001:db8:1::/48)'),
+                         ['v4b', 'v6a', 'none'])
+
+    def test_connection_ends(self):
+        self.assertEqual(self.network.select('connections', 'ip in 10.0.0.0/8'), [0, 1])
+        self.assertEqual(self.network.select('connections', 'ip == 2001:db8::a00:5'), [0, 2])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,36 @@
+"""Tests for snapshot_store.py"""
+
+import re
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from snapshot_store import campaign_slugs, write_timeline_tex
+
+class TimelineTexTest(unittest.TestCase):
+
+    def test_campaign_ids_are_safe_in_csname(self):
+        campaigns = {'APT28': (0, {'a'}, True), 'Cozy_Bear & #1': (0, {'a', 'b'}, False),
+                     'cozy bear 1': (0, set(), False), '***': (0, set(), False)}
+        slugs = campaign_slugs(campaigns)
+        self.assertEqual(slugs['APT28'], 'apt28')
+        self.assertEqual(len(set(slugs.values())), len(campaigns))
+        for slug in slugs.values():
+            self.assertRegex(slug, r'^[a-z0-9]+(-[a-z0-9]+)*$')
+
+    def test_written_ids_and_global_event_list(self):
+        campaigns = {'Cozy_Bear & #1': (0, {'a', 'b'}, True)}
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory) / 'history.tex'
+            write_timeline_tex(path, [(10, 'Login burst', 7.5)], campaigns, 0, 100)
+            text = path.read_text(encoding='utf-8')
+        self.assertIn('\\gdef\\timelineEventIds{1}', text)
+        line = next(l for l in text.splitlines() if l.startswith('\\setCampaignHistory'))
+        self.assertTrue(line.startswith('\\setCampaignHistory{cozy-bear-1}{Cozy\\_Bear \\& \\#1}'))
+        self.assertEqual(len(re.findall(r'\{', line)), 5)
+
+if __name__ == '__main__':
+    unittest.main()
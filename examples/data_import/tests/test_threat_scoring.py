@@ -0,0 +1,40 @@
+"""Tests for threat_scoring.py"""
+
+import math
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from threat_scoring import ThreatScorer, parse_severity
+
+THREATS = """target,type,severity,cve
+web1,vulnerability,inf,CVE-1
+web1,vulnerability,nan,CVE-2
+web1,vulnerability,-inf,CVE-3
+web1,vulnerability,7.5,CVE-4
+"""
+
+class ThreatScoringTest(unittest.TestCase):
+
+    def test_parse_severity_rejects_non_finite(self):
+        for value in ('inf', '-inf', 'nan', 'Infinity', '', None, 'high'):
+            self.assertTrue(math.isnan(parse_severity(value)), value)
+        self.assertEqual(parse_severity(' 9.8 '), 9.8)
+
+    def test_non_finite_findings_are_skipped(self):
+        scorer = ThreatScorer()
+        scorer.add_node('web1', 'server')
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory) / 'threats.csv'
+            path.write_text(THREATS, encoding='utf-8')
+            scorer.load_threats_csv(path)
+        self.assertEqual((scorer.findings, scorer.invalid), (4, 3))
+        self.assertEqual(scorer.finding_count[0], 1)
+        self.assertEqual(scorer.max_severity[0], 7.5)
+        self.assertEqual(scorer.top_cve[0], 'CVE-4')
+
+if __name__ == '__main__':
+    unittest.main()
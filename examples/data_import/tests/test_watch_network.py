@@ -0,0 +1,87 @@
+"""Tests for watch_network.py"""
+
+import io
+import sys
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from pathlib import Path
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import watch_network
+from validate_data import csv_kind
+from watch_network import HotTable, Watcher
+
+DOCUMENT = r"""\documentclass{article}
+\begin{document}
+\importNodesFromCSV{nodes.csv}
+\importNodesFromCSV{more_nodes.csv}
+\importConnectionsFromCSV{connections.csv}
+\end{document}
+"""
+
+class WatchNetworkTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.root = Path(self.directory.name).resolve()
+        (self.root / 'doc.tex').write_text(DOCUMENT, encoding='utf-8')
+        (self.root / 'nodes.csv').write_text('id,type,ip,label\na,server,10.0.0.1,A\n',
+                                             encoding='utf-8')
+        (self.root / 'more_nodes.csv').write_text('id,type,ip,label\nb,client,10.0.0.2,B\n',
+                                                  encoding='utf-8')
+        (self.root / 'connections.csv').write_text('source,destination,type\na,b,normal\n',
+                                                   encoding='utf-8')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def watcher(self):
+        with redirect_stdout(io.StringIO()):
+            watcher = Watcher([self.root / 'doc.tex'], engine='no-such-tex-engine')
+            watcher.rebuild(watcher.poll())
+        return watcher
+
+    def test_table_kind_matches_validate_data(self):
+        for header in (['id', 'source', 'destination'], ['ID', 'Type'], ['target', 'id'],
+                       ['source', 'destination', 'target'], ['name']):
+            path = self.root / 'table.csv'
+            path.write_text(','.join(header) + '\n', encoding='utf-8')
+            table = HotTable(path)
+            table.reload()
+            self.assertEqual(table.kind, csv_kind(header, path), header)
+
+    def test_deleted_table_leaves_the_watch_state(self):
+        watcher = self.watcher()
+        more = self.root / 'more_nodes.csv'
+        self.assertIn(more, watcher.tables)
+        self.assertIn('b', watcher.validator.id_counts)
+
+        more.unlink()
+        with redirect_stdout(io.StringIO()):
+            watcher.rebuild(watcher.poll())
+        self.assertNotIn(more, watcher.tables)
+        self.assertNotIn('b', watcher.validator.id_counts)
+        connections = watcher.tables[self.root / 'connections.csv']
+        warnings = [w for _, found in connections.issues.values() for w in found]
+        self.assertEqual(warnings, ["Destination node 'b' not found in nodes file"])
+
+        more.write_text('id,type,ip,label\nb,client,10.0.0.2,B\n', encoding='utf-8')
+        with redirect_stdout(io.StringIO()):
+            watcher.rebuild(watcher.poll())
+        self.assertIn(more, watcher.tables)
+        self.assertIn('b', watcher.validator.id_counts)
+
+    def test_bad_interval_is_reported(self):
+        for value in ('fast', '0', 'nan'):
+            output = io.StringIO()
+            argv = ['watch_network.py', str(self.root / 'doc.tex'), '--interval', value]
+            with mock.patch.object(sys, 'argv', argv), redirect_stdout(output):
+                with self.assertRaises(SystemExit):
+                    watch_network.main()
+            self.assertIn('Error: --interval', output.getvalue())
+
+if __name__ == '__main__':
+    unittest.main()
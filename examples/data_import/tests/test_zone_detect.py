@@ -0,0 +1,35 @@
+"""Tests for zone_detect.py"""
+
+import sys
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from zone_detect import ZoneDetector
+
+def detector(n, links):
+    zones = ZoneDetector()
+    zones.ids = [f'n{i}' for i in range(n)]
+    zones.subnets = [None] * n
+    zones.external = [False] * n
+    zones.adjacency = [dict() for _ in range(n)]
+    for s, d, w in links:
+        zones.adjacency[s][d] = zones.adjacency[d][s] = w
+    return zones
+
+class AbsorbSmallTest(unittest.TestCase):
+
+    def test_chained_small_communities_move_together(self):
+        # 20 folds into 30, then 30 (with the nodes of 20) into 10
+        zones = detector(7, [(4, 5, 5.0), (5, 6, 1.0), (6, 0, 1.0)])
+        membership = zones.absorb_small([10, 10, 10, 10, 20, 30, 30], 3)
+        self.assertEqual(membership, [10] * 7)
+
+    def test_large_communities_stay(self):
+        zones = detector(6, [(0, 1, 1.0), (1, 2, 1.0), (3, 4, 1.0), (4, 5, 1.0), (2, 3, 1.0)])
+        membership = zones.absorb_small([1, 1, 1, 2, 2, 2], 3)
+        self.assertEqual(membership, [1, 1, 1, 2, 2, 2])
+
+if __name__ == '__main__':
+    unittest.main()
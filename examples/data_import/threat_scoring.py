@@ -0,0 +1,357 @@
+#!/usr/bin/env python3
+"""
+threat_scoring.py - Per-node and per-path risk scores from threat findings
+
+This script loads nodes, connections and threat findings and computes a
+risk score for every node:
+
+  max          highest CVSS severity among the node's findings
+  sum          total severity of all its findings
+  weighted     max scaled by exposure: the node's degree, or its hop
+               distance from the internet (attacker/cloud nodes)
+  propagated   risk of an attacker reaching the node along connections,
+               10 x the highest product of per-hop exploit likelihoods
+
+Severities are parsed once into flat numeric arrays while the threats file
+is streamed, and aggregated per node in the same pass, so roll-ups with
+millions of findings score in seconds. Findings may name their target by
+node id or IP address.
+
+The scores are written as a TeX file for \\loadRiskScores, \\markNodeRisk and
+\\drawRiskMeter (threat_indicators.tex), which draw them with
+\\markVulnerabilityCVSS and \\drawCVSSMeter.
+
+Usage:
+    python3 threat_scoring.py nodes.csv connections.csv threats.csv
+    python3 threat_scoring.py nodes.csv connections.csv threats.csv --exposure internet
+    python3 threat_scoring.py nodes.csv connections.csv threats.csv --output risk_scores.tex
+"""
+
+import sys
+import csv
+import math
+import heapq
+import time
+from array import array
+from collections import deque
+from pathlib import Path
+
+# ANSI color codes
+GREEN = '\033[0;32m'
+YELLOW = '\033[1;33m'
+BLUE = '\033[0;34m'
+CYAN = '\033[0;36m'
+RED = '\033[0;31m'
+NC = '\033[0m'
+
+# Node types that face the internet (hop distance 0 for --exposure internet)
+INTERNET_TYPES = {'attacker', 'cloud', 'internet'}
+ATTACKER_TYPES = {'attacker'}
+
+# Exploit likelihood assumed for hops through nodes without findings
+DEFAULT_FLOOR = 0.5
+
+# Exposure decay per hop away from the internet
+HOP_DECAY = 0.75
+
+# Exposure of nodes the internet cannot reach at all
+UNREACHABLE_EXPOSURE = 0.25
+
+def parse_severity(value):
+    """CVSS severity as float, NaN when missing, not numeric or not finite"""
+    try:
+        severity = float(value)
+    except (TypeError, ValueError):
+        return math.nan
+    return severity if math.isfinite(severity) else math.nan
+
+def normalize_type(value):
+    """Node type as used by the import dispatch tables"""
+    return value.strip().lower().replace('-', '_').replace(' ', '_')
+
+def tex_escape(text):
+    """Escape TeX special characters in free text"""
+    for char, escaped in (('\\', r'\textbackslash{}'), ('{', r'\{'), ('}', r'\}'),
+                          ('#', r'\#'), ('%', r'\%'), ('&', r'\&'), ('$', r'\$'),
+                          ('_', r'\_'), ('~', r'\textasciitilde{}'),
+                          ('^', r'\textasciicircum{}')):
+        text = text.replace(char, escaped)
+    return text
+
+class ThreatScorer:
+    """Aggregate findings per node and propagate risk from attackers"""
+
+    def __init__(self, floor=DEFAULT_FLOOR):
+        self.floor = floor
+        self.ids = []
+        self.types = []
+        self.index = {}
+        self.neighbors = []
+        # Per-node aggregates, filled while findings are streamed
+        self.max_severity = array('d')
+        self.sum_severity = array('d')
+        self.finding_count = array('l')
+        self.top_cve = []
+        self.findings = 0
+        self.unmatched = 0
+        self.invalid = 0
+
+    def add_node(self, node_id, node_type='', ip=''):
+        """Register a node; returns its index"""
+        i = self.index.get(node_id)
+        if i is not None:
+            return i
+        i = len(self.ids)
+        self.ids.append(node_id)
+        self.types.append(normalize_type(node_type))
+        self.neighbors.append([])
+        self.max_severity.append(0.0)
+        self.sum_severity.append(0.0)
+        self.finding_count.append(0)
+        self.top_cve.append('')
+        self.index[node_id] = i
+        if ip:
+            self.index.setdefault(ip, i)
+        return i
+
+    def load_nodes_csv(self, filepath):
+        """Load nodes from CSV (id,type,ip,...)"""
+        with open(filepath, 'r', encoding='utf-8', newline='') as f:
+            for row in csv.DictReader(f):
+                node_id = (row.get('id') or '').strip()
+                if node_id:
+                    self.add_node(node_id, row.get('type') or '', (row.get('ip') or '').strip())
+
+    def load_connections_csv(self, filepath):
+        """Load connections from CSV (source,destination,...)"""
+        with open(filepath, 'r', encoding='utf-8', newline='') as f:
+            for row in csv.DictReader(f):
+                source = self.index.get((row.get('source') or '').strip())
+                dest = self.index.get((row.get('destination') or '').strip())
+                if source is not None and dest is not None and source != dest:
+                    self.neighbors[source].append(dest)
+                    self.neighbors[dest].append(source)
+
+    def load_threats_csv(self, filepath):
+        """Stream findings (target,type,severity,cve,...) into the aggregates"""
+        with open(filepath, 'r', encoding='utf-8', newline='') as f:
+            reader = csv.reader(f)
+            header = [name.strip().lower() for name in next(reader, [])]
+            try:
+                target_col = header.index('target')
+                severity_col = header.index('severity')
+            except ValueError:
+                raise ValueError(f"{filepath}: needs 'target' and 'severity' columns")
+            cve_col = header.index('cve') if 'cve' in header else None
+            width = max(target_col, severity_col, cve_col or 0) + 1
+
+            # Local names keep the per-row loop tight
+            index = self.index
+            max_severity = self.max_severity
+            sum_severity = self.sum_severity
+            finding_count = self.finding_count
+            top_cve = self.top_cve
+            findings = unmatched = invalid = 0
+
+            for row in reader:
+                if len(row) < width:
+                    if not row:
+                        continue
+                    row = row + [''] * (width - len(row))
+                findings += 1
+                target = row[target_col]
+                i = index.get(target)
+                if i is None:
+                    i = index.get(target.strip())
+                    if i is None:
+                        unmatched += 1
+                        continue
+                severity = parse_severity(row[severity_col])
+                if math.isnan(severity):
+                    invalid += 1
+                    continue
+                finding_count[i] += 1
+                sum_severity[i] += severity
+                if severity > max_severity[i] or finding_count[i] == 1:
+                    max_severity[i] = max(severity, max_severity[i])
+                    if cve_col is not None:
+                        top_cve[i] = row[cve_col].strip()
+
+            self.findings += findings
+            self.unmatched += unmatched
+            self.invalid += invalid
+
+    def degree_exposure(self):
+        """0.5 for isolated nodes up to 1.0 for the best-connected node"""
+        degrees = [len(n) for n in self.neighbors]
+        top = max(degrees, default=0) or 1
+        return array('d', (0.5 + 0.5 * d / top for d in degrees))
+
+    def internet_exposure(self):
+        """1.0 at or next to the internet, decaying per further hop"""
+        hops = [-1] * len(self.ids)
+        queue = deque()
+        for i, node_type in enumerate(self.types):
+            if node_type in INTERNET_TYPES:
+                hops[i] = 0
+                queue.append(i)
+        while queue:
+            u = queue.popleft()
+            for v in self.neighbors[u]:
+                if hops[v] < 0:
+                    hops[v] = hops[u] + 1
+                    queue.append(v)
+        return array('d', (UNREACHABLE_EXPOSURE if h < 0 else HOP_DECAY ** max(h - 1, 0)
+                           for h in hops))
+
+    def propagate(self):
+        """Highest attacker-to-node path likelihood and predecessor per node
+
+        Each hop into node v succeeds with likelihood max(floor, max_v/10),
+        so the best path is a max-product search (Dijkstra on -log).
+        """
+        count = len(self.ids)
+        likelihood = array('d', bytes(8 * count))
+        previous = array('l', [-1] * count)
+        heap = []
+        for i, node_type in enumerate(self.types):
+            if node_type in ATTACKER_TYPES:
+                likelihood[i] = 1.0
+                heap.append((-1.0, i))
+        heapq.heapify(heap)
+
+        step = [max(self.floor, min(s, 10.0) / 10.0) for s in self.max_severity]
+        while heap:
+            negative, u = heapq.heappop(heap)
+            if -negative < likelihood[u]:
+                continue
+            for v in self.neighbors[u]:
+                candidate = -negative * step[v]
+                if candidate > likelihood[v]:
+                    likelihood[v] = candidate
+                    previous[v] = u
+                    heapq.heappush(heap, (-candidate, v))
+        return likelihood, previous
+
+    def path_to(self, previous, i):
+        """Node ids on the best attacker path ending at node i"""
+        path = []
+        while i >= 0:
+            path.append(self.ids[i])
+            i = previous[i]
+        return path[::-1]
+
+    def score(self, exposure='degree'):
+        """Return (weighted, propagated, previous) arrays"""
+        factors = self.internet_exposure() if exposure == 'internet' else self.degree_exposure()
+        weighted = array('d', (m * f for m, f in zip(self.max_severity, factors)))
+        likelihood, previous = self.propagate()
+        propagated = array('d', (10.0 * l for l in likelihood))
+        return weighted, propagated, previous
+
+    def write_tex(self, filepath, weighted, propagated, previous, exposure):
+        """Write \\setRiskScore lines, paths and the ranked node list"""
+        ranked = sorted((i for i in range(len(self.ids))
+                         if self.types[i] not in ATTACKER_TYPES
+                         and (self.finding_count[i] or propagated[i] > 0)),
+                        key=lambda i: (-weighted[i], -propagated[i], self.ids[i]))
+        lines = [
+            '% Generated by threat_scoring.py - do not edit by hand',
+            f'% Exposure: {exposure}; hop likelihood floor: {self.floor}',
+            '% \\setRiskScore{node}{top CVE}{max}{sum}{weighted}{propagated}{findings}',
+        ]
+        for i in ranked:
+            lines.append(
+                f'\\setRiskScore{{{self.ids[i]}}}{{{tex_escape(self.top_cve[i])}}}'
+                f'{{{self.max_severity[i]:.1f}}}{{{self.sum_severity[i]:.1f}}}'
+                f'{{{weighted[i]:.1f}}}{{{propagated[i]:.1f}}}{{{self.finding_count[i]}}}')
+            if previous[i] >= 0:
+                lines.append(f'% path: {" -> ".join(self.path_to(previous, i))}')
+        lines.append(f'\\def\\riskRankedNodes{{{",".join(self.ids[i] for i in ranked)}}}')
+        lines.append('\\endinput')
+        Path(filepath).write_text('\n'.join(lines) + '\n', encoding='utf-8')
+        return ranked
+
+    def print_report(self, ranked, weighted, propagated, previous, top):
+        """Print the highest-risk nodes and their attack paths"""
+        print(f"\n{BLUE}{'='*60}{NC}")
+        print(f"{BLUE}HIGHEST-RISK NODES{NC}")
+        print(f"{BLUE}{'='*60}{NC}\n")
+        print(f"  {'node':20} {'max':>5} {'sum':>9} {'weighted':>8} {'propagated':>10} {'findings':>9}")
+        for i in ranked[:top]:
+            print(f"  {self.ids[i]:20} {self.max_severity[i]:5.1f} {self.sum_severity[i]:9.1f} "
+                  f"{weighted[i]:8.1f} {propagated[i]:10.1f} {self.finding_count[i]:9}")
+            if previous[i] >= 0:
+                print(f"  {CYAN}  path: {' -> '.join(self.path_to(previous, i))}{NC}")
+
+def main():
+    """Main threat scoring function"""
+    args = sys.argv[1:]
+    if len(args) < 3 or '--help' in args or '-h' in args:
+        print("Usage: python3 threat_scoring.py nodes.csv connections.csv threats.csv [more threats...] [options]")
+        print("")
+        print("Options:")
+        print("  --exposure MODE    degree (default) or internet")
+        print("  --floor P          Exploit likelihood of hops without findings (default: 0.5)")
+        print("  --output FILE      TeX output file (default: risk_scores.tex)")
+        print("  --top N            Nodes shown in the report (default: 10)")
+        sys.exit(1)
+
+    options = {'--exposure': 'degree', '--floor': str(DEFAULT_FLOOR),
+               '--output': 'risk_scores.tex', '--top': '10'}
+    for flag in options:
+        if flag in args:
+            index = args.index(flag)
+            if index + 1 >= len(args):
+                print(f"{RED}Error: {flag} requires a value{NC}")
+                sys.exit(1)
+            options[flag] = args[index + 1]
+            del args[index:index + 2]
+    if options['--exposure'] not in ('degree', 'internet'):
+        print(f"{RED}Error: --exposure must be degree or internet{NC}")
+        sys.exit(1)
+
+    for filepath in args:
+        if not Path(filepath).exists():
+            print(f"{RED}✗ File not found: {filepath}{NC}")
+            sys.exit(1)
+
+    print(f"{BLUE}{'='*60}{NC}")
+    print(f"{BLUE}Threat Scoring{NC}")
+    print(f"{BLUE}{'='*60}{NC}\n")
+
+    scorer = ThreatScorer(floor=float(options['--floor']))
+    start = time.perf_counter()
+    scorer.load_nodes_csv(args[0])
+    scorer.load_connections_csv(args[1])
+    for filepath in args[2:]:
+        try:
+            scorer.load_threats_csv(filepath)
+        except ValueError as e:
+            print(f"{RED}✗ {e}{NC}")
+            sys.exit(1)
+    loaded = time.perf_counter()
+
+    weighted, propagated, previous = scorer.score(options['--exposure'])
+    ranked = scorer.write_tex(options['--output'], weighted, propagated, previous,
+                              options['--exposure'])
+    done = time.perf_counter()
+
+    print(f"{GREEN}✓ Loaded {len(scorer.ids)} nodes and {scorer.findings} findings "
+          f"in {loaded - start:.2f}s{NC}")
+    if scorer.unmatched:
+        print(f"{YELLOW}  ⚠ {scorer.unmatched} findings target unknown nodes{NC}")
+    if scorer.invalid:
+        print(f"{YELLOW}  ⚠ {scorer.invalid} findings without a finite numeric severity{NC}")
+    if not any(t in ATTACKER_TYPES for t in scorer.types):
+        print(f"{YELLOW}  ⚠ No attacker nodes; propagated risk is 0 everywhere{NC}")
+    print(f"{GREEN}✓ Scored {len(ranked)} nodes in {done - loaded:.2f}s{NC}")
+
+    scorer.print_report(ranked, weighted, propagated, previous, int(options['--top']))
+
+    print(f"\n{GREEN}✓ Risk scores written to: {options['--output']}{NC}")
+    print(f"{YELLOW}  Usage: \\loadRiskScores{{{options['--output']}}} then "
+          f"\\markNodeRisk{{node}} or \\drawRiskMeter{{x}}{{y}}{{node}}{NC}\n")
+
+if __name__ == '__main__':
+    main()
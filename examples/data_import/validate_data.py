@@ -24,6 +24,8 @@ import re
 from pathlib import Path
 from typing import Dict, List, Tuple, Set
 
+from ip_utils import parse_ip
+
 # ANSI color codes
 RED = '\033[0;31m'
 GREEN = '\033[0;32m'
@@ -31,6 +33,79 @@ YELLOW = '\033[1;33m'
 BLUE = '\033[0;34m'
 NC = '\033[0m'  # No Color
 
+IPV4_PATTERN = re.compile(r'^(\d{1,3})\.(\d{1,3})\.(\d{1,3})\.(\d{1,3})$')
+
+VALID_NODE_TYPES = frozenset([
+    # Basic network devices
+    'server', 'client', 'router', 'firewall', 'switch', 'cloud', 'attacker',
+    # Database nodes
+    'database', 'database_primary', 'database_replica', 'database_cluster',
+    # Load balancers
+    'loadbalancer', 'loadbalancer_active', 'loadbalancer_passive',
+    # Virtualization
+    'vm', 'hypervisor', 'container', 'pod',
+    # Mobile devices
+    'mobile', 'mobile_phone', 'tablet', 'laptop',
+    # IoT devices
+    'iot', 'iot_device', 'sensor', 'smart_device',
+    # Cloud providers
+    'aws', 'azure', 'gcp', 'aws_node', 'azure_node', 'gcp_node',
+    # Network appliances
+    'ips', 'ids', 'proxy', 'waf',
+    # Storage
+    'storage', 'nas', 'san',
+    # Wireless
+    'wireless', 'wireless_ap', 'access_point',
+    # Generic
+    'generic', 'unknown'
+])
+
+VALID_CONNECTION_TYPES = frozenset([
+    # Basic connection types
+    'normal', 'encrypted', 'attack', 'suspicious', 'bidirectional',
+    # Special connection types
+    'vpn', 'vpn_tunnel', 'wireless', 'fiber', 'fiber_optic',
+    'satellite', 'satellite_link', 'blocked',
+    # Bandwidth-based
+    'bw_low', 'bw_medium', 'bw_high', 'bw_very_high', 'bw_congested',
+    # Load balanced
+    'load_balanced', 'curve', 'curve_sharp', 'curve_reverse',
+    # Generic
+    'generic', 'unknown'
+])
+
+# Headers each CSV kind must have
+REQUIRED_HEADERS = {
+    'nodes': ['id', 'type', 'ip', 'label'],
+    'connections': ['source', 'destination'],
+    'threats': ['target', 'type', 'severity'],
+}
+
+def csv_kind(fieldnames, filepath=''):
+    """'nodes', 'connections' or 'threats' for a CSV header, or None
+
+    The header decides; the file name is the fallback for a header that
+    matches no kind, so a nodes.csv missing its id column still gets the
+    nodes checks and their error messages.
+    """
+    names = {name.strip().lower() for name in fieldnames or []}
+    if {'source', 'destination'} <= names:
+        return 'connections'
+    if 'target' in names:
+        return 'threats'
+    if 'id' in names:
+        return 'nodes'
+    name = Path(filepath).name.lower()
+    for kind, hint in (('nodes', 'node'), ('connections', 'connection'), ('threats', 'threat')):
+        if hint in name:
+            return kind
+    return None
+
+def read_csv_kind(filepath):
+    """csv_kind() of a file, reading only its header"""
+    with open(filepath, 'r', encoding='utf-8', newline='') as f:
+        return csv_kind(next(csv.reader(f), []), filepath)
+
 class NetworkDataValidator:
     """Validates network diagram data files"""
 
@@ -41,8 +116,7 @@ class NetworkDataValidator:
 
     def validate_ipv4(self, ip: str) -> bool:
         """Validate IPv4 address format"""
-        pattern = r'^(\d{1,3})\.(\d{1,3})\.(\d{1,3})\.(\d{1,3})$'
-        match = re.match(pattern, ip)
+        match = IPV4_PATTERN.match(ip)
         if not match:
             return False
 
@@ -53,52 +127,125 @@ class NetworkDataValidator:
 
         return True
 
+    def validate_ip(self, ip: str) -> bool:
+        """Validate an IPv4 or IPv6 address"""
+        return parse_ip(ip) is not None
+
     def validate_node_type(self, node_type: str) -> bool:
         """Validate node type"""
-        valid_types = [
-            # Basic network devices
-            'server', 'client', 'router', 'firewall', 'switch', 'cloud', 'attacker',
-            # Database nodes
-            'database', 'database_primary', 'database_replica', 'database_cluster',
-            # Load balancers
-            'loadbalancer', 'loadbalancer_active', 'loadbalancer_passive',
-            # Virtualization
-            'vm', 'hypervisor', 'container', 'pod',
-            # Mobile devices
-            'mobile', 'mobile_phone', 'tablet', 'laptop',
-            # IoT devices
-            'iot', 'iot_device', 'sensor', 'smart_device',
-            # Cloud providers
-            'aws', 'azure', 'gcp', 'aws_node', 'azure_node', 'gcp_node',
-            # Network appliances
-            'ips', 'ids', 'proxy', 'waf',
-            # Storage
-            'storage', 'nas', 'san',
-            # Wireless
-            'wireless', 'wireless_ap', 'access_point',
-            # Generic
-            'generic', 'unknown'
-        ]
-        return node_type.lower().replace(' ', '_').replace('-', '_') in valid_types
+        return node_type.lower().replace(' ', '_').replace('-', '_') in VALID_NODE_TYPES
 
     def validate_connection_type(self, conn_type: str) -> bool:
         """Validate connection type"""
         if not conn_type:  # Empty is OK (defaults to normal)
             return True
-        valid_types = [
-            # Basic connection types
-            'normal', 'encrypted', 'attack', 'suspicious', 'bidirectional',
-            # Special connection types
-            'vpn', 'vpn_tunnel', 'wireless', 'fiber', 'fiber_optic',
-            'satellite', 'satellite_link', 'blocked',
-            # Bandwidth-based
-            'bw_low', 'bw_medium', 'bw_high', 'bw_very_high', 'bw_congested',
-            # Load balanced
-            'load_balanced', 'curve', 'curve_sharp', 'curve_reverse',
-            # Generic
-            'generic', 'unknown'
-        ]
-        return conn_type.lower().replace(' ', '_').replace('-', '_') in valid_types
+        return conn_type.lower().replace(' ', '_').replace('-', '_') in VALID_CONNECTION_TYPES
+
+    def check_headers(self, kind: str, fieldnames: List[str]) -> bool:
+        """Check a CSV header has the columns its kind requires"""
+        if not fieldnames:
+            self.errors.append("No headers found in CSV file")
+            return False
+
+        missing_headers = set(REQUIRED_HEADERS[kind]) - set(fieldnames)
+        if missing_headers:
+            self.errors.append(f"Missing required headers: {missing_headers}")
+            return False
+        return True
+
+    def check_node(self, row: Dict[str, str], line_num: int, has_coordinates: bool):
+        """Check one node row"""
+        # Check node ID
+        node_id = row.get('id', '').strip()
+        if not node_id:
+            self.errors.append(f"Line {line_num}: Empty node ID")
+        elif node_id in self.node_ids:
+            self.errors.append(f"Line {line_num}: Duplicate node ID '{node_id}'")
+        else:
+            self.node_ids.add(node_id)
+
+        # Check node type
+        node_type = row.get('type', '').strip()
+        if not self.validate_node_type(node_type):
+            self.errors.append(
+                f"Line {line_num}: Invalid node type '{node_type}'"
+            )
+
+        # Check IP address
+        ip = row.get('ip', '').strip()
+        if ip and not self.validate_ip(ip):
+            self.errors.append(
+                f"Line {line_num}: Invalid IP address '{ip}'"
+            )
+
+        # Check coordinates if present
+        if has_coordinates:
+            try:
+                x = float(row.get('x', 0))
+                y = float(row.get('y', 0))
+            except ValueError as e:
+                self.errors.append(
+                    f"Line {line_num}: Invalid coordinates (x={row.get('x')}, y={row.get('y')})"
+                )
+
+        # Check label
+        label = row.get('label', '').strip()
+        if not label:
+            self.warnings.append(
+                f"Line {line_num}: Empty label for node '{node_id}'"
+            )
+
+    def check_connection(self, row: Dict[str, str], line_num: int):
+        """Check one connection row"""
+        source = row.get('source', '').strip()
+        destination = row.get('destination', '').strip()
+
+        # Check source and destination
+        if not source:
+            self.errors.append(f"Line {line_num}: Empty source")
+        if not destination:
+            self.errors.append(f"Line {line_num}: Empty destination")
+
+        # Warn if nodes not found (only if nodes were validated first)
+        if self.node_ids:
+            if source and source not in self.node_ids:
+                self.warnings.append(
+                    f"Line {line_num}: Source node '{source}' not found in nodes file"
+                )
+            if destination and destination not in self.node_ids:
+                self.warnings.append(
+                    f"Line {line_num}: Destination node '{destination}' not found in nodes file"
+                )
+
+        # Check connection type
+        conn_type = row.get('type', '').strip()
+        if conn_type and not self.validate_connection_type(conn_type):
+            self.errors.append(
+                f"Line {line_num}: Invalid connection type '{conn_type}'"
+            )
+
+    def check_threat(self, row: Dict[str, str], line_num: int):
+        """Check one threat row"""
+        target = row.get('target', '').strip()
+
+        # Check target exists
+        if not target:
+            self.errors.append(f"Line {line_num}: Empty target")
+        elif self.node_ids and target not in self.node_ids:
+            self.warnings.append(
+                f"Line {line_num}: Target node '{target}' not found in nodes file"
+            )
+
+        # Check severity (if it's a number, should be 0-10)
+        severity = row.get('severity', '').strip()
+        try:
+            sev_val = float(severity)
+            if sev_val < 0 or sev_val > 10:
+                self.warnings.append(
+                    f"Line {line_num}: Severity {sev_val} outside typical CVSS range (0-10)"
+                )
+        except ValueError:
+            pass  # Non-numeric severity is OK
 
     def validate_nodes_csv(self, filepath: str) -> bool:
         """Validate nodes CSV file"""
@@ -108,18 +255,7 @@ class NetworkDataValidator:
             with open(filepath, 'r', encoding='utf-8') as f:
                 reader = csv.DictReader(f)
 
-                # Check required headers
-                required_headers = ['id', 'type', 'ip', 'label']
-                optional_headers = ['x', 'y']
-
-                if not reader.fieldnames:
-                    self.errors.append("No headers found in CSV file")
-                    return False
-
-                # Check for required headers
-                missing_headers = set(required_headers) - set(reader.fieldnames)
-                if missing_headers:
-                    self.errors.append(f"Missing required headers: {missing_headers}")
+                if not self.check_headers('nodes', reader.fieldnames):
                     return False
 
                 # Determine if coordinates are provided
@@ -133,46 +269,7 @@ class NetworkDataValidator:
                 # Validate each row
                 line_num = 2  # Start at 2 (header is line 1)
                 for row in reader:
-                    # Check node ID
-                    node_id = row.get('id', '').strip()
-                    if not node_id:
-                        self.errors.append(f"Line {line_num}: Empty node ID")
-                    elif node_id in self.node_ids:
-                        self.errors.append(f"Line {line_num}: Duplicate node ID '{node_id}'")
-                    else:
-                        self.node_ids.add(node_id)
-
-                    # Check node type
-                    node_type = row.get('type', '').strip()
-                    if not self.validate_node_type(node_type):
-                        self.errors.append(
-                            f"Line {line_num}: Invalid node type '{node_type}'"
-                        )
-
-                    # Check IP address
-                    ip = row.get('ip', '').strip()
-                    if ip and not self.validate_ipv4(ip):
-                        self.errors.append(
-                            f"Line {line_num}: Invalid IP address '{ip}'"
-                        )
-
-                    # Check coordinates if present
-                    if has_coordinates:
-                        try:
-                            x = float(row.get('x', 0))
-                            y = float(row.get('y', 0))
-                        except ValueError as e:
-                            self.errors.append(
-                                f"Line {line_num}: Invalid coordinates (x={row.get('x')}, y={row.get('y')})"
-                            )
-
-                    # Check label
-                    label = row.get('label', '').strip()
-                    if not label:
-                        self.warnings.append(
-                            f"Line {line_num}: Empty label for node '{node_id}'"
-                        )
-
+                    self.check_node(row, line_num, has_coordinates)
                     line_num += 1
 
                 print(f"{GREEN}✓ Processed {line_num - 2} nodes{NC}")
@@ -193,55 +290,16 @@ class NetworkDataValidator:
             with open(filepath, 'r', encoding='utf-8') as f:
                 reader = csv.DictReader(f)
 
-                # Check required headers
-                required_headers = ['source', 'destination']
-                optional_headers = ['label', 'type']
-
-                if not reader.fieldnames:
-                    self.errors.append("No headers found in CSV file")
-                    return False
-
-                # Check for required headers
-                missing_headers = set(required_headers) - set(reader.fieldnames)
-                if missing_headers:
-                    self.errors.append(f"Missing required headers: {missing_headers}")
+                if not self.check_headers('connections', reader.fieldnames):
                     return False
 
                 # Validate each row
                 line_num = 2
-                connection_count = 0
                 for row in reader:
-                    source = row.get('source', '').strip()
-                    destination = row.get('destination', '').strip()
-
-                    # Check source and destination
-                    if not source:
-                        self.errors.append(f"Line {line_num}: Empty source")
-                    if not destination:
-                        self.errors.append(f"Line {line_num}: Empty destination")
-
-                    # Warn if nodes not found (only if nodes were validated first)
-                    if self.node_ids:
-                        if source and source not in self.node_ids:
-                            self.warnings.append(
-                                f"Line {line_num}: Source node '{source}' not found in nodes file"
-                            )
-                        if destination and destination not in self.node_ids:
-                            self.warnings.append(
-                                f"Line {line_num}: Destination node '{destination}' not found in nodes file"
-                            )
-
-                    # Check connection type
-                    conn_type = row.get('type', '').strip()
-                    if conn_type and not self.validate_connection_type(conn_type):
-                        self.errors.append(
-                            f"Line {line_num}: Invalid connection type '{conn_type}'"
-                        )
-
+                    self.check_connection(row, line_num)
                     line_num += 1
-                    connection_count += 1
 
-                print(f"{GREEN}✓ Processed {connection_count} connections{NC}")
+                print(f"{GREEN}✓ Processed {line_num - 2} connections{NC}")
                 return len(self.errors) == 0
 
         except FileNotFoundError:
@@ -259,48 +317,16 @@ class NetworkDataValidator:
             with open(filepath, 'r', encoding='utf-8') as f:
                 reader = csv.DictReader(f)
 
-                # Check required headers
-                required_headers = ['target', 'type', 'severity']
-
-                if not reader.fieldnames:
-                    self.errors.append("No headers found in CSV file")
-                    return False
-
-                # Check for required headers
-                missing_headers = set(required_headers) - set(reader.fieldnames)
-                if missing_headers:
-                    self.errors.append(f"Missing required headers: {missing_headers}")
+                if not self.check_headers('threats', reader.fieldnames):
                     return False
 
                 # Validate each row
                 line_num = 2
-                threat_count = 0
                 for row in reader:
-                    target = row.get('target', '').strip()
-
-                    # Check target exists
-                    if not target:
-                        self.errors.append(f"Line {line_num}: Empty target")
-                    elif self.node_ids and target not in self.node_ids:
-                        self.warnings.append(
-                            f"Line {line_num}: Target node '{target}' not found in nodes file"
-                        )
-
-                    # Check severity (if it's a number, should be 0-10)
-                    severity = row.get('severity', '').strip()
-                    try:
-                        sev_val = float(severity)
-                        if sev_val < 0 or sev_val > 10:
-                            self.warnings.append(
-                                f"Line {line_num}: Severity {sev_val} outside typical CVSS range (0-10)"
-                            )
-                    except ValueError:
-                        pass  # Non-numeric severity is OK
-
+                    self.check_threat(row, line_num)
                     line_num += 1
-                    threat_count += 1
 
-                print(f"{GREEN}✓ Processed {threat_count} threats{NC}")
+                print(f"{GREEN}✓ Processed {line_num - 2} threats{NC}")
                 return len(self.errors) == 0
 
         except FileNotFoundError:
@@ -354,7 +380,7 @@ class NetworkDataValidator:
 
                     # Check IP if present
                     ip = node.get('ip', '').strip() if isinstance(node.get('ip'), str) else ''
-                    if ip and not self.validate_ipv4(ip):
+                    if ip and not self.validate_ip(ip):
                         self.errors.append(f"Node {idx} ({node_id}): Invalid IP address '{ip}'")
 
                     # Check position if present
@@ -518,13 +544,14 @@ def main():
 
         # Determine file type and validate
         if filepath.endswith('.csv'):
-            if 'node' in filepath.lower():
+            kind = read_csv_kind(filepath)
+            if kind == 'nodes':
                 if not validator.validate_nodes_csv(filepath):
                     all_valid = False
-            elif 'connection' in filepath.lower():
+            elif kind == 'connections':
                 if not validator.validate_connections_csv(filepath):
                     all_valid = False
-            elif 'threat' in filepath.lower():
+            elif kind == 'threats':
                 if not validator.validate_threats_csv(filepath):
                     all_valid = False
             else:
@@ -0,0 +1,506 @@
+#!/usr/bin/env python3
+"""
+vuln_enrich.py - Enrich threat findings from a local vulnerability index
+
+This script builds an offline SQLite index from NVD CVE feeds and the
+MITRE ATT&CK STIX bundle, then joins threats CSV files against it. Each
+finding gains its CVSS v3 vector, base/impact/exploitability scores and
+ATT&CK techniques and tactics, so \\drawCVSSBreakdown and \\attackTechnique
+no longer have to be filled in by hand. Nothing is fetched from the
+network: download the feeds once and copy them into the air-gapped site.
+
+Lookups go through primary-key B-trees, batched per chunk of findings and
+memoized per CVE, so a million findings cost one query per distinct CVE
+rather than one per row.
+
+Inputs understood by build:
+    NVD JSON 1.1 feeds (CVE_Items) and NVD API 2.0 dumps (vulnerabilities),
+    plain or .gz; ATT&CK STIX bundles (enterprise-attack.json); CVE to
+    ATT&CK mappings as CTID mapping JSON (mapping_objects) or any CSV whose
+    rows hold a CVE ID and technique IDs (T1190, T1059.001)
+
+Usage:
+    python3 vuln_enrich.py build nvdcve-1.1-2024.json.gz --attack enterprise-attack.json --mappings cve_attack.csv
+    python3 vuln_enrich.py enrich threats.csv
+    python3 vuln_enrich.py enrich threats.csv --output threats_enriched.csv --tex cve_details.tex
+    python3 vuln_enrich.py info
+"""
+
+import sys
+import re
+import csv
+import gzip
+import json
+import math
+import time
+import sqlite3
+from pathlib import Path
+
+from threat_scoring import parse_severity, tex_escape
+
+# ANSI color codes
+GREEN = '\033[0;32m'
+YELLOW = '\033[1;33m'
+BLUE = '\033[0;34m'
+CYAN = '\033[0;36m'
+RED = '\033[0;31m'
+NC = '\033[0m'
+
+DEFAULT_DB = 'vulndb.sqlite'
+
+CVE_RE = re.compile(r'CVE-\d{4}-\d{4,}', re.IGNORECASE)
+TECHNIQUE_RE = re.compile(r'\bT\d{4}(?:\.\d{3})?\b')
+
+# Findings per lookup batch, and CVE IDs per SQL IN (...) list
+CHUNK_ROWS = 50000
+QUERY_BATCH = 500
+
+# Columns appended to enriched threats files
+ENRICHED_COLUMNS = ['cvss_vector', 'base_score', 'impact_score', 'exploitability_score',
+                    'attack_techniques', 'attack_tactics']
+
+# ATT&CK tactic names as used by \attackTechnique
+TACTIC_ALIASES = {'command-and-control': 'command-control'}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS cve (
+    id TEXT PRIMARY KEY,
+    vector TEXT,
+    base REAL,
+    impact REAL,
+    exploitability REAL,
+    description TEXT
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS technique (
+    id TEXT PRIMARY KEY,
+    name TEXT,
+    tactic TEXT
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS cve_technique (
+    cve TEXT,
+    technique TEXT,
+    PRIMARY KEY (cve, technique)
+) WITHOUT ROWID;
+"""
+
+# CVSS v3.x metric weights (FIRST CVSS v3.1 specification, section 7.4)
+CVSS_WEIGHTS = {
+    'AV': {'N': 0.85, 'A': 0.62, 'L': 0.55, 'P': 0.2},
+    'AC': {'L': 0.77, 'H': 0.44},
+    'UI': {'N': 0.85, 'R': 0.62},
+    'C': {'H': 0.56, 'L': 0.22, 'N': 0.0},
+    'I': {'H': 0.56, 'L': 0.22, 'N': 0.0},
+    'A': {'H': 0.56, 'L': 0.22, 'N': 0.0},
+}
+CVSS_PR = {'U': {'N': 0.85, 'L': 0.62, 'H': 0.27},
+           'C': {'N': 0.85, 'L': 0.68, 'H': 0.5}}
+
+def cvss_roundup(value):
+    """CVSS v3.1 Roundup: smallest one-decimal number >= value"""
+    scaled = int(round(value * 100000))
+    if scaled % 10000 == 0:
+        return scaled / 100000.0
+    return (math.floor(scaled / 10000) + 1) / 10.0
+
+def cvss3_scores(vector):
+    """(base, impact, exploitability) from a CVSS:3.x vector, or None"""
+    metrics = dict(part.split(':', 1) for part in vector.split('/')[1:] if ':' in part)
+    try:
+        scope = metrics['S']
+        iss = 1 - ((1 - CVSS_WEIGHTS['C'][metrics['C']]) *
+                   (1 - CVSS_WEIGHTS['I'][metrics['I']]) *
+                   (1 - CVSS_WEIGHTS['A'][metrics['A']]))
+        exploitability = (8.22 * CVSS_WEIGHTS['AV'][metrics['AV']] *
+                          CVSS_WEIGHTS['AC'][metrics['AC']] *
+                          CVSS_PR[scope][metrics['PR']] *
+                          CVSS_WEIGHTS['UI'][metrics['UI']])
+    except KeyError:
+        return None
+    if scope == 'U':
+        impact = 6.42 * iss
+    else:
+        impact = 7.52 * (iss - 0.029) - 3.25 * (iss - 0.02) ** 15
+    if impact <= 0:
+        base = 0.0
+    elif scope == 'U':
+        base = cvss_roundup(min(impact + exploitability, 10))
+    else:
+        base = cvss_roundup(min(1.08 * (impact + exploitability), 10))
+    return base, round(impact, 1), round(exploitability, 1)
+
+def open_text(path):
+    """Open a plain or gzip-compressed text file"""
+    if str(path).endswith('.gz'):
+        return gzip.open(path, 'rt', encoding='utf-8')
+    return open(path, 'r', encoding='utf-8')
+
+def english(descriptions):
+    """English text from an NVD description list"""
+    for entry in descriptions or []:
+        if entry.get('lang') == 'en':
+            return entry.get('value', '')
+    return ''
+
+def nvd_records(data):
+    """Yield (id, vector, base, impact, exploitability, description) rows"""
+    for item in data.get('CVE_Items', []):
+        # NVD JSON 1.1 feed
+        cve_id = item.get('cve', {}).get('CVE_data_meta', {}).get('ID')
+        metric = item.get('impact', {}).get('baseMetricV3', {})
+        vector = metric.get('cvssV3', {}).get('vectorString', '')
+        yield (cve_id, vector, metric.get('cvssV3', {}).get('baseScore'),
+               metric.get('impactScore'), metric.get('exploitabilityScore'),
+               english(item.get('cve', {}).get('description', {}).get('description_data')))
+    for item in data.get('vulnerabilities', []):
+        # NVD API 2.0 dump
+        cve = item.get('cve', {})
+        metrics = cve.get('metrics', {})
+        entries = metrics.get('cvssMetricV31') or metrics.get('cvssMetricV30') or []
+        metric = next((m for m in entries if m.get('type') == 'Primary'), entries[0] if entries else {})
+        yield (cve.get('id'), metric.get('cvssData', {}).get('vectorString', ''),
+               metric.get('cvssData', {}).get('baseScore'), metric.get('impactScore'),
+               metric.get('exploitabilityScore'), english(cve.get('descriptions')))
+
+def attack_records(data):
+    """Yield (id, name, tactic) for current ATT&CK techniques in a STIX bundle"""
+    for obj in data.get('objects', []):
+        if obj.get('type') != 'attack-pattern' or obj.get('revoked') or obj.get('x_mitre_deprecated'):
+            continue
+        technique_id = next((ref.get('external_id') for ref in obj.get('external_references', [])
+                             if ref.get('source_name') == 'mitre-attack'), None)
+        if not technique_id:
+            continue
+        phases = [p.get('phase_name', '') for p in obj.get('kill_chain_phases', [])
+                  if p.get('kill_chain_name') == 'mitre-attack']
+        tactic = phases[0] if phases else ''
+        yield technique_id, obj.get('name', ''), TACTIC_ALIASES.get(tactic, tactic)
+
+def mapping_records(path):
+    """Yield (cve, technique) pairs from a CTID JSON or CSV mapping file"""
+    if str(path).endswith(('.json', '.json.gz')):
+        with open_text(path) as f:
+            data = json.load(f)
+        for obj in data.get('mapping_objects', []):
+            cve = CVE_RE.search(obj.get('capability_id') or '')
+            technique = TECHNIQUE_RE.search(obj.get('attack_object_id') or '')
+            if cve and technique:
+                yield cve.group(0).upper(), technique.group(0)
+        return
+    with open_text(path) as f:
+        for row in csv.reader(f):
+            text = ' '.join(row)
+            cve = CVE_RE.search(text)
+            if cve:
+                for technique in set(TECHNIQUE_RE.findall(text)):
+                    yield cve.group(0).upper(), technique
+
+class VulnIndex:
+    """SQLite index of CVEs, ATT&CK techniques and their mappings"""
+
+    def __init__(self, db_path):
+        self.db = sqlite3.connect(str(db_path))
+        self.db.executescript(SCHEMA)
+        self.cves = {}
+        self.techniques = {}
+
+    def build(self, nvd_files, attack_files, mapping_files):
+        """Load feeds into the index; returns counts per table"""
+        counts = {'cve': 0, 'technique': 0, 'cve_technique': 0}
+        self.db.execute('PRAGMA journal_mode=MEMORY')
+        self.db.execute('PRAGMA synchronous=OFF')
+        with self.db:
+            for path in nvd_files:
+                with open_text(path) as f:
+                    data = json.load(f)
+                rows = []
+                for cve_id, vector, base, impact, exploitability, description in nvd_records(data):
+                    if not cve_id:
+                        continue
+                    if vector and (impact is None or exploitability is None):
+                        scores = cvss3_scores(vector)
+                        if scores:
+                            base, impact, exploitability = scores
+                    rows.append((cve_id.upper(), vector, base, impact, exploitability, description))
+                self.db.executemany('INSERT OR REPLACE INTO cve VALUES (?, ?, ?, ?, ?, ?)', rows)
+                counts['cve'] += len(rows)
+            for path in attack_files:
+                with open_text(path) as f:
+                    rows = list(attack_records(json.load(f)))
+                self.db.executemany('INSERT OR REPLACE INTO technique VALUES (?, ?, ?)', rows)
+                counts['technique'] += len(rows)
+            for path in mapping_files:
+                rows = list(mapping_records(path))
+                self.db.executemany('INSERT OR IGNORE INTO cve_technique VALUES (?, ?)', rows)
+                counts['cve_technique'] += len(rows)
+        return counts
+
+    def info(self):
+        """Row count per table"""
+        return {table: self.db.execute(f'SELECT COUNT(*) FROM {table}').fetchone()[0]
+                for table in ('cve', 'technique', 'cve_technique')}
+
+    def prefetch(self, cve_ids):
+        """Look up every CVE not seen yet, QUERY_BATCH IDs per query"""
+        missing = [c for c in cve_ids if c not in self.cves]
+        for c in missing:
+            self.cves[c] = None
+            self.techniques[c] = []
+        for start in range(0, len(missing), QUERY_BATCH):
+            batch = missing[start:start + QUERY_BATCH]
+            marks = ','.join('?' * len(batch))
+            for row in self.db.execute(
+                    f'SELECT id, vector, base, impact, exploitability, description '
+                    f'FROM cve WHERE id IN ({marks})', batch):
+                self.cves[row[0]] = row[1:]
+            for cve, technique, name, tactic in self.db.execute(
+                    f'SELECT m.cve, m.technique, t.name, t.tactic FROM cve_technique m '
+                    f'LEFT JOIN technique t ON t.id = m.technique '
+                    f'WHERE m.cve IN ({marks}) ORDER BY m.cve, m.technique', batch):
+                self.techniques[cve].append((technique, name or '', tactic or ''))
+
+def score_text(value):
+    """One-decimal score, empty when unknown"""
+    return '' if value is None else f'{float(value):.1f}'
+
+class ThreatEnricher:
+    """Stream a threats CSV and append index data to every finding"""
+
+    def __init__(self, index, prefer_nvd=False):
+        self.index = index
+        self.prefer_nvd = prefer_nvd
+        self.rows = 0
+        self.matched = 0
+        self.details = {}
+        # Memos: raw cve field -> CVE ID, CVE ID / vector -> enrichment,
+        # severity text -> whether it is numeric
+        self.canonical = {}
+        self.resolved = {}
+        self.vectors = {}
+        self.numeric = {}
+
+    def cve_id(self, raw):
+        """Canonical CVE ID in a raw cve field, '' when there is none"""
+        cve_id = self.canonical.get(raw)
+        if cve_id is None:
+            match = CVE_RE.search(raw)
+            cve_id = self.canonical[raw] = match.group(0).upper() if match else ''
+        return cve_id
+
+    def resolve(self, cve_id):
+        """(appended columns, base score text, description) for an indexed CVE"""
+        entry = self.index.cves.get(cve_id)
+        techniques = self.index.techniques.get(cve_id, [])
+        if not entry and not techniques:
+            return None
+        vector, base, impact, exploitability, description = entry or ('', None, None, None, '')
+        self.details[cve_id] = (vector, base, impact, exploitability, techniques)
+        tail = [vector, score_text(base), score_text(impact), score_text(exploitability),
+                ';'.join(t[0] for t in techniques),
+                ';'.join(dict.fromkeys(t[2] for t in techniques if t[2]))]
+        return tail, score_text(base), description, entry is not None
+
+    def resolve_vector(self, vector):
+        """Enrichment computed from a row's own CVSS vector (no index entry)"""
+        if vector not in self.vectors:
+            scores = cvss3_scores(vector) if vector.startswith('CVSS:3') else None
+            if scores:
+                base, impact, exploitability = (score_text(v) for v in scores)
+                self.vectors[vector] = ([vector, base, impact, exploitability, '', ''], base, '', False)
+            else:
+                self.vectors[vector] = None
+        return self.vectors[vector]
+
+    def needs_severity(self, value):
+        """True when a severity field is empty or not numeric"""
+        numeric = self.numeric.get(value)
+        if numeric is None:
+            numeric = self.numeric[value] = not math.isnan(parse_severity(value))
+        return not numeric
+
+    def enrich_file(self, input_path, output_path):
+        """Enrich input_path into output_path, CHUNK_ROWS findings at a time"""
+        with open(input_path, 'r', encoding='utf-8', newline='') as fin, \
+             open(output_path, 'w', encoding='utf-8', newline='') as fout:
+            reader = csv.reader(fin)
+            writer = csv.writer(fout)
+            header = next(reader, [])
+            names = [name.strip().lower() for name in header]
+            # Re-enriching replaces earlier enrichment columns
+            keep = [i for i, name in enumerate(names) if name not in ENRICHED_COLUMNS]
+            reenrich = len(keep) != len(names)
+            if 'cvss_vector' in names:
+                # A vector already in the input is carried as a trailing
+                # field, so findings missing from the index still get scored
+                keep.append(names.index('cvss_vector'))
+            names = [names[i] for i in keep]
+            columns = tuple(names.index(name) if name in names else None
+                            for name in ('cve', 'severity', 'description', 'cvss_vector'))
+            if columns[0] is None:
+                raise ValueError(f"{input_path}: needs a 'cve' column")
+            width = len(names)
+            writer.writerow([header[i] for i in keep[:width - (columns[3] is not None)]]
+                            + ENRICHED_COLUMNS)
+
+            chunk = []
+            for row in reader:
+                if not row:
+                    continue
+                if reenrich or columns[3] is not None:
+                    row = [row[i] if i < len(row) else '' for i in keep]
+                elif len(row) != width:
+                    row = (row + [''] * width)[:width]
+                chunk.append(row)
+                if len(chunk) >= CHUNK_ROWS:
+                    self.flush(chunk, columns, writer)
+                    chunk = []
+            self.flush(chunk, columns, writer)
+
+    def flush(self, chunk, columns, writer):
+        """Look up a chunk's distinct CVEs in one batch, then write it"""
+        cve_col, severity_col, description_col, vector_col = columns
+        ids = [self.cve_id(row[cve_col]) for row in chunk]
+        new = {c for c in ids if c and c not in self.resolved}
+        if new:
+            self.index.prefetch(new)
+            for cve_id in new:
+                self.resolved[cve_id] = self.resolve(cve_id)
+
+        resolved = self.resolved
+        empty = [''] * len(ENRICHED_COLUMNS)
+        matched = 0
+        for row, cve_id in zip(chunk, ids):
+            info = resolved.get(cve_id) if cve_id else None
+            if vector_col is not None:
+                vector = row.pop()
+                if info is None and vector:
+                    info = self.resolve_vector(vector)
+            if info is None:
+                row.extend(empty)
+                continue
+            tail, base, description, indexed = info
+            matched += indexed
+            if base and severity_col is not None and (
+                    self.prefer_nvd or self.needs_severity(row[severity_col])):
+                row[severity_col] = base
+            if description and description_col is not None and not row[description_col].strip():
+                row[description_col] = description
+            row.extend(tail)
+        writer.writerows(chunk)
+        self.rows += len(chunk)
+        self.matched += matched
+
+    def write_tex(self, filepath):
+        """Write \\setCVEDetails and \\setCVETechnique lines for every enriched CVE"""
+        lines = [
+            '% Generated by vuln_enrich.py - do not edit by hand',
+            '% \\setCVEDetails{cve}{vector}{base}{impact}{exploitability}',
+            '% \\setCVETechnique{cve}{tactic}{technique_id}{technique_name}',
+        ]
+        for cve_id in sorted(self.details):
+            vector, base, impact, exploitability, techniques = self.details[cve_id]
+            lines.append(f'\\setCVEDetails{{{cve_id}}}{{{tex_escape(vector)}}}{{{score_text(base)}}}'
+                         f'{{{score_text(impact)}}}{{{score_text(exploitability)}}}')
+            if techniques:
+                technique, name, tactic = techniques[0]
+                lines.append(f'\\setCVETechnique{{{cve_id}}}{{{tactic}}}{{{technique}}}'
+                             f'{{{tex_escape(name)}}}')
+        lines.append('\\endinput')
+        Path(filepath).write_text('\n'.join(lines) + '\n', encoding='utf-8')
+
+def main():
+    """Main enrichment function"""
+    args = sys.argv[1:]
+    if not args or args[0] not in ('build', 'enrich', 'info'):
+        print("Usage: python3 vuln_enrich.py <build|enrich|info> [files...] [options]")
+        print("")
+        print("Commands:")
+        print("  build FEEDS...     Add NVD JSON feeds (.json/.json.gz) to the index")
+        print("  enrich THREATS...  Write <name>_enriched.csv for each threats CSV")
+        print("  info               Show index contents")
+        print("")
+        print("Options:")
+        print(f"  --db FILE          Index file (default: {DEFAULT_DB})")
+        print("  --attack FILE      build: ATT&CK STIX bundle (repeatable)")
+        print("  --mappings FILE    build: CVE to ATT&CK mappings, CTID JSON or CSV (repeatable)")
+        print("  --output FILE      enrich: output file (single input only)")
+        print("  --tex FILE         enrich: also write CVE details for \\loadCVEDetails")
+        print("  --prefer-nvd       enrich: replace user severities with NVD base scores")
+        sys.exit(1)
+
+    command = args.pop(0)
+    options = {'--db': DEFAULT_DB, '--output': None, '--tex': None}
+    lists = {'--attack': [], '--mappings': []}
+    prefer_nvd = '--prefer-nvd' in args
+    if prefer_nvd:
+        args.remove('--prefer-nvd')
+    for flag in list(options) + list(lists):
+        while flag in args:
+            index = args.index(flag)
+            if index + 1 >= len(args):
+                print(f"{RED}Error: {flag} requires a value{NC}")
+                sys.exit(1)
+            if flag in lists:
+                lists[flag].append(args[index + 1])
+            else:
+                options[flag] = args[index + 1]
+            del args[index:index + 2]
+
+    for filepath in args + lists['--attack'] + lists['--mappings']:
+        if not Path(filepath).exists():
+            print(f"{RED}✗ File not found: {filepath}{NC}")
+            sys.exit(1)
+
+    print(f"{BLUE}{'='*60}{NC}")
+    print(f"{BLUE}Vulnerability Enrichment{NC}")
+    print(f"{BLUE}{'='*60}{NC}\n")
+
+    if command != 'build' and not Path(options['--db']).exists():
+        print(f"{RED}✗ Index not found: {options['--db']} (run the build command first){NC}")
+        sys.exit(1)
+    index = VulnIndex(options['--db'])
+
+    if command == 'build':
+        start = time.perf_counter()
+        counts = index.build(args, lists['--attack'], lists['--mappings'])
+        print(f"{GREEN}✓ Indexed {counts['cve']} CVEs, {counts['technique']} techniques, "
+              f"{counts['cve_technique']} mappings in {time.perf_counter() - start:.2f}s{NC}")
+        print(f"{GREEN}✓ Index: {options['--db']}{NC}\n")
+        return
+
+    if command == 'info':
+        for table, count in index.info().items():
+            print(f"  {table:15} {count:10}")
+        print("")
+        return
+
+    if not args:
+        print(f"{RED}Error: enrich requires at least one threats CSV{NC}")
+        sys.exit(1)
+    if options['--output'] and len(args) > 1:
+        print(f"{RED}Error: --output needs a single input file{NC}")
+        sys.exit(1)
+
+    enricher = ThreatEnricher(index, prefer_nvd=prefer_nvd)
+    for filepath in args:
+        output = options['--output'] or str(Path(filepath).with_name(Path(filepath).stem + '_enriched.csv'))
+        start = time.perf_counter()
+        rows_before, matched_before = enricher.rows, enricher.matched
+        try:
+            enricher.enrich_file(filepath, output)
+        except ValueError as e:
+            print(f"{RED}✗ {e}{NC}")
+            sys.exit(1)
+        rows = enricher.rows - rows_before
+        print(f"{GREEN}✓ {filepath}: {rows} findings, {enricher.matched - matched_before} "
+              f"matched in the index ({time.perf_counter() - start:.2f}s){NC}")
+        print(f"{CYAN}  → {output}{NC}")
+
+    if options['--tex']:
+        enricher.write_tex(options['--tex'])
+        print(f"{GREEN}✓ CVE details for {len(enricher.details)} CVEs written to: {options['--tex']}{NC}")
+        print(f"{YELLOW}  Usage: \\loadCVEDetails{{{options['--tex']}}} then "
+              f"\\drawCVEBreakdown{{x}}{{y}}{{cve}} or \\markCVETechnique{{node}}{{cve}}{NC}")
+    print("")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,521 @@
+#!/usr/bin/env python3
+"""
+watch_network.py - Rebuild diagrams as soon as their data files change
+
+This script replaces the validate / regenerate / compile round trip with a
+long-running watcher. It reads every document once to learn which data
+files, generated TeX fragments and .tex modules it depends on, then polls
+those files and after each burst of edits (debounced):
+
+  - re-reads only the CSV files that changed and revalidates only the rows
+    that were added or edited, plus rows whose node references changed
+  - regenerates only the fragments built from changed data: the dashboard
+    figures of \\loadNetworkStats (network_stats.py) and the risk scores of
+    \\loadRiskScores (threat_scoring.py), computed in-process
+  - recompiles only the documents that depend on a changed file, cancelling
+    a compile that is still running for an older version
+
+Parsed rows stay in memory between rebuilds. Documents whose data has
+validation errors are held back until the errors are fixed. The engine is
+taken from the document's "% Compile with: lualatex ..." comment, or
+--engine.
+
+Usage:
+    python3 watch_network.py example_csv_import.tex
+    python3 watch_network.py example_csv_import.tex example_auto_positioning.tex --debounce 0.5
+    python3 watch_network.py --once
+"""
+
+import os
+import re
+import sys
+import csv
+import time
+import shutil
+import subprocess
+from array import array
+from collections import Counter, defaultdict
+from pathlib import Path
+
+from validate_data import NetworkDataValidator, csv_kind
+from network_stats import NetworkStats
+from threat_scoring import ThreatScorer, parse_severity
+
+# ANSI color codes
+GREEN = '\033[0;32m'
+YELLOW = '\033[1;33m'
+BLUE = '\033[0;34m'
+CYAN = '\033[0;36m'
+RED = '\033[0;31m'
+NC = '\033[0m'
+
+DEFAULT_INTERVAL = 0.2
+DEFAULT_DEBOUNCE = 0.3
+DEFAULT_ENGINE = 'pdflatex'
+
+# Commands whose brace arguments may name files the document depends on
+DEPENDENCY_RE = re.compile(
+    r'\\(input|include|InputIfFileExists|import[A-Za-z]*|load[A-Za-z]*)\s*((?:\{[^{}]*\}\s*)+)')
+ARGUMENT_RE = re.compile(r'\{([^{}]*)\}')
+ENGINE_RE = re.compile(r'^%\s*Compile with:\s*(\w+)', re.MULTILINE)
+
+# Fragment loaders the watcher can regenerate, by generator
+FRAGMENT_LOADERS = {'loadNetworkStats': 'stats', 'loadRiskScores': 'risk'}
+
+def strip_comments(text):
+    """Remove TeX comments (unescaped % to end of line)"""
+    return re.sub(r'(?<!\\)%.*', '', text)
+
+class HotTable:
+    """One CSV file kept parsed in memory, with per-row validation results"""
+
+    def __init__(self, path):
+        self.path = path
+        self.kind = None
+        self.columns = []
+        self.positions = {}
+        self.rows = []
+        self.reset = False
+        self.counts = Counter()
+        self.issues = {}
+        # node id -> rows naming it (id for nodes, ends/target otherwise)
+        self.refs = defaultdict(set)
+
+    def reload(self):
+        """Re-read the file; returns (gained, lost) row counts"""
+        with open(self.path, 'r', encoding='utf-8', newline='') as f:
+            reader = csv.reader(f)
+            columns = [c.strip().lower() for c in next(reader, [])]
+            rows = [tuple(row) for row in reader if any(row)]
+        self.reset = columns != self.columns
+        if self.reset:
+            # New header: every row is new
+            self.columns, self.kind = columns, csv_kind(columns, self.path)
+            self.positions = {c: i for i, c in enumerate(columns)}
+            self.counts, self.issues, self.refs = Counter(), {}, defaultdict(set)
+        counts = Counter(rows)
+        gained, lost = counts - self.counts, self.counts - counts
+        self.rows, self.counts = rows, counts
+        for row in lost:
+            if row not in counts:
+                self.issues.pop(row, None)
+                for node in self.referenced(row):
+                    self.refs[node].discard(row)
+        for row in gained:
+            for node in self.referenced(row):
+                self.refs[node].add(row)
+        return gained, lost
+
+    def value(self, row, column):
+        """Stripped cell of a row, '' when the column is missing"""
+        try:
+            return row[self.positions[column]].strip()
+        except (KeyError, IndexError):
+            return ''
+
+    def referenced(self, row):
+        """Node ids a row names"""
+        columns = {'nodes': ('id',), 'connections': ('source', 'destination'),
+                   'threats': ('target',)}.get(self.kind, ())
+        return {v for v in (self.value(row, c) for c in columns) if v}
+
+    def dicts(self):
+        """Rows as dicts, as csv.DictReader would return them"""
+        return [dict(zip(self.columns, row)) for row in self.rows]
+
+    def errors(self):
+        """[(line, message)] for rows with validation errors, in file order"""
+        failing = {row: messages for row, (messages, _) in self.issues.items() if messages}
+        if not failing:
+            return []
+        lines = {}
+        for line, row in enumerate(self.rows, 2):
+            lines.setdefault(row, line)
+        return sorted((lines[row], message) for row, messages in failing.items() for message in messages)
+
+class IncrementalValidator(NetworkDataValidator):
+    """validate_data.py checks applied to single rows as they change"""
+
+    def __init__(self):
+        super().__init__()
+        self.id_counts = Counter()
+
+    def check_row(self, table, row):
+        """(errors, warnings) for one row of a table"""
+        errors, warnings = [], []
+        if table.kind == 'nodes':
+            node_id = table.value(row, 'id')
+            if not node_id:
+                errors.append("Empty node ID")
+            elif self.id_counts[node_id] > 1:
+                errors.append(f"Duplicate node ID '{node_id}'")
+            node_type = table.value(row, 'type')
+            if not self.validate_node_type(node_type):
+                errors.append(f"Invalid node type '{node_type}'")
+            ip = table.value(row, 'ip')
+            if ip and not self.validate_ip(ip):
+                errors.append(f"Invalid IP address '{ip}'")
+            if 'x' in table.columns and 'y' in table.columns:
+                try:
+                    float(table.value(row, 'x') or 0)
+                    float(table.value(row, 'y') or 0)
+                except ValueError:
+                    errors.append(f"Invalid coordinates (x={table.value(row, 'x')}, y={table.value(row, 'y')})")
+            if not table.value(row, 'label'):
+                warnings.append(f"Empty label for node '{node_id}'")
+        elif table.kind == 'connections':
+            for end in ('source', 'destination'):
+                node = table.value(row, end)
+                if not node:
+                    errors.append(f"Empty {end}")
+                elif self.id_counts and node not in self.id_counts:
+                    warnings.append(f"{end.capitalize()} node '{node}' not found in nodes file")
+            conn_type = table.value(row, 'type')
+            if conn_type and not self.validate_connection_type(conn_type):
+                errors.append(f"Invalid connection type '{conn_type}'")
+        elif table.kind == 'threats':
+            target = table.value(row, 'target')
+            if not target:
+                errors.append("Empty target")
+            elif self.id_counts and target not in self.id_counts:
+                warnings.append(f"Target node '{target}' not found in nodes file")
+            severity = parse_severity(table.value(row, 'severity'))
+            if severity == severity and not 0 <= severity <= 10:
+                warnings.append(f"Severity {severity} outside typical CVSS range (0-10)")
+        return errors, warnings
+
+    def update(self, tables, changes):
+        """Revalidate changed rows of {table: (gained, lost)}; returns rows checked"""
+        touched_ids = set()
+        counted = changes
+        if any(table.reset and table.kind == 'nodes' for table in changes):
+            # A nodes header changed: count every id again
+            touched_ids = set(self.id_counts)
+            self.id_counts = Counter(table.value(row, 'id') for table in tables
+                                     if table.kind == 'nodes' for row in table.rows)
+            touched_ids |= set(self.id_counts)
+            counted = {}
+        for table, (gained, lost) in counted.items():
+            if table.kind != 'nodes':
+                continue
+            for row, count in lost.items():
+                node = table.value(row, 'id')
+                self.id_counts[node] -= count
+                touched_ids.add(node)
+            for row, count in gained.items():
+                node = table.value(row, 'id')
+                self.id_counts[node] += count
+                touched_ids.add(node)
+        for node in touched_ids:
+            if self.id_counts[node] <= 0:
+                self.id_counts.pop(node, None)
+
+        checked = 0
+        for table in tables:
+            pending = set(changes.get(table, ((), ()))[0])
+            if touched_ids:
+                # Rows naming a node whose existence or uniqueness changed
+                for node in touched_ids:
+                    pending |= table.refs.get(node, set())
+            for row in pending:
+                if row in table.counts:
+                    table.issues[row] = self.check_row(table, row)
+                    checked += 1
+        return checked
+
+class Document:
+    """A .tex document and the files it depends on"""
+
+    def __init__(self, path, engine=None):
+        self.path = path
+        self.engine = engine
+        self.sources = set()
+        self.tables = set()
+        self.fragments = {}
+        self.scan()
+
+    def scan(self):
+        """Find the .tex, data and fragment files the document reads"""
+        self.sources, self.tables, self.fragments = {self.path}, set(), {}
+        text = self.path.read_text(encoding='utf-8', errors='replace')
+        match = ENGINE_RE.search(text)
+        self.compiler = self.engine or (match.group(1) if match else DEFAULT_ENGINE)
+        pending, seen = [self.path], set()
+        while pending:
+            path = pending.pop()
+            if path in seen or not path.exists():
+                continue
+            seen.add(path)
+            text = strip_comments(path.read_text(encoding='utf-8', errors='replace'))
+            for command, arguments in DEPENDENCY_RE.findall(text):
+                for name in ARGUMENT_RE.findall(arguments):
+                    name = name.strip()
+                    if not name or '#' in name or '\\' in name:
+                        continue
+                    # TeX resolves names against the directory it runs in
+                    candidate = (self.path.parent / name).resolve()
+                    if command in FRAGMENT_LOADERS:
+                        self.fragments[candidate] = FRAGMENT_LOADERS[command]
+                    elif candidate.suffix.lower() == '.csv':
+                        self.tables.add(candidate)
+                    elif candidate.suffix == '' and candidate.with_suffix('.tex').exists():
+                        candidate = candidate.with_suffix('.tex')
+                    if candidate.exists():
+                        self.sources.add(candidate)
+                        if candidate.suffix == '.tex' and candidate not in self.fragments:
+                            pending.append(candidate)
+
+class Watcher:
+    """Keeps documents, tables and fragments up to date as files change"""
+
+    def __init__(self, documents, engine=None, interval=DEFAULT_INTERVAL, debounce=DEFAULT_DEBOUNCE):
+        self.engine = engine
+        self.interval = interval
+        self.debounce = debounce
+        self.documents = [Document(path, engine) for path in documents]
+        self.tables = {}
+        self.validator = IncrementalValidator()
+        self.mtimes = {}
+        self.running = {}
+        self.missing_engines = set()
+        self.refresh_tables()
+
+    def refresh_tables(self):
+        """Track every CSV file a document reads"""
+        for document in self.documents:
+            for path in document.tables:
+                if path not in self.tables and path.exists():
+                    self.tables[path] = HotTable(path)
+
+    def watched(self):
+        """Every file whose change triggers work"""
+        files = set(self.tables)
+        for document in self.documents:
+            # Tables too, so a deleted or recreated table is noticed
+            files |= document.sources | document.tables
+        return files
+
+    def stamp(self, path):
+        """Modification stamp of a file, None when it is missing"""
+        try:
+            info = os.stat(path)
+        except OSError:
+            return None
+        return info.st_mtime_ns, info.st_size
+
+    def poll(self):
+        """Files changed since the last poll"""
+        changed = set()
+        for path in self.watched():
+            stamp = self.stamp(path)
+            if self.mtimes.get(path) != stamp:
+                self.mtimes[path] = stamp
+                changed.add(path)
+        return changed
+
+    def tables_by_kind(self, document):
+        """{kind: table} for the first table of each kind a document reads"""
+        tables = {}
+        for path in sorted(document.tables):
+            table = self.tables.get(path)
+            if table and table.kind and table.kind not in tables:
+                tables[table.kind] = table
+        return tables
+
+    def regenerate(self, path, generator, tables):
+        """Write one fragment from in-memory tables"""
+        if generator == 'stats':
+            stats = NetworkStats()
+            stats.nodes = tables['nodes'].dicts() if 'nodes' in tables else []
+            stats.connections = tables['connections'].dicts() if 'connections' in tables else []
+            stats.threats = tables['threats'].dicts() if 'threats' in tables else []
+            stats.severities = array('d', (parse_severity(t.get('severity')) for t in stats.threats))
+            stats.write_dashboard_tex(path)
+        else:
+            scorer = ThreatScorer()
+            scorer.load_nodes_csv(tables['nodes'].path)
+            scorer.load_connections_csv(tables['connections'].path)
+            scorer.load_threats_csv(tables['threats'].path)
+            scorer.write_tex(path, *scorer.score(), 'degree')
+        self.mtimes[path] = self.stamp(path)
+
+    def rebuild(self, changed):
+        """Validate, regenerate and recompile what the changed files affect"""
+        start = time.perf_counter()
+        for document in self.documents:
+            if document.path in changed:
+                document.scan()
+        self.refresh_tables()
+        for path in self.watched() - set(self.mtimes):
+            # Files a rescanned document has just started to read
+            self.mtimes[path] = self.stamp(path)
+            changed.add(path)
+
+        # Re-read changed tables and revalidate their changed rows
+        changes = {}
+        for path in sorted(changed & set(self.tables)):
+            table = self.tables[path]
+            if self.stamp(path) is None:
+                # Deleted: drop the table and its rows; refresh_tables picks
+                # it up again if it comes back
+                del self.tables[path]
+                changes[table] = (Counter(), table.counts)
+                continue
+            changes[table] = table.reload()
+        checked = self.validator.update(list(self.tables.values()), changes)
+        for table, (gained, lost) in changes.items():
+            print(f"{CYAN}  {table.path.name}: {sum(gained.values())} rows added or edited, "
+                  f"{sum(lost.values())} removed{NC}")
+        if changes:
+            warnings = sum(len(w) for table in self.tables.values() for _, w in table.issues.values())
+            print(f"{CYAN}  {checked} rows revalidated, {warnings} warnings{NC}")
+        blocked = set()
+        for table in self.tables.values():
+            errors = table.errors()
+            if errors:
+                blocked.add(table.path)
+                print(f"{RED}  ✗ {table.path.name}: {len(errors)} errors{NC}")
+                for line, message in errors[:10]:
+                    print(f"{RED}    Line {line}: {message}{NC}")
+        changed_tables = {table.path for table in changes}
+
+        # Regenerate fragments built from changed tables, then recompile
+        for document in self.documents:
+            if document.tables & blocked:
+                if changed & (document.sources | document.tables):
+                    print(f"{YELLOW}  ⚠ {document.path.name}: held back until its data validates{NC}")
+                continue
+            tables = self.tables_by_kind(document)
+            affected = bool(changed & (document.sources | document.tables))
+            for path, generator in document.fragments.items():
+                if generator == 'risk' and len(tables) < 3:
+                    continue
+                if changed_tables & {t.path for t in tables.values()} or not path.exists():
+                    self.regenerate(path, generator, tables)
+                    print(f"{GREEN}  ✓ Regenerated {path.name}{NC}")
+                    affected = True
+            if affected:
+                self.compile(document)
+        print(f"{BLUE}  Rebuild scheduled in {time.perf_counter() - start:.2f}s{NC}")
+
+    def compile(self, document):
+        """Start compiling a document, cancelling an older compile of it"""
+        previous = self.running.pop(document.path, None)
+        if previous:
+            previous[0].terminate()
+            previous[0].wait()
+        if shutil.which(document.compiler) is None:
+            if document.compiler not in self.missing_engines:
+                self.missing_engines.add(document.compiler)
+                print(f"{YELLOW}  ⚠ {document.compiler} not found; documents are not compiled{NC}")
+            return
+        process = subprocess.Popen(
+            [document.compiler, '-interaction=nonstopmode', '-halt-on-error', document.path.name],
+            cwd=str(document.path.parent), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        self.running[document.path] = (process, time.perf_counter())
+        print(f"{BLUE}  Compiling {document.path.name} ({document.compiler}){NC}")
+
+    def reap(self):
+        """Report compiles that have finished"""
+        for path, (process, started) in list(self.running.items()):
+            if process.poll() is None:
+                continue
+            del self.running[path]
+            seconds = time.perf_counter() - started
+            if process.returncode == 0:
+                print(f"{GREEN}✓ {path.with_suffix('.pdf').name} updated in {seconds:.2f}s{NC}")
+            else:
+                print(f"{RED}✗ {path.name} failed; see {path.with_suffix('.log').name}{NC}")
+
+    def run(self, once=False):
+        """Build everything once, then rebuild on every change"""
+        self.rebuild(self.poll())
+        if once:
+            while self.running:
+                self.reap()
+                time.sleep(self.interval)
+            return
+        print(f"\n{BLUE}Watching {len(self.watched())} files (Ctrl-C to stop){NC}")
+        while True:
+            changed = self.poll()
+            if changed:
+                # Debounce: wait until edits have been quiet for a moment
+                quiet = time.perf_counter()
+                while time.perf_counter() - quiet < self.debounce:
+                    time.sleep(self.interval)
+                    more = self.poll()
+                    if more:
+                        changed |= more
+                        quiet = time.perf_counter()
+                print(f"\n{BLUE}Changed: {', '.join(sorted(p.name for p in changed))}{NC}")
+                self.rebuild(changed)
+            self.reap()
+            time.sleep(self.interval)
+
+def main():
+    """Main watch function"""
+    args = sys.argv[1:]
+    if '--help' in args or '-h' in args:
+        print("Usage: python3 watch_network.py [documents.tex...] [options]")
+        print("")
+        print("Options:")
+        print("  --engine ENGINE   TeX engine for every document (default: from the")
+        print(f"                    document's '% Compile with:' comment, else {DEFAULT_ENGINE})")
+        print(f"  --interval S      Seconds between polls (default: {DEFAULT_INTERVAL})")
+        print(f"  --debounce S      Quiet seconds before rebuilding (default: {DEFAULT_DEBOUNCE})")
+        print("  --once            Build once and exit")
+        print("")
+        print("Without documents, every .tex file with \\documentclass in the current")
+        print("directory is watched.")
+        sys.exit(1)
+
+    options = {'--engine': None, '--interval': str(DEFAULT_INTERVAL), '--debounce': str(DEFAULT_DEBOUNCE)}
+    once = '--once' in args
+    if once:
+        args.remove('--once')
+    for flag in options:
+        if flag in args:
+            index = args.index(flag)
+            if index + 1 >= len(args):
+                print(f"{RED}Error: {flag} requires a value{NC}")
+                sys.exit(1)
+            options[flag] = args[index + 1]
+            del args[index:index + 2]
+
+    documents = [Path(a).resolve() for a in args]
+    if not documents:
+        documents = [p.resolve() for p in sorted(Path('.').glob('*.tex'))
+                     if '\\documentclass' in p.read_text(encoding='utf-8', errors='replace')]
+    for path in documents:
+        if not path.exists():
+            print(f"{RED}✗ File not found: {path}{NC}")
+            sys.exit(1)
+    if not documents:
+        print(f"{RED}Error: no documents to watch{NC}")
+        sys.exit(1)
+
+    print(f"{BLUE}{'='*60}{NC}")
+    print(f"{BLUE}Network Diagram Watcher{NC}")
+    print(f"{BLUE}{'='*60}{NC}\n")
+
+    try:
+        interval, debounce = float(options['--interval']), float(options['--debounce'])
+    except ValueError:
+        print(f"{RED}Error: --interval and --debounce take a number of seconds{NC}")
+        sys.exit(1)
+    if not interval > 0 or not debounce >= 0:
+        print(f"{RED}Error: --interval must be above 0 and --debounce at least 0{NC}")
+        sys.exit(1)
+    watcher = Watcher(documents, options['--engine'], interval, debounce)
+    for document in watcher.documents:
+        print(f"{GREEN}✓ {document.path.name}: {len(document.sources)} sources, "
+              f"{len(document.tables)} data files, {len(document.fragments)} generated fragments{NC}")
+    try:
+        watcher.run(once)
+    except KeyboardInterrupt:
+        for process, _ in watcher.running.values():
+            process.terminate()
+        print(f"\n{GREEN}✓ Stopped{NC}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+"""
+module_loader.py - Load only the modules a diagram actually uses
+
+This script indexes every command defined by the .tex modules, works out
+which modules depend on which, and scans a document (plus the files it
+\\input's) for the commands it uses. The result is written to
+<document>.modules.tex, which network_diagram_generator.tex reads to
+\\input only the required optional modules instead of all of them.
+
+It can also dump the always-needed core (styles_config and
+node_definitions) into a format file, and benchmark time to first page
+for full, lazy and format-based loading.
+
+Usage:
+    python3 module_loader.py scan network_diagram_generator.tex
+    python3 module_loader.py bench network_diagram_generator.tex --runs 5
+    python3 module_loader.py format
+"""
+
+import sys
+import re
+import time
+import shutil
+import statistics
+import subprocess
+import tempfile
+from pathlib import Path
+
+from compile_styles import build_format
+
+# ANSI color codes
+GREEN = '\033[0;32m'
+YELLOW = '\033[1;33m'
+BLUE = '\033[0;34m'
+RED = '\033[0;31m'
+NC = '\033[0m'
+
+ROOT = Path(__file__).resolve().parent
+
+# Modules in load order; styles_config is always loaded first
+MODULES = ['styles_config', 'node_definitions', 'network_layout',
+           'connection_renderer', 'threat_indicators', 'data_import',
+           'topology_templates']
+CORE_MODULES = ['styles_config', 'node_definitions']
+CORE_FORMAT_NAME = 'network_core'
+
+# Public commands only: \def and \renewcommand are used for scratch macros
+DEFINITION_RE = re.compile(
+    r'\\(?:newcommand\*?|providecommand\*?|(?:New|Declare|Provide)DocumentCommand)'
+    r'\s*\{?\s*\\([A-Za-z@]+)')
+COMMAND_RE = re.compile(r'\\([A-Za-z]+)')
+INPUT_RE = re.compile(r'\\(?:input|include|generateNetworkDiagram)\s*\{([^}]+)\}')
+
+def strip_comments(text):
+    """Remove TeX comments (unescaped % to end of line)"""
+    return re.sub(r'(?<!\\)%.*', '', text)
+
+class ModuleIndex:
+    """Which module defines which command, and module dependencies"""
+
+    def __init__(self, root=ROOT):
+        self.root = root
+        self.defined_in = {}
+        self.depends = {}
+        self.modules = [m for m in MODULES if (root / f'{m}.tex').exists()]
+        texts = {}
+        for module in self.modules:
+            text = strip_comments((root / f'{module}.tex').read_text(encoding='utf-8'))
+            texts[module] = text
+            for match in DEFINITION_RE.finditer(text):
+                self.defined_in.setdefault(match.group(1), module)
+        for module, text in texts.items():
+            self.depends[module] = self.modules_for(COMMAND_RE.findall(text)) - {module}
+
+    def modules_for(self, commands):
+        """Modules that define any of the given command names"""
+        return {self.defined_in[c] for c in commands if c in self.defined_in}
+
+    def closure(self, modules):
+        """Modules plus everything they depend on, in load order"""
+        needed = set(modules) | {'styles_config'}
+        pending = list(needed)
+        while pending:
+            for dep in self.depends.get(pending.pop(), ()):
+                if dep not in needed:
+                    needed.add(dep)
+                    pending.append(dep)
+        return [m for m in self.modules if m in needed]
+
+    def scan_document(self, doc_path):
+        """Return (modules, files scanned) needed by a document"""
+        commands = set()
+        scanned = []
+        pending = [doc_path]
+        seen = set()
+        while pending:
+            path = pending.pop()
+            if path in seen or not path.exists():
+                continue
+            seen.add(path)
+            scanned.append(path)
+            text = strip_comments(path.read_text(encoding='utf-8', errors='replace'))
+            commands.update(COMMAND_RE.findall(text))
+            for name in INPUT_RE.findall(text):
+                name = name.strip()
+                if '#' in name or Path(name).stem in MODULES:
+                    continue
+                candidate = path.parent / name
+                if candidate.suffix != '.tex':
+                    candidate = candidate.with_name(candidate.name + '.tex')
+                pending.append(candidate)
+        return self.closure(self.modules_for(commands)), scanned
+
+def modules_file(doc_path):
+    """Path of the module list read by the document"""
+    return doc_path.with_name(doc_path.stem + '.modules.tex')
+
+def write_modules_file(doc_path, modules):
+    """Write \\networkModules (optional modules only) for the document"""
+    target = modules_file(doc_path)
+    optional = [m for m in modules if m not in CORE_MODULES]
+    target.write_text(
+        '% Generated by module_loader.py - do not edit by hand\n'
+        '% Core modules (styles_config, node_definitions) are always loaded\n'
+        f'\\def\\networkModules{{{",".join(optional)}}}\n', encoding='utf-8')
+    return target
+
+def time_compile(doc_path, engine, runs, fmt=None):
+    """Median wall-clock seconds to compile the document"""
+    samples = []
+    with tempfile.TemporaryDirectory() as outdir:
+        command = [engine, '-interaction=batchmode', f'-output-directory={outdir}']
+        if fmt:
+            command.append(f'-fmt={fmt}')
+        command.append(doc_path.name)
+        for _ in range(runs):
+            start = time.perf_counter()
+            result = subprocess.run(command, cwd=str(doc_path.parent),
+                                    stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            samples.append(time.perf_counter() - start)
+            if result.returncode != 0:
+                return None
+    return statistics.median(samples)
+
+def cmd_scan(doc_path):
+    """Scan a document and write its module list"""
+    index = ModuleIndex()
+    modules, scanned = index.scan_document(doc_path)
+    target = write_modules_file(doc_path, modules)
+
+    total = sum((ROOT / f'{m}.tex').stat().st_size for m in index.modules)
+    needed = sum((ROOT / f'{m}.tex').stat().st_size for m in modules)
+    print(f"{GREEN}✓ Scanned {len(scanned)} file(s){NC}")
+    print(f"{BLUE}  Modules needed: {', '.join(modules)}{NC}")
+    skipped = [m for m in index.modules if m not in modules]
+    if skipped:
+        print(f"{BLUE}  Modules skipped: {', '.join(skipped)}{NC}")
+    print(f"{BLUE}  Source loaded: {needed // 1024} KB of {total // 1024} KB{NC}")
+    print(f"{GREEN}✓ Module list written to: {target.name}{NC}")
+
+def cmd_bench(doc_path, engine, runs):
+    """Compare time to first page for full, lazy and format loading"""
+    if shutil.which(engine) is None:
+        print(f"{RED}✗ {engine} not found; cannot run the benchmark{NC}")
+        sys.exit(1)
+
+    target = modules_file(doc_path)
+    backup = target.read_text(encoding='utf-8') if target.exists() else None
+    results = []
+    try:
+        if target.exists():
+            target.unlink()
+        results.append(('full (all modules)', time_compile(doc_path, engine, runs)))
+
+        modules, _ = ModuleIndex().scan_document(doc_path)
+        write_modules_file(doc_path, modules)
+        results.append(('lazy (' + ','.join(modules) + ')',
+                        time_compile(doc_path, engine, runs)))
+
+        if (ROOT / f'{CORE_FORMAT_NAME}.fmt').exists():
+            results.append(('lazy + core format',
+                            time_compile(doc_path, engine, runs,
+                                         fmt=str(ROOT / CORE_FORMAT_NAME))))
+    finally:
+        if backup is None:
+            if target.exists():
+                target.unlink()
+        else:
+            target.write_text(backup, encoding='utf-8')
+
+    baseline = results[0][1]
+    print(f"{GREEN}Time to first page ({engine}, median of {runs}):{NC}")
+    for label, seconds in results:
+        if seconds is None:
+            print(f"  {label:50} {RED}compile failed{NC}")
+        elif baseline:
+            print(f"  {label:50} {seconds:6.2f}s  ({seconds / baseline * 100:5.1f}%)")
+        else:
+            print(f"  {label:50} {seconds:6.2f}s")
+
+def main():
+    """Main module loader function"""
+    if len(sys.argv) < 2 or sys.argv[1] not in ('scan', 'bench', 'format'):
+        print("Usage: python3 module_loader.py <scan|bench|format> [document.tex] [options]")
+        print("")
+        print("Commands:")
+        print("  scan DOC     Write DOC.modules.tex listing the modules DOC needs")
+        print("  bench DOC    Compare time to first page: full vs lazy vs format")
+        print("  format       Dump styles_config + node_definitions to network_core.fmt")
+        print("")
+        print("Options:")
+        print("  --engine ENGINE    TeX engine (default: pdflatex)")
+        print("  --runs N           Compilations per benchmark case (default: 3)")
+        sys.exit(1)
+
+    args = sys.argv[1:]
+    options = {'--engine': 'pdflatex', '--runs': '3'}
+    for flag in options:
+        if flag in args:
+            index = args.index(flag)
+            if index + 1 >= len(args):
+                print(f"{RED}Error: {flag} requires a value{NC}")
+                sys.exit(1)
+            options[flag] = args[index + 1]
+            del args[index:index + 2]
+
+    print(f"{BLUE}{'='*60}{NC}")
+    print(f"{BLUE}Module Loader{NC}")
+    print(f"{BLUE}{'='*60}{NC}\n")
+
+    command = args[0]
+    if command == 'format':
+        if not build_format(options['--engine'], CORE_MODULES, CORE_FORMAT_NAME):
+            sys.exit(1)
+        return
+
+    if len(args) < 2:
+        print(f"{RED}Error: {command} requires a document{NC}")
+        sys.exit(1)
+    doc_path = Path(args[1]).resolve()
+    if not doc_path.exists():
+        print(f"{RED}✗ File not found: {args[1]}{NC}")
+        sys.exit(1)
+
+    if command == 'scan':
+        cmd_scan(doc_path)
+    else:
+        cmd_bench(doc_path, options['--engine'], int(options['--runs']))
+    print("")
+
+if __name__ == '__main__':
+    main()
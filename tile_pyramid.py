@@ -0,0 +1,539 @@
+#!/usr/bin/env python3
+"""
+tile_pyramid.py - Export a rendered diagram as a deep-zoom tile pyramid
+
+Rasterizing a large diagram to one 300 DPI PNG (./compile.sh png) gives a
+file that is either unreadable when scaled down or too big for a browser
+to open. This script cuts the PDF into a Deep Zoom (DZI) pyramid instead:
+every level halves the resolution of the one above it, down to a single
+pixel, and every level is split into 256x256 PNG tiles. A static viewer,
+NAME.html, pans and zooms the pyramid offline, loading only the tiles on
+screen.
+
+Tiles are rasterized with pdftoppm (poppler), one band of tiles per call,
+on a thread pool. On later runs a low-resolution probe render of the page
+is compared with the previous one, block by block, and only the tiles
+whose region changed are rasterized again, at every level. Changes smaller
+than one probe pixel can go unnoticed; raise --probe or use --force after
+a small edit if in doubt.
+
+Usage:
+    python3 tile_pyramid.py network_diagram_generator.pdf
+    python3 tile_pyramid.py network_diagram_generator.pdf --dpi 600 --jobs 8
+    python3 tile_pyramid.py diagram.pdf --output-dir tiles --force
+"""
+
+import sys
+import os
+import re
+import json
+import math
+import time
+import shutil
+import hashlib
+import struct
+import subprocess
+import tempfile
+import zlib
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+
+# ANSI color codes
+GREEN = '\033[0;32m'
+YELLOW = '\033[1;33m'
+BLUE = '\033[0;34m'
+CYAN = '\033[0;36m'
+RED = '\033[0;31m'
+NC = '\033[0m'
+
+DEFAULT_DPI = 300
+TILE_SIZE = 256
+
+# Probe pixels along one side of a full-resolution tile
+DEFAULT_PROBE = 16
+
+# Widest band of tiles rasterized by one pdftoppm call
+BAND_TILES = 64
+
+MANIFEST_NAME = 'pyramid.json'
+MANIFEST_VERSION = 1
+
+PAGE_SIZE_PATTERN = re.compile(r'Page\s+\d*\s*size:\s*([\d.]+)\s*x\s*([\d.]+)\s*pts')
+
+def page_size(pdf, page):
+    """Page size in points, from pdfinfo"""
+    result = subprocess.run(['pdfinfo', '-f', str(page), '-l', str(page), str(pdf)],
+                            capture_output=True, text=True)
+    match = PAGE_SIZE_PATTERN.search(result.stdout)
+    if result.returncode != 0 or not match:
+        raise RuntimeError(f"pdfinfo could not read page {page} of {pdf}: {result.stderr.strip()}")
+    return float(match.group(1)), float(match.group(2))
+
+def rasterize(pdf, page, dpi, crop, workdir):
+    """Render part of a page to raw RGB; returns (width, height, bytes)
+
+    crop is (x, y, width, height) in pixels at the given resolution, or
+    None for the whole page.
+    """
+    fd, root = tempfile.mkstemp(dir=workdir)
+    os.close(fd)
+    command = ['pdftoppm', '-f', str(page), '-l', str(page), '-r', repr(dpi), '-singlefile']
+    if crop:
+        x, y, width, height = crop
+        command += ['-x', str(x), '-y', str(y), '-W', str(width), '-H', str(height)]
+    command += [str(pdf), root]
+    try:
+        result = subprocess.run(command, capture_output=True, text=True)
+        if result.returncode != 0:
+            raise RuntimeError(f"pdftoppm failed: {result.stderr.strip()}")
+        return read_ppm(root + '.ppm')
+    finally:
+        for path in (root, root + '.ppm'):
+            if os.path.exists(path):
+                os.unlink(path)
+
+def read_ppm(path):
+    """(width, height, RGB bytes) of a binary P6 file"""
+    with open(path, 'rb') as f:
+        data = f.read()
+    fields = []
+    pos = 0
+    while len(fields) < 4:
+        while data[pos:pos + 1].isspace():
+            pos += 1
+        if data[pos:pos + 1] == b'#':
+            pos = data.index(b'\n', pos)
+            continue
+        end = pos
+        while not data[end:end + 1].isspace():
+            end += 1
+        fields.append(data[pos:end])
+        pos = end
+    if fields[0] != b'P6' or fields[3] != b'255':
+        raise RuntimeError(f"{path}: not an 8-bit binary PPM")
+    width, height = int(fields[1]), int(fields[2])
+    return width, height, data[pos + 1:pos + 1 + width * height * 3]
+
+def png_bytes(width, height, rows):
+    """8-bit RGB PNG from a list of row byte strings"""
+    def chunk(kind, body):
+        return (struct.pack('>I', len(body)) + kind + body
+                + struct.pack('>I', zlib.crc32(kind + body) & 0xffffffff))
+    raw = b''.join(b'\x00' + row for row in rows)
+    return (b'\x89PNG\r\n\x1a\n'
+            + chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0))
+            + chunk(b'IDAT', zlib.compress(raw, 6))
+            + chunk(b'IEND', b''))
+
+def crop_rows(image, x, y, width, height):
+    """Rows of a (width, height, bytes) image region, clipped to the image"""
+    image_width, image_height, data = image
+    stride = image_width * 3
+    right = min(x + width, image_width) * 3
+    return [data[row * stride + x * 3:row * stride + right]
+            for row in range(y, min(y + height, image_height))]
+
+class Pyramid:
+    """Geometry of a DZI pyramid for one PDF page"""
+
+    def __init__(self, page_points, dpi=DEFAULT_DPI, tile_size=TILE_SIZE):
+        self.points = page_points
+        self.dpi = dpi
+        self.tile_size = tile_size
+        # pdftoppm rounds the page size in pixels up
+        self.width = math.ceil(page_points[0] * dpi / 72)
+        self.height = math.ceil(page_points[1] * dpi / 72)
+        self.max_level = math.ceil(math.log2(max(self.width, self.height, 1)))
+
+    def level_dpi(self, level):
+        return self.dpi / 2 ** (self.max_level - level)
+
+    def level_size(self, level):
+        factor = 2 ** (self.max_level - level)
+        return math.ceil(self.width / factor), math.ceil(self.height / factor)
+
+    def level_tiles(self, level):
+        """(columns, rows) of tiles on a level"""
+        width, height = self.level_size(level)
+        return math.ceil(width / self.tile_size), math.ceil(height / self.tile_size)
+
+    def tiles(self):
+        """Every (level, column, row) in the pyramid"""
+        for level in range(self.max_level + 1):
+            columns, rows = self.level_tiles(level)
+            for row in range(rows):
+                for column in range(columns):
+                    yield level, column, row
+
+    def covers(self, level, column, row):
+        """Range of full-resolution tiles under a tile: (c0, c1, r0, r1), ends exclusive"""
+        factor = 2 ** (self.max_level - level)
+        columns, rows = self.level_tiles(self.max_level)
+        return (column * factor, min((column + 1) * factor, columns),
+                row * factor, min((row + 1) * factor, rows))
+
+    def dzi(self):
+        return ('<?xml version="1.0" encoding="UTF-8"?>\n'
+                '<Image xmlns="http://schemas.microsoft.com/deepzoom/2008" '
+                f'TileSize="{self.tile_size}" Overlap="0" Format="png">\n'
+                f'  <Size Width="{self.width}" Height="{self.height}"/>\n'
+                '</Image>\n')
+
+def probe_hashes(pyramid, pdf, page, probe, workdir):
+    """Digest of each full-resolution tile's block of a low-resolution render
+
+    The probe is rendered at probe/tile_size of the full resolution, so
+    each full-resolution tile is a probe x probe block of it.
+    """
+    image = rasterize(pdf, page, pyramid.dpi * probe / pyramid.tile_size, None, workdir)
+    columns, rows = pyramid.level_tiles(pyramid.max_level)
+    hashes = {}
+    for row in range(rows):
+        for column in range(columns):
+            block = crop_rows(image, column * probe, row * probe, probe, probe)
+            hashes[f'{column}_{row}'] = hashlib.md5(b''.join(block)).hexdigest()
+    return hashes
+
+def changed_tiles(pyramid, tile_dir, hashes, previous):
+    """Tiles to rasterize: under a changed probe block, or missing on disk"""
+    changed = {key for key, digest in hashes.items() if previous.get(key) != digest}
+    existing = {}
+    todo = []
+    for level, column, row in pyramid.tiles():
+        if level not in existing:
+            level_dir = tile_dir / str(level)
+            existing[level] = set(os.listdir(level_dir)) if level_dir.is_dir() else set()
+        if f'{column}_{row}.png' not in existing[level]:
+            todo.append((level, column, row))
+            continue
+        c0, c1, r0, r1 = pyramid.covers(level, column, row)
+        if any(f'{c}_{r}' in changed for r in range(r0, r1) for c in range(c0, c1)):
+            todo.append((level, column, row))
+    return todo
+
+def bands(tiles):
+    """Group tiles into horizontal runs on one row, at most BAND_TILES wide"""
+    rows = {}
+    for level, column, row in tiles:
+        rows.setdefault((level, row), []).append(column)
+    for (level, row), columns in sorted(rows.items()):
+        columns.sort()
+        start = 0
+        while start < len(columns):
+            end = start
+            while (end + 1 < len(columns) and
+                   columns[end + 1] - columns[start] < BAND_TILES):
+                end += 1
+            yield level, row, columns[start:end + 1]
+            start = end + 1
+
+def render_band(pyramid, pdf, page, tile_dir, workdir, level, row, columns):
+    """Rasterize one band and write its tiles; returns the tile count"""
+    size = pyramid.tile_size
+    width, height = pyramid.level_size(level)
+    x = columns[0] * size
+    band_width = min((columns[-1] + 1) * size, width) - x
+    band_height = min(size, height - row * size)
+    image = rasterize(pdf, page, pyramid.level_dpi(level),
+                      (x, row * size, band_width, band_height), workdir)
+    level_dir = tile_dir / str(level)
+    level_dir.mkdir(parents=True, exist_ok=True)
+    for column in columns:
+        rows = crop_rows(image, column * size - x, 0, size, size)
+        if not rows or not rows[0]:
+            continue
+        target = level_dir / f'{column}_{row}.png'
+        # Written under a temporary name so a viewer never sees half a tile
+        partial = target.with_suffix('.part')
+        partial.write_bytes(png_bytes(len(rows[0]) // 3, len(rows), rows))
+        os.replace(partial, target)
+    return len(columns)
+
+VIEWER_TEMPLATE = '''<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="utf-8">
+<title>__TITLE__</title>
+<style>
+html, body { margin: 0; height: 100%; overflow: hidden; background: #2c3e50; font: 13px sans-serif; }
+#view { position: absolute; inset: 0; cursor: grab; touch-action: none; }
+#view.dragging { cursor: grabbing; }
+#view img { position: absolute; transform-origin: 0 0; user-select: none; -webkit-user-drag: none; }
+#bar { position: absolute; top: 8px; left: 8px; display: flex; gap: 4px; }
+#bar button { width: 32px; height: 32px; border: 0; border-radius: 4px; background: #ecf0f1; font-size: 16px; cursor: pointer; }
+#info { position: absolute; bottom: 8px; left: 8px; color: #ecf0f1; opacity: 0.8; }
+</style>
+</head>
+<body>
+<div id="view"></div>
+<div id="bar"><button id="in" title="Zoom in">+</button><button id="out" title="Zoom out">&minus;</button><button id="home" title="Fit">&#8962;</button></div>
+<div id="info"></div>
+<script>
+// Generated by tile_pyramid.py - do not edit by hand
+const PYRAMID = __CONFIG__;
+const view = document.getElementById('view');
+const info = document.getElementById('info');
+const size = PYRAMID.tileSize;
+let scale = 1, left = 0, top = 0;   // screen px per full-resolution px, image offset
+let shown = new Map();
+
+function tileUrl(level, column, row) {
+  return PYRAMID.url + level + '/' + column + '_' + row + '.png?v=' + PYRAMID.version;
+}
+
+function levelSize(level) {
+  const factor = Math.pow(2, PYRAMID.maxLevel - level);
+  return [Math.ceil(PYRAMID.width / factor), Math.ceil(PYRAMID.height / factor)];
+}
+
+// Coarsest level that fits in one tile, drawn under the others while they load
+const baseLevel = Math.max(0, PYRAMID.maxLevel - Math.ceil(Math.log2(Math.max(PYRAMID.width, PYRAMID.height) / size)));
+
+function place(img, level, column, row) {
+  const factor = Math.pow(2, PYRAMID.maxLevel - level) * scale;
+  img.style.transform = 'translate(' + (left + column * size * factor) + 'px,' +
+                        (top + row * size * factor) + 'px) scale(' + factor + ')';
+}
+
+function draw() {
+  const level = Math.max(baseLevel, Math.min(PYRAMID.maxLevel,
+    PYRAMID.maxLevel + Math.ceil(Math.log2(scale * (window.devicePixelRatio || 1)))));
+  const [width, height] = levelSize(level);
+  const span = size * Math.pow(2, PYRAMID.maxLevel - level) * scale;
+  const c0 = Math.max(0, Math.floor(-left / span));
+  const c1 = Math.min(Math.ceil(width / size) - 1, Math.floor((view.clientWidth - left) / span));
+  const r0 = Math.max(0, Math.floor(-top / span));
+  const r1 = Math.min(Math.ceil(height / size) - 1, Math.floor((view.clientHeight - top) / span));
+  const wanted = new Map();
+  const bc = Math.ceil(levelSize(baseLevel)[0] / size), br = Math.ceil(levelSize(baseLevel)[1] / size);
+  for (let r = 0; r < br; r++) for (let c = 0; c < bc; c++) wanted.set(baseLevel + '/' + c + '_' + r, [baseLevel, c, r]);
+  for (let r = r0; r <= r1; r++) for (let c = c0; c <= c1; c++) wanted.set(level + '/' + c + '_' + r, [level, c, r]);
+  for (const [key, img] of shown) {
+    if (!wanted.has(key)) { img.remove(); shown.delete(key); }
+  }
+  for (const [key, [l, c, r]] of wanted) {
+    let img = shown.get(key);
+    if (!img) {
+      img = new Image();
+      img.draggable = false;
+      img.style.zIndex = l;
+      img.src = tileUrl(l, c, r);
+      view.appendChild(img);
+      shown.set(key, img);
+    }
+    place(img, l, c, r);
+  }
+  info.textContent = PYRAMID.width + ' x ' + PYRAMID.height + ' px, level ' + level + '/' +
+                     PYRAMID.maxLevel + ', ' + Math.round(scale * 100) + '%';
+}
+
+function zoom(factor, x, y) {
+  const next = Math.min(4, Math.max(fitScale() / 2, scale * factor));
+  left = x - (x - left) * next / scale;
+  top = y - (y - top) * next / scale;
+  scale = next;
+  draw();
+}
+
+function fitScale() {
+  return Math.min(view.clientWidth / PYRAMID.width, view.clientHeight / PYRAMID.height);
+}
+
+function home() {
+  scale = fitScale();
+  left = (view.clientWidth - PYRAMID.width * scale) / 2;
+  top = (view.clientHeight - PYRAMID.height * scale) / 2;
+  draw();
+}
+
+let drag = null;
+view.addEventListener('pointerdown', e => {
+  drag = [e.clientX, e.clientY];
+  view.setPointerCapture(e.pointerId);
+  view.classList.add('dragging');
+});
+view.addEventListener('pointermove', e => {
+  if (!drag) return;
+  left += e.clientX - drag[0];
+  top += e.clientY - drag[1];
+  drag = [e.clientX, e.clientY];
+  draw();
+});
+view.addEventListener('pointerup', () => { drag = null; view.classList.remove('dragging'); });
+view.addEventListener('wheel', e => {
+  e.preventDefault();
+  zoom(Math.pow(2, -e.deltaY / 300), e.clientX, e.clientY);
+}, { passive: false });
+view.addEventListener('dblclick', e => zoom(2, e.clientX, e.clientY));
+document.getElementById('in').onclick = () => zoom(2, view.clientWidth / 2, view.clientHeight / 2);
+document.getElementById('out').onclick = () => zoom(0.5, view.clientWidth / 2, view.clientHeight / 2);
+document.getElementById('home').onclick = home;
+window.addEventListener('keydown', e => {
+  const step = 100;
+  if (e.key === '+' || e.key === '=') zoom(2, view.clientWidth / 2, view.clientHeight / 2);
+  else if (e.key === '-') zoom(0.5, view.clientWidth / 2, view.clientHeight / 2);
+  else if (e.key === '0') home();
+  else if (e.key.startsWith('Arrow')) {
+    left += { ArrowLeft: step, ArrowRight: -step }[e.key] || 0;
+    top += { ArrowUp: step, ArrowDown: -step }[e.key] || 0;
+    draw();
+  }
+});
+window.addEventListener('resize', draw);
+home();
+</script>
+</body>
+</html>
+'''
+
+def viewer_html(pyramid, name, version):
+    """Self-contained viewer; the settings are inlined so it works from file://"""
+    config = {
+        'url': f'{name}_files/', 'tileSize': pyramid.tile_size,
+        'width': pyramid.width, 'height': pyramid.height,
+        'maxLevel': pyramid.max_level, 'version': version,
+    }
+    return (VIEWER_TEMPLATE.replace('__TITLE__', name)
+            .replace('__CONFIG__', json.dumps(config)))
+
+def build(pdf, output_dir, page=1, dpi=DEFAULT_DPI, probe=DEFAULT_PROBE, jobs=None, force=False):
+    """Create or update the pyramid; returns a summary dict"""
+    name = pdf.stem
+    tile_dir = output_dir / f'{name}_files'
+    manifest_path = tile_dir / MANIFEST_NAME
+    pyramid = Pyramid(page_size(pdf, page), dpi)
+    settings = {'version': MANIFEST_VERSION, 'page': page, 'dpi': dpi, 'probe': probe,
+                'tile_size': pyramid.tile_size, 'size': [pyramid.width, pyramid.height]}
+
+    previous = {}
+    if manifest_path.exists() and not force:
+        try:
+            manifest = json.loads(manifest_path.read_text(encoding='utf-8'))
+        except (OSError, ValueError):
+            manifest = {}
+        if manifest.get('settings') == settings:
+            previous = manifest
+    if not previous and tile_dir.exists():
+        # New geometry: tiles of the old pyramid would be wrong
+        shutil.rmtree(tile_dir)
+    tile_dir.mkdir(parents=True, exist_ok=True)
+
+    with tempfile.TemporaryDirectory(prefix='tiles-') as workdir:
+        start = time.perf_counter()
+        hashes = probe_hashes(pyramid, pdf, page, probe, workdir)
+        probe_seconds = time.perf_counter() - start
+        todo = changed_tiles(pyramid, tile_dir, hashes, previous.get('hashes', {}))
+
+        rendered = 0
+        failed = []
+        with ThreadPoolExecutor(max_workers=jobs or os.cpu_count() or 1) as pool:
+            futures = {pool.submit(render_band, pyramid, pdf, page, tile_dir, workdir, *band): band
+                       for band in bands(todo)}
+            for done, future in enumerate(as_completed(futures), 1):
+                try:
+                    rendered += future.result()
+                except RuntimeError as e:
+                    failed.append((futures[future], str(e)))
+                print(f"\r{CYAN}  Bands: {done}/{len(futures)}, tiles: {rendered}/{len(todo)}{NC}",
+                      end='', flush=True)
+        if futures:
+            print()
+
+    # Tiles of failed bands are removed so the next run retries them
+    for (level, row, columns), _ in failed:
+        for column in columns:
+            tile = tile_dir / str(level) / f'{column}_{row}.png'
+            if tile.exists():
+                tile.unlink()
+    version = previous.get('revision', 0) + (1 if todo else 0)
+    manifest_path.write_text(json.dumps({'settings': settings, 'revision': version,
+                                         'hashes': hashes}), encoding='utf-8')
+    (output_dir / f'{name}.dzi').write_text(pyramid.dzi(), encoding='utf-8')
+    (output_dir / f'{name}.html').write_text(viewer_html(pyramid, name, version), encoding='utf-8')
+    return {
+        'pyramid': pyramid, 'total': sum(1 for _ in pyramid.tiles()), 'rendered': rendered,
+        'failed': failed, 'probe_seconds': probe_seconds, 'incremental': bool(previous),
+        'viewer': output_dir / f'{name}.html',
+    }
+
+def main():
+    """Main tile export function"""
+    args = sys.argv[1:]
+    if not args or '--help' in args or '-h' in args:
+        print("Usage: python3 tile_pyramid.py diagram.pdf [options]")
+        print("")
+        print("Options:")
+        print("  --output-dir DIR   Where NAME.dzi, NAME_files/ and NAME.html go (default: next to the PDF)")
+        print(f"  --dpi DPI          Resolution of the deepest level (default: {DEFAULT_DPI})")
+        print("  --page N           PDF page to export (default: 1)")
+        print("  --jobs N           Parallel pdftoppm processes (default: CPU count)")
+        print(f"  --probe PX         Probe pixels per tile side for change detection (default: {DEFAULT_PROBE})")
+        print("  --force            Rasterize every tile again")
+        sys.exit(1)
+
+    options = {'--output-dir': None, '--dpi': str(DEFAULT_DPI), '--page': '1',
+               '--jobs': '0', '--probe': str(DEFAULT_PROBE)}
+    for flag in options:
+        if flag in args:
+            index = args.index(flag)
+            if index + 1 >= len(args):
+                print(f"{RED}Error: {flag} requires a value{NC}")
+                sys.exit(1)
+            options[flag] = args[index + 1]
+            del args[index:index + 2]
+    files = [a for a in args if not a.startswith('--')]
+    if len(files) != 1:
+        print(f"{RED}Error: expected one PDF file{NC}")
+        sys.exit(1)
+    pdf = Path(files[0])
+    if not pdf.exists():
+        print(f"{RED}✗ File not found: {pdf}{NC}")
+        sys.exit(1)
+    try:
+        dpi = float(options['--dpi'])
+        page, jobs, probe = int(options['--page']), int(options['--jobs']), int(options['--probe'])
+    except ValueError:
+        print(f"{RED}Error: --dpi, --page, --jobs and --probe take numbers{NC}")
+        sys.exit(1)
+    if probe < 1 or probe > TILE_SIZE:
+        print(f"{RED}Error: --probe must be between 1 and {TILE_SIZE}{NC}")
+        sys.exit(1)
+    for tool in ('pdftoppm', 'pdfinfo'):
+        if shutil.which(tool) is None:
+            print(f"{RED}✗ {tool} not found. Install poppler:{NC}")
+            print("   Ubuntu/Debian: sudo apt-get install poppler-utils")
+            print("   Fedora/RHEL: sudo dnf install poppler-utils")
+            sys.exit(1)
+
+    print(f"{BLUE}{'='*60}{NC}")
+    print(f"{BLUE}Deep-Zoom Tile Export{NC}")
+    print(f"{BLUE}{'='*60}{NC}\n")
+
+    output_dir = Path(options['--output-dir']) if options['--output-dir'] else pdf.parent
+    output_dir.mkdir(parents=True, exist_ok=True)
+    start = time.perf_counter()
+    try:
+        summary = build(pdf, output_dir, page, dpi, probe, jobs or None, '--force' in args)
+    except RuntimeError as e:
+        print(f"{RED}✗ {e}{NC}")
+        sys.exit(1)
+    elapsed = time.perf_counter() - start
+
+    pyramid = summary['pyramid']
+    print(f"{BLUE}  {pyramid.width} x {pyramid.height} px at {dpi:g} DPI, "
+          f"{pyramid.max_level + 1} levels, {summary['total']} tiles{NC}")
+    if summary['incremental']:
+        print(f"{GREEN}✓ {summary['rendered']} changed tiles rasterized, "
+              f"{summary['total'] - summary['rendered']} unchanged "
+              f"(probe {summary['probe_seconds']:.2f}s){NC}")
+    else:
+        print(f"{GREEN}✓ {summary['rendered']} tiles rasterized{NC}")
+    for (level, row, columns), error in summary['failed']:
+        print(f"{RED}✗ Level {level}, row {row}, columns {columns[0]}-{columns[-1]}: {error}{NC}")
+    print(f"{BLUE}  Viewer: {summary['viewer']}{NC}")
+    print(f"\n{GREEN}✓ Done in {elapsed:.2f}s{NC}\n")
+    if summary['failed']:
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()